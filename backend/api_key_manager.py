@@ -10,18 +10,88 @@ SECURITY NOTES:
 - Revocation is soft-delete via revoked_at timestamp
 - All operations are audited in audit log
 - Thread-safe with connection pooling
+
+PERFORMANCE NOTES:
+- Validated keys are cached in-process by hash for API_KEY_CACHE_TTL seconds,
+  so the common authenticated request is a dictionary lookup
+- Revocation evicts the key from this process immediately and, when Redis is
+  enabled, sets apikey:revoked:{key_hash}; cache hits check that marker (one
+  EXISTS) so every worker rejects the key at once. Without Redis, other
+  workers stop accepting it once their cache entry expires
+- last_used_at and audit rows are buffered (write-behind) and flushed in one
+  batch every API_KEY_USAGE_FLUSH_INTERVAL seconds and at exit
 """
 
+import atexit
 import logging
 import hashlib
 import secrets
+import threading
+import time
 from datetime import datetime, timedelta
 from typing import Optional, Dict, List, Tuple
-from database import get_db, execute_query, _raise_critical_error
+from psycopg2.extras import execute_values
+from config import config
+from database import get_db, get_db_session, execute_query, _raise_critical_error
 from utils.timezone_util import get_ist_timestamp, get_ist_now
 
+# Optional Redis import
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+    redis = None
+
 logger = logging.getLogger(__name__)
 
+# key_hash -> (metadata, expires_at monotonic seconds)
+_key_cache: Dict[str, Tuple[Dict, float]] = {}
+_key_cache_lock = threading.Lock()
+
+# Write-behind buffers: key_hash -> newest last_used_at, and pending audit rows
+_pending_last_used: Dict[str, str] = {}
+_pending_audit: List[Tuple[str, str, Optional[str]]] = []
+_pending_lock = threading.Lock()
+_flush_lock = threading.Lock()
+_flusher_lock = threading.Lock()
+_flusher: Optional[threading.Thread] = None
+_flusher_stop = threading.Event()
+
+# Shared revocation markers: None until first use, False if Redis is unavailable
+_revocation_redis = None
+_revocation_redis_lock = threading.Lock()
+
+
+def _get_revocation_redis():
+    """Redis client for revocation markers, or None (cache entries then only expire by TTL)"""
+    global _revocation_redis
+    if _revocation_redis is None:
+        with _revocation_redis_lock:
+            if _revocation_redis is None:
+                _revocation_redis = _connect_revocation_redis() or False
+    return _revocation_redis or None
+
+
+def _connect_revocation_redis():
+    if not REDIS_AVAILABLE or not config.REDIS_ENABLED:
+        logger.info("Redis not available, API key revocation reaches other workers by cache TTL")
+        return None
+    try:
+        client = redis.Redis(
+            host=config.REDIS_HOST,
+            port=config.REDIS_PORT,
+            db=config.REDIS_DB,
+            password=config.REDIS_PASSWORD if config.REDIS_PASSWORD else None,
+            socket_connect_timeout=2,
+            socket_timeout=2
+        )
+        client.ping()
+        return client
+    except Exception as e:
+        logger.warning(f"Redis unavailable for API key revocation, falling back to cache TTL: {e}")
+        return None
+
 
 class APIKeyManager:
     """Manages persistent API key storage and validation"""
@@ -144,6 +214,9 @@ class APIKeyManager:
         """
         Validate API key and return metadata if valid.
         
+        Served from the in-process cache when possible; last_used_at is
+        recorded in the write-behind buffer rather than updated inline.
+        
         Args:
             api_key: The API key to validate
             
@@ -156,34 +229,92 @@ class APIKeyManager:
         try:
             key_hash = APIKeyManager.hash_api_key(api_key)
             
-            # Query for active (non-revoked) key
-            query = """
-            SELECT id, name, permissions, created_at, last_used_at
-            FROM api_keys
-            WHERE key_hash = ? AND revoked_at IS NULL
-            """
-            result = execute_query(query, (key_hash,), fetch_one=True)
-            
-            if not result:
-                return None
-            
-            # Update last_used_at timestamp
-            update_query = "UPDATE api_keys SET last_used_at = ? WHERE key_hash = ?"
-            execute_query(update_query, (get_ist_timestamp(), key_hash))
+            cached = _key_cache.get(key_hash)
+            if cached and cached[1] > time.monotonic() and not APIKeyManager._revoked_elsewhere(key_hash):
+                metadata = cached[0]
+            else:
+                metadata = APIKeyManager._load_active_key(key_hash)
+                if metadata is None:
+                    APIKeyManager.invalidate_cache(key_hash)
+                    return None
+                with _key_cache_lock:
+                    _key_cache[key_hash] = (metadata, time.monotonic() + config.API_KEY_CACHE_TTL)
             
-            # Return metadata
-            return {
-                'id': result.get('id') if isinstance(result, dict) else result[0],
-                'name': result.get('name') if isinstance(result, dict) else result[1],
-                'permissions': (result.get('permissions') if isinstance(result, dict) else result[2]).split(','),
-                'created_at': result.get('created_at') if isinstance(result, dict) else result[3],
-                'last_used_at': result.get('last_used_at') if isinstance(result, dict) else result[4]
-            }
+            APIKeyManager._record_usage(key_hash)
+            return dict(metadata, permissions=list(metadata['permissions']))
             
         except Exception as e:
             logger.warning(f"Error validating API key: {e}")
             return None
     
+    @staticmethod
+    def _load_active_key(key_hash: str) -> Optional[Dict]:
+        """Fetch metadata for an active (non-revoked) key hash from the database"""
+        query = """
+        SELECT id, name, permissions, created_at, last_used_at
+        FROM api_keys
+        WHERE key_hash = ? AND revoked_at IS NULL
+        """
+        result = execute_query(query, (key_hash,), fetch_one=True)
+        
+        if not result:
+            return None
+        
+        return {
+            'id': result.get('id') if isinstance(result, dict) else result[0],
+            'name': result.get('name') if isinstance(result, dict) else result[1],
+            'permissions': (result.get('permissions') if isinstance(result, dict) else result[2]).split(','),
+            'created_at': result.get('created_at') if isinstance(result, dict) else result[3],
+            'last_used_at': result.get('last_used_at') if isinstance(result, dict) else result[4]
+        }
+    
+    @staticmethod
+    def _revocation_marker(key_hash: str) -> str:
+        return f"apikey:revoked:{key_hash}"
+    
+    @staticmethod
+    def _revoked_elsewhere(key_hash: str) -> bool:
+        """
+        Whether another worker has revoked key_hash (shared Redis marker).
+        
+        False without Redis or on a Redis error; the cache entry then
+        lives until its TTL, as before.
+        """
+        client = _get_revocation_redis()
+        if client is None:
+            return False
+        try:
+            return bool(client.exists(APIKeyManager._revocation_marker(key_hash)))
+        except Exception as e:
+            logger.warning(f"Failed to check API key revocation in Redis: {e}")
+            return False
+    
+    @staticmethod
+    def _publish_revocation(key_hash: str) -> None:
+        """Tell every worker to drop key_hash from its cache"""
+        client = _get_revocation_redis()
+        if client is None:
+            return
+        try:
+            # Outlives every cache entry filled before the revocation
+            client.set(APIKeyManager._revocation_marker(key_hash), 1, ex=config.API_KEY_CACHE_TTL + 5)
+        except Exception as e:
+            logger.warning(f"Failed to publish API key revocation to Redis: {e}")
+    
+    @staticmethod
+    def invalidate_cache(key_hash: Optional[str] = None) -> None:
+        """
+        Drop cached validation results.
+        
+        Args:
+            key_hash: Hash to evict, or None to clear the whole cache
+        """
+        with _key_cache_lock:
+            if key_hash is None:
+                _key_cache.clear()
+            else:
+                _key_cache.pop(key_hash, None)
+    
     @staticmethod
     def revoke_api_key(api_key: str) -> bool:
         """
@@ -211,6 +342,8 @@ class APIKeyManager:
             # Update revoked_at timestamp
             update_query = "UPDATE api_keys SET revoked_at = ? WHERE key_hash = ?"
             execute_query(update_query, (get_ist_timestamp(), key_hash))
+            APIKeyManager.invalidate_cache(key_hash)
+            APIKeyManager._publish_revocation(key_hash)
             
             # Audit log
             APIKeyManager._audit_log(
@@ -278,22 +411,93 @@ class APIKeyManager:
     @staticmethod
     def _audit_log(key_hash: str, action: str, details: str = None) -> None:
         """
-        Log audit event for API key operation.
+        Queue audit event for API key operation (written by flush_usage).
         
         Args:
             key_hash: Hash of the API key
             action: Action performed (created, revoked, validated, etc.)
             details: Additional details (no sensitive information)
         """
-        try:
-            query = """
-            INSERT INTO api_key_audit (key_hash, action, details)
-            VALUES (?, ?, ?)
-            """
-            execute_query(query, (key_hash, action, details))
-        except Exception as e:
-            logger.warning(f"Failed to write audit log: {e}")
-            # Don't raise - audit failure shouldn't break key operations
+        with _pending_lock:
+            _pending_audit.append((key_hash, action, details))
+        APIKeyManager._ensure_flusher()
+    
+    @staticmethod
+    def _record_usage(key_hash: str) -> None:
+        """Buffer last_used_at for key_hash; repeated uses collapse to the newest"""
+        with _pending_lock:
+            _pending_last_used[key_hash] = get_ist_timestamp()
+        APIKeyManager._ensure_flusher()
+    
+    @staticmethod
+    def _ensure_flusher() -> None:
+        """Start the background flush thread on first buffered write"""
+        global _flusher
+        if _flusher is not None and _flusher.is_alive():
+            return
+        with _flusher_lock:
+            if _flusher is not None and _flusher.is_alive():
+                return
+            _flusher_stop.clear()
+            _flusher = threading.Thread(
+                target=APIKeyManager._flush_loop,
+                daemon=True,
+                name="APIKeyUsageFlusher"
+            )
+            _flusher.start()
+    
+    @staticmethod
+    def _flush_loop() -> None:
+        while not _flusher_stop.wait(config.API_KEY_USAGE_FLUSH_INTERVAL):
+            APIKeyManager.flush_usage()
+    
+    @staticmethod
+    def flush_usage() -> Dict[str, int]:
+        """
+        Write buffered last_used_at values and audit rows in one transaction.
+        
+        On failure the rows are put back and retried on the next flush.
+        
+        Returns:
+            Dict with the number of 'last_used' and 'audit' rows written
+        """
+        with _flush_lock:
+            with _pending_lock:
+                last_used = dict(_pending_last_used)
+                audit = list(_pending_audit)
+                _pending_last_used.clear()
+                _pending_audit.clear()
+            
+            if not last_used and not audit:
+                return {'last_used': 0, 'audit': 0}
+            
+            try:
+                with get_db_session() as (conn, cursor):
+                    if last_used:
+                        execute_values(cursor, """
+                            UPDATE api_keys AS k
+                            SET last_used_at = GREATEST(k.last_used_at, v.last_used_at::timestamp)
+                            FROM (VALUES %s) AS v(key_hash, last_used_at)
+                            WHERE k.key_hash = v.key_hash
+                        """, list(last_used.items()))
+                    if audit:
+                        execute_values(cursor, """
+                            INSERT INTO api_key_audit (key_hash, action, details)
+                            VALUES %s
+                        """, audit)
+            except Exception as e:
+                logger.warning(f"Failed to flush API key usage ({len(last_used)} keys, {len(audit)} audit rows): {e}")
+                with _pending_lock:
+                    for key_hash, used_at in last_used.items():
+                        _pending_last_used.setdefault(key_hash, used_at)
+                    _pending_audit[:0] = audit
+                return {'last_used': 0, 'audit': 0}
+            
+            return {'last_used': len(last_used), 'audit': len(audit)}
+
+
+# Persist anything still buffered when the worker shuts down
+atexit.register(APIKeyManager.flush_usage)
 
 
 # Module initialization: Create master key if not exists
@@ -17,10 +17,11 @@ load_dotenv()
 from config import config
 
 # Import database and migrations
-from database import init_db, init_db_if_needed, close_db
+from database import init_db, init_db_if_needed, close_db, ensure_analysis_partitions
 from db_migrations import run_migrations
 from utils.logger import setup_logger
 from utils.api_utils import register_error_handlers
+from utils.serialization import FastJSONProvider
 
 # Import blueprints
 from routes.analysis import bp as analysis_bp
@@ -65,7 +66,7 @@ def create_app(config_object=None):
             DEBUG=config.DEBUG,
             TESTING=False,
             JSON_SORT_KEYS=False,
-            JSONIFY_PRETTYPRINT_REGULAR=True
+            JSON_PRETTY_PRINT=config.JSON_PRETTY_PRINT
         )
     
     # Ensure critical Flask defaults are set if not provided
@@ -73,8 +74,11 @@ def create_app(config_object=None):
         app.config['TESTING'] = False
     if 'JSON_SORT_KEYS' not in app.config:
         app.config['JSON_SORT_KEYS'] = False
-    if 'JSONIFY_PRETTYPRINT_REGULAR' not in app.config:
-        app.config['JSONIFY_PRETTYPRINT_REGULAR'] = True
+    if 'JSON_PRETTY_PRINT' not in app.config:
+        app.config['JSON_PRETTY_PRINT'] = False
+    
+    # Compact, numpy-aware JSON for every jsonify() response
+    app.json = FastJSONProvider(app)
     
     # Setup logging (idempotent, setup_logger handles deduplication)
     logger = setup_logger()
@@ -181,6 +185,8 @@ def create_app(config_object=None):
     # Run migrations on startup (idempotent, safe in multi-worker; log only once)
     try:
         run_migrations()
+        # Upcoming analysis_results partitions must exist before rows arrive for them
+        ensure_analysis_partitions()
         # Log only in main/non-worker process
         if os.environ.get('WERKZEUG_RUN_MAIN') == 'true' or not os.environ.get('GUNICORN_CMD_ARGS'):
             logger.info("[OK] Database migrations completed")
@@ -10,17 +10,25 @@ Features:
 - Cache key based on ticker + timeframe + indicator parameters
 - Automatic eviction of stale entries
 - Cache statistics for monitoring
+- Backtest result cache keyed by OHLCV fingerprint + strategy config
 """
 
+import copy
+import logging
+import os
+import re
 import threading
 import time
 import hashlib
 import json
+from pathlib import Path
 from typing import Any, Optional, Dict, Tuple
 from functools import wraps
 from collections import OrderedDict
 from config import config
 
+logger = logging.getLogger('trading_analyzer')
+
 
 class ThreadSafeLRUCache:
     """
@@ -238,12 +246,166 @@ class ThreadSafeLRUCache:
             }
 
 
+class BacktestResultCache:
+    """
+    LRU cache of complete backtest results, optionally mirrored to disk.
+    
+    Key: ticker + strategy/days slot + OHLCV fingerprint + strategy config hash.
+    When new bars arrive the fingerprint changes, the lookup misses, and the
+    fresh result replaces every older entry in the same slot, so stale
+    results are never served and never pile up.
+    
+    Disk tier (BACKTEST_CACHE_DIR): one JSON file per ticker/slot, written
+    atomically; survives restarts and is shared by gunicorn workers.
+    """
+    
+    def __init__(self, max_size: int = 256, default_ttl: int = 86400, cache_dir: Optional[str] = None):
+        self._memory = ThreadSafeLRUCache(max_size=max_size, default_ttl=default_ttl)
+        self.default_ttl = default_ttl
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self._lock = threading.Lock()
+        self._disk_hits = 0
+        self._disk_writes = 0
+        
+        if self.cache_dir:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+    
+    @staticmethod
+    def _slot(strategy_id: int, days: int) -> str:
+        return f"backtest_s{strategy_id}_d{days}"
+    
+    def _disk_path(self, ticker: str, slot: str) -> Path:
+        safe_ticker = re.sub(r'[^A-Za-z0-9._-]', '_', ticker.upper())
+        return self.cache_dir / f"{safe_ticker}__{slot}.json"
+    
+    def get(self, ticker: str, strategy_id: int, days: int,
+            fingerprint: str, config_hash: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached result, or None on miss"""
+        slot = self._slot(strategy_id, days)
+        value = self._memory.get(ticker, slot, fingerprint=fingerprint, config_hash=config_hash)
+        
+        if value is None and self.cache_dir:
+            value = self._read_disk(ticker, slot, fingerprint, config_hash)
+            if value is not None:
+                with self._lock:
+                    self._disk_hits += 1
+                self._memory.set(ticker, slot, value, fingerprint=fingerprint, config_hash=config_hash)
+        
+        # Callers decorate results (e.g. monte_carlo), never hand out the cached object
+        return copy.deepcopy(value) if value is not None else None
+    
+    def set(self, ticker: str, strategy_id: int, days: int,
+            fingerprint: str, config_hash: str, result: Dict[str, Any]):
+        """Store a result, replacing any entry computed from older bars"""
+        slot = self._slot(strategy_id, days)
+        value = copy.deepcopy(result)
+        self._memory.invalidate(ticker, slot)
+        self._memory.set(ticker, slot, value, fingerprint=fingerprint, config_hash=config_hash)
+        
+        if self.cache_dir:
+            self._write_disk(ticker, slot, fingerprint, config_hash, value)
+    
+    def _read_disk(self, ticker: str, slot: str, fingerprint: str, config_hash: str) -> Optional[Dict[str, Any]]:
+        path = self._disk_path(ticker, slot)
+        try:
+            if time.time() - path.stat().st_mtime > self.default_ttl:
+                return None
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        
+        if entry.get('fingerprint') != fingerprint or entry.get('config_hash') != config_hash:
+            return None
+        return entry.get('result')
+    
+    def _write_disk(self, ticker: str, slot: str, fingerprint: str, config_hash: str, result: Dict[str, Any]):
+        path = self._disk_path(ticker, slot)
+        tmp_path = path.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'fingerprint': fingerprint, 'config_hash': config_hash, 'result': result},
+                          f, default=_json_default)
+            os.replace(tmp_path, path)
+            with self._lock:
+                self._disk_writes += 1
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"[Cache] Failed to persist backtest result for {ticker}: {e}")
+            try:
+                tmp_path.unlink()
+            except OSError:
+                pass
+    
+    def invalidate(self, ticker: str):
+        """Drop every cached backtest for a ticker (memory and disk)"""
+        self._memory.invalidate(ticker)
+        if self.cache_dir:
+            safe_ticker = re.sub(r'[^A-Za-z0-9._-]', '_', ticker.upper())
+            for path in self.cache_dir.glob(f"{safe_ticker}__backtest_*.json"):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+    
+    def clear(self):
+        """Drop every cached backtest (memory and disk)"""
+        self._memory.clear()
+        if self.cache_dir:
+            for path in self.cache_dir.glob("*__backtest_*.json"):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+        with self._lock:
+            self._disk_hits = 0
+            self._disk_writes = 0
+    
+    def stats(self) -> Dict[str, Any]:
+        stats = self._memory.stats()
+        with self._lock:
+            stats['disk_enabled'] = self.cache_dir is not None
+            stats['disk_hits'] = self._disk_hits
+            stats['disk_writes'] = self._disk_writes
+        return stats
+
+
+def _json_default(obj):
+    """Serialize numpy scalars / timestamps found in backtest results"""
+    if hasattr(obj, 'item'):
+        return obj.item()
+    return str(obj)
+
+
+def ohlcv_fingerprint(df) -> str:
+    """
+    Content hash of an OHLCV frame (index + price/volume columns).
+    
+    Any new, removed or revised bar changes the fingerprint.
+    """
+    import pandas as pd
+    
+    columns = [c for c in ('open', 'high', 'low', 'close', 'volume') if c in df.columns]
+    row_hashes = pd.util.hash_pandas_object(df[columns], index=True).to_numpy()
+    return hashlib.sha256(row_hashes.tobytes()).hexdigest()
+
+
+def config_fingerprint(params: Dict[str, Any]) -> str:
+    """Stable hash of a strategy configuration dict"""
+    return hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
 # Global cache instance
 _indicator_cache = ThreadSafeLRUCache(
     max_size=config.CACHE_MAX_SIZE,
     default_ttl=config.CACHE_TTL
 ) if config.CACHE_ENABLED else None
 
+_backtest_cache = BacktestResultCache(
+    max_size=config.BACKTEST_CACHE_MAX_SIZE,
+    default_ttl=config.BACKTEST_CACHE_TTL,
+    cache_dir=config.BACKTEST_CACHE_DIR or None
+) if config.CACHE_ENABLED else None
+
 
 def cached_indicator(indicator_name: str, ttl: Optional[int] = None):
     """
@@ -315,10 +477,29 @@ def get_cache_stats() -> Dict[str, Any]:
     return {'enabled': False, 'message': 'Cache is disabled'}
 
 
+def get_backtest_cache() -> Optional[BacktestResultCache]:
+    """Get the global backtest result cache (None when caching is disabled)"""
+    return _backtest_cache
+
+
+def get_backtest_cache_stats() -> Dict[str, Any]:
+    """
+    Get backtest result cache statistics for monitoring.
+    
+    Returns:
+        dict: Cache statistics or disabled message
+    """
+    if _backtest_cache:
+        return _backtest_cache.stats()
+    return {'enabled': False, 'message': 'Cache is disabled'}
+
+
 def clear_cache():
     """Clear all cache entries"""
     if _indicator_cache:
         _indicator_cache.clear()
+    if _backtest_cache:
+        _backtest_cache.clear()
 
 
 def invalidate_ticker_cache(ticker: str, indicator: Optional[str] = None):
@@ -331,3 +512,5 @@ def invalidate_ticker_cache(ticker: str, indicator: Optional[str] = None):
     """
     if _indicator_cache:
         _indicator_cache.invalidate(ticker, indicator)
+    if _backtest_cache and indicator is None:
+        _backtest_cache.invalidate(ticker)
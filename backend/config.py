@@ -42,6 +42,12 @@ class Config:
     # Bcrypt hash of the password required for bulk/multi-stock analysis
     # Generate with: python -c "import bcrypt; print(bcrypt.hashpw(b'your-password', bcrypt.gensalt()).decode())"
     BULK_ANALYSIS_PASSWORD_HASH = os.getenv('BULK_ANALYSIS_PASSWORD_HASH', '')
+
+    # Validated API keys are cached per process; revocation in another worker
+    # takes effect after at most this many seconds
+    API_KEY_CACHE_TTL = int(os.getenv('API_KEY_CACHE_TTL', '60'))
+    # last_used_at / audit rows are buffered and written in one batch this often
+    API_KEY_USAGE_FLUSH_INTERVAL = int(os.getenv('API_KEY_USAGE_FLUSH_INTERVAL', '30'))
     
     # =============================================================================
     # DATABASE CONFIGURATION (PostgreSQL Only)
@@ -65,6 +71,22 @@ class Config:
     # PostgreSQL is now required - no SQLite fallback
     DATABASE_TYPE = 'postgres'
     
+    # analysis_results monthly partitions (created_at range)
+    ANALYSIS_PARTITION_MONTHS_AHEAD = int(os.getenv('ANALYSIS_PARTITION_MONTHS_AHEAD', '3'))
+    ANALYSIS_RETENTION_MONTHS = int(os.getenv('ANALYSIS_RETENTION_MONTHS', '0'))  # 0 = keep forever
+    # Detach expired partitions (keeps them as standalone tables for archiving) instead of dropping
+    ANALYSIS_PARTITION_DETACH_ONLY = os.getenv('ANALYSIS_PARTITION_DETACH_ONLY', 'True').lower() in ('true', '1', 'yes')
+    # Rows deleted per transaction by the keep-last-N retention pass
+    ANALYSIS_RETENTION_BATCH_SIZE = int(os.getenv('ANALYSIS_RETENTION_BATCH_SIZE', '5000'))
+    
+    # Background sessions (get_db_session) borrow from a per-process connection pool;
+    # 0 disables pooling and opens a connection per session
+    DB_POOL_MIN_CONNECTIONS = int(os.getenv('DB_POOL_MIN_CONNECTIONS', '1'))
+    DB_POOL_MAX_CONNECTIONS = int(os.getenv('DB_POOL_MAX_CONNECTIONS', '10'))
+    # Hot statements are PREPAREd once per pooled connection. Disable behind
+    # PgBouncer in transaction mode, where sessions are not sticky.
+    DB_PREPARED_STATEMENTS = os.getenv('DB_PREPARED_STATEMENTS', 'True').lower() in ('true', '1', 'yes')
+    
     # Legacy property for backward compatibility (always returns None now)
     @property
     def DB_PATH(self) -> str:
@@ -132,6 +154,13 @@ class Config:
     
     MAX_THREADS = int(os.getenv('MAX_THREADS', '10'))
     MAX_BULK_WORKERS = int(os.getenv('MAX_BULK_WORKERS', '5'))
+    MAX_BACKTEST_WORKERS = int(os.getenv('MAX_BACKTEST_WORKERS', '4'))
+    # Worker threads shared by all analysis/backtest jobs (global concurrency budget)
+    JOB_SCHEDULER_WORKERS = int(os.getenv('JOB_SCHEDULER_WORKERS', '4'))
+    # Analysis jobs with at most this many tickers run in the 'interactive' priority class
+    INTERACTIVE_JOB_MAX_TICKERS = int(os.getenv('INTERACTIVE_JOB_MAX_TICKERS', '5'))
+    # Active jobs older than this no longer block an identical request (stale lock guard)
+    JOB_DEDUP_WINDOW_SECONDS = int(os.getenv('JOB_DEDUP_WINDOW_SECONDS', '300'))
     
     # =============================================================================
     # CACHE CONFIGURATION
@@ -141,6 +170,14 @@ class Config:
     CACHE_TTL = int(os.getenv('CACHE_TTL', '3600'))  # 1 hour
     CACHE_MAX_SIZE = int(os.getenv('CACHE_MAX_SIZE', '1000'))
     
+    # Backtest results (keyed by OHLCV fingerprint, so new bars invalidate automatically)
+    BACKTEST_CACHE_MAX_SIZE = int(os.getenv('BACKTEST_CACHE_MAX_SIZE', '256'))
+    BACKTEST_CACHE_TTL = int(os.getenv('BACKTEST_CACHE_TTL', '86400'))  # 24 hours
+    BACKTEST_CACHE_DIR = os.getenv('BACKTEST_CACHE_DIR', '')  # Empty = memory only
+    
+    # Exact COUNT(*) totals for paginated result listings
+    RESULT_COUNT_CACHE_TTL = int(os.getenv('RESULT_COUNT_CACHE_TTL', '30'))  # seconds
+    
     # =============================================================================
     # RATE LIMITING CONFIGURATION
     # =============================================================================
@@ -148,6 +185,8 @@ class Config:
     RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'True').lower() in ('true', '1', 'yes')
     RATE_LIMIT_PER_MINUTE = int(os.getenv('RATE_LIMIT_PER_MINUTE', '60'))
     ANALYZE_RATE_LIMIT = int(os.getenv('ANALYZE_RATE_LIMIT', '10'))
+    # Per-API-key token buckets: 'auto' (Redis when available), 'redis' or 'memory'
+    RATE_LIMIT_BACKEND = os.getenv('RATE_LIMIT_BACKEND', 'auto').lower()
     
     # =============================================================================
     # MARKET DATA CONFIGURATION
@@ -157,6 +196,13 @@ class Config:
     USE_DEMO_DATA = os.getenv('USE_DEMO_DATA', 'True').lower() in ('true', '1', 'yes')
     YAHOO_TIMEOUT = int(os.getenv('YAHOO_TIMEOUT', '30'))
     
+    # Default freshness policy for /api/analysis/analyze and /analyze-all-stocks:
+    # 'recompute' analyzes every ticker, 'reuse_fresh' serves tickers already
+    # analyzed (same strategy and config) since the last market bar from analysis_results
+    ANALYSIS_FRESHNESS_POLICY = os.getenv('ANALYSIS_FRESHNESS_POLICY', 'recompute').lower()
+    # Bar length used to decide freshness while the NSE session is open
+    MARKET_BAR_MINUTES = int(os.getenv('MARKET_BAR_MINUTES', '15'))
+    
     # =============================================================================
     # LOGGING CONFIGURATION
     # =============================================================================
@@ -190,7 +236,24 @@ class Config:
     
     ENABLE_NUMBA = os.getenv('ENABLE_NUMBA', 'True').lower() in ('true', '1', 'yes')
     ENABLE_VECTORIZATION = os.getenv('ENABLE_VECTORIZATION', 'True').lower() in ('true', '1', 'yes')
-    
+
+    # JSON serializer for API responses and stored blobs: auto (orjson when
+    # installed), orjson or stdlib. Responses are compact unless pretty
+    # printing is enabled here or requested per call with ?pretty=1.
+    JSON_BACKEND = os.getenv('JSON_BACKEND', 'auto').lower()
+    JSON_PRETTY_PRINT = os.getenv('JSON_PRETTY_PRINT', 'False').lower() in ('true', '1', 'yes')
+
+    # Cached GET responses (progress, results, history, report, strategies).
+    # Entries are evicted on result inserts / job changes; the TTL bounds
+    # staleness for writes made by other workers when Redis is not used.
+    RESPONSE_CACHE_ENABLED = os.getenv('RESPONSE_CACHE_ENABLED', 'True').lower() in ('true', '1', 'yes')
+    RESPONSE_CACHE_BACKEND = os.getenv('RESPONSE_CACHE_BACKEND', 'auto').lower()  # auto, redis, memory
+    RESPONSE_CACHE_TTL = float(os.getenv('RESPONSE_CACHE_TTL', '30'))
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', '512'))
+
+    # Rows fetched per server-side cursor round trip by results exports
+    EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', '2000'))
+
     # =============================================================================
     # CLEANUP CONFIGURATION
     # =============================================================================
@@ -12,15 +12,23 @@ Usage:
 
 All SQL queries should use ? placeholders (SQLite style) and they will
 be automatically converted to %s (PostgreSQL style) by _convert_query_params().
+Hot-path statements are registered once with register_statement() and run as
+server-side prepared statements on pooled connections.
 """
 
 import logging
+import os
+import threading
 import time
+from contextlib import contextmanager
+from datetime import date
 from flask import g
 from config import config
 
 # PostgreSQL driver
 import psycopg2
+import psycopg2.extensions
+import psycopg2.pool
 from psycopg2.extras import RealDictCursor
 
 # Setup module logger
@@ -95,25 +103,212 @@ def get_db_connection():
     return psycopg2.connect(config.DATABASE_URL)
 
 
-def get_db_session():
-    """Get a thread-safe database session as context manager"""
-    from contextlib import contextmanager
+# =============================================================================
+# CONNECTION POOL
+# =============================================================================
+
+class StatementConnection(psycopg2.extensions.connection):
+    """Pooled connection that remembers which statements it has PREPAREd"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared_statements = set()
+
+
+_connection_pool = None
+_connection_pool_pid = None
+_connection_pool_lock = threading.Lock()
+
+
+def _get_connection_pool():
+    """
+    Per-process ThreadedConnectionPool, created on first use.
+    
+    A pool inherited across fork (gunicorn preload) shares sockets with the
+    parent, so a new pool is built whenever the PID changes.
+    
+    Returns:
+        ThreadedConnectionPool, or None when DB_POOL_MAX_CONNECTIONS is 0
+    """
+    global _connection_pool, _connection_pool_pid
+    
+    if config.DB_POOL_MAX_CONNECTIONS <= 0:
+        return None
+    pid = os.getpid()
+    if _connection_pool is not None and _connection_pool_pid == pid:
+        return _connection_pool
+    
+    with _connection_pool_lock:
+        if _connection_pool is None or _connection_pool_pid != pid:
+            _connection_pool = psycopg2.pool.ThreadedConnectionPool(
+                min(config.DB_POOL_MIN_CONNECTIONS, config.DB_POOL_MAX_CONNECTIONS),
+                config.DB_POOL_MAX_CONNECTIONS,
+                config.DATABASE_URL,
+                connection_factory=StatementConnection
+            )
+            _connection_pool_pid = pid
+            logger.info(f"Database connection pool created (max {config.DB_POOL_MAX_CONNECTIONS} connections)")
+    return _connection_pool
+
 
+def close_connection_pool():
+    """Close every pooled connection (process shutdown, tests)"""
+    global _connection_pool
+    
+    with _connection_pool_lock:
+        if _connection_pool is not None and _connection_pool_pid == os.getpid():
+            _connection_pool.closeall()
+        _connection_pool = None
+
+
+def _acquire_connection():
+    """
+    Borrow a pooled connection, or open a dedicated one when pooling is
+    disabled or every pooled connection is in use.
+    
+    Returns:
+        (conn, pool): pool is None for dedicated connections
+    """
+    pool = _get_connection_pool()
+    if pool is not None:
+        try:
+            conn = pool.getconn()
+            if not conn.closed:
+                return conn, pool
+            pool.putconn(conn, close=True)
+        except psycopg2.pool.PoolError:
+            logger.debug("Connection pool exhausted; opening a dedicated connection")
+    return get_db_connection(), None
+
+
+def _release_connection(conn, pool, broken=False):
+    """Return a connection to its pool (or close it if dedicated/broken)"""
+    if pool is None:
+        conn.close()
+        return
+    try:
+        pool.putconn(conn, close=broken or bool(conn.closed))
+    except psycopg2.pool.PoolError:
+        # Pool was replaced/closed while the connection was out
+        conn.close()
+
+
+def get_db_session():
+    """
+    Get a thread-safe database session as context manager.
+    
+    Yields (conn, cursor) from the connection pool; commits on success,
+    rolls back on error, then returns the connection to the pool.
+    """
     @contextmanager
     def session():
-        conn = get_db_connection()
+        conn, pool = _acquire_connection()
+        broken = False
         try:
             yield conn, conn.cursor()
             conn.commit()
         except Exception as e:
             logger.warning(f"Transaction rolled back due to error: {e}")
-            conn.rollback()
+            broken = isinstance(e, (psycopg2.OperationalError, psycopg2.InterfaceError))
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                broken = True
             raise
         finally:
-            conn.close()
+            _release_connection(conn, pool, broken)
     return session()
 
 
+# =============================================================================
+# PREPARED STATEMENTS
+# =============================================================================
+# Hot statements are registered once at import time. Placeholder conversion
+# happens at registration; each pooled connection PREPAREs a statement the
+# first time it runs it and EXECUTEs it by name afterwards, so Postgres parses
+# and plans it once per connection instead of once per call.
+
+_statements = {}
+
+
+def _number_placeholders(query):
+    """Rewrite ? placeholders as $1..$n; returns (query, n)"""
+    parts = query.split('?')
+    numbered = parts[0] + ''.join(f'${i}{part}' for i, part in enumerate(parts[1:], 1))
+    return numbered, len(parts) - 1
+
+
+class PreparedStatement:
+    """A named hot-path statement; see register_statement()"""
+
+    def __init__(self, name, query):
+        self.name = name
+        self.query = query
+        self.prepare_sql, self.param_count = _number_placeholders(query)
+        self.prepare_sql = f'PREPARE {name} AS {self.prepare_sql}'
+        # Plain parameterized form for connections outside the pool
+        self.fallback_sql, _ = _convert_query_params(query, ())
+        args_sql = ', '.join(['%s'] * self.param_count)
+        self.execute_sql = f'EXECUTE {name} ({args_sql})' if self.param_count else f'EXECUTE {name}'
+
+    def execute(self, cursor, args=()):
+        """
+        Run the statement on `cursor`.
+        
+        PREPAREs it on the cursor's connection first if that connection has
+        not seen it yet. Connections that do not track prepared statements
+        (dedicated connections, DB_PREPARED_STATEMENTS=False) run the plain
+        parameterized query instead.
+        """
+        if len(args) != self.param_count:
+            raise ValueError(f"Statement {self.name} takes {self.param_count} parameters, got {len(args)}")
+        
+        prepared = getattr(getattr(cursor, 'connection', None), 'prepared_statements', None)
+        if prepared is None or not config.DB_PREPARED_STATEMENTS:
+            cursor.execute(self.fallback_sql, args)
+            return
+        
+        if self.name not in prepared:
+            cursor.execute(self.prepare_sql)
+            prepared.add(self.name)
+        try:
+            cursor.execute(self.execute_sql, args)
+        except psycopg2.Error as e:
+            # invalid_sql_statement_name: the server no longer has it
+            # (e.g. DISCARD ALL); PREPARE again on the next session
+            if getattr(e, 'pgcode', None) == '26000':
+                prepared.discard(self.name)
+            raise
+
+
+def register_statement(name, query):
+    """
+    Register a hot-path statement under a unique name.
+    
+    Args:
+        name: SQL identifier used for PREPARE/EXECUTE
+        query: SQL with ? placeholders
+        
+    Returns:
+        PreparedStatement
+    """
+    if not name.isidentifier():
+        raise ValueError(f"Invalid statement name: {name!r}")
+    existing = _statements.get(name)
+    if existing is not None:
+        if existing.query != query:
+            raise ValueError(f"Statement {name} is already registered with a different query")
+        return existing
+    statement = PreparedStatement(name, query)
+    _statements[name] = statement
+    return statement
+
+
+def get_statement(name):
+    """Look up a registered statement by name (KeyError if unknown)"""
+    return _statements[name]
+
+
 def execute_query(query, args=(), fetch_one=False):
     """
     Execute a database query with automatic parameter conversion.
@@ -271,6 +466,41 @@ def _raise_critical_error(error):
     raise error
 
 
+# analysis_results indexes (also recreated when the table is converted to partitions)
+ANALYSIS_RESULTS_INDEXES = [
+    'CREATE INDEX IF NOT EXISTS idx_ticker ON analysis_results(ticker)',
+    'CREATE INDEX IF NOT EXISTS idx_created_at ON analysis_results(created_at)',
+    'CREATE INDEX IF NOT EXISTS idx_ticker_created ON analysis_results(ticker, created_at DESC)',
+    'CREATE INDEX IF NOT EXISTS idx_symbol ON analysis_results(symbol)',
+    'CREATE INDEX IF NOT EXISTS idx_yahoo_symbol ON analysis_results(yahoo_symbol)',
+    'CREATE INDEX IF NOT EXISTS idx_status ON analysis_results(status)',
+    'CREATE INDEX IF NOT EXISTS idx_analysis_source ON analysis_results(analysis_source)',
+    'CREATE INDEX IF NOT EXISTS idx_symbol_created ON analysis_results(symbol, created_at DESC)',
+    'CREATE INDEX IF NOT EXISTS idx_source_symbol ON analysis_results(analysis_source, symbol)',
+    'CREATE INDEX IF NOT EXISTS idx_updated_at ON analysis_results(updated_at)',
+    'CREATE INDEX IF NOT EXISTS idx_strategy_id ON analysis_results(strategy_id)',
+    # Keyset pagination: (created_at, id) ordering for listings and per-symbol history.
+    # The listing and symbol-history indexes INCLUDE every column those endpoints
+    # return, so pages are served by index-only scans.
+    'CREATE INDEX IF NOT EXISTS idx_results_listing ON analysis_results(created_at DESC, id DESC) '
+    'INCLUDE (ticker, symbol, name, yahoo_symbol, score, verdict, entry, stop_loss, target) '
+    'WHERE verdict IS NOT NULL',
+    'CREATE INDEX IF NOT EXISTS idx_results_symbol_history ON analysis_results(LOWER(symbol), created_at DESC, id DESC) '
+    'INCLUDE (ticker, symbol, verdict, score, entry, stop_loss, target)',
+    'CREATE INDEX IF NOT EXISTS idx_results_ticker_keyset ON analysis_results(LOWER(ticker), created_at DESC, id DESC)',
+    # Job progress / job results lookups; most rows carry no job_id
+    'CREATE INDEX IF NOT EXISTS idx_results_job ON analysis_results(job_id, created_at DESC) '
+    'INCLUDE (ticker) WHERE job_id IS NOT NULL',
+]
+
+# Watchlist lookups: case-insensitive duplicate checks and per-collection listings
+WATCHLIST_INDEXES = [
+    'CREATE INDEX IF NOT EXISTS idx_watchlist_ticker_lower ON watchlist(LOWER(ticker)) INCLUDE (collection_id)',
+    'CREATE INDEX IF NOT EXISTS idx_watchlist_collection_created ON watchlist(collection_id, created_at DESC)',
+    'CREATE INDEX IF NOT EXISTS idx_collections_name_lower ON watchlist_collections(LOWER(name))',
+]
+
+
 def _init_postgres_db():
     """Initialize PostgreSQL database schema"""
     conn = None
@@ -323,27 +553,28 @@ def _init_postgres_db():
                 target REAL,
                 position_size INTEGER DEFAULT 0,
                 risk_reward_ratio REAL DEFAULT 0,
-                analysis_config TEXT,
+                analysis_config JSONB,
                 entry_method TEXT,
                 data_source TEXT,
                 is_demo_data BOOLEAN DEFAULT FALSE,
-                raw_data TEXT,
+                raw_data JSONB,
                 status TEXT,
                 error_message TEXT,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 updated_at TIMESTAMP,
                 analysis_source TEXT,
-                strategy_id INTEGER DEFAULT 1
+                strategy_id INTEGER DEFAULT 1,
+                job_id TEXT
             )
         ''')
+        cursor.execute("ALTER TABLE analysis_results ADD COLUMN IF NOT EXISTS job_id TEXT")
         
         # Add columns if they don't exist (migration for existing databases)
         try:
             cursor.execute("ALTER TABLE analysis_results ADD COLUMN IF NOT EXISTS position_size INTEGER DEFAULT 0")
             cursor.execute("ALTER TABLE analysis_results ADD COLUMN IF NOT EXISTS risk_reward_ratio REAL DEFAULT 0")
-            cursor.execute("ALTER TABLE analysis_results ADD COLUMN IF NOT EXISTS analysis_config TEXT")
+            cursor.execute("ALTER TABLE analysis_results ADD COLUMN IF NOT EXISTS analysis_config JSONB")
             cursor.execute("ALTER TABLE analysis_results ADD COLUMN IF NOT EXISTS strategy_id INTEGER DEFAULT 1")
-            cursor.execute("ALTER TABLE analysis_jobs ADD COLUMN IF NOT EXISTS strategy_id INTEGER DEFAULT 1")
             # Add collection_id to watchlist for multiple watchlists support
             cursor.execute("ALTER TABLE watchlist ADD COLUMN IF NOT EXISTS collection_id INTEGER REFERENCES watchlist_collections(id) ON DELETE SET NULL")
             # Drop ALL old unique constraints on ticker only, add new one for (ticker, collection_id)
@@ -371,7 +602,50 @@ def _init_postgres_db():
                 updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 started_at TIMESTAMP,
                 completed_at TIMESTAMP,
-                strategy_id INTEGER DEFAULT 1
+                strategy_id INTEGER DEFAULT 1,
+                job_type TEXT DEFAULT 'analysis',
+                symbols_digest TEXT,
+                reused INTEGER DEFAULT 0
+            )
+        ''')
+        cursor.execute("ALTER TABLE analysis_jobs ADD COLUMN IF NOT EXISTS strategy_id INTEGER DEFAULT 1")
+        cursor.execute("ALTER TABLE analysis_jobs ADD COLUMN IF NOT EXISTS job_type TEXT DEFAULT 'analysis'")
+        cursor.execute("ALTER TABLE analysis_jobs ADD COLUMN IF NOT EXISTS symbols_digest TEXT")
+        cursor.execute("ALTER TABLE analysis_jobs ADD COLUMN IF NOT EXISTS reused INTEGER DEFAULT 0")
+        
+        # Backtest job results (one row per ticker/strategy, written as each finishes)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS backtest_results (
+                id SERIAL PRIMARY KEY,
+                job_id TEXT NOT NULL,
+                ticker TEXT NOT NULL,
+                strategy_id INTEGER NOT NULL,
+                days INTEGER NOT NULL,
+                result TEXT,
+                error TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        # Latest result per (symbol, strategy), upserted alongside every analysis_results insert
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS latest_analysis (
+                symbol TEXT NOT NULL,
+                strategy_id INTEGER NOT NULL DEFAULT 1,
+                result_id INTEGER NOT NULL,
+                ticker TEXT,
+                name TEXT,
+                yahoo_symbol TEXT,
+                score REAL,
+                verdict TEXT,
+                entry REAL,
+                stop_loss REAL,
+                target REAL,
+                status TEXT,
+                analysis_source TEXT,
+                created_at TIMESTAMP,
+                updated_at TIMESTAMP,
+                PRIMARY KEY (symbol, strategy_id)
             )
         ''')
         
@@ -398,18 +672,16 @@ def _init_postgres_db():
         ''')
         
         # Create indexes for faster queries on unified analysis_results table
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_ticker ON analysis_results(ticker)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_created_at ON analysis_results(created_at)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_ticker_created ON analysis_results(ticker, created_at DESC)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_symbol ON analysis_results(symbol)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_yahoo_symbol ON analysis_results(yahoo_symbol)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_status ON analysis_results(status)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_analysis_source ON analysis_results(analysis_source)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_symbol_created ON analysis_results(symbol, created_at DESC)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_source_symbol ON analysis_results(analysis_source, symbol)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_updated_at ON analysis_results(updated_at)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_strategy_id ON analysis_results(strategy_id)')
+        for index_sql in ANALYSIS_RESULTS_INDEXES + WATCHLIST_INDEXES:
+            cursor.execute(index_sql)
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_jobs_strategy_id ON analysis_jobs(strategy_id)')
+        cursor.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_active_digest ON analysis_jobs(symbols_digest)
+            WHERE status IN ('queued', 'processing')
+        """)
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_backtest_results_job ON backtest_results(job_id, ticker)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_latest_keyset ON latest_analysis(created_at DESC, result_id DESC)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_latest_verdict_score ON latest_analysis(verdict, score DESC)')
         
         conn.commit()
         logger.debug("PostgreSQL database schema initialized successfully")
@@ -434,6 +706,83 @@ def _init_postgres_db():
                 logger.warning(f"Failed to close PostgreSQL connection: {close_error}")
 
 
+# Ranks every row within its stock, newest first; rows ranked past keep_last are expired.
+# {where} / {partition} are fixed fragments chosen by cleanup_old_analyses, never user input.
+_RETENTION_RANKED_SQL = '''
+    SELECT id, created_at FROM (
+        SELECT id, created_at,
+               ROW_NUMBER() OVER ({partition}ORDER BY created_at DESC, id DESC) AS rn
+        FROM analysis_results
+        {where}
+    ) ranked
+    WHERE rn > %s
+'''
+
+
+def run_analysis_retention(keep_last=10, batch_size=None):
+    """
+    Set-based retention pass over all stocks: keep the newest `keep_last`
+    analyses per COALESCE(symbol, ticker) and delete the rest.
+    
+    Expired (id, created_at) keys are computed once with ROW_NUMBER() into a
+    temp table, then deleted in batches of `batch_size`, committing after each
+    batch so locks are held only briefly. Rows inserted meanwhile only push
+    older rows further past the cut-off, so the snapshot never deletes a row
+    that should be kept.
+    
+    Returns:
+        dict: {'deleted': int, 'batches': int, 'keep_last': int, 'elapsed_seconds': float}
+    """
+    if batch_size is None:
+        batch_size = config.ANALYSIS_RETENTION_BATCH_SIZE
+    started = time.perf_counter()
+    deleted = 0
+    batches = 0
+    
+    with get_db_session() as (conn, cursor):
+        cursor.execute('DROP TABLE IF EXISTS analysis_retention')
+        cursor.execute(
+            'CREATE TEMP TABLE analysis_retention AS ' + _RETENTION_RANKED_SQL.format(
+                partition='PARTITION BY COALESCE(symbol, ticker) ', where=''
+            ),
+            (keep_last,)
+        )
+        expired = cursor.rowcount
+        conn.commit()
+        
+        while expired > 0:
+            cursor.execute('''
+                WITH batch AS (
+                    DELETE FROM analysis_retention
+                    WHERE ctid IN (SELECT ctid FROM analysis_retention LIMIT %s)
+                    RETURNING id, created_at
+                )
+                DELETE FROM analysis_results a
+                USING batch b
+                WHERE a.id = b.id AND a.created_at = b.created_at
+            ''', (batch_size,))
+            conn.commit()
+            deleted += cursor.rowcount
+            batches += 1
+            expired -= batch_size
+        
+        cursor.execute('DROP TABLE IF EXISTS analysis_retention')
+    
+    if deleted:
+        from utils.infrastructure.response_cache import invalidate_responses
+        invalidate_responses('results')
+    
+    stats = {
+        'deleted': deleted,
+        'batches': batches,
+        'keep_last': keep_last,
+        'elapsed_seconds': round(time.perf_counter() - started, 3)
+    }
+    logger.info(f"Analysis retention: deleted {deleted} rows in {batches} batch(es), "
+                f"{stats['elapsed_seconds']}s (keep_last={keep_last})")
+    return stats
+
+
 def cleanup_old_analyses(ticker=None, symbol=None, keep_last=10):
     """
     Keep only the last N analyses per stock using thread-safe connections.
@@ -444,56 +793,28 @@ def cleanup_old_analyses(ticker=None, symbol=None, keep_last=10):
         symbol: Specific symbol to cleanup (e.g., "RELIANCE" - preferred method)
         keep_last: Number of analyses to keep per stock (default 10)
         
+    With neither ticker nor symbol, runs the batched run_analysis_retention() pass.
+        
     Returns:
         int: Number of records deleted
     """
+    if not ticker and not symbol:
+        return run_analysis_retention(keep_last=keep_last)['deleted']
+    
+    # Single stock: one ranked delete (ticker = watchlist-style, symbol = bulk-style)
+    column = 'ticker' if ticker else 'symbol'
+    ranked = _RETENTION_RANKED_SQL.format(partition='', where=f'WHERE {column} = %s')
     with get_db_session() as (conn, cursor):
-        if ticker:
-            # Cleanup by ticker (watchlist-style, backward compatible)
-            query = '''
-                DELETE FROM analysis_results
-                WHERE ticker = %s
-                AND id NOT IN (
-                    SELECT id FROM analysis_results
-                    WHERE ticker = %s
-                    ORDER BY created_at DESC
-                    LIMIT %s
-                )
-            '''
-            cursor.execute(query, (ticker, ticker, keep_last))
-        elif symbol:
-            # Cleanup by symbol (bulk analysis style, preferred for unified table)
-            query = '''
-                DELETE FROM analysis_results
-                WHERE symbol = %s
-                AND id NOT IN (
-                    SELECT id FROM analysis_results
-                    WHERE symbol = %s
-                    ORDER BY created_at DESC
-                    LIMIT %s
-                )
-            '''
-            cursor.execute(query, (symbol, symbol, keep_last))
-        else:
-            # Cleanup all symbols (works for both ticker and symbol)
-            cursor.execute('SELECT DISTINCT COALESCE(symbol, ticker) FROM analysis_results')
-            identifiers = [row[0] for row in cursor.fetchall()]
-            
-            for identifier in identifiers:
-                delete_query = '''
-                    DELETE FROM analysis_results
-                    WHERE (symbol = %s OR ticker = %s)
-                    AND id NOT IN (
-                        SELECT id FROM analysis_results
-                        WHERE (symbol = %s OR ticker = %s)
-                        ORDER BY created_at DESC
-                        LIMIT %s
-                    )
-                '''
-                cursor.execute(delete_query, (identifier, identifier, identifier, identifier, keep_last))
-        
+        cursor.execute(f'''
+            DELETE FROM analysis_results a
+            USING ({ranked}) expired
+            WHERE a.id = expired.id AND a.created_at = expired.created_at
+        ''', (ticker or symbol, keep_last))
         deleted = cursor.rowcount
     
+    if deleted:
+        from utils.infrastructure.response_cache import invalidate_responses
+        invalidate_responses('results')
     return deleted
 
 
@@ -508,6 +829,198 @@ def cleanup_all_stocks_analysis(symbol=None, keep_last=10):
     return cleanup_old_analyses(symbol=symbol, keep_last=keep_last)
 
 
+# =============================================================================
+# analysis_results MONTHLY PARTITIONS
+# =============================================================================
+# analysis_results is range-partitioned by month on created_at (migration v12).
+# Partitions are named analysis_results_pYYYYMM; analysis_results_default
+# catches rows outside every monthly range. Retention works by detaching or
+# dropping whole partitions, which is a catalog update rather than a row scan.
+
+ANALYSIS_PARTITION_PREFIX = 'analysis_results_p'
+ANALYSIS_DEFAULT_PARTITION = 'analysis_results_default'
+
+
+def _month_start(value):
+    """First day of the month containing value (date or datetime)"""
+    return date(value.year, value.month, 1)
+
+
+def _add_months(month, months):
+    """Shift a first-of-month date by a number of months"""
+    index = month.year * 12 + (month.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def analysis_partition_name(month):
+    """Partition table name for the month containing `month`"""
+    return f"{ANALYSIS_PARTITION_PREFIX}{month.year:04d}{month.month:02d}"
+
+
+def parse_analysis_partition_month(name):
+    """Month covered by a partition name, or None if it is not a monthly partition"""
+    suffix = name[len(ANALYSIS_PARTITION_PREFIX):] if name.startswith(ANALYSIS_PARTITION_PREFIX) else ''
+    if len(suffix) != 6 or not suffix.isdigit():
+        return None
+    year, month = int(suffix[:4]), int(suffix[4:])
+    return date(year, month, 1) if 1 <= month <= 12 else None
+
+
+def expired_analysis_partitions(names, retention_months, today=None):
+    """
+    Monthly partitions whose whole range is older than the retention window.
+    
+    The current month plus the previous (retention_months - 1) months are kept.
+    """
+    if retention_months <= 0:
+        return []
+    cutoff = _add_months(_month_start(today or date.today()), -(retention_months - 1))
+    expired = []
+    for name in names:
+        month = parse_analysis_partition_month(name)
+        if month is not None and month < cutoff:
+            expired.append(name)
+    return sorted(expired)
+
+
+def analysis_results_is_partitioned(cursor):
+    """True if analysis_results is a declaratively partitioned table"""
+    cursor.execute('''
+        SELECT 1 FROM pg_partitioned_table
+        WHERE partrelid = to_regclass('analysis_results')
+    ''')
+    return cursor.fetchone() is not None
+
+
+def list_analysis_partitions(cursor):
+    """Names of partitions currently attached to analysis_results"""
+    cursor.execute('''
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass('analysis_results')
+        ORDER BY c.relname
+    ''')
+    return [row[0] for row in cursor.fetchall()]
+
+
+def create_analysis_partition(cursor, month):
+    """
+    Create the monthly partition covering `month` if it does not exist.
+    
+    The per-day uniqueness of (ticker, date, strategy_id) cannot be declared on
+    the partitioned parent (it is an expression), but a date always falls in a
+    single partition, so a unique index on every partition is equivalent.
+    
+    Returns:
+        bool: True if the partition was created
+    """
+    month = _month_start(month)
+    name = analysis_partition_name(month)
+    cursor.execute('SELECT to_regclass(%s)', (name,))
+    if cursor.fetchone()[0] is not None:
+        return False
+    
+    cursor.execute(
+        f'CREATE TABLE {name} PARTITION OF analysis_results FOR VALUES FROM (%s) TO (%s)',
+        (month, _add_months(month, 1))
+    )
+    cursor.execute(
+        f'CREATE UNIQUE INDEX IF NOT EXISTS {name}_ticker_date_strategy '
+        f'ON {name}(ticker, CAST(created_at AS DATE), strategy_id)'
+    )
+    return True
+
+
+def create_default_analysis_partition(cursor):
+    """Create the catch-all partition for rows outside every monthly range"""
+    cursor.execute(f'CREATE TABLE IF NOT EXISTS {ANALYSIS_DEFAULT_PARTITION} PARTITION OF analysis_results DEFAULT')
+    cursor.execute(
+        f'CREATE UNIQUE INDEX IF NOT EXISTS {ANALYSIS_DEFAULT_PARTITION}_ticker_date_strategy '
+        f'ON {ANALYSIS_DEFAULT_PARTITION}(ticker, CAST(created_at AS DATE), strategy_id)'
+    )
+
+
+def ensure_analysis_partitions(months_ahead=None):
+    """
+    Create partitions for the current month and the next `months_ahead` months.
+    
+    Returns:
+        list: Names of partitions created (empty if analysis_results is not partitioned)
+    """
+    if months_ahead is None:
+        months_ahead = config.ANALYSIS_PARTITION_MONTHS_AHEAD
+    
+    created = []
+    with get_db_session() as (conn, cursor):
+        if not analysis_results_is_partitioned(cursor):
+            return created
+        current = _month_start(date.today())
+        for offset in range(months_ahead + 1):
+            month = _add_months(current, offset)
+            # Savepoint so one failure (e.g. matching rows already in the
+            # default partition) does not abort the other months
+            cursor.execute('SAVEPOINT create_partition')
+            try:
+                if create_analysis_partition(cursor, month):
+                    created.append(analysis_partition_name(month))
+            except psycopg2.Error as e:
+                cursor.execute('ROLLBACK TO SAVEPOINT create_partition')
+                logger.warning(f"Could not create partition {analysis_partition_name(month)}: {e}")
+    
+    if created:
+        logger.info(f"Created analysis_results partitions: {', '.join(created)}")
+    return created
+
+
+def drop_expired_analysis_partitions(retention_months=None, detach_only=None):
+    """
+    Detach (or drop) monthly partitions older than the retention window.
+    
+    Args:
+        retention_months: Months of history to keep (0 disables retention)
+        detach_only: Detach into standalone tables instead of dropping them
+        
+    Returns:
+        list: Names of partitions detached or dropped
+    """
+    if retention_months is None:
+        retention_months = config.ANALYSIS_RETENTION_MONTHS
+    if detach_only is None:
+        detach_only = config.ANALYSIS_PARTITION_DETACH_ONLY
+    if retention_months <= 0:
+        return []
+    
+    with get_db_session() as (conn, cursor):
+        if not analysis_results_is_partitioned(cursor):
+            return []
+        expired = expired_analysis_partitions(list_analysis_partitions(cursor), retention_months)
+        for name in expired:
+            if detach_only:
+                cursor.execute(f'ALTER TABLE analysis_results DETACH PARTITION {name}')
+            else:
+                cursor.execute(f'DROP TABLE {name}')
+    
+    if expired:
+        action = 'Detached' if detach_only else 'Dropped'
+        logger.info(f"{action} expired analysis_results partitions: {', '.join(expired)}")
+    return expired
+
+
+def manage_analysis_partitions():
+    """
+    Partition maintenance for the scheduler: pre-create upcoming months, then
+    apply retention.
+    
+    Returns:
+        dict: {'created': [...], 'expired': [...]}
+    """
+    return {
+        'created': ensure_analysis_partitions(),
+        'expired': drop_expired_analysis_partitions()
+    }
+
+
 def init_db_if_needed():
     """
     Safe database initialization: idempotent and gunicorn-safe.
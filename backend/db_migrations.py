@@ -13,7 +13,7 @@ from config import config
 
 logger = logging.getLogger(__name__)
 
-CURRENT_SCHEMA_VERSION = 8
+CURRENT_SCHEMA_VERSION = 16
 
 
 def get_migration_conn():
@@ -579,6 +579,291 @@ def migration_v8(conn):
         return False
 
 
+def migration_v9(conn):
+    """
+    Migration V9: Asynchronous backtest jobs
+    
+    - analysis_jobs.job_type distinguishes 'analysis' from 'backtest' jobs
+      (existing rows default to 'analysis')
+    - backtest_results stores one row per ticker/strategy of a backtest job
+    """
+    migration_sql = '''
+    ALTER TABLE analysis_jobs ADD COLUMN IF NOT EXISTS job_type TEXT DEFAULT 'analysis';
+    
+    CREATE TABLE IF NOT EXISTS backtest_results (
+        id SERIAL PRIMARY KEY,
+        job_id TEXT NOT NULL,
+        ticker TEXT NOT NULL,
+        strategy_id INTEGER NOT NULL,
+        days INTEGER NOT NULL,
+        result TEXT,
+        error TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    
+    CREATE INDEX IF NOT EXISTS idx_backtest_results_job ON backtest_results(job_id, ticker)
+    '''
+    return apply_migration(conn, 9, "Add job_type and backtest_results for async backtest jobs", migration_sql)
+
+
+def migration_v10(conn):
+    """
+    Migration V10: Keyset pagination indexes
+    
+    Listings page on (created_at, id) instead of OFFSET, so each page is an
+    index range scan regardless of how deep the client has paged.
+    """
+    migration_sql = '''
+    CREATE INDEX IF NOT EXISTS idx_results_keyset ON analysis_results(created_at DESC, id DESC) WHERE verdict IS NOT NULL;
+    
+    CREATE INDEX IF NOT EXISTS idx_results_symbol_keyset ON analysis_results(LOWER(symbol), created_at DESC, id DESC);
+    
+    CREATE INDEX IF NOT EXISTS idx_results_ticker_keyset ON analysis_results(LOWER(ticker), created_at DESC, id DESC)
+    '''
+    return apply_migration(conn, 10, "Add keyset pagination indexes on analysis_results", migration_sql)
+
+
+def migration_v11(conn):
+    """
+    Migration V11: latest_analysis table
+    
+    One row per (symbol, strategy_id) pointing at the newest non-failed
+    analysis_results row, so dashboards scale with the stock universe rather
+    than with the full analysis history. Backfilled from existing history.
+    """
+    migration_sql = '''
+    CREATE TABLE IF NOT EXISTS latest_analysis (
+        symbol TEXT NOT NULL,
+        strategy_id INTEGER NOT NULL DEFAULT 1,
+        result_id INTEGER NOT NULL,
+        ticker TEXT,
+        name TEXT,
+        yahoo_symbol TEXT,
+        score REAL,
+        verdict TEXT,
+        entry REAL,
+        stop_loss REAL,
+        target REAL,
+        status TEXT,
+        analysis_source TEXT,
+        created_at TIMESTAMP,
+        updated_at TIMESTAMP,
+        PRIMARY KEY (symbol, strategy_id)
+    );
+    
+    INSERT INTO latest_analysis
+        (symbol, strategy_id, result_id, ticker, name, yahoo_symbol, score, verdict,
+         entry, stop_loss, target, status, analysis_source, created_at, updated_at)
+    SELECT DISTINCT ON (symbol, COALESCE(strategy_id, 1))
+        symbol, COALESCE(strategy_id, 1), id, ticker, name, yahoo_symbol, score, verdict,
+        entry, stop_loss, target, status, analysis_source, created_at, updated_at
+    FROM analysis_results
+    WHERE symbol IS NOT NULL AND status IS DISTINCT FROM 'failed'
+    ORDER BY symbol, COALESCE(strategy_id, 1), created_at DESC, id DESC
+    ON CONFLICT (symbol, strategy_id) DO NOTHING;
+    
+    CREATE INDEX IF NOT EXISTS idx_latest_keyset ON latest_analysis(created_at DESC, result_id DESC);
+    
+    CREATE INDEX IF NOT EXISTS idx_latest_verdict_score ON latest_analysis(verdict, score DESC)
+    '''
+    return apply_migration(conn, 11, "Add latest_analysis table (latest result per symbol/strategy)", migration_sql)
+
+
+def migration_v12(conn):
+    """
+    Migration V12: Partition analysis_results by month on created_at
+    
+    - Existing rows are copied into a new RANGE-partitioned table with one
+      partition per month of history, plus the next few months and a DEFAULT
+      partition for anything outside those ranges
+    - Primary key becomes (id, created_at): PostgreSQL requires the partition
+      key in every unique constraint. The id sequence is kept, so ids stay unique
+    - The per-day (ticker, date, strategy_id) unique index is recreated on each
+      partition (see database.create_analysis_partition)
+    
+    Skipped if analysis_results is already partitioned.
+    """
+    from database import (
+        ANALYSIS_RESULTS_INDEXES, analysis_results_is_partitioned,
+        create_analysis_partition, create_default_analysis_partition, _add_months, _month_start
+    )
+    from datetime import date
+    
+    cursor = conn.cursor()
+    try:
+        if analysis_results_is_partitioned(cursor):
+            logger.info("  analysis_results is already partitioned")
+            return apply_migration(conn, 12, "Partition analysis_results by month", "")
+        
+        # Partition key must be NOT NULL for the monthly ranges to be meaningful
+        logger.info("    Backfilling NULL created_at values...")
+        cursor.execute('''
+            UPDATE analysis_results
+            SET created_at = COALESCE(updated_at, CURRENT_TIMESTAMP)
+            WHERE created_at IS NULL
+        ''')
+        
+        cursor.execute("SELECT pg_get_serial_sequence('analysis_results', 'id')")
+        id_sequence = cursor.fetchone()[0]
+        cursor.execute('SELECT MIN(created_at) FROM analysis_results')
+        oldest = cursor.fetchone()[0]
+        
+        logger.info("    Creating partitioned table...")
+        cursor.execute('ALTER TABLE analysis_results RENAME TO analysis_results_unpartitioned')
+        if id_sequence:
+            # Detach the sequence so dropping the old table does not drop it
+            cursor.execute(f'ALTER SEQUENCE {id_sequence} OWNED BY NONE')
+        cursor.execute('''
+            CREATE TABLE analysis_results (LIKE analysis_results_unpartitioned INCLUDING DEFAULTS)
+            PARTITION BY RANGE (created_at)
+        ''')
+        cursor.execute('ALTER TABLE analysis_results ALTER COLUMN created_at SET NOT NULL')
+        cursor.execute('ALTER TABLE analysis_results ADD PRIMARY KEY (id, created_at)')
+        
+        first_month = _month_start(oldest or date.today())
+        last_month = _add_months(_month_start(date.today()), config.ANALYSIS_PARTITION_MONTHS_AHEAD)
+        month = first_month
+        created = 0
+        while month <= last_month:
+            create_analysis_partition(cursor, month)
+            month = _add_months(month, 1)
+            created += 1
+        create_default_analysis_partition(cursor)
+        logger.info(f"      ✓ Created {created} monthly partitions + default")
+        
+        logger.info("    Copying existing rows...")
+        cursor.execute('INSERT INTO analysis_results SELECT * FROM analysis_results_unpartitioned')
+        logger.info(f"      ✓ Copied {cursor.rowcount} rows")
+        
+        if id_sequence:
+            cursor.execute(f'ALTER SEQUENCE {id_sequence} OWNED BY analysis_results.id')
+        cursor.execute('DROP TABLE analysis_results_unpartitioned')
+        
+        # Index names are free again once the old table is gone
+        for index_sql in ANALYSIS_RESULTS_INDEXES:
+            cursor.execute(index_sql)
+        
+        conn.commit()
+        logger.info("  ✓ analysis_results partitioned")
+        
+        return apply_migration(conn, 12, "Partition analysis_results by month", "")
+        
+    except Exception as e:
+        logger.error(f"  ✗ v12 failed: {e}", exc_info=True)
+        conn.rollback()
+        return False
+
+
+def migration_v13(conn):
+    """
+    Migration V13: JSONB raw_data / analysis_config
+    
+    - Converts both TEXT columns to JSONB in place (values that are not valid
+      JSON, e.g. legacy NaN tokens or Python reprs, become NULL instead of
+      failing the migration)
+    - GIN (jsonb_path_ops) index on raw_data for indicator filters such as
+      raw_data @> '[{"name": "RSI", "vote": 1}]'
+    """
+    cursor = conn.cursor()
+    try:
+        # Session-local helper: invalid JSON -> NULL
+        cursor.execute('''
+            CREATE OR REPLACE FUNCTION pg_temp.try_jsonb(value TEXT) RETURNS JSONB AS $$
+            BEGIN
+                RETURN value::jsonb;
+            EXCEPTION WHEN others THEN
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql IMMUTABLE
+        ''')
+        
+        for column in ('raw_data', 'analysis_config'):
+            cursor.execute('''
+                SELECT data_type FROM information_schema.columns
+                WHERE table_name = 'analysis_results' AND column_name = %s
+            ''', (column,))
+            row = cursor.fetchone()
+            if row and row[0] == 'text':
+                logger.info(f"    Converting analysis_results.{column} to JSONB...")
+                cursor.execute(f'''
+                    ALTER TABLE analysis_results
+                    ALTER COLUMN {column} TYPE JSONB USING pg_temp.try_jsonb({column})
+                ''')
+                logger.info(f"      ✓ {column} converted")
+        
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_results_raw_data_gin
+            ON analysis_results USING GIN (raw_data jsonb_path_ops)
+        ''')
+        
+        conn.commit()
+        return apply_migration(conn, 13, "Store raw_data/analysis_config as JSONB", "")
+        
+    except Exception as e:
+        logger.error(f"  ✗ v13 failed: {e}", exc_info=True)
+        conn.rollback()
+        return False
+
+
+def migration_v14(conn):
+    """
+    Migration V14: Symbol-set digest on analysis_jobs
+    
+    - symbols_digest: SHA-256 of the normalized symbol set, strategy and job type
+      (see utils.db_utils.symbol_set_digest), written at job creation
+    - Partial unique index over active statuses, so duplicate detection is one
+      index lookup and concurrent identical requests are rejected by the
+      database. Existing rows keep a NULL digest and never conflict.
+    """
+    migration_sql = '''
+    ALTER TABLE analysis_jobs ADD COLUMN IF NOT EXISTS symbols_digest TEXT;
+    
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_active_digest ON analysis_jobs(symbols_digest)
+    WHERE status IN ('queued', 'processing')
+    '''
+    return apply_migration(conn, 14, "Add symbols_digest and active-job unique index", migration_sql)
+
+
+def migration_v15(conn):
+    """
+    Migration V15: Expression, partial and covering indexes for hot lookups
+    
+    - Results listing and per-symbol history indexes gain INCLUDE columns so
+      pages are index-only scans; they replace idx_results_keyset and
+      idx_results_symbol_keyset (same keys, no payload)
+    - Partial (job_id, created_at) index for job progress/results lookups
+    - LOWER(ticker) / LOWER(name) expression indexes for case-insensitive
+      watchlist and collection duplicate checks, and (collection_id, created_at)
+      for per-collection listings
+    
+    The statements are the ones init_db uses (database.ANALYSIS_RESULTS_INDEXES,
+    database.WATCHLIST_INDEXES), so fresh and migrated databases match.
+    """
+    from database import ANALYSIS_RESULTS_INDEXES, WATCHLIST_INDEXES
+    
+    migration_sql = ';\n'.join(
+        ['ALTER TABLE analysis_results ADD COLUMN IF NOT EXISTS job_id TEXT']
+        + ANALYSIS_RESULTS_INDEXES
+        + WATCHLIST_INDEXES
+        + ['DROP INDEX IF EXISTS idx_results_keyset', 'DROP INDEX IF EXISTS idx_results_symbol_keyset']
+    )
+    return apply_migration(conn, 15, "Add covering, partial and expression indexes for hot queries", migration_sql)
+
+
+def migration_v16(conn):
+    """
+    Migration V16: Reused-result count on analysis_jobs
+    
+    - reused: tickers served from fresh analysis_results rows instead of being
+      recomputed (freshness_policy='reuse_fresh'); they are counted in
+      completed/successful from job creation
+    """
+    migration_sql = '''
+    ALTER TABLE analysis_jobs ADD COLUMN IF NOT EXISTS reused INTEGER DEFAULT 0
+    '''
+    return apply_migration(conn, 16, "Add reused count to analysis_jobs", migration_sql)
+
+
 def run_migrations():
     """
     Main entry point: Apply all pending migrations in sequence.
@@ -618,6 +903,14 @@ def run_migrations():
             (6, migration_v6),
             (7, migration_v7),
             (8, migration_v8),
+            (9, migration_v9),
+            (10, migration_v10),
+            (11, migration_v11),
+            (12, migration_v12),
+            (13, migration_v13),
+            (14, migration_v14),
+            (15, migration_v15),
+            (16, migration_v16),
         ]
         
         pending_count = sum(1 for v, _ in migrations if v > current_version)
@@ -14,7 +14,12 @@ import logging
 # Basic settings
 bind = f"0.0.0.0:{os.getenv('PORT', 5000)}"
 workers = max(2, multiprocessing.cpu_count())
-worker_class = "sync"  # Use sync worker (safer for SQLite/Postgres)
+# gthread workers keep heartbeating while a request streams, so long
+# streamed responses (e.g. /api/backtest/portfolio) are not killed at `timeout`
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+if threads < 1:
+    raise ValueError(f"GUNICORN_THREADS must be at least 1, got {threads}")
 worker_connections = 1000
 max_requests = 1000
 max_requests_jitter = 100
@@ -5,6 +5,7 @@ Celery Tasks for Background Stock Analysis
 from celery_config import celery_app
 from utils.compute_score import analyze_ticker
 from database import get_db_connection, cleanup_old_analyses, _convert_query_params
+from utils.db_utils import jsonb_dumps
 from datetime import datetime
 import logging
 import json
@@ -155,7 +156,7 @@ def analyze_stocks_batch(self, job_id, tickers, indicators=None, capital=100000,
                         result.get('entry_method', 'UNKNOWN'),
                         result.get('data_source', 'unknown'),
                         result.get('is_demo_data', False),
-                        str(result.get('indicators', [])),
+                        jsonb_dumps(result.get('indicators', [])),
                         datetime.now().isoformat()
                     )
                     
@@ -8,17 +8,22 @@ This module provides async job processing with:
 - Thread-local database connections
 - Optional Redis-based job state (distributed-ready)
 - Fallback to in-memory tracking (single server)
+- Jobs run on the shared, priority-aware job scheduler
+  (utils.infrastructure.job_scheduler) instead of a thread each
 """
 
 import threading
 import logging
 import time
-import json
 import numpy as np
 from datetime import datetime
-from typing import List, Dict, Any, Optional
-from database import get_db_connection, get_db_session, close_thread_connection, _convert_query_params
+from typing import Any, Callable, Dict, List, Optional
+from database import get_db_connection, get_db_session, close_thread_connection, _convert_query_params, register_statement
 from utils.compute_score import analyze_ticker
+from utils.db_utils import ResultInsertion, jsonb_dumps
+from utils.serialization import dumps as json_dumps
+from utils.infrastructure.response_cache import invalidate_responses
+from utils.infrastructure.job_scheduler import ScheduledJob, classify_priority, get_job_scheduler
 from utils.timezone_util import get_ist_timestamp, get_ist_now
 from models.job_state import get_job_state_manager
 
@@ -26,21 +31,6 @@ logger = logging.getLogger('thread_tasks')
 logger.setLevel(logging.DEBUG)
 
 
-# Custom JSON encoder to handle numpy types
-class NumpyEncoder(json.JSONEncoder):
-    """Handle numpy data types in JSON serialization"""
-    def default(self, o):
-        if isinstance(o, np.integer):
-            return int(o)
-        elif isinstance(o, np.floating):
-            return float(o)
-        elif isinstance(o, np.ndarray):
-            return o.tolist()
-        elif isinstance(o, np.bool_):
-            return bool(o)
-        return super().default(o)
-
-
 def convert_numpy_types(value):
     """Convert numpy types to Python native types for database insertion"""
     if isinstance(value, np.integer):
@@ -56,312 +46,471 @@ def convert_numpy_types(value):
     return value
 
 
-# Global dictionary to track running threads (thread management only)
-# Job state is now managed by JobStateManager (Redis or in-memory)
-job_threads: Dict[str, threading.Thread] = {}
-
 # Get job state manager (Redis or in-memory)
 job_state = get_job_state_manager()
 
 
-def analyze_stocks_batch(job_id: str, tickers: List[str], capital: float, indicators: Optional[List[str]] = None, use_demo_data: bool = True, analysis_config: Optional[Dict[str, Any]] = None, strategy_id: int = 1):
+# Only a still-queued job is started, so a cancel issued while it waited in the scheduler sticks
+# (no row comes back for a job that is no longer queued)
+JOB_MARK_PROCESSING = register_statement('job_mark_processing', '''
+    UPDATE analysis_jobs
+    SET status = 'processing', started_at = ?
+    WHERE job_id = ? AND status = 'queued'
+    RETURNING status
+''')
+
+# Runs after every ticker. RETURNING status lets a cancel issued through the DB stop the loop.
+JOB_PROGRESS_UPDATE = register_statement('job_progress_update', '''
+    UPDATE analysis_jobs
+    SET progress = ?, completed = ?, successful = ?, errors = ?
+    WHERE job_id = ?
+    RETURNING status
+''')
+
+
+def _update_job_row(job_id: str, statement, params: tuple, attempts: int = 3, label: str = 'update'):
     """
-    Background task to analyze multiple stocks.
-    Runs in separate thread with thread-safe database connections.
+    Run a registered UPDATE against analysis_jobs with retry/backoff.
     
-    CRITICAL FIX (ISSUE_010):
-    Uses thread-local database connections to prevent SQLite thread-safety violations.
-    Each thread gets its own connection, which is properly closed when done.
+    Statements ending in RETURNING yield the first column of the returned row
+    (e.g. the job's current status), or False if no row matched; other
+    statements yield True. Returns None on failure.
+    """
+    for attempt in range(attempts):
+        try:
+            with get_db_session() as (conn, cursor):
+                statement.execute(cursor, params)
+                row = cursor.fetchone() if 'RETURNING' in statement.query.upper() else None
+            invalidate_responses('jobs')
+            if 'RETURNING' in statement.query.upper():
+                return row[0] if row else False
+            return True
+        except Exception as update_error:
+            logger.warning(f"[RETRY] Failed to {label} for {job_id} (attempt {attempt + 1}/{attempts}): {update_error}")
+            if attempt < attempts - 1:
+                time.sleep(0.5 * (attempt + 1))  # Backoff: 0.5s, 1.0s
+            else:
+                logger.error(f"✗ Failed to {label} for {job_id} after {attempts} attempts")
+    return None
+
+
+class TickerBatch(ScheduledJob):
+    """
+    Shared lifecycle for per-ticker background jobs tracked in analysis_jobs.
     
-    Args:
-        job_id: Unique job identifier
-        tickers: List of stock ticker symbols
-        capital: Trading capital amount
-        indicators: Optional list of specific indicators to use
-        use_demo_data: Whether to use demo data for testing
-        analysis_config: Optional dict with additional config (risk_percent, position_size_limit, etc.)
-        strategy_id: Strategy ID (1=Balanced, 2=Trend, 3=Mean Reversion, 4=Momentum)
+    Handles everything except the per-ticker work:
+    - queued -> processing transition (with retry)
+    - JobStateManager (Redis/memory) progress mirror
+    - cancellation, via the job state flag, the scheduler or a 'cancelled' status set in the DB
+    - per-ticker progress/errors persisted after every ticker
+    - completed/cancelled/failed finalization
+    
+    Submitted to the job scheduler, tickers of one job may run on several
+    workers at once; counters and progress writes are serialized per job.
     """
-    # Merge config with defaults
-    config = analysis_config or {}
-    effective_capital = config.get('capital', capital) or capital
-    effective_demo = config.get('use_demo_data', use_demo_data)
     
-    try:
-        logger.info("=" * 60)
-        logger.info(f"THREAD TASK STARTED - Job ID: {job_id}")
-        logger.info(f"Total stocks to analyze: {len(tickers)}")
-        logger.info(f"Tickers: {tickers}")
-        logger.info(f"Capital: {effective_capital}")
-        logger.info(f"Indicators: {indicators if indicators else 'default'}")
-        logger.info(f"Demo mode: {effective_demo}")
-        logger.info(f"Strategy ID: {strategy_id}")
-        if config:
-            logger.info(f"Additional config: risk_percent={config.get('risk_percent')}, position_limit={config.get('position_size_limit')}, rr_ratio={config.get('risk_reward_ratio')}")
-        logger.info("=" * 60)
+    def __init__(self, job_id: str, tickers: List[str], process_ticker: Callable[[str], Any], label: str = 'ANALYSIS', reused: int = 0, priority: str = 'watchlist'):
+        """
+        Args:
+            job_id: Unique job identifier (row must exist in analysis_jobs)
+            tickers: Items to process, in order
+            process_ticker: callable(ticker) -> truthy on success; raise to record an error
+            label: Log label for the job type
+            reused: Items already satisfied from stored results; counted as
+                    completed and successful ahead of `tickers`
+            priority: Scheduler priority class
+        """
+        super().__init__(job_id, enumerate(tickers, reused + 1), priority)
+        self.process_ticker = process_ticker
+        self.label = label
+        self.reused = reused
+        self.total = reused + len(tickers)
+        self.completed = reused
+        self.successful = reused
+        self.errors: List[Dict[str, str]] = []
+        self.cancelled = False
+        self.skipped = False
+        self._lock = threading.Lock()
+    
+    def start(self) -> None:
+        # ✅ FIX #11: Retry status update with backoff
+        db_status = _update_job_row(
+            self.job_id,
+            JOB_MARK_PROCESSING,
+            (get_ist_timestamp(), self.job_id),
+            label="update status to 'processing'"
+        )
         
-        # ✅ FIX #11: Add retry logic for status update with exponential backoff
-        max_retries = 3
-        status_updated = False
-        for attempt in range(max_retries):
-            try:
-                with get_db_session() as (conn, cursor):
-                    # Need to convert query params for PostgreSQL compatibility
-                    # PostgreSQL only - _convert_query_params already imported at top
-                    query = '''
-                        UPDATE analysis_jobs 
-                        SET status = 'processing', started_at = ?
-                        WHERE job_id = ?
-                    '''
-                    query, params = _convert_query_params(query, (get_ist_timestamp(), job_id))
-                    cursor.execute(query, params)
-                status_updated = True
-                logger.info(f"✓ Job {job_id} status updated to 'processing'")
-                break
-            except Exception as update_error:
-                logger.warning(f"[RETRY] Failed to update status for {job_id} (attempt {attempt + 1}/{max_retries}): {update_error}")
-                if attempt < max_retries - 1:
-                    time.sleep(0.5 * (attempt + 1))  # Exponential backoff: 0.5s, 1.0s
-                else:
-                    logger.error(f"✗ FAILED to update job {job_id} to processing after {max_retries} attempts")
+        if db_status is False:
+            # Cancelled (or otherwise settled) while it waited in the scheduler:
+            # the row is already final, so run nothing and leave it untouched
+            logger.warning(f"Job {self.job_id} is no longer queued; skipping it")
+            self.cancelled = self.skipped = True
+            return
         
-        if not status_updated:
-            logger.warning(f"⚠️  Job {job_id}: Proceeding despite status update failure (will rely on memory state)")
+        status_updated = db_status is not None
+        # Keep a cancellation requested before the job state existed
+        self.cancelled = self.cancelled or job_state.is_cancelled(self.job_id)
         
-        total = len(tickers)
-        completed = 0
-        successful = 0
-        errors = []
+        if status_updated:
+            logger.info(f"✓ Job {self.job_id} status updated to 'processing'")
+        else:
+            logger.warning(f"⚠️  Job {self.job_id}: Proceeding despite status update failure (will rely on memory state)")
         
         # Create job state in Redis/memory
-        job_state.create_job(job_id, {
+        job_state.create_job(self.job_id, {
             'status': 'processing' if status_updated else 'queued',
-            'total': total,
-            'completed': 0,
-            'successful': 0,
-            'cancelled': False,
+            'total': self.total,
+            'completed': self.completed,
+            'successful': self.successful,
+            'reused': self.reused,
+            'priority': self.priority,
+            'cancelled': self.cancelled,
             'started_at': get_ist_timestamp()
         })
+    
+    def should_stop(self) -> bool:
+        # Check if job was cancelled (cheap flag lookup in Redis/memory)
+        if not self.cancelled and job_state.is_cancelled(self.job_id):
+            self.cancelled = True
+        return self.cancelled
+    
+    def cancel(self) -> None:
+        self.cancelled = True
+    
+    def run_item(self, item) -> None:
+        idx, ticker = item
+        error = None
+        success = False
+        try:
+            logger.info(f"START {self.label.lower()} {ticker} ({idx}/{self.total})")
+            if self.process_ticker(ticker):
+                success = True
+            else:
+                error = {'ticker': ticker, 'error': 'No result returned'}
+        except Exception as e:
+            error = {'ticker': ticker, 'error': str(e)}
+            logger.error(f"? {ticker} ERROR - {str(e)}", exc_info=True)
         
-        # Process each stock
-        for idx, ticker in enumerate(tickers, 1):
-            # Check if job was cancelled (check Redis/memory)
-            current_job = job_state.get_job(job_id)
-            if current_job and current_job.get('cancelled'):
-                logger.warning(f"Job {job_id}: CANCELLED by user at {completed}/{total}")
-                with get_db_session() as (conn, cursor):
-                    # PostgreSQL only - _convert_query_params already imported at top
-                    query = '''
-                        UPDATE analysis_jobs 
-                        SET status = 'cancelled', completed_at = ?
-                        WHERE job_id = ?
-                    '''
-                    query, params = _convert_query_params(query, (get_ist_timestamp(), job_id))
-                    cursor.execute(query, params)
-                job_state.update_job(job_id, {'status': 'cancelled'})
-                break
+        with self._lock:
+            self.completed += 1
+            self.successful += success
+            if error:
+                self.errors.append(error)
+            completed, successful, errors = self.completed, self.successful, list(self.errors)
+            progress = int((completed / self.total) * 100)
             
-            try:
-                logger.info(f"START analyzing {ticker} ({idx}/{total})")
-                
-                # Analyze the stock with config and strategy
-                result = analyze_ticker(
-                    ticker, 
-                    indicator_list=indicators, 
-                    capital=effective_capital, 
-                    use_demo_data=effective_demo,
-                    analysis_config=config,
-                    strategy_id=strategy_id
-                )
-                
-                if result:
-                    # Store analysis result using thread-safe connection
-                    # UNIFIED TABLE: Now includes symbol, name, yahoo_symbol, status, analysis_source
-                    raw_data = json.dumps(result.get('indicators', []), cls=NumpyEncoder)
-                    
-                    # Extract symbol (remove exchange suffix like .NS, .BO)
-                    if '.' in ticker:
-                        symbol = ticker.rsplit('.', 1)[0]
-                    else:
-                        symbol = ticker
-                    
-                    # ✅ Always INSERT new record to keep full history
-                    insert_success = False
-                    for insert_attempt in range(3):
-                        try:
-                            with get_db_session() as (conn, cursor):
-                                # Serialize config for storage
-                                config_json = json.dumps(config) if config else None
-                                
-                                query = '''
-                                    INSERT INTO analysis_results 
-                                    (ticker, symbol, name, yahoo_symbol, score, verdict, entry, stop_loss, target, 
-                                     position_size, risk_reward_ratio, analysis_config, strategy_id,
-                                     entry_method, data_source, is_demo_data, raw_data, status, 
-                                     created_at, updated_at, analysis_source)
-                                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                                '''
-                                query, params = _convert_query_params(query, (
-                                    ticker,
-                                    symbol,
-                                    None,  # name not available from watchlist analysis
-                                    ticker,  # yahoo_symbol same as ticker
-                                    float(convert_numpy_types(result.get('score', 0)) or 0),
-                                    result.get('verdict', 'Neutral'),
-                                    float(convert_numpy_types(result.get('entry')) or 0),
-                                    float(convert_numpy_types(result.get('stop')) or 0),
-                                    float(convert_numpy_types(result.get('target')) or 0),
-                                    int(convert_numpy_types(result.get('position_size', 0)) or 0),
-                                    float(convert_numpy_types(result.get('risk_reward_ratio', 0)) or 0),
-                                    config_json,
-                                    strategy_id,
-                                    result.get('entry_method', 'Market Order'),
-                                    result.get('data_source', 'real'),
-                                    bool(result.get('is_demo_data', False)),
-                                    raw_data,
-                                    'completed',
-                                    get_ist_timestamp(),
-                                    get_ist_timestamp(),
-                                    'watchlist'
-                                ))
-                                cursor.execute(query, params)
-                            insert_success = True
-                            break
-                        except Exception as insert_error:
-                            logger.warning(f"[RETRY] Failed to insert result for {ticker} (attempt {insert_attempt + 1}/3): {insert_error}")
-                            if insert_attempt < 2:
-                                time.sleep(0.3 * (insert_attempt + 1))
-                            else:
-                                logger.error(f"✗ Failed to store result for {ticker} after 3 attempts: {insert_error}")
-                                errors.append({'ticker': ticker, 'error': f"DB insert failed: {str(insert_error)}"})
-                    
-                    if insert_success:
-                        successful += 1
-                        
-                        # Log status - check if success flag exists
-                        if result.get('success'):
-                            logger.info(f"✓ {ticker} COMPLETED - Score: {result.get('score')}, Verdict: {result.get('verdict')}")
-                        else:
-                            # Still log as completed even if validation failed - we still have analysis data
-                            error_msg = result.get('error', 'Trade validation failed')
-                            if result.get('trade_issues'):
-                                error_msg = f"Validation: {', '.join(result.get('trade_issues', []))}"
-                            logger.warning(f"✓ {ticker} ANALYZED (Validation failed) - Score: {result.get('score')}, Reason: {error_msg}")
-                else:
-                    error_msg = 'No result returned from analyzer'
-                    errors.append({'ticker': ticker, 'error': error_msg})
-                    logger.error(f"✗ {ticker} FAILED - {error_msg}")
-                
-            except Exception as e:
-                error_msg = str(e)
-                errors.append({'ticker': ticker, 'error': error_msg})
-                logger.error(f"? {ticker} ERROR - {error_msg}", exc_info=True)
-            
-            completed += 1
-            progress = int((completed / total) * 100)
-            
-            # ✅ FIX #12b: Add retry logic for progress updates with backoff
-            progress_updated = False
-            for progress_attempt in range(3):
-                try:
-                    with get_db_session() as (conn, cursor):
-                        # PostgreSQL only - _convert_query_params already imported at top
-                        query = '''
-                            UPDATE analysis_jobs 
-                            SET progress = ?, completed = ?, successful = ?, errors = ?
-                            WHERE job_id = ?
-                        '''
-                        query, params = _convert_query_params(query, (progress, completed, successful, json.dumps(errors, cls=NumpyEncoder), job_id))
-                        cursor.execute(query, params)
-                    progress_updated = True
-                    break
-                except Exception as progress_error:
-                    logger.warning(f"[RETRY] Failed to update progress for {job_id} (attempt {progress_attempt + 1}/3): {progress_error}")
-                    if progress_attempt < 2:
-                        time.sleep(0.3 * (progress_attempt + 1))
-                    else:
-                        logger.error(f"✗ Failed to update progress for {job_id} after 3 attempts")
+            # ✅ FIX #12b: Retry progress updates with backoff.
+            db_status = _update_job_row(
+                self.job_id,
+                JOB_PROGRESS_UPDATE,
+                (progress, completed, successful, json_dumps(errors), self.job_id),
+                label='update progress'
+            )
             
             # Update job state (Redis/memory) - always succeeds since it's in-process
-            job_state.update_job(job_id, {
+            job_state.update_job(self.job_id, {
                 'completed': completed,
                 'successful': successful,
                 'progress': progress,
                 'errors': errors,
-                'db_updated': progress_updated
+                'db_updated': bool(db_status)
             })
-            
-            # Log progress
-            if total == 1 or completed % 10 == 0 or completed == total:
-                logger.info(f"Progress: {completed}/{total} ({progress}%) | Successful: {successful} | Errors: {len(errors)}")
+        
+        # Log progress
+        if self.total == 1 or completed % 10 == 0 or completed == self.total:
+            logger.info(f"Progress: {completed}/{self.total} ({progress}%) | Successful: {successful} | Errors: {len(errors)}")
+        
+        if db_status == 'cancelled' and completed < self.total:
+            self.cancelled = True
+    
+    def finish(self) -> None:
+        if self.skipped:
+            return
+        if self.cancelled:
+            logger.warning(f"Job {self.job_id}: CANCELLED by user at {self.completed}/{self.total}")
         
         # Mark as completed
-        current_job = job_state.get_job(job_id)
-        final_status = 'cancelled' if (current_job and current_job.get('cancelled')) else 'completed'
+        final_status = 'cancelled' if self.cancelled else 'completed'
         
         with get_db_session() as (conn, cursor):
             # PostgreSQL only - _convert_query_params already imported at top
             query = '''
-                UPDATE analysis_jobs 
+                UPDATE analysis_jobs
                 SET status = ?, completed_at = ?, errors = ?
                 WHERE job_id = ?
             '''
-            query, params = _convert_query_params(query, (final_status, datetime.now().isoformat(), json.dumps(errors, cls=NumpyEncoder), job_id))
+            query, params = _convert_query_params(query, (final_status, datetime.now().isoformat(), json_dumps(self.errors), self.job_id))
             cursor.execute(query, params)
+        invalidate_responses('jobs')
         
         # Update job state
-        job_state.update_job(job_id, {
-            'status': final_status,
-            'completed_at': datetime.now().isoformat()
-        })
+        final_state = {'status': final_status, 'completed_at': datetime.now().isoformat()}
+        if self.cancelled:
+            final_state['cancelled'] = True
+        job_state.update_job(self.job_id, final_state)
         
         logger.info("=" * 60)
-        logger.info(f"JOB {job_id} FINISHED")
+        logger.info(f"{self.label} JOB {self.job_id} FINISHED")
         logger.info(f"Status: {final_status}")
-        logger.info(f"Completed: {completed}/{total}")
-        logger.info(f"Successful: {successful}")
-        logger.info(f"Errors: {len(errors)}")
+        logger.info(f"Completed: {self.completed}/{self.total}")
+        if self.reused:
+            logger.info(f"Reused: {self.reused} | Recomputed: {self.completed - self.reused}")
+        logger.info(f"Successful: {self.successful}")
+        logger.info(f"Errors: {len(self.errors)}")
         logger.info("=" * 60)
-        
-    except Exception as e:
-        logger.error(f"FATAL ERROR in job {job_id}: {e}", exc_info=True)
+    
+    def fail(self, error: Exception) -> None:
+        logger.error(f"FATAL ERROR in job {self.job_id}: {error}", exc_info=error)
         try:
             with get_db_session() as (conn, cursor):
                 # PostgreSQL only - _convert_query_params already imported at top
                 query = '''
-                    UPDATE analysis_jobs 
+                    UPDATE analysis_jobs
                     SET status = ?, completed_at = ?, errors = ?
                     WHERE job_id = ?
                 '''
-                query, params = _convert_query_params(query, ('failed', datetime.now().isoformat(), json.dumps([{'error': str(e)}]), job_id))
+                query, params = _convert_query_params(query, ('failed', datetime.now().isoformat(), json_dumps([{'error': str(error)}]), self.job_id))
                 cursor.execute(query, params)
+            invalidate_responses('jobs')
             
             # Update job state
-            job_state.update_job(job_id, {
+            job_state.update_job(self.job_id, {
                 'status': 'failed',
                 'completed_at': datetime.now().isoformat(),
-                'errors': [{'error': str(e)}]
+                'errors': [{'error': str(error)}]
             })
         except Exception as cleanup_error:
             logger.error(f"Failed to update job status: {cleanup_error}")
+
+
+def run_ticker_batch(job_id: str, tickers: List[str], process_ticker: Callable[[str], Any], label: str = 'ANALYSIS', reused: int = 0):
+    """
+    Run a TickerBatch to completion in the calling thread, one ticker at a time.
     
+    Args:
+        job_id: Unique job identifier (row must exist in analysis_jobs)
+        tickers: Items to process, in order
+        process_ticker: callable(ticker) -> truthy on success; raise to record an error
+        label: Log label for the job type
+        reused: Items already satisfied from stored results; counted as
+                completed and successful ahead of `tickers`
+    """
+    try:
+        TickerBatch(job_id, tickers, process_ticker, label=label, reused=reused).run_inline()
     finally:
         # Cleanup thread-local connection
         close_thread_connection()
+
+
+def analysis_batch(job_id: str, tickers: List[str], capital: float, indicators: Optional[List[str]] = None, use_demo_data: bool = True, analysis_config: Optional[Dict[str, Any]] = None, strategy_id: int = 1, reused: int = 0, priority: str = 'watchlist') -> TickerBatch:
+    """
+    Analysis of multiple stocks as a TickerBatch.
+    
+    Args:
+        job_id: Unique job identifier
+        tickers: List of stock ticker symbols
+        capital: Trading capital amount
+        indicators: Optional list of specific indicators to use
+        use_demo_data: Whether to use demo data for testing
+        analysis_config: Optional dict with additional config (risk_percent, position_size_limit, etc.)
+        strategy_id: Strategy ID (1=Balanced, 2=Trend, 3=Mean Reversion, 4=Momentum)
+        reused: Tickers of this job already served from fresh results (not in `tickers`)
+        priority: Scheduler priority class
+    """
+    # Merge config with defaults
+    config = analysis_config or {}
+    effective_capital = config.get('capital', capital) or capital
+    effective_demo = config.get('use_demo_data', use_demo_data)
+    
+    logger.info("=" * 60)
+    logger.info(f"ANALYSIS TASK CREATED - Job ID: {job_id} ({priority})")
+    logger.info(f"Total stocks to analyze: {len(tickers)}" + (f" (+{reused} reused)" if reused else ""))
+    logger.info(f"Tickers: {tickers}")
+    logger.info(f"Capital: {effective_capital}")
+    logger.info(f"Indicators: {indicators if indicators else 'default'}")
+    logger.info(f"Demo mode: {effective_demo}")
+    logger.info(f"Strategy ID: {strategy_id}")
+    if config:
+        logger.info(f"Additional config: risk_percent={config.get('risk_percent')}, position_limit={config.get('position_size_limit')}, rr_ratio={config.get('risk_reward_ratio')}")
+    logger.info("=" * 60)
+    
+    def process_ticker(ticker: str) -> bool:
+        # Analyze the stock with config and strategy
+        result = analyze_ticker(
+            ticker,
+            indicator_list=indicators,
+            capital=effective_capital,
+            use_demo_data=effective_demo,
+            analysis_config=config,
+            strategy_id=strategy_id
+        )
+        
+        if not result:
+            raise ValueError('No result returned from analyzer')
+        
+        # Store analysis result using thread-safe connection
+        # UNIFIED TABLE: Now includes symbol, name, yahoo_symbol, status, analysis_source
+        raw_data = jsonb_dumps(result.get('indicators', []))
+        
+        # Extract symbol (remove exchange suffix like .NS, .BO)
+        if '.' in ticker:
+            symbol = ticker.rsplit('.', 1)[0]
+        else:
+            symbol = ticker
+        
+        # ✅ Always INSERT new record to keep full history
+        for insert_attempt in range(3):
+            try:
+                with get_db_session() as (conn, cursor):
+                    # Serialize config for storage
+                    config_json = jsonb_dumps(config) if config else None
+                    
+                    ResultInsertion.INSERT_RESULT.execute(cursor, (
+                        ticker,
+                        symbol,
+                        None,  # name not available from watchlist analysis
+                        ticker,  # yahoo_symbol same as ticker
+                        float(convert_numpy_types(result.get('score', 0)) or 0),
+                        result.get('verdict', 'Neutral'),
+                        float(convert_numpy_types(result.get('entry')) or 0),
+                        float(convert_numpy_types(result.get('stop')) or 0),
+                        float(convert_numpy_types(result.get('target')) or 0),
+                        int(convert_numpy_types(result.get('position_size', 0)) or 0),
+                        float(convert_numpy_types(result.get('risk_reward_ratio', 0)) or 0),
+                        config_json,
+                        strategy_id,
+                        result.get('entry_method', 'Market Order'),
+                        result.get('data_source', 'real'),
+                        bool(result.get('is_demo_data', False)),
+                        raw_data,
+                        'completed',
+                        get_ist_timestamp(),
+                        get_ist_timestamp(),
+                        'watchlist',
+                        job_id
+                    ))
+                    ResultInsertion.upsert_latest(cursor, cursor.fetchone()[0])
+                invalidate_responses('results')
+                break
+            except Exception as insert_error:
+                logger.warning(f"[RETRY] Failed to insert result for {ticker} (attempt {insert_attempt + 1}/3): {insert_error}")
+                if insert_attempt < 2:
+                    time.sleep(0.3 * (insert_attempt + 1))
+                else:
+                    logger.error(f"✗ Failed to store result for {ticker} after 3 attempts: {insert_error}")
+                    raise RuntimeError(f"DB insert failed: {str(insert_error)}")
+        
+        # Log status - check if success flag exists
+        if result.get('success'):
+            logger.info(f"✓ {ticker} COMPLETED - Score: {result.get('score')}, Verdict: {result.get('verdict')}")
+        else:
+            # Still log as completed even if validation failed - we still have analysis data
+            error_msg = result.get('error', 'Trade validation failed')
+            if result.get('trade_issues'):
+                error_msg = f"Validation: {', '.join(result.get('trade_issues', []))}"
+            logger.warning(f"✓ {ticker} ANALYZED (Validation failed) - Score: {result.get('score')}, Reason: {error_msg}")
+        return True
+    
+    return TickerBatch(job_id, tickers, process_ticker, label='ANALYSIS', reused=reused, priority=priority)
+
+
+def analyze_stocks_batch(job_id: str, tickers: List[str], capital: float, indicators: Optional[List[str]] = None, use_demo_data: bool = True, analysis_config: Optional[Dict[str, Any]] = None, strategy_id: int = 1, reused: int = 0):
+    """
+    Analyze multiple stocks in the calling thread.
+    start_analysis_job submits the same work to the job scheduler instead.
+    
+    CRITICAL FIX (ISSUE_010):
+    Uses thread-local database connections to prevent SQLite thread-safety violations.
+    Each thread gets its own connection, which is properly closed when done.
+    
+    Args:
+        job_id: Unique job identifier
+        tickers: List of stock ticker symbols
+        capital: Trading capital amount
+        indicators: Optional list of specific indicators to use
+        use_demo_data: Whether to use demo data for testing
+        analysis_config: Optional dict with additional config (risk_percent, position_size_limit, etc.)
+        strategy_id: Strategy ID (1=Balanced, 2=Trend, 3=Mean Reversion, 4=Momentum)
+        reused: Tickers of this job already served from fresh results (not in `tickers`)
+    """
+    batch = analysis_batch(job_id, tickers, capital, indicators, use_demo_data, analysis_config, strategy_id, reused)
+    try:
+        batch.run_inline()
+    finally:
+        close_thread_connection()
+
+
+def backtest_batch(job_id: str, tickers: List[str], days: int, strategy_ids: List[int]) -> TickerBatch:
+    """
+    Backtest of multiple tickers (optionally across several strategies) as a TickerBatch.
+    
+    Progress is reported per ticker; each ticker/strategy result is
+    persisted to backtest_results as soon as it finishes, so partial
+    results survive cancellation.
+    
+    Args:
+        job_id: Unique job identifier
+        tickers: List of stock ticker symbols
+        days: Historical days to backtest
+        strategy_ids: Strategies to run for every ticker (a parameter sweep when > 1)
+    """
+    from utils.backtesting import BacktestEngine
+    
+    logger.info("=" * 60)
+    logger.info(f"BACKTEST TASK CREATED - Job ID: {job_id}")
+    logger.info(f"Tickers: {len(tickers)}, days: {days}, strategies: {strategy_ids}")
+    logger.info("=" * 60)
+    
+    engines = {sid: BacktestEngine(strategy_id=sid) for sid in strategy_ids}
+    
+    def process_ticker(ticker: str) -> bool:
+        failures = []
+        for strategy_id, engine in engines.items():
+            result = engine.backtest_ticker(ticker, days=days)
+            error = result.get('error')
+            with get_db_session() as (conn, cursor):
+                query = '''
+                    INSERT INTO backtest_results
+                    (job_id, ticker, strategy_id, days, result, error, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                '''
+                query, params = _convert_query_params(query, (
+                    job_id,
+                    ticker,
+                    strategy_id,
+                    days,
+                    None if error else json_dumps(result),
+                    error,
+                    get_ist_timestamp()
+                ))
+                cursor.execute(query, params)
+            if error:
+                failures.append(f"strategy {strategy_id}: {error}")
         
-        # Cleanup thread tracking (Redis job state is kept for monitoring)
-        if job_id in job_threads:
-            del job_threads[job_id]
+        if failures:
+            raise ValueError('; '.join(failures))
+        return True
+    
+    return TickerBatch(job_id, tickers, process_ticker, label='BACKTEST', priority='backtest')
+
 
+def backtest_stocks_batch(job_id: str, tickers: List[str], days: int, strategy_ids: List[int]):
+    """Backtest multiple tickers in the calling thread (see backtest_batch)"""
+    batch = backtest_batch(job_id, tickers, days, strategy_ids)
+    try:
+        batch.run_inline()
+    finally:
+        close_thread_connection()
 
-def start_analysis_job(job_id: str, tickers: List[str], indicators: Optional[List[str]], capital: float, use_demo: bool, analysis_config: Optional[Dict[str, Any]] = None, strategy_id: int = 1) -> bool:
+
+def start_analysis_job(job_id: str, tickers: List[str], indicators: Optional[List[str]], capital: float, use_demo: bool, analysis_config: Optional[Dict[str, Any]] = None, strategy_id: int = 1, reused: int = 0, priority: str = 'watchlist') -> bool:
     """
-    Start a new analysis job in background thread
-    Returns True if started successfully
+    Queue a new analysis job on the job scheduler
+    Returns True if queued successfully
     
-    CRITICAL: On Railway (and cloud platforms), we MUST use daemon=False
-    to ensure threads actually run. Daemon threads are killed immediately
-    on serverless/containerized platforms.
+    Jobs of at most INTERACTIVE_JOB_MAX_TICKERS tickers run in the
+    'interactive' class and take the next free worker ahead of larger jobs.
     
     Args:
         job_id: Unique job identifier
@@ -371,26 +520,49 @@ def start_analysis_job(job_id: str, tickers: List[str], indicators: Optional[Lis
         use_demo: Whether to use demo data
         analysis_config: Optional dict with additional config (risk_percent, position_size_limit, etc.)
         strategy_id: Strategy ID (1=Balanced, 2=Trend, 3=Mean Reversion, 4=Momentum)
+        reused: Tickers of this job already served from fresh results (not in `tickers`)
+        priority: 'watchlist' or 'bulk' (small jobs are promoted to 'interactive')
     """
     try:
-        thread = threading.Thread(
-            target=analyze_stocks_batch,
-            args=(job_id, tickers, capital, indicators, use_demo, analysis_config, strategy_id),
-            daemon=False,  # CRITICAL: Must be False on Railway for threads to execute
-            name=f"AnalysisJob-{job_id[:8]}"
-        )
-        thread.start()
-        job_threads[job_id] = thread
-        logger.info(f"✅ DAEMON_FALSE_FIX: Started background thread for job {job_id} with daemon=False, strategy_id={strategy_id}")
+        priority = classify_priority(priority, len(tickers))
+        batch = analysis_batch(job_id, tickers, capital, indicators, use_demo, analysis_config, strategy_id, reused, priority)
+        if not get_job_scheduler().submit(batch):
+            logger.error(f"Job {job_id} is already scheduled")
+            return False
+        logger.info(f"Queued analysis job {job_id} ({priority}, {len(tickers)} tickers, strategy_id={strategy_id})")
         return True
     except Exception as e:
-        logger.error(f"Failed to start thread for job {job_id}: {e}")
+        logger.error(f"Failed to queue job {job_id}: {e}")
+        return False
+
+
+def start_backtest_job(job_id: str, tickers: List[str], days: int, strategy_ids: List[int]) -> bool:
+    """
+    Queue a backtest job on the job scheduler ('backtest' priority class).
+    
+    Args:
+        job_id: Unique job identifier (created via JobStateTransactions.create_job_atomic)
+        tickers: List of stock ticker symbols
+        days: Historical days to backtest
+        strategy_ids: Strategies to run for every ticker
+    """
+    try:
+        if not get_job_scheduler().submit(backtest_batch(job_id, tickers, days, strategy_ids)):
+            logger.error(f"Backtest job {job_id} is already scheduled")
+            return False
+        logger.info(f"Queued backtest job {job_id} ({len(tickers)} tickers, strategies={strategy_ids})")
+        return True
+    except Exception as e:
+        logger.error(f"Failed to queue backtest job {job_id}: {e}")
         return False
 
 
 def cancel_job(job_id: str) -> bool:
     """
-    Cancel a running job.
+    Cancel a queued or running job.
+    
+    Drops its remaining tickers from this process's scheduler and sets the
+    shared cancellation flag, which workers in any process check between tickers.
     
     Args:
         job_id: Job identifier
@@ -398,7 +570,8 @@ def cancel_job(job_id: str) -> bool:
     Returns:
         True if job was cancelled successfully
     """
-    return job_state.cancel_job(job_id)
+    descheduled = get_job_scheduler().cancel(job_id)
+    return job_state.cancel_job(job_id) or descheduled
 
 
 def get_active_jobs() -> Dict[str, Dict[str, Any]]:
@@ -411,18 +584,6 @@ def get_active_jobs() -> Dict[str, Dict[str, Any]]:
     return job_state.get_all_jobs()
 
 
-def cleanup_old_threads():
-    """Clean up completed threads from tracking"""
-    to_remove = []
-    for job_id, thread in job_threads.items():
-        if not thread.is_alive():
-            to_remove.append(job_id)
-    
-    for job_id in to_remove:
-        del job_threads[job_id]
-        logger.debug(f"Cleaned up completed thread for job {job_id}")
-
-
 def analyze_single_stock_bulk(symbol: str, yahoo_symbol: str, name: str, use_demo: bool):
     """
     Analyze a single stock for bulk analysis with thread-safe database operations.
@@ -448,19 +609,11 @@ def analyze_single_stock_bulk(symbol: str, yahoo_symbol: str, name: str, use_dem
         
         if result:
             # Store analysis result in UNIFIED analysis_results table
-            raw_data = json.dumps(result.get('indicators', []), cls=NumpyEncoder)
+            raw_data = jsonb_dumps(result.get('indicators', []))
             
             with get_db_session() as (conn, cursor):
                 # Always INSERT new record to keep full history
-                query = '''
-                    INSERT INTO analysis_results 
-                    (ticker, symbol, name, yahoo_symbol, score, verdict, entry, stop_loss, target, 
-                     position_size, risk_reward_ratio, analysis_config, strategy_id,
-                     entry_method, data_source, is_demo_data, raw_data, status, 
-                     created_at, updated_at, analysis_source)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                '''
-                query, params = _convert_query_params(query, (
+                ResultInsertion.INSERT_RESULT.execute(cursor, (
                     yahoo_symbol,
                     symbol,
                     name,
@@ -479,11 +632,13 @@ def analyze_single_stock_bulk(symbol: str, yahoo_symbol: str, name: str, use_dem
                     bool(use_demo),
                     raw_data,
                     'completed',
-                    datetime.now().isoformat(),
-                    datetime.now().isoformat(),
-                    'bulk'
+                    get_ist_timestamp(),
+                    get_ist_timestamp(),
+                    'bulk',
+                    None
                 ))
-                cursor.execute(query, params)
+                ResultInsertion.upsert_latest(cursor, cursor.fetchone()[0])
+            invalidate_responses('results')
             
             # Log with full context
             if result.get('success'):
@@ -510,10 +665,11 @@ def analyze_single_stock_bulk(symbol: str, yahoo_symbol: str, name: str, use_dem
                     name,
                     yahoo_symbol,
                     str(e),
-                    datetime.now().isoformat(),
-                    datetime.now().isoformat()
+                    get_ist_timestamp(),
+                    get_ist_timestamp()
                 ))
                 cursor.execute(query, params)
+            invalidate_responses('results')
         except Exception as cleanup_error:
             logger.error(f"Failed to log error for {symbol}: {cleanup_error}")
         
@@ -253,6 +253,19 @@ class JobStateManager(ABC):
     def cleanup_old_jobs(self, max_age_hours: int = 24) -> int:
         """Cleanup old completed/failed jobs"""
         pass
+    
+    def is_cancelled(self, job_id: str) -> bool:
+        """Whether the job has been cancelled (polled by workers between items)"""
+        return bool((self.get_job(job_id) or {}).get('cancelled'))
+    
+    def get_jobs(self, job_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get several jobs at once; unknown IDs are left out"""
+        jobs = {}
+        for job_id in job_ids:
+            job_state = self.get_job(job_id)
+            if job_state:
+                jobs[job_id] = job_state
+        return jobs
 
 
 class RedisJobStateManager(JobStateManager):
@@ -262,12 +275,41 @@ class RedisJobStateManager(JobStateManager):
     Storage Strategy:
     - Job data: Redis Hash (HSET job:{job_id})
     - Job list: Redis Set (SADD active_jobs {job_id})
+    - Cancellation flag: plain key (SET job:{job_id}:cancelled)
     - Expiry: TTL on completed jobs (24 hours default)
     
     Key Structure:
     - job:{job_id} -> Hash with job data
+    - job:{job_id}:cancelled -> "1" once the job is cancelled (TTL 24 hours)
     - active_jobs -> Set of active job IDs
     - job:{job_id}:logs -> List for job logs (optional)
+    
+    Writes go out as one pipeline (or script call) per call, and workers poll
+    cancellation with a single EXISTS on the flag key instead of reading the
+    whole hash.
+    Cancellation is one-way, so a flag seen once is remembered locally and
+    not asked for again.
+    """
+    
+    FINISHED_TTL = 86400  # 24 hours
+    
+    # KEYS = job hash, cancel flag, active_jobs set
+    # ARGV = job_id, cancelled (0/1), finished (0/1), TTL, field1, value1, ...
+    # The flag is set even for a job whose hash does not exist yet (still queued);
+    # the hash is only written if it exists, so an update never recreates it.
+    UPDATE_JOB_LUA = """
+    if ARGV[2] == '1' then
+        redis.call('SET', KEYS[2], 1, 'EX', ARGV[4])
+    end
+    if redis.call('EXISTS', KEYS[1]) == 0 then
+        return 0
+    end
+    redis.call('HSET', KEYS[1], unpack(ARGV, 5))
+    if ARGV[3] == '1' then
+        redis.call('EXPIRE', KEYS[1], ARGV[4])
+        redis.call('SREM', KEYS[3], ARGV[1])
+    end
+    return 1
     """
     
     def __init__(self, redis_client: Optional[RedisType] = None):
@@ -299,6 +341,14 @@ class RedisJobStateManager(JobStateManager):
         except redis.ConnectionError as e:
             logger.error(f"Redis connection failed: {str(e)}")
             raise
+        
+        # Jobs this process has already seen cancelled
+        self._cancelled: set = set()
+        self._update_script = self.redis.register_script(self.UPDATE_JOB_LUA)
+    
+    @staticmethod
+    def _cancel_key(job_id: str) -> str:
+        return f"job:{job_id}:cancelled"
     
     def create_job(self, job_id: str, initial_state: Dict[str, Any]) -> bool:
         """
@@ -319,12 +369,11 @@ class RedisJobStateManager(JobStateManager):
             # Convert dict to flat structure for HSET
             job_data = self._serialize_job_state(initial_state)
             
-            # Store in Redis
-            key = f"job:{job_id}"
-            self.redis.hset(key, mapping=job_data)
-            
-            # Add to active jobs set
-            self.redis.sadd("active_jobs", job_id)
+            # Store the hash and register it as active in one round-trip
+            pipe = self.redis.pipeline(transaction=True)
+            pipe.hset(f"job:{job_id}", mapping=job_data)
+            pipe.sadd("active_jobs", job_id)
+            pipe.execute()
             
             logger.debug(f"Created job {job_id} in Redis")
             return True
@@ -337,6 +386,11 @@ class RedisJobStateManager(JobStateManager):
         """
         Update job state in Redis.
         
+        The existence check and all field writes run as one Lua script, so
+        a missing job is never (re)created. A cancellation flag is set even
+        then (with its TTL), so a job cancelled while still queued stops as
+        soon as it starts.
+        
         Args:
             job_id: Job identifier
             updates: Dictionary of fields to update
@@ -347,23 +401,20 @@ class RedisJobStateManager(JobStateManager):
         try:
             key = f"job:{job_id}"
             
-            # Check if job exists
-            if not self.redis.exists(key):
-                logger.warning(f"Job {job_id} not found for update")
-                return False
-            
             # Add update timestamp
-            updates['updated_at'] = datetime.now().isoformat()
-            
-            # Serialize and update
-            job_data = self._serialize_job_state(updates)
-            self.redis.hset(key, mapping=job_data)
+            updates = {**updates, 'updated_at': datetime.now().isoformat()}
             
             # If job completed/failed/cancelled, set expiry and remove from active set
-            status = updates.get('status')
-            if status in ['completed', 'failed', 'cancelled']:
-                self.redis.expire(key, 86400)  # 24 hours
-                self.redis.srem("active_jobs", job_id)
+            finished = updates.get('status') in ['completed', 'failed', 'cancelled']
+            fields = [part for item in self._serialize_job_state(updates).items() for part in item]
+            
+            existed = self._update_script(
+                keys=[key, self._cancel_key(job_id), "active_jobs"],
+                args=[job_id, int(bool(updates.get('cancelled'))), int(finished), self.FINISHED_TTL] + fields
+            )
+            if not existed:
+                logger.warning(f"Job {job_id} not found for update")
+                return False
             
             return True
             
@@ -407,11 +458,12 @@ class RedisJobStateManager(JobStateManager):
         try:
             key = f"job:{job_id}"
             
-            # Delete job data
-            self.redis.delete(key)
-            
-            # Remove from active jobs
-            self.redis.srem("active_jobs", job_id)
+            # Delete job data and remove from active jobs
+            pipe = self.redis.pipeline(transaction=True)
+            pipe.delete(key, self._cancel_key(job_id))
+            pipe.srem("active_jobs", job_id)
+            pipe.execute()
+            self._cancelled.discard(job_id)
             
             logger.debug(f"Deleted job {job_id}")
             return True
@@ -428,22 +480,57 @@ class RedisJobStateManager(JobStateManager):
             Dictionary mapping job_id -> job_state
         """
         try:
-            # Get all active job IDs
-            job_ids = self.redis.smembers("active_jobs")
-            
-            # Retrieve each job's data
-            all_jobs = {}
-            for job_id in job_ids:
-                job_state = self.get_job(job_id)
-                if job_state:
-                    all_jobs[job_id] = job_state
-            
-            return all_jobs
+            # Get all active job IDs, then their data in one pipeline
+            return self.get_jobs(list(self.redis.smembers("active_jobs")))
             
         except Exception as e:
             logger.error(f"Failed to get all jobs: {str(e)}")
             return {}
     
+    def get_jobs(self, job_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get several jobs in one round-trip (pipelined HGETALL).
+        
+        Args:
+            job_ids: Job identifiers
+        
+        Returns:
+            Dictionary mapping job_id -> job_state for the jobs that exist
+        """
+        job_ids = list(dict.fromkeys(job_ids))
+        if not job_ids:
+            return {}
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for job_id in job_ids:
+                pipe.hgetall(f"job:{job_id}")
+            return {
+                job_id: self._deserialize_job_state(job_data)
+                for job_id, job_data in zip(job_ids, pipe.execute())
+                if job_data
+            }
+        except Exception as e:
+            logger.error(f"Failed to get jobs {job_ids}: {str(e)}")
+            return {}
+    
+    def is_cancelled(self, job_id: str) -> bool:
+        """
+        Whether the job has been cancelled, by any worker.
+        
+        One EXISTS on job:{job_id}:cancelled; free once the flag has been seen.
+        Errors count as not cancelled so a Redis hiccup does not stop a job.
+        """
+        if job_id in self._cancelled:
+            return True
+        try:
+            cancelled = bool(self.redis.exists(self._cancel_key(job_id)))
+        except Exception as e:
+            logger.error(f"Failed to check cancellation of job {job_id}: {str(e)}")
+            return False
+        if cancelled:
+            self._cancelled.add(job_id)
+        return cancelled
+    
     def cancel_job(self, job_id: str) -> bool:
         """
         Mark job as cancelled in Redis.
@@ -480,6 +567,9 @@ class RedisJobStateManager(JobStateManager):
                 cursor, keys = self.redis.scan(cursor, match="job:*", count=100)
                 
                 for key in keys:
+                    # Only job hashes; flag and log keys share the prefix
+                    if key.count(':') != 1:
+                        continue
                     job_data = self.redis.hgetall(key)
                     if not job_data:
                         continue
@@ -489,7 +579,7 @@ class RedisJobStateManager(JobStateManager):
                     if completed_at:
                         completed_time = datetime.fromisoformat(completed_at)
                         if completed_time < cutoff_time:
-                            self.redis.delete(key)
+                            self.redis.delete(key, f"{key}:cancelled")
                             cleaned_count += 1
                 
                 if cursor == 0:
@@ -589,6 +679,8 @@ class InMemoryJobStateManager(JobStateManager):
     def __init__(self):
         """Initialize in-memory storage"""
         self._jobs: Dict[str, Dict[str, Any]] = {}
+        # Jobs cancelled before their state was created (still queued)
+        self._cancelled: set = set()
         logger.info("Using in-memory job state (not distributed)")
     
     def create_job(self, job_id: str, initial_state: Dict[str, Any]) -> bool:
@@ -607,19 +699,29 @@ class InMemoryJobStateManager(JobStateManager):
         return True
     
     def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
-        """Get job from memory"""
-        return self._jobs.get(job_id)
+        """Get a copy of the job from memory"""
+        job_state = self._jobs.get(job_id)
+        return dict(job_state) if job_state is not None else None
     
     def delete_job(self, job_id: str) -> bool:
         """Delete job from memory"""
+        self._cancelled.discard(job_id)
         if job_id in self._jobs:
             del self._jobs[job_id]
             return True
         return False
     
     def get_all_jobs(self) -> Dict[str, Dict[str, Any]]:
-        """Get all jobs from memory"""
-        return self._jobs.copy()
+        """Get copies of all jobs from memory"""
+        return {job_id: dict(job_state) for job_id, job_state in self._jobs.items()}
+    
+    def get_jobs(self, job_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get copies of several jobs from memory"""
+        return {job_id: dict(self._jobs[job_id]) for job_id in job_ids if job_id in self._jobs}
+    
+    def is_cancelled(self, job_id: str) -> bool:
+        """Check the cancelled flag in memory"""
+        return job_id in self._cancelled or bool(self._jobs.get(job_id, {}).get('cancelled'))
     
     def cancel_job(self, job_id: str) -> bool:
         """Cancel job in memory"""
@@ -627,6 +729,8 @@ class InMemoryJobStateManager(JobStateManager):
             self._jobs[job_id]['cancelled'] = True
             self._jobs[job_id]['status'] = 'cancelled'
             return True
+        # Not started yet: remember it so the job stops when it starts
+        self._cancelled.add(job_id)
         return False
     
     def cleanup_old_jobs(self, max_age_hours: int = 24) -> int:
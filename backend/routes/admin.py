@@ -6,6 +6,7 @@ from flask import Blueprint, jsonify
 from utils.logger import setup_logger
 from database import query_db, get_db_connection
 from config import config
+from cache import get_cache_stats, get_backtest_cache_stats
 import sys
 
 logger = setup_logger()
@@ -129,3 +130,17 @@ def get_config():
     except Exception as e:
         logger.exception("get_config error")
         return jsonify({"error": str(e)}), 500
+
+
+@bp.route("/cache/stats", methods=["GET"])
+def cache_stats():
+    """Hit/miss statistics for the indicator and backtest result caches"""
+    try:
+        return jsonify({
+            "indicators": get_cache_stats(),
+            "backtests": get_backtest_cache_stats()
+        }), 200
+        
+    except Exception as e:
+        logger.exception("cache_stats error")
+        return jsonify({"error": str(e)}), 500
@@ -14,56 +14,37 @@ from utils.api_utils import (
     RequestValidator
 )
 from utils.timezone_util import get_ist_timestamp
+from config import config
 from database import query_db, execute_db, get_db_connection
 from models.job_state import get_job_state_manager
-from utils.db_utils import JobStateTransactions, get_job_status
+from utils.db_utils import JobStateTransactions, get_job_status, INDICATORS_PROJECTION_SQL, indicator_vote_condition
+from utils.pagination import keyset_condition, parse_limit, split_page
+from utils.analysis.freshness import parse_freshness_policy, reused_summary, split_by_freshness
+from utils.infrastructure.response_cache import cached_response
+from utils.data.result_export import (
+    EXPORT_COLUMNS, INDICATORS_COLUMN, ExportFilter, build_export_query, iter_result_batches
+)
 from utils.schemas import ResponseSchemas, validate_response
 
 logger = setup_logger()
 bp = Blueprint("analysis", __name__, url_prefix="/api/analysis")
 
 
-def _get_active_job_for_tickers(tickers: list) -> dict:
-    """
-    Check if an identical job (same tickers) is already running.
-    Returns the existing job info or None if safe to create new job.
-    Tickers are normalized (sorted, uppercased) for reliable matching.
-    """
-    try:
-        from datetime import timedelta
-        from utils.timezone_util import get_ist_now
-        
-        # Normalize tickers for comparison: sort and uppercase
-        normalized_tickers = json.dumps(sorted([t.upper().strip() for t in tickers]))
-        five_min_ago = (get_ist_now() - timedelta(minutes=5)).isoformat()
-        
-        # Look for exact same tickers in queued/processing jobs from last 5 minutes
-        active_job = query_db("""
-            SELECT job_id, status, total, completed, created_at
-            FROM analysis_jobs
-            WHERE status IN ('queued', 'processing')
-              AND tickers_json = ?
-              AND created_at > ?
-            ORDER BY created_at DESC
-            LIMIT 1
-        """, (normalized_tickers, five_min_ago), one=True)
-        
-        if not active_job:
-            return None
-        
-        job_id, status, total, completed, created_at = active_job
-        logger.info(f"Found active job {job_id} with status {status} for tickers {tickers}")
-        
-        return {
-            "job_id": job_id,
-            "status": status,
-            "total": total,
-            "completed": completed,
-            "created_at": created_at
-        }
-    except Exception as e:
-        logger.exception(f"Error checking for active jobs with tickers {tickers}: {e}")
-        return None
+def _duplicate_job_response(active_job: dict, tickers: list, capital):
+    """200 response pointing the client at the already-active identical job"""
+    return jsonify({
+        "job_id": active_job["job_id"],
+        "status": active_job["status"],
+        "is_duplicate": True,
+        "message": "Analysis already running for these tickers",
+        "total": active_job["total"],
+        "completed": active_job["completed"],
+        "tickers": tickers,
+        "capital": capital
+    }), 200
+
+
+XLSX_MIMETYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
 
 
 def get_analyze_ticker():
@@ -81,8 +62,13 @@ def analyze():
     {
         "tickers": ["TCS.NS", "INFY.NS"],
         "capital": 100000,
-        "force": false  # Set true to bypass duplicate check
+        "force": false,  # Set true to bypass duplicate check
+        "freshness_policy": "reuse_fresh"  # Or "recompute" (default: ANALYSIS_FRESHNESS_POLICY)
     }
+    
+    With "reuse_fresh", tickers already analyzed with the same strategy and
+    config since the last market bar are served from analysis_results and
+    only the rest are queued; the job counts them as completed ("reused").
     """
     try:
         data = request.get_json() or {}
@@ -116,6 +102,11 @@ def analyze():
         except (ValueError, TypeError):
             strategy_id = 1
         
+        try:
+            freshness_policy = parse_freshness_policy(data.get("freshness_policy"))
+        except ValueError as e:
+            return StandardizedErrorResponse.format("INVALID_REQUEST", str(e), 400)
+        
         # Extract additional config parameters
         analysis_config = {
             "capital": capital,
@@ -133,54 +124,44 @@ def analyze():
         
         # Check for duplicate/active jobs (unless force=true)
         if not force:
-            active_job = _get_active_job_for_tickers(tickers)
+            active_job = JobStateTransactions.find_active_job(tickers, strategy_id)
             if active_job:
                 logger.info(f"Duplicate job request detected. Returning existing job {active_job['job_id']}")
-                return jsonify({
-                    "job_id": active_job["job_id"],
-                    "status": active_job["status"],
-                    "is_duplicate": True,
-                    "message": "Analysis already running for these tickers",
-                    "total": active_job["total"],
-                    "completed": active_job["completed"],
-                    "tickers": tickers,
-                    "capital": capital
-                }), 200
+                return _duplicate_job_response(active_job, tickers, capital)
+        
+        # Serve tickers with a fresh stored result; queue only the stale ones
+        fresh, pending = split_by_freshness(tickers, strategy_id, analysis_config, freshness_policy)
         
         # Create job ID
         job_id = str(uuid.uuid4())
-        logger.info(f"[ANALYZE] Creating new job {job_id}")
+        logger.info(f"[ANALYZE] Creating new job {job_id} ({len(pending)} to compute, {len(fresh)} reused)")
         
-        # Create job atomically with retries
-        max_retries = 3
-        created = False
-        for attempt in range(max_retries):
-            try:
-                created = JobStateTransactions.create_job_atomic(
-                    job_id=job_id,
-                    status="queued",
-                    total=len(tickers),
-                    description=f"Analyze {len(tickers)} ticker(s) with capital {capital}",
-                    tickers=tickers,
-                    strategy_id=strategy_id
-                )
-                if created:
-                    break
-                else:
-                    logger.warning(f"Job creation failed (attempt {attempt + 1}/{max_retries}), retrying...")
-                    import time
-                    time.sleep(0.1 * (attempt + 1))
-            except Exception as e:
-                logger.exception(f"Exception during job creation (attempt {attempt + 1}/{max_retries})")
-                if attempt == max_retries - 1:
-                    return StandardizedErrorResponse.format(
-                        "JOB_CREATION_FAILED",
-                        "Failed to create analysis job",
-                        500,
-                        {"error": str(e), "job_id": job_id}
-                    )
+        # The active-digest unique index settles concurrent identical requests
+        try:
+            created = JobStateTransactions.create_job_atomic(
+                job_id=job_id,
+                status="queued",
+                total=len(tickers),
+                description=f"Analyze {len(tickers)} ticker(s) with capital {capital}",
+                tickers=tickers,
+                strategy_id=strategy_id,
+                dedupe=not force,
+                reused=len(fresh)
+            )
+        except Exception as e:
+            logger.exception("Exception during job creation")
+            return StandardizedErrorResponse.format(
+                "JOB_CREATION_FAILED",
+                "Failed to create analysis job",
+                500,
+                {"error": str(e), "job_id": job_id}
+            )
         
         if not created:
+            active_job = None if force else JobStateTransactions.find_active_job(tickers, strategy_id)
+            if active_job:
+                logger.info(f"Lost creation race to job {active_job['job_id']}")
+                return _duplicate_job_response(active_job, tickers, capital)
             return StandardizedErrorResponse.format(
                 "JOB_DUPLICATE",
                 "Job already exists (potential race condition)",
@@ -192,9 +173,11 @@ def analyze():
         start_success = False
         try:
             from infrastructure.thread_tasks import start_analysis_job
-            start_success = start_analysis_job(job_id, tickers, None, capital, False, analysis_config, strategy_id)
+            start_success = start_analysis_job(
+                job_id, pending, None, capital, False, analysis_config, strategy_id, reused=len(fresh)
+            )
             if not start_success:
-                logger.error(f"Failed to start thread for job {job_id}")
+                logger.error(f"Failed to queue job {job_id}")
         except Exception as e:
             logger.exception(f"Failed to start analysis job {job_id}")
         
@@ -205,6 +188,10 @@ def analyze():
             "tickers": tickers,
             "capital": capital,
             "strategy_id": strategy_id,
+            "freshness_policy": freshness_policy,
+            "reused": len(fresh),
+            "recomputed": len(pending),
+            "reused_results": reused_summary(fresh),
             "thread_started": start_success
         }), 201
         
@@ -285,6 +272,8 @@ def cancel_job(job_id):
         # Update job status to cancelled
         try:
             JobStateTransactions.mark_job_completed(job_id, "cancelled")
+            from infrastructure.thread_tasks import cancel_job as cancel_thread_job
+            cancel_thread_job(job_id)
         except Exception as e:
             logger.error(f"Failed to mark job {job_id} as cancelled: {e}")
             return StandardizedErrorResponse.format(
@@ -311,8 +300,17 @@ def cancel_job(job_id):
 
 
 @bp.route("/history/<ticker>", methods=["GET"])
+@cached_response(tags=('results',))
 def get_history(ticker):
-    """Get analysis history for a specific ticker"""
+    """
+    Get analysis history for a specific ticker (newest first)
+    
+    Query params:
+        cursor: Opaque token from a previous response's next_cursor
+        limit: Page size (1-200, default 50)
+        indicators: 'false' to omit per-indicator details (scores only)
+        indicator, vote: Only results where `indicator` cast `vote` (e.g. indicator=RSI&vote=1)
+    """
     try:
         # Validate ticker
         if not ticker or len(ticker.strip()) == 0:
@@ -322,30 +320,47 @@ def get_history(ticker):
                 400
             )
         
-        # Query analysis results including raw_data for indicators and position_size
+        limit = parse_limit(request.args.get("limit", type=int), 50, 200)
+        try:
+            keyset_sql, keyset_params = keyset_condition(request.args.get("cursor"))
+        except ValueError as e:
+            return StandardizedErrorResponse.format("INVALID_CURSOR", str(e), 400)
+        
+        include_indicators = request.args.get("indicators", "true").lower() not in ("false", "0", "no")
+        vote_sql, vote_params = indicator_vote_condition(
+            request.args.get("indicator"), request.args.get("vote", type=int)
+        )
+        
+        # Indicators are projected from the raw_data JSONB in SQL (only the keys
+        # the UI renders); psycopg2 returns JSONB columns already decoded
+        indicators_sql = INDICATORS_PROJECTION_SQL if include_indicators else "NULL"
         results = query_db(
-            """
-            SELECT id, ticker, symbol, verdict, score, entry, stop_loss, target, created_at, raw_data,
+            f"""
+            SELECT id, ticker, symbol, verdict, score, entry, stop_loss, target, created_at,
+                   {indicators_sql} AS indicators,
                    position_size, risk_reward_ratio, strategy_id, analysis_config
             FROM analysis_results
-            WHERE LOWER(ticker) = LOWER(?)
-            ORDER BY created_at DESC
-            LIMIT 50
+            WHERE LOWER(ticker) = LOWER(?) {vote_sql} {keyset_sql}
+            ORDER BY created_at DESC, id DESC
+            LIMIT ?
             """,
-            (ticker,)
+            (ticker,) + vote_params + keyset_params + (limit + 1,)
         )
+        results, next_cursor = split_page(results, limit, created_at_index=8)
         
         if not results:
             return jsonify({
                 "ticker": ticker,
-                "history": []
+                "history": [],
+                "next_cursor": None,
+                "has_more": False
             }), 200
         
         # Handle both tuple (PostgreSQL) and dict (SQLite) return types
         history = []
         for r in results:
             if isinstance(r, (tuple, list)):
-                # PostgreSQL returns tuples: (id, ticker, symbol, verdict, score, entry, stop_loss, target, created_at, raw_data, position_size, risk_reward_ratio, strategy_id, analysis_config)
+                # PostgreSQL returns tuples: (id, ticker, symbol, verdict, score, entry, stop_loss, target, created_at, indicators, position_size, risk_reward_ratio, strategy_id, analysis_config)
                 raw_data = r[9]
                 indicators = []
                 if raw_data:
@@ -381,7 +396,7 @@ def get_history(ticker):
             else:
                 # SQLite returns Row objects
                 item_dict = dict(r)
-                raw_data = item_dict.get('raw_data')
+                raw_data = item_dict.pop('indicators', None)
                 indicators = []
                 if raw_data:
                     try:
@@ -403,7 +418,9 @@ def get_history(ticker):
         
         return jsonify({
             "ticker": ticker,
-            "history": history
+            "history": history,
+            "next_cursor": next_cursor,
+            "has_more": next_cursor is not None
         }), 200
         
     except Exception as e:
@@ -417,6 +434,7 @@ def get_history(ticker):
 
 
 @bp.route("/report/<ticker>", methods=["GET"])
+@cached_response(tags=('results',))
 def get_report(ticker):
     """Get detailed analysis report for a ticker"""
     try:
@@ -431,8 +449,9 @@ def get_report(ticker):
         
         # Get latest analysis (including position_size, risk_reward_ratio, strategy_id, and analysis_config)
         result = query_db(
-            """
-            SELECT verdict, score, entry, stop_loss, target, created_at, raw_data,
+            f"""
+            SELECT verdict, score, entry, stop_loss, target, created_at,
+                   {INDICATORS_PROJECTION_SQL} AS indicators,
                    position_size, risk_reward_ratio, analysis_config, strategy_id
             FROM analysis_results
             WHERE LOWER(ticker) = LOWER(?)
@@ -447,7 +466,7 @@ def get_report(ticker):
         
         if not result:
             # Log available tickers for debugging
-            all_tickers = query_db("SELECT DISTINCT ticker FROM analysis_results LIMIT 10")
+            all_tickers = query_db("SELECT ticker FROM latest_analysis LIMIT 10")
             available = [t[0] if isinstance(t, (tuple, list)) else t['ticker'] for t in all_tickers]
             logger.warning(f"[REPORT] No analysis found for {ticker}. Available tickers: {available}")
             
@@ -484,7 +503,7 @@ def get_report(ticker):
                 "strategy_id": result.get('strategy_id', 5) or 5
             }
             created_at = result['created_at']
-            raw_data = result['raw_data']
+            raw_data = result['indicators']
             analysis_config = result.get('analysis_config')
         
         # Parse analysis_config if present
@@ -577,31 +596,22 @@ def download_report(ticker):
                 "indicators": []
             }
         
-        # Parse indicators from raw_data JSON
+        # Parse indicators from raw_data (JSONB columns arrive already decoded)
         if raw_data_str:
             try:
-                analysis_data["indicators"] = json.loads(raw_data_str)
+                analysis_data["indicators"] = json.loads(raw_data_str) if isinstance(raw_data_str, str) else raw_data_str
             except (json.JSONDecodeError, TypeError):
                 analysis_data["indicators"] = []
         
-        # Export to Excel - pass the full result dict (not ticker separately)
+        # Export to an in-memory workbook - pass the full result dict (not ticker separately)
         analyze_ticker, export_to_excel = get_analyze_ticker()
-        excel_file = export_to_excel(analysis_data)
-        
-        # excel_file is a string path, check if file exists
-        import os
-        if not excel_file or not os.path.exists(excel_file):
-            return StandardizedErrorResponse.format(
-                "EXPORT_FAILED",
-                "Failed to generate Excel report",
-                500
-            )
+        excel_buffer = export_to_excel(analysis_data)
         
         return send_file(
-            excel_file,
+            excel_buffer,
             as_attachment=True,
             download_name=f"{ticker}_analysis_{get_ist_timestamp()[:19].replace(':', '-')}.xlsx",
-            mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            mimetype=XLSX_MIMETYPE
         )
         
     except Exception as e:
@@ -612,3 +622,60 @@ def download_report(ticker):
             500,
             {"error": str(e)}
         )
+
+
+def _job_report_results(job_id):
+    """Report dicts for every result of a job, read in batches from a server-side cursor"""
+    columns = EXPORT_COLUMNS + (INDICATORS_COLUMN,)
+    query, params = build_export_query(ExportFilter(job_id=job_id), include_indicators=True)
+    for rows in iter_result_batches(query, params, config.EXPORT_BATCH_SIZE):
+        for row in rows:
+            record = dict(zip(columns, row))
+            indicators = record[INDICATORS_COLUMN] or []
+            if isinstance(indicators, str):
+                try:
+                    indicators = json.loads(indicators)
+                except json.JSONDecodeError:
+                    indicators = []
+            yield {
+                "ticker": record["ticker"],
+                "verdict": record["verdict"],
+                "score": record["score"],
+                "entry": record["entry"],
+                "stop": record["stop_loss"],
+                "target": record["target"],
+                "created_at": record["created_at"],
+                "indicators": indicators if isinstance(indicators, list) else []
+            }
+
+
+@bp.route("/report/job/<job_id>/download", methods=["GET"])
+def download_job_report(job_id):
+    """Download every result of an analysis job as one Excel workbook (Summary + Indicators sheets)"""
+    try:
+        job = query_db("SELECT job_id FROM analysis_jobs WHERE job_id = ?", (job_id,), one=True)
+        if not job:
+            return StandardizedErrorResponse.format(
+                "JOB_NOT_FOUND",
+                f"Job {job_id} not found",
+                404
+            )
+        
+        from utils.analysis.orchestrator import export_results_to_excel
+        excel_buffer = export_results_to_excel(_job_report_results(job_id))
+        
+        return send_file(
+            excel_buffer,
+            as_attachment=True,
+            download_name=f"job_{job_id}_analysis.xlsx",
+            mimetype=XLSX_MIMETYPE
+        )
+        
+    except Exception as e:
+        logger.exception(f"download_job_report error for {job_id}")
+        return StandardizedErrorResponse.format(
+            "DOWNLOAD_ERROR",
+            "Failed to download job report",
+            500,
+            {"error": str(e)}
+        )
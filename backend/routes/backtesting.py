@@ -9,13 +9,27 @@ Following TheTool architecture:
 - Multi-strategy support (1-5)
 """
 
-from flask import Blueprint, request, jsonify
-from utils.backtesting import BacktestEngine, STRATEGY_CONFIGS
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from utils.backtesting import BacktestEngine, STRATEGY_CONFIGS, summarize_portfolio_results
+from utils.trading.portfolio_simulator import PortfolioSimulator
+from utils.monte_carlo import run_monte_carlo, DEFAULT_ITERATIONS, MAX_ITERATIONS, METHODS as MONTE_CARLO_METHODS
+from utils.db_utils import JobStateTransactions, get_job_status
+from utils.api_utils import SafeJsonParser
+from infrastructure.thread_tasks import start_backtest_job, cancel_job as cancel_thread_job
+from database import query_db
+from config import config
+import json
 import logging
+import time
+import uuid
 
 bp = Blueprint('backtesting', __name__, url_prefix='/api/backtest')
 logger = logging.getLogger('trading_analyzer')
 
+# Synchronous simulations fetch every ticker inside the request
+MAX_SIMULATION_TICKERS = 200
+
 
 @bp.route('/strategies', methods=['GET'])
 def get_strategies():
@@ -59,9 +73,14 @@ def backtest_ticker(ticker):
     Query params:
     - days: Historical days to analyze (30-365, default 90)
     - strategy_id: Strategy to backtest (1-5, default 5)
+    - monte_carlo: Attach Monte Carlo robustness stats (true/false, default false)
+    - mc_iterations: Simulated trade sequences (default 2000)
+    - mc_method: 'bootstrap' (default) or 'permute'
+    - seed: RNG seed for reproducible Monte Carlo results
     
     Example:
         GET /api/backtest/ticker/RELIANCE.NS?days=90&strategy_id=5
+        GET /api/backtest/ticker/RELIANCE.NS?monte_carlo=true&seed=42
     
     Returns:
         {
@@ -95,13 +114,18 @@ def backtest_ticker(ticker):
                     'rsi': 58.5
                 },
                 ...
-            ]
+            ],
+            'monte_carlo': { run_monte_carlo() result }   # only with monte_carlo=true
         }
     """
     try:
         # Get parameters
         days = request.args.get('days', 90, type=int)
         strategy_id = request.args.get('strategy_id', 5, type=int)
+        monte_carlo = request.args.get('monte_carlo', 'false').lower() in ('true', '1', 'yes')
+        mc_iterations = request.args.get('mc_iterations', DEFAULT_ITERATIONS, type=int)
+        mc_method = request.args.get('mc_method', 'bootstrap')
+        seed = request.args.get('seed', None, type=int)
         
         # Validate
         if days < 30 or days > 365:
@@ -110,6 +134,12 @@ def backtest_ticker(ticker):
         if strategy_id not in STRATEGY_CONFIGS:
             return jsonify({'error': f'Invalid strategy_id: {strategy_id}. Must be 1-5.'}), 400
         
+        if monte_carlo:
+            if mc_method not in MONTE_CARLO_METHODS:
+                return jsonify({'error': f"mc_method must be one of {', '.join(MONTE_CARLO_METHODS)}"}), 400
+            if mc_iterations < 1 or mc_iterations > MAX_ITERATIONS:
+                return jsonify({'error': f'mc_iterations must be between 1 and {MAX_ITERATIONS}'}), 400
+        
         logger.info(f"[API] Backtest request: {ticker} ({days} days, strategy_id={strategy_id})")
         
         # Run backtest
@@ -120,6 +150,14 @@ def backtest_ticker(ticker):
             logger.warning(f"[API] Backtest failed for {ticker}: {result['error']}")
             return jsonify(result), 400
         
+        if monte_carlo:
+            result['monte_carlo'] = run_monte_carlo(
+                result.get('trades', []),
+                iterations=mc_iterations,
+                method=mc_method,
+                seed=seed
+            )
+        
         return jsonify(result), 200
         
     except ValueError as e:
@@ -130,28 +168,84 @@ def backtest_ticker(ticker):
         return jsonify({'error': str(e)}), 500
 
 
+def _run_ticker_backtest(ticker: str, days: int, strategy_id: int, include_closes: bool = False) -> dict:
+    """Backtest one ticker on a worker thread (one engine per call, no shared state)."""
+    try:
+        engine = BacktestEngine(strategy_id=strategy_id)
+        return engine.backtest_ticker(ticker, days=days, include_closes=include_closes)
+    except Exception as e:
+        logger.error(f"[API] Backtest worker failed for {ticker}: {str(e)}", exc_info=True)
+        return {'error': f'Backtest failed: {str(e)}', 'ticker': ticker}
+
+
+def _iter_portfolio_results(tickers, days: int, strategy_id: int, include_closes: bool = False):
+    """
+    Run ticker backtests on a bounded worker pool.
+    
+    Yields (ticker, result) tuples in completion order so callers can
+    forward each result as soon as it is ready. If the generator is closed
+    early (e.g. the streaming client disconnected), tickers that have not
+    started yet are cancelled instead of being run for nobody.
+    """
+    workers = max(1, min(config.MAX_BACKTEST_WORKERS, len(tickers)))
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='backtest')
+    try:
+        futures = {
+            executor.submit(_run_ticker_backtest, ticker, days, strategy_id, include_closes): ticker
+            for ticker in tickers
+        }
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+    except BaseException:
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    executor.shutdown()
+
+
+def _encode_stream_record(record: dict, fmt: str) -> str:
+    """Encode one stream record as an NDJSON line or an SSE event."""
+    payload = json.dumps(record, default=str)
+    if fmt == 'sse':
+        return f"event: {record['type']}\ndata: {payload}\n\n"
+    return payload + '\n'
+
+
 @bp.route('/portfolio', methods=['POST'])
 def backtest_portfolio():
     """
-    Backtest multiple tickers.
+    Backtest multiple tickers in parallel.
+    
+    Tickers run on a worker pool (MAX_BACKTEST_WORKERS) and each result is
+    streamed as soon as it finishes, so the first rows arrive within seconds
+    instead of after the whole portfolio completes.
     
     Body:
         {
             'tickers': ['RELIANCE.NS', 'TCS.NS', 'INFY.NS'],
             'days': 90,
-            'strategy_id': 5
+            'strategy_id': 5,
+            'stream': true          # optional, default true
         }
     
-    Returns:
+    Query params:
+    - format: 'ndjson' (default) or 'sse'
+    
+    Streamed response (application/x-ndjson, one JSON object per line):
+        {"type": "start", "tickers": 3, "days": 90, "strategy_id": 5, ...}
+        {"type": "result", "ticker": "TCS.NS", "completed": 1, "total": 3, "result": { backtest_result }}
+        ...
+        {"type": "summary", "elapsed_seconds": 4.2, ... summarize_portfolio_results() ...}
+    
+    With 'stream': false the legacy single document is returned:
         {
             'tickers_analyzed': 3,
             'strategy_id': 5,
             'strategy_name': 'Weekly 4% Target',
             'results': {
                 'RELIANCE.NS': { backtest_result },
-                'TCS.NS': { backtest_result },
-                'INFY.NS': { backtest_result }
-            }
+                ...
+            },
+            'summary': { ... }
         }
     """
     try:
@@ -160,6 +254,8 @@ def backtest_portfolio():
         tickers = data.get('tickers', [])
         days = data.get('days', 90)
         strategy_id = data.get('strategy_id', 5)
+        stream = data.get('stream', True)
+        fmt = request.args.get('format', 'ndjson').lower()
         
         # Validate
         if not tickers:
@@ -177,31 +273,157 @@ def backtest_portfolio():
         if strategy_id not in STRATEGY_CONFIGS:
             return jsonify({'error': f'Invalid strategy_id: {strategy_id}. Must be 1-5.'}), 400
         
-        logger.info(f"[API] Portfolio backtest: {len(tickers)} tickers ({days} days, strategy_id={strategy_id})")
+        if fmt not in ('ndjson', 'sse'):
+            return jsonify({'error': "format must be 'ndjson' or 'sse'"}), 400
         
-        # Run backtest for each ticker
-        engine = BacktestEngine(strategy_id=strategy_id)
-        results = {}
+        # Duplicate tickers would be backtested twice for the same result
+        tickers = list(dict.fromkeys(tickers))
+        strategy_name = STRATEGY_CONFIGS[strategy_id]['name']
         
-        for ticker in tickers:
-            logger.debug(f"[API] Backtesting {ticker}...")
-            results[ticker] = engine.backtest_ticker(ticker, days=days)
+        logger.info(f"[API] Portfolio backtest: {len(tickers)} tickers ({days} days, strategy_id={strategy_id}, stream={stream})")
         
-        logger.info(f"[API] Portfolio backtest complete: {len(tickers)} tickers")
+        if not stream:
+            results = dict(_iter_portfolio_results(tickers, days, strategy_id))
+            logger.info(f"[API] Portfolio backtest complete: {len(tickers)} tickers")
+            return jsonify({
+                'tickers_analyzed': len(tickers),
+                'days': days,
+                'strategy_id': strategy_id,
+                'strategy_name': strategy_name,
+                'results': {ticker: results[ticker] for ticker in tickers},
+                'summary': summarize_portfolio_results(results)
+            }), 200
+        
+        def generate():
+            started = time.monotonic()
+            results = {}
+            yield _encode_stream_record({
+                'type': 'start',
+                'tickers': len(tickers),
+                'days': days,
+                'strategy_id': strategy_id,
+                'strategy_name': strategy_name
+            }, fmt)
+            
+            for ticker, result in _iter_portfolio_results(tickers, days, strategy_id):
+                results[ticker] = result
+                yield _encode_stream_record({
+                    'type': 'result',
+                    'ticker': ticker,
+                    'completed': len(results),
+                    'total': len(tickers),
+                    'result': result
+                }, fmt)
+            
+            summary = {
+                'type': 'summary',
+                'days': days,
+                'strategy_id': strategy_id,
+                'strategy_name': strategy_name,
+                **summarize_portfolio_results(results),
+                'elapsed_seconds': round(time.monotonic() - started, 2)
+            }
+            logger.info(f"[API] Portfolio backtest streamed: {len(tickers)} tickers in {summary['elapsed_seconds']}s")
+            yield _encode_stream_record(summary, fmt)
+        
+        mimetype = 'text/event-stream' if fmt == 'sse' else 'application/x-ndjson'
+        response = Response(stream_with_context(generate()), mimetype=mimetype)
+        # Keep reverse proxies from buffering the stream
+        response.headers['Cache-Control'] = 'no-cache'
+        response.headers['X-Accel-Buffering'] = 'no'
+        return response
+        
+    except (ValueError, TypeError) as e:
+        logger.error(f"[API] Invalid parameter: {str(e)}")
+        return jsonify({'error': f'Invalid parameter: {str(e)}'}), 400
+    except Exception as e:
+        logger.error(f"[API] Portfolio backtest failed: {str(e)}", exc_info=True)
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/portfolio-simulation', methods=['POST'])
+def simulate_portfolio():
+    """
+    Simulate a capital-constrained portfolio across many tickers.
+    
+    Each ticker is backtested on the worker pool, then all trades are
+    replayed on a common date axis with fixed capital and at most
+    max_positions concurrent holdings (RiskManager position sizing).
+    Open positions are marked to each bar's close, so equity, exposure and
+    drawdown include unrealized P&L.
+    
+    Body:
+        {
+            'tickers': ['RELIANCE.NS', 'TCS.NS', 'INFY.NS'],
+            'days': 365,
+            'strategy_id': 5,
+            'capital': 100000,          # optional
+            'max_positions': 5,         # optional, default 10
+            'include_curve': true       # optional
+        }
+    
+    Returns:
+        {
+            'tickers_analyzed': 3,
+            'days': 365,
+            'strategy_id': 5,
+            'strategy_name': 'Weekly 4% Target',
+            'failed_tickers': [],
+            'portfolio': { PortfolioSimulator.run() result }
+        }
+    """
+    try:
+        data = request.json or {}
+        tickers = data.get('tickers', [])
+        days = data.get('days', 90)
+        strategy_id = data.get('strategy_id', 5)
+        capital = data.get('capital')
+        max_positions = data.get('max_positions', PortfolioSimulator.DEFAULT_MAX_POSITIONS)
+        include_curve = bool(data.get('include_curve', True))
+        
+        if not tickers or not isinstance(tickers, list):
+            return jsonify({'error': 'tickers array required'}), 400
+        
+        if len(tickers) > MAX_SIMULATION_TICKERS:
+            return jsonify({'error': f'Maximum {MAX_SIMULATION_TICKERS} tickers per simulation'}), 400
+        
+        if days < 30 or days > 365:
+            return jsonify({'error': 'days must be between 30 and 365'}), 400
+        
+        if strategy_id not in STRATEGY_CONFIGS:
+            return jsonify({'error': f'Invalid strategy_id: {strategy_id}. Must be 1-5.'}), 400
+        
+        tickers = list(dict.fromkeys(tickers))
+        simulator = PortfolioSimulator(initial_capital=capital, max_positions=max_positions)
+        
+        logger.info(f"[API] Portfolio simulation: {len(tickers)} tickers ({days} days, "
+                    f"strategy_id={strategy_id}, max_positions={simulator.max_positions})")
+        
+        # Feed trades and closes in as each ticker finishes; full results are not retained
+        failed = []
+        for ticker, result in _iter_portfolio_results(tickers, days, strategy_id, include_closes=True):
+            if 'error' in result:
+                failed.append(ticker)
+                continue
+            simulator.add_trades(ticker, result.get('trades', []))
+            closes = result.get('closes')
+            if closes:
+                simulator.add_prices(ticker, closes['dates'], closes['close'])
         
         return jsonify({
             'tickers_analyzed': len(tickers),
             'days': days,
             'strategy_id': strategy_id,
             'strategy_name': STRATEGY_CONFIGS[strategy_id]['name'],
-            'results': results
+            'failed_tickers': sorted(failed),
+            'portfolio': simulator.run(include_curve=include_curve)
         }), 200
         
-    except ValueError as e:
+    except (ValueError, TypeError) as e:
         logger.error(f"[API] Invalid parameter: {str(e)}")
         return jsonify({'error': f'Invalid parameter: {str(e)}'}), 400
     except Exception as e:
-        logger.error(f"[API] Portfolio backtest failed: {str(e)}", exc_info=True)
+        logger.error(f"[API] Portfolio simulation failed: {str(e)}", exc_info=True)
         return jsonify({'error': str(e)}), 500
 
 
@@ -273,3 +495,191 @@ def compare_strategies():
     except Exception as e:
         logger.error(f"[API] Strategy comparison failed: {str(e)}", exc_info=True)
         return jsonify({'error': str(e)}), 500
+
+
+# =============================================================================
+# ASYNC BACKTEST JOBS
+# =============================================================================
+# Large or sweep backtests run as background jobs on the analysis job
+# infrastructure (analysis_jobs row + JobStateManager + run_ticker_batch).
+
+MAX_JOB_TICKERS = 2500
+
+
+@bp.route('/jobs', methods=['POST'])
+def submit_backtest_job():
+    """
+    Submit a backtest as a background job.
+    
+    Body:
+        {
+            'tickers': ['RELIANCE.NS', 'TCS.NS', ...],
+            'days': 365,
+            'strategy_id': 5,           # or
+            'strategies': [1, 2, 5]     # sweep: every ticker x every strategy
+        }
+    
+    Returns (202):
+        {
+            'job_id': '...',
+            'status': 'queued',
+            'total': 120,
+            'strategies': [5],
+            'status_url': '/api/backtest/jobs/<job_id>',
+            'results_url': '/api/backtest/jobs/<job_id>/results'
+        }
+    """
+    try:
+        data = request.json or {}
+        tickers = data.get('tickers', [])
+        days = data.get('days', 90)
+        strategies = data.get('strategies') or [data.get('strategy_id', 5)]
+        
+        if not tickers or not isinstance(tickers, list):
+            return jsonify({'error': 'tickers array required'}), 400
+        
+        if not all(isinstance(t, str) and t.strip() for t in tickers):
+            return jsonify({'error': 'tickers must be non-empty strings'}), 400
+        
+        if len(tickers) > MAX_JOB_TICKERS:
+            return jsonify({'error': f'Maximum {MAX_JOB_TICKERS} tickers per backtest job'}), 400
+        
+        if days < 30 or days > 365:
+            return jsonify({'error': 'days must be between 30 and 365'}), 400
+        
+        if not isinstance(strategies, list) or any(s not in STRATEGY_CONFIGS for s in strategies):
+            return jsonify({'error': 'strategies must be a list of valid strategy ids (1-5)'}), 400
+        
+        tickers = list(dict.fromkeys(t.upper().strip() for t in tickers))
+        strategies = list(dict.fromkeys(strategies))
+        job_id = str(uuid.uuid4())
+        
+        created = JobStateTransactions.create_job_atomic(
+            job_id=job_id,
+            status='queued',
+            total=len(tickers),
+            description=f"Backtest {len(tickers)} ticker(s), {days} days, strategies {strategies}",
+            tickers=tickers,
+            strategy_id=strategies[0],
+            job_type='backtest'
+        )
+        if not created:
+            return jsonify({'error': 'Failed to create backtest job', 'job_id': job_id}), 500
+        
+        started = start_backtest_job(job_id, tickers, days, strategies)
+        logger.info(f"[API] Backtest job {job_id} queued: {len(tickers)} tickers, strategies={strategies}")
+        
+        return jsonify({
+            'job_id': job_id,
+            'status': 'queued',
+            'total': len(tickers),
+            'days': days,
+            'strategies': strategies,
+            'thread_started': started,
+            'status_url': f'/api/backtest/jobs/{job_id}',
+            'results_url': f'/api/backtest/jobs/{job_id}/results'
+        }), 202
+        
+    except (ValueError, TypeError) as e:
+        logger.error(f"[API] Invalid parameter: {str(e)}")
+        return jsonify({'error': f'Invalid parameter: {str(e)}'}), 400
+    except Exception as e:
+        logger.error(f"[API] Backtest job submission failed: {str(e)}", exc_info=True)
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/jobs/<job_id>', methods=['GET'])
+def get_backtest_job(job_id):
+    """
+    Get progress of a backtest job (per-ticker progress, errors, last ticker).
+    """
+    try:
+        status = get_job_status(job_id)
+        if not status:
+            return jsonify({'error': f'Job {job_id} not found'}), 404
+        
+        last = query_db(
+            'SELECT ticker FROM backtest_results WHERE job_id = ? ORDER BY id DESC LIMIT 1',
+            (job_id,),
+            one=True
+        )
+        status['current_ticker'] = last[0] if last else None
+        status['errors'] = SafeJsonParser.parse_string(status.get('errors'), default=[])
+        return jsonify(status), 200
+        
+    except Exception as e:
+        logger.error(f"[API] Backtest job status failed for {job_id}: {str(e)}", exc_info=True)
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/jobs/<job_id>/results', methods=['GET'])
+def get_backtest_job_results(job_id):
+    """
+    Get persisted results of a backtest job (available while it is still running).
+    
+    Query params:
+    - include_trades: Include per-trade detail (default false)
+    
+    Returns:
+        {
+            'job_id': '...',
+            'status': 'completed',
+            'results': {'RELIANCE.NS': {'5': { backtest_result }}, ...},
+            'summary': {'5': { summarize_portfolio_results() }}
+        }
+    """
+    try:
+        status = get_job_status(job_id)
+        if not status:
+            return jsonify({'error': f'Job {job_id} not found'}), 404
+        
+        include_trades = request.args.get('include_trades', 'false').lower() in ('true', '1', 'yes')
+        rows = query_db(
+            'SELECT ticker, strategy_id, result, error FROM backtest_results WHERE job_id = ? ORDER BY id',
+            (job_id,)
+        )
+        
+        results = {}
+        by_strategy = {}
+        for ticker, strategy_id, result_json, error in rows:
+            result = json.loads(result_json) if result_json else {'error': error, 'ticker': ticker}
+            by_strategy.setdefault(str(strategy_id), {})[ticker] = result
+            if not include_trades:
+                result = {k: v for k, v in result.items() if k not in ('trades', 'excluded_trades_detail')}
+            results.setdefault(ticker, {})[str(strategy_id)] = result
+        
+        return jsonify({
+            'job_id': job_id,
+            'status': status['status'],
+            'completed': status['completed'],
+            'total': status['total'],
+            'results': results,
+            'summary': {sid: summarize_portfolio_results(res) for sid, res in by_strategy.items()}
+        }), 200
+        
+    except Exception as e:
+        logger.error(f"[API] Backtest job results failed for {job_id}: {str(e)}", exc_info=True)
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_backtest_job(job_id):
+    """Cancel a queued/processing backtest job; results persisted so far are kept."""
+    try:
+        status = get_job_status(job_id)
+        if not status:
+            return jsonify({'error': f'Job {job_id} not found'}), 404
+        
+        if status['status'] not in ('queued', 'processing'):
+            return jsonify({'error': f"Cannot cancel job in {status['status']} state"}), 400
+        
+        # DB status stops the runner even if it lives in another worker process
+        JobStateTransactions.mark_job_completed(job_id, 'cancelled')
+        cancel_thread_job(job_id)
+        
+        logger.info(f"[API] Backtest job {job_id} cancelled by user")
+        return jsonify({'job_id': job_id, 'status': 'cancelled'}), 200
+        
+    except Exception as e:
+        logger.error(f"[API] Backtest job cancel failed for {job_id}: {str(e)}", exc_info=True)
+        return jsonify({'error': str(e)}), 500
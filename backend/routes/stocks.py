@@ -1,18 +1,22 @@
 """
 Stocks routes - NSE stock list and bulk analysis
 """
-import csv
 import json
 import uuid
-import time
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, jsonify, request, stream_with_context
 from utils.logger import setup_logger
 from utils.api_utils import StandardizedErrorResponse, validate_request, RequestValidator
 from utils.timezone_util import get_ist_timestamp
 from database import query_db, execute_db, get_db_connection
-from utils.db_utils import JobStateTransactions, get_job_status
+from utils.db_utils import JobStateTransactions, ResultInsertion, get_job_status, indicator_vote_condition
+from utils.pagination import count_rows, keyset_condition, parse_count_mode, parse_limit, split_page
+from utils.data.nse_universe import get_nse_universe
+from utils.data.result_export import EXPORT_FORMATS, ExportFilter, parquet_available, stream_results_export
+from utils.analysis.freshness import parse_freshness_policy, reused_summary, split_by_freshness
+from utils.infrastructure.response_cache import cached_response, invalidate_responses
+from models.job_state import get_job_state_manager
 
 logger = setup_logger()
 bp = Blueprint("stocks", __name__, url_prefix="/api/stocks")
@@ -23,18 +27,31 @@ def _data_root() -> Path:
     return Path(__file__).parent.parent / "data"
 
 
+def _nse_universe():
+    """Loaded-once NSE universe index (None if the CSV is missing)"""
+    csv_path = _data_root() / "nse_stocks_complete.csv"
+    try:
+        return get_nse_universe(csv_path)
+    except FileNotFoundError:
+        logger.warning(f"NSE CSV not found at {csv_path}")
+        return None
+
+
 @bp.route("/all", methods=["GET"])
 def get_all_nse_stocks():
     """
     Get ALL NSE stocks from CSV (2,192 stocks).
     Used for Add Stock Modal and All Stocks Analysis page.
     Returns stocks in pagination-friendly format.
+    
+    Query params:
+        page, per_page: Pagination (per_page 1-500, default 50)
+        q: Symbol / company name prefix (case-insensitive)
+        sector, industry: Exact sector / industry filters
     """
     try:
-        csv_path = _data_root() / "nse_stocks_complete.csv"
-        
-        if not csv_path.exists():
-            logger.warning(f"NSE CSV not found at {csv_path}")
+        universe = _nse_universe()
+        if universe is None:
             return StandardizedErrorResponse.format(
                 "FILE_NOT_FOUND",
                 "NSE stock list not available",
@@ -51,23 +68,18 @@ def get_all_nse_stocks():
         if per_page < 1 or per_page > 500:
             per_page = 50
         
-        stocks = []
-        with open(csv_path, "r", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                stocks.append({
-                    'symbol': row.get('symbol', '').strip(),
-                    'name': row.get('name', '').strip(),
-                    'yahoo_symbol': row.get('yahoo_symbol', '').strip(),
-                    'sector': row.get('sector', '').strip(),
-                    'industry': row.get('industry', '').strip()
-                })
+        indices = universe.filter_indices(request.args.get("sector"), request.args.get("industry"))
+        prefix = request.args.get("q", "").strip()
+        if prefix:
+            matches = universe.search_prefix(prefix)
+            if indices is not None:
+                allowed = set(indices)
+                matches = [i for i in matches if i in allowed]
+            indices = matches
         
         # Calculate pagination
-        total = len(stocks)
-        start_idx = (page - 1) * per_page
-        end_idx = start_idx + per_page
-        paginated = stocks[start_idx:end_idx]
+        total = len(universe) if indices is None else len(indices)
+        paginated = universe.page(page, per_page, indices)
         
         logger.info(f"Retrieved {len(paginated)} stocks (page {page}) from NSE list")
         return jsonify({
@@ -89,27 +101,77 @@ def get_all_nse_stocks():
         )
 
 
+@bp.route("/search", methods=["GET"])
+def search_nse_stocks():
+    """
+    Ranked typeahead search over NSE symbols and company names.
+    Used by the Add Stock Modal instead of downloading the full list.
+
+    Query params:
+        q: Search text (required)
+        limit: Max results (1-50, default 10)
+        exclude: Comma-separated yahoo symbols to leave out (already added)
+    """
+    try:
+        query = request.args.get("q", "").strip()
+        if not query:
+            return StandardizedErrorResponse.format(
+                "INVALID_QUERY",
+                "Search query 'q' is required",
+                400
+            )
+        limit = parse_limit(request.args.get("limit", type=int), 10, 50)
+        exclude = {
+            s.strip().upper() for s in request.args.get("exclude", "").split(",") if s.strip()
+        }
+
+        universe = _nse_universe()
+        if universe is None:
+            return StandardizedErrorResponse.format(
+                "FILE_NOT_FOUND",
+                "NSE stock list not available",
+                404
+            )
+
+        # Over-fetch so excluded rows don't shrink the result below `limit`
+        results = []
+        for idx, score, match in universe.search(query, limit + len(exclude)):
+            row = universe.records[idx]
+            if row['yahoo_symbol'].upper() in exclude:
+                continue
+            results.append(dict(row, score=round(score, 2), match=match))
+            if len(results) >= limit:
+                break
+
+        return jsonify({
+            "query": query,
+            "results": results,
+            "count": len(results)
+        }), 200
+
+    except Exception as e:
+        logger.exception("search_nse_stocks error")
+        return StandardizedErrorResponse.format(
+            "NSE_SEARCH_ERROR",
+            "Failed to search NSE stocks",
+            500,
+            {"error": str(e)}
+        )
+
+
 @bp.route("/nse", methods=["GET"])
 def get_nse_list():
     """Get list of NSE stocks from CSV"""
     try:
-        csv_path = _data_root() / "nse_stocks_complete.csv"
-        
-        if not csv_path.exists():
-            logger.warning(f"NSE CSV not found at {csv_path}")
+        universe = _nse_universe()
+        if universe is None:
             return StandardizedErrorResponse.format(
                 "FILE_NOT_FOUND",
                 "NSE stock list not available",
                 404
             )
         
-        stocks = []
-        with open(csv_path, "r", encoding="utf-8") as f:
-            header = f.readline().strip().split(",")
-            for line in f:
-                parts = line.strip().split(",")
-                if len(parts) >= len(header):
-                    stocks.append(dict(zip(header, parts[:len(header)])))
+        stocks = universe.rows()
         
         logger.info(f"Retrieved {len(stocks)} stocks from NSE list")
         return jsonify({
@@ -148,26 +210,22 @@ def get_nse_stocks():
         except Exception as db_error:
             logger.warning(f"Database query failed, falling back to CSV: {db_error}")
         
-        # Fall back to CSV file
-        csv_path = _data_root() / "nse_stocks_complete.csv"
-        if csv_path.exists():
-            import csv
-            stocks = []
-            with open(csv_path, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    stocks.append({
-                        'symbol': row.get('SYMBOL', row.get('symbol', '')),
-                        'name': row.get('NAME OF COMPANY', row.get('name', row.get('company_name', ''))),
-                        'ticker': f"{row.get('SYMBOL', row.get('symbol', ''))}.NS",
-                        'sector': row.get('sector', ''),
-                        'industry': row.get('industry', ''),
-                        'market_cap': row.get('market_cap', 0)
-                    })
+        # Fall back to the CSV universe (limit to 500 for performance)
+        universe = _nse_universe()
+        if universe is not None:
+            limit = min(len(universe), 500)
+            stocks = [{
+                'symbol': universe.symbols[i],
+                'name': universe.names[i],
+                'ticker': f"{universe.symbols[i]}.NS",
+                'sector': universe.sectors[i],
+                'industry': universe.industries[i],
+                'market_cap': 0
+            } for i in range(limit)]
             
             return jsonify({
-                "stocks": stocks[:500],  # Limit to 500 for performance
-                "count": len(stocks)
+                "stocks": stocks,
+                "count": len(universe)
             }), 200
         
         # No data available
@@ -200,16 +258,18 @@ def get_all_stocks():
         if offset < 0:
             offset = 0
         
+        # latest_analysis holds one row per (symbol, strategy), so this scales
+        # with the stock universe rather than the full analysis history
         stocks = query_db("""
-            SELECT DISTINCT ticker, symbol, MAX(created_at) as latest_analysis
-            FROM analysis_results
+            SELECT ticker, symbol, MAX(created_at) as latest_analysis
+            FROM latest_analysis
             GROUP BY ticker, symbol
             ORDER BY latest_analysis DESC
             LIMIT ? OFFSET ?
         """, (limit, offset))
         
         total = query_db(
-            "SELECT COUNT(DISTINCT ticker) as count FROM analysis_results",
+            "SELECT COUNT(DISTINCT ticker) as count FROM latest_analysis",
             one=True
         )
         
@@ -232,8 +292,15 @@ def get_all_stocks():
 
 
 @bp.route("/all-stocks/<symbol>/history", methods=["GET"])
+@cached_response(tags=('results',))
 def get_stock_history(symbol):
-    """Get analysis history for a specific stock"""
+    """
+    Get analysis history for a specific stock (newest first)
+    
+    Query params:
+        cursor: Opaque token from a previous response's next_cursor
+        limit: Page size (1-200, default 50)
+    """
     try:
         if not symbol or len(symbol.strip()) == 0:
             return StandardizedErrorResponse.format(
@@ -242,18 +309,27 @@ def get_stock_history(symbol):
                 400
             )
         
-        results = query_db("""
+        limit = parse_limit(request.args.get("limit", type=int), 50, 200)
+        try:
+            keyset_sql, keyset_params = keyset_condition(request.args.get("cursor"))
+        except ValueError as e:
+            return StandardizedErrorResponse.format("INVALID_CURSOR", str(e), 400)
+        
+        results = query_db(f"""
             SELECT id, ticker, symbol, verdict, score, entry, stop_loss, target, created_at
             FROM analysis_results
-            WHERE LOWER(symbol) = LOWER(?)
-            ORDER BY created_at DESC
-            LIMIT 50
-        """, (symbol,))
+            WHERE LOWER(symbol) = LOWER(?) {keyset_sql}
+            ORDER BY created_at DESC, id DESC
+            LIMIT ?
+        """, (symbol,) + keyset_params + (limit + 1,))
+        results, next_cursor = split_page(results, limit, created_at_index=8)
         
         return jsonify({
             "symbol": symbol,
             "history": [dict(r) for r in results],
-            "count": len(results)
+            "count": len(results),
+            "next_cursor": next_cursor,
+            "has_more": next_cursor is not None
         }), 200
         
     except Exception as e:
@@ -266,89 +342,19 @@ def get_stock_history(symbol):
         )
 
 
-def _get_active_job_for_symbols(symbols: list, strategy_id: int = 1) -> dict:
-    """
-    Check if an identical job is already running for the exact same symbol set AND strategy.
-    Returns the existing job info or None if safe to create new job.
-    
-    Only considers jobs "duplicate" if:
-    - Same symbols (in any order) - normalized by uppercase + trim
-    - Same strategy_id (different strategies can run concurrently)
-    - Status is 'queued' or 'processing'
-    - Within last 5 minutes (to avoid stale locks)
-    
-    Different symbol sets or different strategies are NOT blocked and can run concurrently.
-    """
-    try:
-        # Normalize requested symbols: uppercase, trim, sort
-        normalized_symbols = sorted([s.upper().strip() for s in symbols])
-        requested_json = json.dumps(normalized_symbols)
-        
-        # Get active jobs from last 5 minutes WITH SAME STRATEGY
-        from datetime import timedelta
-        from utils.timezone_util import get_ist_now
-        five_min_ago = (get_ist_now() - timedelta(minutes=5)).isoformat()
-        
-        active_jobs = query_db("""
-            SELECT job_id, status, total, completed, created_at, tickers_json, strategy_id
-            FROM analysis_jobs
-            WHERE status IN ('queued', 'processing')
-              AND created_at > ?
-              AND strategy_id = ?
-            ORDER BY created_at DESC
-            LIMIT 20
-        """, (five_min_ago, strategy_id))
-        
-        if not active_jobs:
-            return None
-        
-        # Check if this is a bulk analysis request (> 100 symbols)
-        is_bulk_request = len(symbols) > 100
-        
-        # Check each active job for exact symbol match
-        for job_id, status, total, completed, created_at, tickers_json, job_strategy_id in active_jobs:
-            # Skip jobs with no tickers_json (shouldn't happen, but be safe)
-            if not tickers_json:
-                continue
-            
-            try:
-                job_data = json.loads(tickers_json)
-                
-                # Handle bulk marker format: {"type": "bulk", "count": 2000}
-                if isinstance(job_data, dict) and job_data.get("type") == "bulk":
-                    # Both are bulk jobs - consider as duplicate if same count AND same strategy
-                    if is_bulk_request and job_data.get("count") == len(symbols):
-                        logger.info(f"Found active bulk job {job_id} with same count ({len(symbols)}) and strategy {strategy_id}")
-                        return {
-                            "job_id": job_id,
-                            "status": status,
-                            "total": total,
-                            "completed": completed,
-                            "created_at": created_at
-                        }
-                    continue
-                
-                # Handle normal list format
-                if isinstance(job_data, list):
-                    # Compare normalized symbol sets
-                    if job_data == normalized_symbols:
-                        logger.info(f"Found active job {job_id} with matching symbols and strategy {strategy_id}, status {status}")
-                        return {
-                            "job_id": job_id,
-                            "status": status,
-                            "total": total,
-                            "completed": completed,
-                            "created_at": created_at
-                        }
-            except json.JSONDecodeError:
-                logger.warning(f"Failed to parse tickers_json for job {job_id}")
-                continue
-        
-        # No matching job found
-        return None
-    except Exception as e:
-        logger.error(f"Error checking for active jobs: {e}")
-        return None
+def _duplicate_job_response(active_job: dict, symbols: list, capital):
+    """200 response pointing the client at the already-active identical job"""
+    return jsonify({
+        "job_id": active_job["job_id"],
+        "status": active_job["status"],
+        "is_duplicate": True,
+        "message": "Analysis already running for these symbols",
+        "total": active_job["total"],
+        "completed": active_job["completed"],
+        "symbols": symbols,
+        "capital": capital,
+        "count": len(symbols)
+    }), 200
 
 
 @bp.route("/analyze-all-stocks", methods=["POST"])
@@ -360,8 +366,13 @@ def analyze_all_stocks():
     {
         "symbols": ["TCS.NS", "INFY.NS"],  # Empty array [] means analyze ALL stocks
         "capital": 100000,
-        "force": false  # Set true to bypass duplicate check and force new analysis
+        "force": false,  # Set true to bypass duplicate check and force new analysis
+        "freshness_policy": "reuse_fresh"  # Or "recompute" (default: ANALYSIS_FRESHNESS_POLICY)
     }
+    
+    With "reuse_fresh", symbols already analyzed with the same strategy and
+    config since the last market bar are served from analysis_results and
+    only the rest are queued; the job counts them as completed ("reused").
     """
     try:
         data = request.get_json() or {}
@@ -379,6 +390,10 @@ def analyze_all_stocks():
             symbols = []
         capital = validated_data.get("capital", 100000) if validated_data else 100000
         force = data.get("force", False)  # Force new job even if one is running
+        try:
+            freshness_policy = parse_freshness_policy(data.get("freshness_policy"))
+        except ValueError as e:
+            return StandardizedErrorResponse.format("INVALID_REQUEST", str(e), 400)
         
         # Extract additional config parameters
         strategy_id = data.get("strategy_id", 1)  # Default to Strategy 1
@@ -398,24 +413,17 @@ def analyze_all_stocks():
         if len(symbols) == 0:
             logger.info("Empty symbols array received - analyzing ALL stocks from NSE list")
             try:
-                # Get all stocks from NSE CSV (not just from database)
-                csv_path = _data_root() / "nse_stocks_complete.csv"
-                
-                if not csv_path.exists():
+                # Get all stocks from the NSE universe (not just from database)
+                universe = _nse_universe()
+                if universe is None:
                     return StandardizedErrorResponse.format(
                         "NO_STOCKS_FOUND",
                         "NSE stock list not available. Please ensure nse_stocks_complete.csv exists.",
                         400
                     )
                 
-                all_stocks = []
-                with open(csv_path, "r", encoding="utf-8") as f:
-                    reader = csv.DictReader(f)
-                    for row in reader:
-                        # Use yahoo_symbol (with .NS suffix) instead of bare symbol
-                        yahoo_symbol = row.get('yahoo_symbol', '').strip()
-                        if yahoo_symbol:
-                            all_stocks.append(yahoo_symbol)
+                # Use yahoo_symbol (with .NS suffix) instead of bare symbol
+                all_stocks = list(universe.yahoo_symbols)
                 
                 if not all_stocks:
                     return StandardizedErrorResponse.format(
@@ -436,81 +444,50 @@ def analyze_all_stocks():
                 )
         
         # Check for duplicate/active jobs (unless force=true)
+        # Same symbol set (any order) AND same strategy; other strategies run concurrently
         if not force:
-            active_job = _get_active_job_for_symbols(symbols, strategy_id)
+            active_job = JobStateTransactions.find_active_job(symbols, strategy_id)
             if active_job:
                 logger.info(f"Duplicate job request detected. Returning existing job {active_job['job_id']}")
-                return jsonify({
-                    "job_id": active_job["job_id"],
-                    "status": active_job["status"],
-                    "is_duplicate": True,
-                    "message": "Analysis already running for these symbols",
-                    "total": active_job["total"],
-                    "completed": active_job["completed"],
-                    "symbols": symbols,
-                    "capital": capital,
-                    "count": len(symbols)
-                }), 200
+                return _duplicate_job_response(active_job, symbols, capital)
+        
+        # Serve symbols with a fresh stored result; queue only the stale ones
+        fresh, pending = split_by_freshness(symbols, strategy_id, analysis_config, freshness_policy)
         
         # Create job ID
         job_id = str(uuid.uuid4())
-        logger.info(f"Creating new analysis job {job_id} for {len(symbols)} symbols")
+        logger.info(f"Creating new analysis job {job_id} for {len(symbols)} symbols "
+                    f"({len(pending)} to compute, {len(fresh)} reused)")
         
-        # Create job atomically with retries on db lock
-        max_retries = 3
-        created = False
-        for attempt in range(max_retries):
-            try:
-                created = JobStateTransactions.create_job_atomic(
-                    job_id=job_id,
-                    status="queued",
-                    total=len(symbols),
-                    description=f"Bulk analyze {len(symbols)} stock(s) (Strategy {strategy_id})",
-                    tickers=symbols,  # Include symbols for duplicate detection
-                    strategy_id=strategy_id  # Include strategy for duplicate detection
-                )
-                if created:
-                    break
-                else:
-                    # Job creation returned False, likely due to race condition
-                    # Retry with fresh check in case another thread just created it
-                    logger.warning(f"Job creation failed (attempt {attempt + 1}/{max_retries}), retrying...")
-                    time.sleep(0.1 * (attempt + 1))  # Exponential backoff
-                    
-                    # Check if job was created by concurrent request
-                    if attempt == max_retries - 1:
-                        try:
-                            active_job = _get_active_job_for_symbols(symbols, strategy_id)
-                            if active_job:
-                                logger.info(f"Found existing job {active_job['job_id']} created by concurrent request")
-                                return jsonify({
-                                    "job_id": active_job["job_id"],
-                                    "status": active_job["status"],
-                                    "is_duplicate": True,
-                                    "message": "Analysis already running for these symbols",
-                                    "total": active_job["total"],
-                                    "completed": active_job["completed"],
-                                    "symbols": symbols,
-                                    "capital": capital,
-                                    "count": len(symbols)
-                                }), 200
-                        except Exception as check_err:
-                            logger.warning(f"Could not check for existing job on final retry: {check_err}")
-                            # Continue to error response
-            except Exception as e:
-                logger.error(f"Exception during job creation (attempt {attempt + 1}/{max_retries}): {e}")
-                if attempt == max_retries - 1:
-                    return StandardizedErrorResponse.format(
-                        "JOB_CREATION_FAILED",
-                        "Failed to create analysis job",
-                        500,
-                        {"error": str(e), "job_id": job_id}
-                    )
+        # The active-digest unique index settles concurrent identical requests
+        try:
+            created = JobStateTransactions.create_job_atomic(
+                job_id=job_id,
+                status="queued",
+                total=len(symbols),
+                description=f"Bulk analyze {len(symbols)} stock(s) (Strategy {strategy_id})",
+                tickers=symbols,
+                strategy_id=strategy_id,
+                dedupe=not force,
+                reused=len(fresh)
+            )
+        except Exception as e:
+            logger.error(f"Exception during job creation: {e}")
+            return StandardizedErrorResponse.format(
+                "JOB_CREATION_FAILED",
+                "Failed to create analysis job",
+                500,
+                {"error": str(e), "job_id": job_id}
+            )
         
         if not created:
+            active_job = None if force else JobStateTransactions.find_active_job(symbols, strategy_id)
+            if active_job:
+                logger.info(f"Found existing job {active_job['job_id']} created by concurrent request")
+                return _duplicate_job_response(active_job, symbols, capital)
             return StandardizedErrorResponse.format(
                 "JOB_CREATION_FAILED",
-                "Failed to create analysis job after retries",
+                "Failed to create analysis job",
                 500,
                 {"job_id": job_id}
             )
@@ -519,9 +496,12 @@ def analyze_all_stocks():
         start_success = False
         try:
             from infrastructure.thread_tasks import start_analysis_job
-            start_success = start_analysis_job(job_id, symbols, None, capital, False, analysis_config, strategy_id)
+            start_success = start_analysis_job(
+                job_id, pending, None, capital, False, analysis_config, strategy_id,
+                reused=len(fresh), priority='bulk'
+            )
             if not start_success:
-                logger.error(f"Failed to start thread for job {job_id}")
+                logger.error(f"Failed to queue job {job_id}")
         except Exception as e:
             logger.error(f"Failed to start bulk analysis job {job_id}: {e}")
         
@@ -533,6 +513,10 @@ def analyze_all_stocks():
             "symbols": symbols,
             "capital": capital,
             "count": len(symbols),
+            "freshness_policy": freshness_policy,
+            "reused": len(fresh),
+            "recomputed": len(pending),
+            "reused_results": reused_summary(fresh),
             "thread_started": start_success
         }), 201
         
@@ -547,6 +531,7 @@ def analyze_all_stocks():
 
 
 @bp.route("/all-stocks/progress", methods=["GET"])
+@cached_response(tags=('jobs',), ttl=2)
 def get_all_stocks_progress():
     """Get progress of bulk analysis jobs"""
     try:
@@ -558,6 +543,7 @@ def get_all_stocks_progress():
             SELECT job_id, status, total, completed, successful, errors
             FROM analysis_jobs
             WHERE status IN ('queued', 'processing')
+              AND COALESCE(job_type, 'analysis') = 'analysis'
             ORDER BY created_at DESC
             LIMIT 20
         """)
@@ -573,6 +559,7 @@ def get_all_stocks_progress():
                 SELECT job_id, status, total, completed, successful, errors
                 FROM analysis_jobs
                 WHERE status IN ('completed', 'cancelled', 'failed')
+                AND COALESCE(job_type, 'analysis') = 'analysis'
                 AND completed_at > %s
                 ORDER BY completed_at DESC
                 LIMIT 5
@@ -582,6 +569,7 @@ def get_all_stocks_progress():
                 SELECT job_id, status, total, completed, successful, errors
                 FROM analysis_jobs
                 WHERE status IN ('completed', 'cancelled', 'failed')
+                AND COALESCE(job_type, 'analysis') = 'analysis'
                 AND completed_at > ?
                 ORDER BY completed_at DESC
                 LIMIT 5
@@ -594,6 +582,10 @@ def get_all_stocks_progress():
         total_analyzing = 0
         total_errors = 0
         
+        # Live counters of the active jobs, fetched in one call; they run
+        # ahead of the row when a per-ticker DB progress write was missed
+        live_jobs = get_job_state_manager().get_jobs([row[0] for row in jobs_rows])
+        
         # Process active jobs
         for row in jobs_rows:
             try:
@@ -601,6 +593,11 @@ def get_all_stocks_progress():
             except (json.JSONDecodeError, TypeError):
                 errors_list = []
             
+            live = live_jobs.get(row[0]) or {}
+            if (live.get('completed') or 0) > row[3]:
+                row = (row[0], row[1], row[2], live['completed'], live.get('successful') or row[4], row[5])
+                errors_list = live.get('errors') or errors_list
+            
             progress_pct = 0
             if row[3] > 0 and row[2] > 0:
                 progress_pct = int((row[3] / row[2]) * 100)
@@ -695,35 +692,54 @@ def get_all_stocks_progress():
 
 
 @bp.route("/all-stocks/results", methods=["GET"])
+@cached_response(tags=('results',))
 def get_all_analysis_results():
-    """Get all completed analysis results"""
+    """
+    Get all completed analysis results (newest first)
+    
+    Query params:
+        cursor: Opaque token from a previous response's next_cursor (keyset pagination)
+        page: Legacy page number, used only when no cursor is given
+        per_page: Page size (1-500, default 50)
+        count: 'exact' (cached COUNT), 'estimate' (planner estimate) or 'none'.
+               Defaults to 'exact' for page-based requests and 'none' with a cursor.
+        indicator, vote: Only results where `indicator` cast `vote` (e.g. indicator=RSI&vote=1)
+        latest: If true, only the newest result per (symbol, strategy) from
+                latest_analysis, optionally screened by:
+            verdict: Exact verdict match (e.g. 'Buy')
+            min_score: Minimum score
+            strategy_id: Strategy filter
+    """
     try:
-        # Get pagination params
+        if request.args.get("latest", "false").lower() in ("true", "1", "yes"):
+            return _get_latest_analysis_results()
+        
+        cursor = request.args.get("cursor")
         page = request.args.get("page", default=1, type=int)
-        per_page = request.args.get("per_page", default=50, type=int)
+        per_page = parse_limit(request.args.get("per_page", type=int), 50, 500)
+        count_mode = parse_count_mode(request.args.get("count"), "none" if cursor else "exact")
         
-        # Validate pagination
         if page < 1:
             page = 1
-        if per_page < 1 or per_page > 500:
-            per_page = 50
         
-        # Get total count - include all records with verdict/score (completed analysis)
-        total_result = query_db("""
-            SELECT COUNT(*) FROM analysis_results 
-            WHERE verdict IS NOT NULL
-        """, one=True)
-        total = total_result[0] if total_result else 0
+        try:
+            keyset_sql, keyset_params = keyset_condition(cursor)
+        except ValueError as e:
+            return StandardizedErrorResponse.format("INVALID_CURSOR", str(e), 400)
+        vote_sql, vote_params = indicator_vote_condition(
+            request.args.get("indicator"), request.args.get("vote", type=int)
+        )
         
-        # Get paginated results
-        offset = (page - 1) * per_page
-        rows = query_db("""
+        # Keyset page when a cursor is given; OFFSET only for legacy deep page numbers
+        offset = 0 if cursor else (page - 1) * per_page
+        rows = query_db(f"""
             SELECT id, ticker, symbol, name, yahoo_symbol, score, verdict, entry, stop_loss, target, created_at
             FROM analysis_results
-            WHERE verdict IS NOT NULL
-            ORDER BY created_at DESC
+            WHERE verdict IS NOT NULL {vote_sql} {keyset_sql}
+            ORDER BY created_at DESC, id DESC
             LIMIT ? OFFSET ?
-        """, (per_page, offset))
+        """, vote_params + keyset_params + (per_page + 1, offset))
+        rows, next_cursor = split_page(rows, per_page, created_at_index=10)
         
         results = []
         for row in rows:
@@ -745,15 +761,22 @@ def get_all_analysis_results():
                 # SQLite Row object
                 results.append(dict(row))
         
-        logger.info(f"[RESULTS] Retrieved {len(results)} analysis results (page {page})")
+        # Total is optional: cached exact count, planner estimate, or skipped
+        total = count_rows(f"FROM analysis_results WHERE verdict IS NOT NULL {vote_sql}", vote_params, mode=count_mode)
+        
+        logger.info(f"[RESULTS] Retrieved {len(results)} analysis results "
+                    f"({'cursor' if cursor else f'page {page}'})")
         
         return jsonify({
             "results": results,
             "count": len(results),
             "total": total,
-            "page": page,
+            "total_mode": count_mode,
+            "page": None if cursor else page,
             "per_page": per_page,
-            "total_pages": (total + per_page - 1) // per_page
+            "total_pages": (total + per_page - 1) // per_page if total is not None else None,
+            "next_cursor": next_cursor,
+            "has_more": next_cursor is not None
         }), 200
         
     except Exception as e:
@@ -766,6 +789,161 @@ def get_all_analysis_results():
         )
 
 
+def _get_latest_analysis_results():
+    """Newest result per (symbol, strategy) from latest_analysis (see get_all_analysis_results)"""
+    cursor = request.args.get("cursor")
+    page = max(request.args.get("page", default=1, type=int), 1)
+    per_page = parse_limit(request.args.get("per_page", type=int), 50, 500)
+    count_mode = parse_count_mode(request.args.get("count"), "none" if cursor else "exact")
+    
+    try:
+        keyset_sql, keyset_params = keyset_condition(cursor, columns="created_at, result_id")
+    except ValueError as e:
+        return StandardizedErrorResponse.format("INVALID_CURSOR", str(e), 400)
+    
+    filters = ["verdict IS NOT NULL"]
+    filter_params = []
+    verdict = request.args.get("verdict")
+    min_score = request.args.get("min_score", type=float)
+    strategy_id = request.args.get("strategy_id", type=int)
+    if verdict:
+        filters.append("verdict = ?")
+        filter_params.append(verdict)
+    if min_score is not None:
+        filters.append("score >= ?")
+        filter_params.append(min_score)
+    if strategy_id is not None:
+        filters.append("strategy_id = ?")
+        filter_params.append(strategy_id)
+    where = " AND ".join(filters)
+    
+    offset = 0 if cursor else (page - 1) * per_page
+    rows = query_db(f"""
+        SELECT result_id, ticker, symbol, name, yahoo_symbol, score, verdict, entry, stop_loss, target,
+               created_at, strategy_id
+        FROM latest_analysis
+        WHERE {where} {keyset_sql}
+        ORDER BY created_at DESC, result_id DESC
+        LIMIT ? OFFSET ?
+    """, tuple(filter_params) + keyset_params + (per_page + 1, offset))
+    rows, next_cursor = split_page(rows, per_page, created_at_index=10)
+    
+    results = [{
+        "id": row[0],
+        "ticker": row[1],
+        "symbol": row[2],
+        "name": row[3],
+        "yahoo_symbol": row[4],
+        "score": row[5],
+        "verdict": row[6],
+        "entry": row[7],
+        "stop_loss": row[8],
+        "target": row[9],
+        "created_at": row[10],
+        "strategy_id": row[11]
+    } for row in rows]
+    
+    total = count_rows(f"FROM latest_analysis WHERE {where}", tuple(filter_params), mode=count_mode)
+    
+    return jsonify({
+        "results": results,
+        "count": len(results),
+        "total": total,
+        "total_mode": count_mode,
+        "page": None if cursor else page,
+        "per_page": per_page,
+        "total_pages": (total + per_page - 1) // per_page if total is not None else None,
+        "next_cursor": next_cursor,
+        "has_more": next_cursor is not None,
+        "latest": True
+    }), 200
+
+
+def _parse_export_bound(value, inclusive_end=False):
+    """ISO date/datetime query arg; a date-only upper bound covers that whole day"""
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value)
+    if inclusive_end and len(value) == 10:
+        parsed += timedelta(days=1)
+    return parsed
+
+
+@bp.route("/all-stocks/results/export", methods=["GET"])
+def export_analysis_results():
+    """
+    Stream analysis results as a file download.
+    
+    Rows are read through a server-side cursor and encoded batch by batch,
+    so memory stays constant whatever the row count.
+    
+    Query params (at least one filter is required):
+        job_id: Results of one analysis job
+        from, to: created_at range, ISO date or datetime (a date-only 'to' is inclusive)
+        strategy_id: Strategy filter
+        source: analysis_source ('watchlist' or 'bulk')
+        format: 'csv' (default), 'ndjson' or 'parquet'
+        include_indicators: If true, add the raw_data column
+        gzip: If true, gzip csv/ndjson on the fly
+    """
+    fmt = request.args.get("format", "csv").lower()
+    if fmt not in EXPORT_FORMATS:
+        return StandardizedErrorResponse.format(
+            "INVALID_EXPORT", f"format must be one of {', '.join(EXPORT_FORMATS)}", 400
+        )
+    if fmt == "parquet" and not parquet_available():
+        return StandardizedErrorResponse.format(
+            "EXPORT_FORMAT_UNAVAILABLE", "Parquet export requires pyarrow on the server", 501
+        )
+    
+    try:
+        filters = ExportFilter(
+            job_id=request.args.get("job_id") or None,
+            start=_parse_export_bound(request.args.get("from")),
+            end=_parse_export_bound(request.args.get("to"), inclusive_end=True),
+            strategy_id=request.args.get("strategy_id", type=int),
+            source=request.args.get("source") or None
+        )
+    except ValueError as e:
+        return StandardizedErrorResponse.format("INVALID_EXPORT", f"Invalid date: {e}", 400)
+    if filters.is_empty():
+        return StandardizedErrorResponse.format(
+            "INVALID_EXPORT", "Provide at least one of job_id, from, to, strategy_id or source", 400
+        )
+    
+    truthy = ("true", "1", "yes")
+    compress = fmt != "parquet" and request.args.get("gzip", "false").lower() in truthy
+    include_indicators = request.args.get("include_indicators", "false").lower() in truthy
+    
+    try:
+        chunks = stream_results_export(filters, fmt, compress=compress, include_indicators=include_indicators)
+        # Run the query now so database errors still get a JSON error response
+        first = next(chunks, b"")
+    except Exception as e:
+        logger.exception("export_analysis_results error")
+        return StandardizedErrorResponse.format(
+            "EXPORT_ERROR",
+            "Failed to export analysis results",
+            500,
+            {"error": str(e)}
+        )
+    
+    def generate():
+        yield first
+        yield from chunks
+    
+    mimetype, extension = EXPORT_FORMATS[fmt]
+    label = filters.job_id or datetime.now().strftime("%Y%m%d_%H%M%S")
+    filename = f"analysis_results_{label}.{extension}" + (".gz" if compress else "")
+    
+    response = Response(stream_with_context(generate()), mimetype="application/gzip" if compress else mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    # Keep reverse proxies from buffering the stream
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
 @bp.route("/initialize-all-stocks", methods=["POST"])
 def initialize_all_stocks():
     """
@@ -845,11 +1023,13 @@ def initialize_all_stocks():
                     insert_query = """
                         INSERT INTO analysis_results (ticker, symbol, verdict, score, status)
                         VALUES (?, ?, ?, ?, ?)
+                        RETURNING id
                     """
                     insert_query, insert_args = _convert_query_params(insert_query, (
                         ticker, stock.get("symbol", ""), "HOLD", 0.0, "initialized"
                     ))
                     cursor.execute(insert_query, insert_args)
+                    ResultInsertion.upsert_latest(cursor, cursor.fetchone()[0])
                     inserted += 1
                     
                 except Exception as e:
@@ -858,6 +1038,8 @@ def initialize_all_stocks():
                         break
             
             conn.commit()
+            if inserted:
+                invalidate_responses('results')
         except Exception as db_error:
             conn.rollback()
             logger.error(f"DB operation failed: {db_error}")
@@ -9,6 +9,7 @@ from flask import Blueprint, jsonify, request
 import logging
 
 from strategies import StrategyManager
+from utils.infrastructure.response_cache import cached_response
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +17,7 @@ strategies_bp = Blueprint('strategies', __name__)
 
 
 @strategies_bp.route('/api/strategies', methods=['GET'])
+@cached_response(ttl=300)
 def list_strategies():
     """
     List all available strategies.
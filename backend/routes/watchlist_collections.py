@@ -3,14 +3,61 @@ Watchlist Collections routes - Named watchlist management
 Allows users to create multiple watchlists with custom names
 """
 from flask import Blueprint, request, jsonify
+from psycopg2.extras import execute_values
 from utils.logger import setup_logger
 from utils.api_utils import StandardizedErrorResponse
-from database import query_db, execute_db
+from database import query_db, execute_db, get_db, _convert_query_params
 
 logger = setup_logger()
 bp = Blueprint("watchlist_collections", __name__, url_prefix="/api/watchlist-collections")
 
 
+def _execute_returning(query, args=(), values=None):
+    """
+    Run one modifying statement with a RETURNING clause, commit, and return its rows.
+    
+    With `values`, `query` must contain a single VALUES %s and is expanded by
+    execute_values into one multi-row statement (one round trip).
+    """
+    db = get_db()
+    cur = db.cursor()
+    try:
+        if values is None:
+            cur.execute(*_convert_query_params(query, args))
+            rows = cur.fetchall()
+        else:
+            rows = execute_values(cur, query, values, page_size=max(len(values), 1), fetch=True)
+        db.commit()
+        return rows
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+def _normalize_symbols(stocks):
+    """[(SYMBOL.NS, name)] from {symbol, name} dicts or bare symbols, first occurrence wins"""
+    rows = {}
+    for stock in stocks:
+        # Handle both formats: {symbol, name} or just string symbol
+        if isinstance(stock, dict):
+            symbol = str(stock.get("symbol") or "").strip().upper()
+            name = str(stock.get("name") or "").strip()
+        else:
+            symbol = str(stock).strip().upper()
+            name = ""
+        
+        if not symbol:
+            continue
+        
+        # Add .NS if no exchange code
+        if '.' not in symbol:
+            symbol = f"{symbol}.NS"
+        rows.setdefault(symbol, name)
+    return list(rows.items())
+
+
 @bp.route("", methods=["GET"])
 def get_all_collections():
     """GET: Retrieve all watchlist collections"""
@@ -34,26 +81,14 @@ def get_all_collections():
                 else:
                     result.append(dict(item))
         
-        # Get stock count for each collection
+        # Stock counts for every collection, "Default" (collection_id IS NULL) included, in one pass
+        counts = {
+            row[0]: row[1]
+            for row in query_db("SELECT collection_id, COUNT(*) FROM watchlist GROUP BY collection_id") or []
+        }
         for collection in result:
-            count_result = query_db(
-                "SELECT COUNT(*) FROM watchlist WHERE collection_id = ?",
-                (collection["id"],),
-                one=True
-            )
-            if count_result:
-                collection["stock_count"] = count_result[0] if isinstance(count_result, (tuple, list)) else count_result.get("count", 0)
-            else:
-                collection["stock_count"] = 0
-        
-        # Also add count for "Default" (collection_id IS NULL)
-        default_count = query_db(
-            "SELECT COUNT(*) FROM watchlist WHERE collection_id IS NULL",
-            one=True
-        )
-        default_stock_count = 0
-        if default_count:
-            default_stock_count = default_count[0] if isinstance(default_count, (tuple, list)) else default_count.get("count", 0)
+            collection["stock_count"] = counts.get(collection["id"], 0)
+        default_stock_count = counts.get(None, 0)
         
         # Insert "Default" collection at the beginning
         result.insert(0, {
@@ -262,42 +297,21 @@ def add_stocks_to_collection():
                     404
                 )
         
-        added = []
-        skipped = []
-        
-        for stock in stocks:
-            # Handle both formats: {symbol, name} or just string symbol
-            if isinstance(stock, dict):
-                symbol = stock.get("symbol", "").strip().upper()
-                name = stock.get("name", "").strip()
-            else:
-                symbol = str(stock).strip().upper()
-                name = ""
-            
-            if not symbol:
-                continue
-            
-            # Add .NS if no exchange code
-            if '.' not in symbol:
-                symbol = f"{symbol}.NS"
-            
-            # Check if already exists in this collection
-            existing = query_db(
-                "SELECT id FROM watchlist WHERE LOWER(ticker) = LOWER(?) AND (collection_id = ? OR (collection_id IS NULL AND ? IS NULL))",
-                (symbol, collection_id, collection_id),
-                one=True
-            )
-            
-            if existing:
-                skipped.append(symbol)
-                continue
-            
-            # Insert
-            execute_db(
-                "INSERT INTO watchlist (ticker, name, collection_id) VALUES (?, ?, ?)",
-                (symbol, name, collection_id)
-            )
-            added.append(symbol)
+        rows = _normalize_symbols(stocks)
+        
+        # One multi-row insert; symbols already in the collection hit
+        # watchlist_ticker_collection_idx and are skipped by ON CONFLICT
+        inserted = set()
+        if rows:
+            inserted = {
+                row[0] for row in _execute_returning(
+                    "INSERT INTO watchlist (ticker, name, collection_id) VALUES %s "
+                    "ON CONFLICT DO NOTHING RETURNING ticker",
+                    values=[(symbol, name, collection_id) for symbol, name in rows]
+                )
+            }
+        added = [symbol for symbol, _ in rows if symbol in inserted]
+        skipped = [symbol for symbol, _ in rows if symbol not in inserted]
         
         logger.info(f"[ADD_STOCKS] Added {len(added)} stocks to collection {collection_id}, skipped {len(skipped)} duplicates")
         
@@ -318,6 +332,24 @@ def add_stocks_to_collection():
         )
 
 
+MOVE_STOCKS_SQL = """
+    UPDATE watchlist AS w
+    SET collection_id = ?
+    WHERE w.id IN (
+        SELECT DISTINCT ON (LOWER(ticker)) id
+        FROM watchlist
+        WHERE id = ANY(?)
+        ORDER BY LOWER(ticker), id
+    )
+    AND NOT EXISTS (
+        SELECT 1 FROM watchlist AS o
+        WHERE LOWER(o.ticker) = LOWER(w.ticker)
+          AND COALESCE(o.collection_id, -1) = COALESCE(?, -1)
+    )
+    RETURNING w.id
+"""
+
+
 @bp.route("/move-stocks", methods=["POST"])
 def move_stocks_to_collection():
     """POST: Move stocks from one collection to another"""
@@ -348,19 +380,31 @@ def move_stocks_to_collection():
                     404
                 )
         
-        # Update collection_id for all specified stocks
-        placeholders = ','.join(['?' for _ in stock_ids])
-        execute_db(
-            f"UPDATE watchlist SET collection_id = ? WHERE id IN ({placeholders})",
-            [target_collection_id] + stock_ids
-        )
+        try:
+            if not isinstance(stock_ids, list):
+                raise TypeError("stock_ids must be a list")
+            stock_ids = [int(stock_id) for stock_id in stock_ids]
+        except (TypeError, ValueError):
+            return StandardizedErrorResponse.format(
+                "INVALID_REQUEST",
+                "stock_ids must be integers",
+                400
+            )
+        
+        # One UPDATE for all stocks. Tickers the target already holds (or that
+        # appear twice in the selection) stay where they are instead of
+        # violating watchlist_ticker_collection_idx.
+        moved = _execute_returning(MOVE_STOCKS_SQL, (target_collection_id, stock_ids, target_collection_id))
+        moved_ids = [row[0] for row in moved]
         
-        logger.info(f"[MOVE_STOCKS] Moved {len(stock_ids)} stocks to collection {target_collection_id}")
+        logger.info(f"[MOVE_STOCKS] Moved {len(moved_ids)}/{len(stock_ids)} stocks to collection {target_collection_id}")
         
         return jsonify({
-            "message": f"Moved {len(stock_ids)} stocks",
+            "message": f"Moved {len(moved_ids)} stocks",
             "target_collection_id": target_collection_id,
-            "moved_count": len(stock_ids)
+            "moved_count": len(moved_ids),
+            "moved_ids": moved_ids,
+            "skipped_ids": sorted(set(stock_ids) - set(moved_ids))
         }), 200
         
     except Exception as e:
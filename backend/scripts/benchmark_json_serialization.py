@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Benchmark: JSON serialization time for API responses and stored blobs
+
+Payloads:
+- a 500-row /api/stocks/all-stocks/results page (floats, datetimes)
+- a 12-indicator raw_data blob as produced by analyze_ticker (numpy
+  scalars, a few NaN values)
+
+Each payload is serialized N times by:
+- before: the previous code paths, i.e. jsonify with
+  JSONIFY_PRETTYPRINT_REGULAR (indent=2) for the page and
+  json.dumps(_finite_json(...), cls=NumpyEncoder) for the blob
+- stdlib / orjson: utils.serialization backends, compact output
+
+No database is needed.
+
+Usage:
+    python scripts/benchmark_json_serialization.py [--iterations 200]
+"""
+
+import argparse
+import json
+import math
+import numbers
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from werkzeug.http import http_date
+
+import utils.serialization as serialization
+
+INDICATORS = ['RSI', 'MACD', 'ADX', 'EMA', 'PSAR', 'Supertrend', 'Stochastic',
+              'CCI', 'Williams', 'Bollinger', 'ATR', 'OBV']
+
+
+class LegacyNumpyEncoder(json.JSONEncoder):
+    """The NumpyEncoder formerly in infrastructure/thread_tasks.py"""
+
+    def default(self, o):
+        if isinstance(o, np.integer):
+            return int(o)
+        elif isinstance(o, np.floating):
+            return float(o)
+        elif isinstance(o, np.ndarray):
+            return o.tolist()
+        elif isinstance(o, np.bool_):
+            return bool(o)
+        return super().default(o)
+
+
+def _legacy_finite_json(value):
+    if isinstance(value, dict):
+        return {k: _legacy_finite_json(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_legacy_finite_json(v) for v in value]
+    if isinstance(value, numbers.Real) and not isinstance(value, numbers.Integral):
+        return value if math.isfinite(value) else None
+    return value
+
+
+def _legacy_flask_default(o):
+    if isinstance(o, datetime):
+        return http_date(o)
+    raise TypeError(type(o).__name__)
+
+
+def legacy_response(payload):
+    return json.dumps(payload, indent=2, default=_legacy_flask_default).encode('utf-8')
+
+
+def legacy_blob(payload):
+    return json.dumps(_legacy_finite_json(payload), cls=LegacyNumpyEncoder, allow_nan=False).encode('utf-8')
+
+
+def results_page(rows=500):
+    started = datetime(2025, 6, 1, 9, 15)
+    return {
+        'results': [{
+            'id': 100000 - i,
+            'ticker': f'SYM{i}.NS',
+            'symbol': f'SYM{i}',
+            'name': f'Sample Company {i} Limited',
+            'yahoo_symbol': f'SYM{i}.NS',
+            'score': round(5 + (i % 50) / 10, 2),
+            'verdict': ('Buy', 'Sell', 'Neutral')[i % 3],
+            'entry': 100.0 + i,
+            'stop_loss': 95.0 + i,
+            'target': 110.0 + i,
+            'created_at': started - timedelta(minutes=i),
+        } for i in range(rows)],
+        'count': rows,
+        'next_cursor': 'WyIyMDI1LTA2LTAxIDA5OjE1OjAwIiwgMTAwMDAwXQ',
+    }
+
+
+def raw_data_blob():
+    rng = np.random.default_rng(7)
+    return [{
+        'name': name,
+        'category': ('momentum', 'trend', 'volatility', 'volume')[i % 4],
+        'value': np.float64(np.nan) if i % 5 == 4 else np.float64(rng.normal(50, 15)),
+        'vote': np.int64(rng.integers(-1, 2)),
+        'confidence': np.float64(rng.random()),
+        'signal': np.bool_(i % 2 == 0),
+        'history': rng.normal(50, 15, 20),
+    } for i, name in enumerate(INDICATORS)]
+
+
+def _timed(run, payload, iterations):
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        run(payload)
+        samples.append((time.perf_counter() - started) * 1_000_000)
+    ordered = sorted(samples)
+    return {
+        'mean': statistics.fmean(ordered),
+        'p50': ordered[len(ordered) // 2],
+        'p95': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        'size': len(run(payload)),
+    }
+
+
+def _backend_dumps(name):
+    backend = serialization._create_backend(name)
+    return backend.dumps
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+
+    serializers = [('stdlib', _backend_dumps('stdlib'))]
+    if serialization.ORJSON_AVAILABLE:
+        serializers.append(('orjson', _backend_dumps('orjson')))
+    else:
+        print('orjson not installed; only the stdlib backend is measured\n')
+
+    cases = [
+        ('500-row results page', results_page(), legacy_response),
+        ('12-indicator raw_data blob', raw_data_blob(), legacy_blob),
+    ]
+
+    print(f"{args.iterations} iterations per payload, latency in microseconds\n")
+    print(f"{'payload':<30}{'serializer':<12}{'p50':>10}{'p95':>10}{'mean':>10}{'bytes':>10}{'speedup':>10}")
+    for label, payload, legacy in cases:
+        for run in (legacy, *(fn for _, fn in serializers)):
+            run(payload)  # warm up
+        before = _timed(legacy, payload, args.iterations)
+        rows = [('before', before)] + [(name, _timed(fn, payload, args.iterations)) for name, fn in serializers]
+        for name, stats in rows:
+            speedup = before['mean'] / stats['mean'] if stats['mean'] else float('inf')
+            print(f"{label:<30}{name:<12}{stats['p50']:>10.0f}{stats['p95']:>10.0f}"
+                  f"{stats['mean']:>10.0f}{stats['size']:>10}{speedup:>9.2f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
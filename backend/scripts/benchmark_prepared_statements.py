@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-statement latency of the hot queries, ad-hoc vs prepared
+
+Runs each registered hot statement (job status read, progress update,
+result insert + latest_analysis upsert) N times two ways on one connection:
+
+- before: _convert_query_params() on every call, then a plain execute
+  (Postgres parses and plans the statement every time)
+- after:  PreparedStatement.execute() (PREPAREd once, then EXECUTE by name)
+
+Everything runs inside a transaction that is rolled back, so no rows are
+left behind. Point DATABASE_URL at a development database.
+
+Usage:
+    python scripts/benchmark_prepared_statements.py [--iterations 500]
+
+Environment Variables:
+    DATABASE_URL: PostgreSQL connection string (required)
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import psycopg2
+
+from config import config
+from database import StatementConnection, _convert_query_params
+from infrastructure.thread_tasks import JOB_PROGRESS_UPDATE
+from utils.db_utils import ResultInsertion, JOB_STATUS_SELECT
+
+
+def _timed(run, iterations):
+    """Per-call latencies in microseconds"""
+    samples = []
+    for i in range(iterations):
+        started = time.perf_counter()
+        run(i)
+        samples.append((time.perf_counter() - started) * 1_000_000)
+    return samples
+
+
+def _summary(samples):
+    ordered = sorted(samples)
+    return {
+        'mean': statistics.fmean(ordered),
+        'p50': ordered[len(ordered) // 2],
+        'p95': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+    }
+
+
+def _result_args(i, now):
+    return (
+        f'BENCH{i}.NS', f'BENCH{i}', None, f'BENCH{i}.NS', 5.0, 'Neutral', 100.0, 95.0, 110.0,
+        10, 2.0, None, 1, 'Market Order', 'real', False,
+        '[{"name": "RSI", "vote": 1, "confidence": 0.8}]', 'completed', now, now, 'benchmark', None
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--iterations', type=int, default=500)
+    args = parser.parse_args()
+
+    if not config.DATABASE_URL:
+        print('DATABASE_URL is not set', file=sys.stderr)
+        return 1
+
+    conn = psycopg2.connect(config.DATABASE_URL, connection_factory=StatementConnection)
+    cursor = conn.cursor()
+    job_id = f'bench-{uuid.uuid4()}'
+    now = datetime.now().isoformat()
+
+    try:
+        cursor.execute(
+            "INSERT INTO analysis_jobs (job_id, status, total, job_type) VALUES (%s, 'processing', %s, 'benchmark')",
+            (job_id, args.iterations)
+        )
+
+        # (label, callable(i) -> (statement, params), runs the latest_analysis upsert)
+        cases = [
+            ('job status read', lambda i: (JOB_STATUS_SELECT, (job_id,)), False),
+            ('progress update', lambda i: (JOB_PROGRESS_UPDATE, (i % 100, i, i, '[]', job_id)), False),
+            ('result insert + latest upsert', lambda i: (ResultInsertion.INSERT_RESULT, _result_args(i, now)), True),
+        ]
+
+        rows = []
+        for label, make, upserts in cases:
+            def before(i):
+                statement, params = make(i)
+                cursor.execute(*_convert_query_params(statement.query, params))
+                if upserts:
+                    cursor.execute(*_convert_query_params(ResultInsertion.LATEST_UPSERT_SQL, (cursor.fetchone()[0],)))
+
+            def after(i):
+                statement, params = make(i)
+                statement.execute(cursor, params)
+                if upserts:
+                    ResultInsertion.upsert_latest(cursor, cursor.fetchone()[0])
+
+            # Warm up both paths (catalog caches, first PREPARE) before measuring
+            for i in range(min(20, args.iterations)):
+                before(i)
+                after(i)
+            rows.append((label, _summary(_timed(before, args.iterations)), _summary(_timed(after, args.iterations))))
+    finally:
+        conn.rollback()
+        conn.close()
+
+    print(f"{args.iterations} iterations per statement, latency in microseconds\n")
+    print(f"{'statement':<32}{'before p50':>12}{'after p50':>12}{'before p95':>12}{'after p95':>12}{'mean speedup':>14}")
+    for label, before_stats, after_stats in rows:
+        speedup = before_stats['mean'] / after_stats['mean'] if after_stats['mean'] else float('inf')
+        print(f"{label:<32}{before_stats['p50']:>12.0f}{after_stats['p50']:>12.0f}"
+              f"{before_stats['p95']:>12.0f}{after_stats['p95']:>12.0f}{speedup:>13.2f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,631 @@
+"""
+Part 6: Backtesting Extensions - Test Suite
+
+Tests for:
+- Portfolio-level simulation (fixed capital, max concurrent positions)
+- Monte Carlo robustness analysis of trade sequences
+- Backtest result cache (OHLCV fingerprint + strategy config keys)
+- Streamed portfolio backtests (NDJSON / SSE) and early-disconnect cancellation
+- Shared per-ticker job runner used by analysis and backtest jobs
+- Priority-aware job scheduler (priority classes, worker budget, fair share)
+"""
+
+from contextlib import contextmanager
+import json
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+from cache import BacktestResultCache, ohlcv_fingerprint, config_fingerprint
+from utils.trading.portfolio_simulator import PortfolioSimulator
+from utils.monte_carlo import run_monte_carlo, extract_pnl
+from utils.infrastructure.job_scheduler import JobScheduler, ScheduledJob, classify_priority
+
+
+def _trade(entry_date, exit_date, entry=100.0, exit_price=104.0, stop=97.0, confidence=80):
+    return {
+        'entry_date': entry_date,
+        'exit_date': exit_date,
+        'entry_price': entry,
+        'exit_price': exit_price,
+        'stop_loss': stop,
+        'confidence': confidence,
+    }
+
+
+# ============================================================================
+# Portfolio Simulator Tests
+# ============================================================================
+
+class TestPortfolioSimulator:
+    """Test cross-sectional portfolio simulation"""
+
+    def test_empty_portfolio(self):
+        """No trades leaves capital untouched"""
+        result = PortfolioSimulator(initial_capital=50000).run()
+        assert result['final_equity'] == 50000
+        assert result['trades_taken'] == 0
+        assert result['equity_curve'] == []
+
+    def test_single_winning_trade(self):
+        """A winning trade is sized by RiskManager and realized on exit"""
+        sim = PortfolioSimulator(initial_capital=100000, max_positions=5)
+        sim.add_trades('AAA.NS', [_trade('2025-01-01', '2025-01-05')])
+        result = sim.run()
+
+        # 2% risk / 3 per share = 666 shares, capped at 20% of capital = 200 shares
+        assert result['trades'][0]['shares'] == 200
+        assert result['final_equity'] == pytest.approx(100000 + 200 * 4)
+        assert result['trades_taken'] == 1
+        assert result['win_rate'] == 100
+        assert [p['date'] for p in result['equity_curve']] == ['2025-01-01', '2025-01-05']
+
+    def test_max_positions_respected(self):
+        """Entries beyond K concurrent positions are skipped, highest confidence wins"""
+        sim = PortfolioSimulator(initial_capital=100000, max_positions=2)
+        sim.add_trades('AAA.NS', [_trade('2025-01-01', '2025-01-10', confidence=60)])
+        sim.add_trades('BBB.NS', [_trade('2025-01-01', '2025-01-10', confidence=90)])
+        sim.add_trades('CCC.NS', [_trade('2025-01-01', '2025-01-10', confidence=75)])
+        result = sim.run()
+
+        assert result['trades_taken'] == 2
+        assert result['skipped']['capacity'] == 1
+        assert result['max_concurrent_positions'] == 2
+        assert {t['ticker'] for t in result['trades']} == {'BBB.NS', 'CCC.NS'}
+
+    def test_slot_freed_on_exit_date(self):
+        """Exits settle before same-day entries"""
+        sim = PortfolioSimulator(initial_capital=100000, max_positions=1)
+        sim.add_trades('AAA.NS', [_trade('2025-01-01', '2025-01-05')])
+        sim.add_trades('BBB.NS', [_trade('2025-01-05', '2025-01-09')])
+        result = sim.run()
+
+        assert result['trades_taken'] == 2
+        assert result['skipped']['capacity'] == 0
+
+    def test_overlapping_trades_same_ticker(self):
+        """Only one open position per ticker"""
+        sim = PortfolioSimulator(initial_capital=100000, max_positions=5)
+        sim.add_trades('AAA.NS', [
+            _trade('2025-01-01', '2025-01-10'),
+            _trade('2025-01-02', '2025-01-08'),
+        ])
+        result = sim.run()
+
+        assert result['trades_taken'] == 1
+        assert result['skipped']['duplicate'] == 1
+
+    def test_drawdown_and_exposure(self):
+        """A losing trade produces a negative drawdown and non-zero exposure"""
+        sim = PortfolioSimulator(initial_capital=100000, max_positions=5)
+        sim.add_trades('AAA.NS', [_trade('2025-01-01', '2025-01-05', exit_price=97.0)])
+        result = sim.run()
+
+        assert result['max_drawdown_pct'] < 0
+        assert result['avg_exposure_pct'] > 0
+        assert result['turnover'] > 0
+
+    def test_open_positions_marked_to_close(self):
+        """Equity, exposure and drawdown follow the closes between entry and exit"""
+        sim = PortfolioSimulator(initial_capital=100000, max_positions=5)
+        sim.add_trades('AAA.NS', [_trade('2025-01-01', '2025-01-05')])
+        sim.add_prices('AAA.NS', ['2024-12-31', '2025-01-01', '2025-01-02', '2025-01-03', '2025-01-06'],
+                       [90.0, 100.0, 95.0, 102.0, 110.0])
+        result = sim.run()
+
+        curve = {p['date']: p for p in result['equity_curve']}
+        # Bars outside the trading span are not on the axis
+        assert list(curve) == ['2025-01-01', '2025-01-02', '2025-01-03', '2025-01-05']
+        assert curve['2025-01-02']['equity'] == pytest.approx(100000 - 200 * 5)
+        assert curve['2025-01-03']['equity'] == pytest.approx(100000 + 200 * 2)
+        assert curve['2025-01-02']['exposure_pct'] == pytest.approx(200 * 95 / 99000 * 100, abs=0.01)
+        assert result['max_drawdown_pct'] == pytest.approx(-1.0)
+        # Realized P&L on exit is unchanged
+        assert result['final_equity'] == pytest.approx(100000 + 200 * 4)
+
+    def test_invalid_trades_rejected(self):
+        """Trades with missing fields or stop above entry are counted, not simulated"""
+        sim = PortfolioSimulator()
+        accepted = sim.add_trades('AAA.NS', [
+            {'entry_date': '2025-01-01'},
+            _trade('2025-01-01', '2025-01-05', stop=101.0),
+        ])
+        assert accepted == 0
+        assert sim.run()['skipped']['invalid'] == 2
+
+    def test_add_backtest_result_ignores_errors(self):
+        sim = PortfolioSimulator()
+        assert sim.add_backtest_result({'error': 'no data', 'ticker': 'X'}) == 0
+        assert sim.add_backtest_result({
+            'ticker': 'AAA.NS', 'trades': [_trade('2025-01-01', '2025-01-05')]
+        }) == 1
+
+
+# ============================================================================
+# Monte Carlo Tests
+# ============================================================================
+
+class TestMonteCarlo:
+    """Test vectorized Monte Carlo resampling"""
+
+    PNL = [4.0, -3.0, 4.0, 4.0, -2.5, 4.0, -3.0, 1.2]
+
+    def test_seed_is_reproducible(self):
+        a = run_monte_carlo(np.array(self.PNL), iterations=500, seed=7)
+        b = run_monte_carlo(np.array(self.PNL), iterations=500, seed=7)
+        assert a == b
+
+    def test_permute_keeps_total_return(self):
+        """Shuffling order never changes the sum, only the path"""
+        result = run_monte_carlo(np.array(self.PNL), iterations=500, method='permute', seed=1)
+        assert result['total_return']['std'] == 0
+        assert result['total_return']['mean'] == pytest.approx(sum(self.PNL), abs=0.01)
+        assert result['observed']['total_return'] == pytest.approx(sum(self.PNL), abs=0.01)
+        assert result['max_drawdown']['std'] > 0
+
+    def test_bootstrap_distribution(self):
+        result = run_monte_carlo(np.array(self.PNL), iterations=2000, seed=3)
+        assert result['iterations'] == 2000
+        assert result['trades'] == len(self.PNL)
+        assert result['total_return']['ci_low'] < result['total_return']['ci_high']
+        assert result['max_drawdown']['mean'] <= 0
+        assert 0 <= result['prob_loss'] <= 100
+
+    def test_chunking_matches_iterations(self, monkeypatch):
+        """Large runs are split into chunks without losing iterations"""
+        import utils.monte_carlo as mc
+        monkeypatch.setattr(mc, '_MAX_CHUNK_CELLS', 16)
+        result = mc.run_monte_carlo(np.array(self.PNL), iterations=101, seed=5)
+        assert result['iterations'] == 101
+
+    def test_extract_pnl_from_many_lists(self):
+        trades = {'AAA.NS': {'trades': [{'pnl_pct': 4.0}]}, 'BBB.NS': [{'pnl_pct': -3.0}]}
+        assert extract_pnl(trades).tolist() == [4.0, -3.0]
+        assert extract_pnl([[{'pnl_pct': 1.0}], [{'pnl_pct': 2.0}]]).tolist() == [1.0, 2.0]
+
+    def test_no_trades(self):
+        assert run_monte_carlo([], seed=1)['iterations'] == 0
+
+    def test_invalid_method(self):
+        with pytest.raises(ValueError):
+            run_monte_carlo(np.array(self.PNL), method='jackknife')
+
+
+# ============================================================================
+# Backtest Result Cache Tests
+# ============================================================================
+
+def _ohlcv(bars=30):
+    index = pd.date_range('2025-01-01', periods=bars, freq='D')
+    close = np.linspace(100, 130, bars)
+    return pd.DataFrame({
+        'open': close, 'high': close + 1, 'low': close - 1,
+        'close': close, 'volume': np.full(bars, 1000.0)
+    }, index=index)
+
+
+class TestBacktestResultCache:
+    """Test backtest result caching and automatic invalidation"""
+
+    RESULT = {'ticker': 'AAA.NS', 'total_signals': 3, 'trades': [{'pnl_pct': 4.0}]}
+
+    def test_fingerprint_changes_with_new_bar(self):
+        df = _ohlcv(30)
+        assert ohlcv_fingerprint(df) == ohlcv_fingerprint(df.copy())
+        assert ohlcv_fingerprint(df) != ohlcv_fingerprint(_ohlcv(31))
+
+    def test_config_fingerprint_is_order_independent(self):
+        assert config_fingerprint({'a': 1, 'b': 2}) == config_fingerprint({'b': 2, 'a': 1})
+        assert config_fingerprint({'a': 1}) != config_fingerprint({'a': 2})
+
+    def test_hit_and_miss(self):
+        cache = BacktestResultCache(max_size=10)
+        assert cache.get('AAA.NS', 5, 90, 'fp1', 'cfg') is None
+        cache.set('AAA.NS', 5, 90, 'fp1', 'cfg', self.RESULT)
+        assert cache.get('AAA.NS', 5, 90, 'fp1', 'cfg') == self.RESULT
+        assert cache.get('AAA.NS', 5, 90, 'fp1', 'other-cfg') is None
+        assert cache.get('AAA.NS', 4, 90, 'fp1', 'cfg') is None
+
+        stats = cache.stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 3
+
+    def test_new_bars_replace_old_entry(self):
+        """A result for new data evicts the result for the old fingerprint"""
+        cache = BacktestResultCache(max_size=10)
+        cache.set('AAA.NS', 5, 90, 'fp1', 'cfg', self.RESULT)
+        cache.set('AAA.NS', 5, 90, 'fp2', 'cfg', dict(self.RESULT, total_signals=4))
+
+        assert cache.get('AAA.NS', 5, 90, 'fp1', 'cfg') is None
+        assert cache.get('AAA.NS', 5, 90, 'fp2', 'cfg')['total_signals'] == 4
+        assert cache.stats()['size'] == 1
+
+    def test_returned_results_are_copies(self):
+        cache = BacktestResultCache(max_size=10)
+        cache.set('AAA.NS', 5, 90, 'fp1', 'cfg', self.RESULT)
+        first = cache.get('AAA.NS', 5, 90, 'fp1', 'cfg')
+        first['monte_carlo'] = {}
+        first['trades'].append({'pnl_pct': -1})
+        assert cache.get('AAA.NS', 5, 90, 'fp1', 'cfg') == self.RESULT
+
+    def test_disk_tier_survives_new_instance(self, tmp_path):
+        cache = BacktestResultCache(max_size=10, cache_dir=str(tmp_path))
+        cache.set('AAA.NS', 5, 90, 'fp1', 'cfg', dict(self.RESULT, win_rate=np.float64(66.7)))
+
+        fresh = BacktestResultCache(max_size=10, cache_dir=str(tmp_path))
+        result = fresh.get('AAA.NS', 5, 90, 'fp1', 'cfg')
+        assert result['win_rate'] == pytest.approx(66.7)
+        assert fresh.get('AAA.NS', 5, 90, 'fp2', 'cfg') is None
+        assert fresh.stats()['disk_hits'] == 1
+
+    def test_invalidate_ticker(self, tmp_path):
+        cache = BacktestResultCache(max_size=10, cache_dir=str(tmp_path))
+        cache.set('AAA.NS', 5, 90, 'fp1', 'cfg', self.RESULT)
+        cache.invalidate('AAA.NS')
+        assert cache.get('AAA.NS', 5, 90, 'fp1', 'cfg') is None
+        assert list(tmp_path.glob('*.json')) == []
+
+    def test_clear_removes_disk_entries(self, tmp_path):
+        cache = BacktestResultCache(max_size=10, cache_dir=str(tmp_path))
+        cache.set('AAA.NS', 5, 90, 'fp1', 'cfg', self.RESULT)
+        cache.set('BBB.NS', 2, 180, 'fp1', 'cfg', self.RESULT)
+        (tmp_path / 'unrelated.txt').write_text('keep')
+
+        cache.clear()
+
+        assert cache.get('AAA.NS', 5, 90, 'fp1', 'cfg') is None
+        assert list(tmp_path.glob('*.json')) == []
+        assert (tmp_path / 'unrelated.txt').exists()
+
+
+# ============================================================================
+# Batch Runner Tests
+# ============================================================================
+
+class TestPortfolioStream:
+    """POST /api/backtest/portfolio streaming and the shared worker pool"""
+
+    # Finish order is controlled by per-ticker delays
+    DELAYS = {'SLOW.NS': 0.2, 'FAST.NS': 0.0, 'MID.NS': 0.1}
+
+    @pytest.fixture
+    def backtesting(self, monkeypatch):
+        import routes.backtesting as backtesting
+
+        def fake_backtest(ticker, days, strategy_id, include_closes=False):
+            time.sleep(self.DELAYS.get(ticker, 0))
+            if ticker == 'BAD.NS':
+                return {'error': 'no data', 'ticker': ticker}
+            return {'ticker': ticker, 'total_signals': 2, 'winning_trades': 1,
+                    'losing_trades': 1, 'total_profit_pct': 3.0, 'trades': []}
+
+        monkeypatch.setattr(backtesting, '_run_ticker_backtest', fake_backtest)
+        monkeypatch.setattr(backtesting.config, 'MAX_BACKTEST_WORKERS', 4)
+        return backtesting
+
+    @pytest.fixture
+    def client(self, backtesting):
+        from flask import Flask
+        app = Flask('portfolio_stream_test')
+        app.register_blueprint(backtesting.bp)
+        return app.test_client()
+
+    BODY = {'tickers': ['SLOW.NS', 'FAST.NS', 'MID.NS', 'BAD.NS', 'FAST.NS'], 'days': 90, 'strategy_id': 5}
+
+    def test_ndjson_records_in_completion_order(self, client):
+        response = client.post('/api/backtest/portfolio', json=self.BODY)
+
+        assert response.status_code == 200
+        assert response.mimetype == 'application/x-ndjson'
+        assert response.headers['X-Accel-Buffering'] == 'no'
+        records = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+        assert records[0]['type'] == 'start' and records[0]['tickers'] == 4
+        results = records[1:-1]
+        assert [r['type'] for r in results] == ['result'] * 4
+        assert [r['completed'] for r in results] == [1, 2, 3, 4]
+        assert [r['ticker'] for r in results][-2:] == ['MID.NS', 'SLOW.NS']
+        summary = records[-1]
+        assert summary['type'] == 'summary'
+        assert summary['tickers_succeeded'] == 3 and summary['failed_tickers'] == ['BAD.NS']
+        assert 'elapsed_seconds' in summary
+
+    def test_sse_events(self, client):
+        response = client.post('/api/backtest/portfolio?format=sse', json=self.BODY)
+
+        assert response.mimetype == 'text/event-stream'
+        events = response.get_data(as_text=True).strip().split('\n\n')
+        names = [event.split('\n')[0] for event in events]
+        assert names == ['event: start'] + ['event: result'] * 4 + ['event: summary']
+        assert json.loads(events[-1].split('data: ', 1)[1])['tickers_analyzed'] == 4
+
+    def test_non_streaming_document(self, client):
+        response = client.post('/api/backtest/portfolio', json={**self.BODY, 'stream': False})
+
+        assert response.status_code == 200
+        data = response.get_json()
+        assert sorted(data['results']) == ['BAD.NS', 'FAST.NS', 'MID.NS', 'SLOW.NS']
+        assert data['results']['BAD.NS'] == {'error': 'no data', 'ticker': 'BAD.NS'}
+        assert data['summary']['tickers_failed'] == 1 and data['tickers_analyzed'] == 4
+
+    def test_closing_the_stream_cancels_queued_tickers(self, backtesting, monkeypatch):
+        started = []
+
+        def slow_backtest(ticker, days, strategy_id, include_closes=False):
+            started.append(ticker)
+            time.sleep(0.05)
+            return {'ticker': ticker}
+
+        monkeypatch.setattr(backtesting, '_run_ticker_backtest', slow_backtest)
+        monkeypatch.setattr(backtesting.config, 'MAX_BACKTEST_WORKERS', 1)
+
+        results = backtesting._iter_portfolio_results([f'T{n}.NS' for n in range(10)], 90, 5)
+        next(results)
+        results.close()
+        time.sleep(0.2)
+
+        assert len(started) <= 2
+
+
+class TestBacktestJobSubmission:
+    """POST /api/backtest/jobs request validation"""
+
+    @pytest.fixture
+    def client(self):
+        from flask import Flask
+        import routes.backtesting as backtesting
+        app = Flask('backtest_jobs_test')
+        app.register_blueprint(backtesting.bp)
+        return app.test_client()
+
+    @pytest.mark.parametrize('tickers', [[123], ['TCS.NS', None], ['TCS.NS', '  ']])
+    def test_rejects_invalid_tickers(self, client, tickers):
+        response = client.post('/api/backtest/jobs', json={'tickers': tickers, 'days': 90})
+
+        assert response.status_code == 400
+        assert response.get_json()['error'] == 'tickers must be non-empty strings'
+
+
+class _RecordingCursor:
+    """Cursor double that records statements and reports a job status"""
+
+    def __init__(self, status_after, queued=True):
+        self.statements = []
+        self.status_after = status_after
+        self.queued = queued
+
+    def execute(self, query, params=None):
+        self.statements.append((query, params))
+
+    def fetchone(self):
+        if "status = 'queued'" in self.statements[-1][0]:
+            return ('processing',) if self.queued else None
+        completed = sum(1 for q, _ in self.statements if 'SET progress' in q)
+        return ('cancelled',) if self.status_after and completed >= self.status_after else ('processing',)
+
+
+class TestRunTickerBatch:
+    """Test the shared job lifecycle in infrastructure.thread_tasks"""
+
+    def _patch(self, monkeypatch, cursor):
+        import infrastructure.thread_tasks as tt
+
+        @contextmanager
+        def fake_session():
+            yield None, cursor
+
+        monkeypatch.setattr(tt, 'get_db_session', fake_session)
+        monkeypatch.setattr(tt, 'close_thread_connection', lambda: None)
+        return tt
+
+    def test_counts_successes_and_errors(self, monkeypatch):
+        cursor = _RecordingCursor(status_after=None)
+        tt = self._patch(monkeypatch, cursor)
+
+        def process(ticker):
+            if ticker == 'BAD.NS':
+                raise ValueError('no data')
+            return True
+
+        tt.run_ticker_batch('job-ok', ['A.NS', 'BAD.NS', 'C.NS'], process, label='TEST')
+
+        job = tt.job_state.get_job('job-ok')
+        assert job['completed'] == 3
+        assert job['successful'] == 2
+        assert job['errors'] == [{'ticker': 'BAD.NS', 'error': 'no data'}]
+        assert job['status'] == 'completed'
+
+    def test_reused_items_count_towards_progress(self, monkeypatch):
+        cursor = _RecordingCursor(status_after=None)
+        tt = self._patch(monkeypatch, cursor)
+
+        tt.run_ticker_batch('job-reused', ['C.NS'], lambda t: True, reused=2)
+
+        job = tt.job_state.get_job('job-reused')
+        assert (job['completed'], job['successful'], job['progress'], job['reused']) == (3, 3, 100, 2)
+        progress = [p for q, p in cursor.statements if 'SET progress' in q]
+        assert progress[0][:3] == (100, 3, 3)
+
+    def test_db_cancellation_stops_loop(self, monkeypatch):
+        """A 'cancelled' status written by another process stops the runner"""
+        cursor = _RecordingCursor(status_after=1)
+        tt = self._patch(monkeypatch, cursor)
+        seen = []
+
+        tt.run_ticker_batch('job-cancel', ['A.NS', 'B.NS', 'C.NS'], lambda t: seen.append(t) or True)
+
+        assert seen == ['A.NS']
+        assert tt.job_state.get_job('job-cancel')['status'] == 'cancelled'
+
+    def test_job_no_longer_queued_is_skipped(self, monkeypatch):
+        """A job cancelled in the DB while it waited is neither run nor resurrected"""
+        cursor = _RecordingCursor(status_after=None, queued=False)
+        tt = self._patch(monkeypatch, cursor)
+        seen = []
+
+        tt.run_ticker_batch('job-skipped', ['A.NS', 'B.NS'], lambda t: seen.append(t) or True)
+
+        assert seen == []
+        assert len(cursor.statements) == 1  # only the queued -> processing attempt
+        assert tt.job_state.get_job('job-skipped') is None
+
+    def test_cancel_before_start_is_kept(self, monkeypatch):
+        """A cancel flag set before the job state existed survives start()"""
+        cursor = _RecordingCursor(status_after=None)
+        tt = self._patch(monkeypatch, cursor)
+        seen = []
+
+        tt.job_state.cancel_job('job-early-cancel')
+        tt.run_ticker_batch('job-early-cancel', ['A.NS', 'B.NS'], lambda t: seen.append(t) or True)
+
+        assert seen == []
+        job = tt.job_state.get_job('job-early-cancel')
+        assert job['cancelled'] is True and job['status'] == 'cancelled'
+
+
+class _ScheduledTestJob(ScheduledJob):
+    """Records items into a shared log; the first item can be held on a gate"""
+
+    def __init__(self, job_id, items, priority, log, gate=None):
+        super().__init__(job_id, items, priority)
+        self.log = log
+        self.gate = gate
+        self.running = threading.Event()
+        self.done = threading.Event()
+        self.cancelled = False
+        self.failed = None
+
+    def run_item(self, item):
+        self.running.set()
+        if self.gate is not None:
+            assert self.gate.wait(5)
+            self.gate = None
+        if item == 'boom':
+            raise RuntimeError('boom')
+        self.log.append(item)
+
+    def cancel(self):
+        self.cancelled = True
+
+    def finish(self):
+        self.done.set()
+
+    def fail(self, error):
+        self.failed = error
+        self.done.set()
+
+
+class TestJobScheduler:
+    """Priority classes, fair share and the shared worker budget"""
+
+    def test_priority_then_fair_share(self):
+        scheduler = JobScheduler(max_workers=1)
+        log, gate = [], threading.Event()
+        bulk_a = _ScheduledTestJob('a', ['a1', 'a2', 'a3'], 'bulk', log, gate)
+        scheduler.submit(bulk_a)
+        assert bulk_a.running.wait(5)
+
+        bulk_b = _ScheduledTestJob('b', ['b1', 'b2'], 'bulk', log)
+        interactive = _ScheduledTestJob('i', ['i1', 'i2'], 'interactive', log)
+        scheduler.submit(bulk_b)
+        scheduler.submit(interactive)
+
+        assert scheduler.job_status('a')['queue_position'] == 0
+        assert scheduler.job_status('i')['queue_position'] == 1
+        assert scheduler.job_status('b')['queue_position'] == 2
+        assert scheduler.job_status('b')['priority'] == 'bulk'
+
+        gate.set()
+        assert all(job.done.wait(5) for job in (bulk_a, bulk_b, interactive))
+
+        # The interactive job takes over at the next ticker; the bulk jobs then alternate
+        assert log == ['a1', 'i1', 'i2', 'b1', 'a2', 'b2', 'a3']
+        assert scheduler.job_status('a') is None
+
+    def test_concurrency_stays_within_budget(self):
+        scheduler = JobScheduler(max_workers=2)
+        lock = threading.Lock()
+        running, peak = [0], [0]
+
+        class Job(_ScheduledTestJob):
+            def run_item(self, item):
+                with lock:
+                    running[0] += 1
+                    peak[0] = max(peak[0], running[0])
+                time.sleep(0.01)
+                with lock:
+                    running[0] -= 1
+
+        jobs = [Job(f'j{n}', range(5), 'watchlist', []) for n in range(4)]
+        for job in jobs:
+            scheduler.submit(job)
+        assert all(job.done.wait(5) for job in jobs)
+        assert peak[0] <= 2
+
+        deadline = time.monotonic() + 5
+        while scheduler.stats()['workers'] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert scheduler.stats()['workers'] == 0
+
+    def test_cancel_queued_job(self):
+        scheduler = JobScheduler(max_workers=1)
+        log, gate = [], threading.Event()
+        running = _ScheduledTestJob('run', ['r1'], 'bulk', log, gate)
+        queued = _ScheduledTestJob('queued', ['q1'], 'bulk', log)
+        scheduler.submit(running)
+        assert running.running.wait(5)
+        scheduler.submit(queued)
+
+        assert scheduler.cancel('queued')
+        assert queued.cancelled and queued.done.is_set()
+        assert scheduler.job_status('queued') is None
+        assert not scheduler.cancel('queued')
+
+        gate.set()
+        assert running.done.wait(5)
+        assert log == ['r1']
+
+    def test_item_error_fails_the_job(self):
+        scheduler = JobScheduler(max_workers=1)
+        job = _ScheduledTestJob('bad', ['boom', 'never'], 'watchlist', [])
+        scheduler.submit(job)
+        assert job.done.wait(5)
+        assert str(job.failed) == 'boom' and job.log == []
+
+    def test_duplicate_submit_is_rejected(self):
+        scheduler = JobScheduler(max_workers=1)
+        gate = threading.Event()
+        job = _ScheduledTestJob('dup', ['x'], 'bulk', [], gate)
+        assert scheduler.submit(job)
+        assert not scheduler.submit(_ScheduledTestJob('dup', ['y'], 'bulk', []))
+        gate.set()
+        assert job.done.wait(5)
+
+    def test_classify_priority(self, monkeypatch):
+        from config import config
+        monkeypatch.setattr(config, 'INTERACTIVE_JOB_MAX_TICKERS', 5)
+        assert classify_priority('watchlist', 3) == 'interactive'
+        assert classify_priority('bulk', 5) == 'interactive'
+        assert classify_priority('bulk', 2000) == 'bulk'
+        assert classify_priority('backtest', 1) == 'backtest'
+        with pytest.raises(ValueError):
+            classify_priority('urgent', 1)
+
+    def test_ticker_batch_on_the_scheduler(self, monkeypatch):
+        cursor = _RecordingCursor(status_after=None)
+        tt = TestRunTickerBatch()._patch(monkeypatch, cursor)
+        batch = tt.TickerBatch('job-sched', ['A.NS', 'B.NS', 'C.NS'], lambda t: t != 'B.NS', priority='bulk')
+        finished = threading.Event()
+        finish = batch.finish
+        monkeypatch.setattr(batch, 'finish', lambda: (finish(), finished.set()))
+
+        JobScheduler(max_workers=3).submit(batch)
+
+        assert finished.wait(5)
+        job = tt.job_state.get_job('job-sched')
+        assert (job['completed'], job['successful'], job['status']) == (3, 2, 'completed')
+        assert job['priority'] == 'bulk'
+        progress = sorted(p[1] for q, p in cursor.statements if 'SET progress' in q)
+        assert progress == [1, 2, 3]
@@ -0,0 +1,1529 @@
+"""
+Part 7: Data Access Performance - Test Suite
+
+Tests for:
+- Keyset (cursor) pagination helpers for analysis_results listings
+- latest_analysis upsert issued alongside analysis_results inserts
+- Monthly partition naming and retention for analysis_results
+- Set-based, batched keep-last-N retention
+- JSONB serialization and server-side indicator projection
+- Symbol-set digest and database-enforced job dedup
+- API key validation cache with write-behind usage tracking
+- Token-bucket rate limiting (in-memory and Redis-backed)
+- Named prepared statements for hot-path queries
+- In-memory NSE universe index and ranked typeahead search
+- Numpy-aware JSON serializer for responses and stored blobs
+- Tag-invalidated response cache with ETag / 304 handling
+- Streaming analysis_results export (csv / ndjson / parquet, gzip)
+- Write-only, in-memory Excel reports (single ticker and whole job)
+- Set-based watchlist collection mutations and counts
+- Freshness policy: reuse recent results, recompute only stale tickers
+- Job state: cancellation flag key, pipelined updates and bulk reads
+"""
+
+from contextlib import contextmanager
+from datetime import date, datetime
+import gzip
+import io
+
+import json
+
+import os
+
+import numpy as np
+import pytest
+import api_key_manager
+import database
+import utils.pagination as pagination
+from api_key_manager import APIKeyManager
+import utils.infrastructure.rate_limiter as rate_limiter
+from utils.infrastructure.rate_limiter import InMemoryRateLimiter, RedisRateLimiter
+from utils.pagination import (
+    encode_cursor,
+    decode_cursor,
+    keyset_condition,
+    split_page,
+    parse_limit,
+    parse_count_mode,
+    count_rows,
+)
+from utils.data.nse_universe import NSEUniverse, get_nse_universe
+import utils.serialization as serialization
+import utils.infrastructure.response_cache as response_cache
+import utils.data.result_export as result_export
+from utils.data.result_export import ExportFilter, build_export_query, stream_results_export
+from utils.analysis.orchestrator import export_to_excel, export_results_to_excel
+import utils.analysis.freshness as freshness
+from utils.analysis.freshness import last_market_bar, split_by_freshness, parse_freshness_policy
+from models.job_state import InMemoryJobStateManager, RedisJobStateManager
+from utils.infrastructure.response_cache import (
+    InMemoryResponseCache,
+    RedisResponseCache,
+    cached_response,
+    invalidate_responses,
+)
+from utils.db_utils import (
+    ResultInsertion,
+    INDICATOR_FIELDS,
+    INDICATORS_PROJECTION_SQL,
+    jsonb_dumps,
+    indicator_vote_condition,
+    JobStateTransactions,
+    symbol_set_digest,
+)
+from database import (
+    register_statement,
+    get_statement,
+    _add_months,
+    analysis_partition_name,
+    parse_analysis_partition_month,
+    expired_analysis_partitions,
+)
+
+
+class TestKeysetPagination:
+    """Cursor encoding, page splitting and optional totals"""
+
+    def test_cursor_round_trip(self):
+        created = datetime(2025, 3, 14, 9, 26, 53, 589793)
+        token = encode_cursor(created, 42)
+
+        assert '=' not in token
+        assert decode_cursor(token) == (created, 42)
+
+    def test_cursor_accepts_string_timestamps(self):
+        token = encode_cursor('2025-03-14 09:26:53', 7)
+        assert decode_cursor(token) == (datetime(2025, 3, 14, 9, 26, 53), 7)
+
+    @pytest.mark.parametrize('token', ['', 'not-a-cursor', 'WyJ4Il0'])
+    def test_invalid_cursor_raises_value_error(self, token):
+        with pytest.raises(ValueError):
+            decode_cursor(token)
+
+    def test_keyset_condition(self):
+        assert keyset_condition(None) == ("", ())
+
+        created = datetime(2025, 1, 2, 3, 4, 5)
+        sql, params = keyset_condition(encode_cursor(created, 9))
+        assert sql == "AND (created_at, id) < (?, ?)"
+        assert params == (created, 9)
+
+    def test_split_page_with_more_rows(self):
+        rows = [(i, datetime(2025, 1, 10 - i)) for i in range(1, 5)]
+        page, next_cursor = split_page(rows, 3, created_at_index=1)
+
+        assert page == rows[:3]
+        assert decode_cursor(next_cursor) == (rows[2][1], rows[2][0])
+
+    def test_split_page_last_page(self):
+        rows = [(1, datetime(2025, 1, 1))]
+        assert split_page(rows, 3, created_at_index=1) == (rows, None)
+        assert split_page(None, 3, created_at_index=1) == ([], None)
+
+    def test_parse_params(self):
+        assert parse_limit(None, 50, 500) == 50
+        assert parse_limit(0, 50, 500) == 50
+        assert parse_limit(501, 50, 500) == 50
+        assert parse_limit(20, 50, 500) == 20
+        assert parse_count_mode('ESTIMATE', 'exact') == 'estimate'
+        assert parse_count_mode('bogus', 'none') == 'none'
+        assert parse_count_mode(None, 'exact') == 'exact'
+
+    def test_exact_count_is_cached(self, monkeypatch):
+        calls = []
+
+        def fake_query_db(query, args=(), one=False):
+            calls.append(query)
+            return (123,)
+
+        monkeypatch.setattr(pagination, 'query_db', fake_query_db)
+        pagination.clear_count_cache()
+
+        assert count_rows("FROM analysis_results WHERE verdict IS NOT NULL") == 123
+        assert count_rows("FROM analysis_results WHERE verdict IS NOT NULL") == 123
+        assert len(calls) == 1
+        assert count_rows("FROM analysis_results", mode='none') is None
+        assert len(calls) == 1
+
+    def test_estimate_uses_planner_rows(self, monkeypatch):
+        def fake_query_db(query, args=(), one=False):
+            assert query.startswith("EXPLAIN (FORMAT JSON)")
+            return ([{'Plan': {'Plan Rows': 98765}}],)
+
+        monkeypatch.setattr(pagination, 'query_db', fake_query_db)
+        assert count_rows("FROM analysis_results", mode='estimate') == 98765
+
+
+class _RecordingCursor:
+    def __init__(self):
+        self.executed = []
+
+    def execute(self, query, params=None):
+        self.executed.append((query, params))
+
+
+class _SQLiteCursor:
+    """sqlite3 cursor that accepts the %s placeholders produced for PostgreSQL"""
+
+    def __init__(self, conn):
+        self._cursor = conn.cursor()
+
+    def execute(self, query, params=None):
+        self._cursor.execute(query.replace('%s', '?'), params or ())
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+
+class TestLatestAnalysisUpsert:
+    """ResultInsertion.upsert_latest keeps latest_analysis in step with history"""
+
+    @pytest.fixture
+    def db(self):
+        import sqlite3
+
+        conn = sqlite3.connect(':memory:')
+        conn.executescript('''
+            CREATE TABLE analysis_results (
+                id INTEGER PRIMARY KEY, ticker TEXT, symbol TEXT, name TEXT, yahoo_symbol TEXT,
+                score REAL, verdict TEXT, entry REAL, stop_loss REAL, target REAL, status TEXT,
+                analysis_source TEXT, strategy_id INTEGER, created_at TEXT, updated_at TEXT
+            );
+            CREATE TABLE latest_analysis (
+                symbol TEXT NOT NULL, strategy_id INTEGER NOT NULL DEFAULT 1, result_id INTEGER NOT NULL,
+                ticker TEXT, name TEXT, yahoo_symbol TEXT, score REAL, verdict TEXT, entry REAL,
+                stop_loss REAL, target REAL, status TEXT, analysis_source TEXT,
+                created_at TEXT, updated_at TEXT,
+                PRIMARY KEY (symbol, strategy_id)
+            );
+        ''')
+        yield conn
+        conn.close()
+
+    @staticmethod
+    def _insert(db, symbol, created_at, score, verdict='Buy', status='completed', strategy_id=None, name=None):
+        cursor = _SQLiteCursor(db)
+        cursor.execute(
+            '''INSERT INTO analysis_results
+               (ticker, symbol, name, score, verdict, status, strategy_id, created_at, updated_at)
+               VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s) RETURNING id''',
+            (f'{symbol}.NS', symbol, name, score, verdict, status, strategy_id, created_at, created_at)
+        )
+        result_id = cursor.fetchone()[0]
+        ResultInsertion.upsert_latest(cursor, result_id)
+        return result_id
+
+    @staticmethod
+    def _latest(db):
+        return db.execute(
+            'SELECT symbol, strategy_id, result_id, score, name FROM latest_analysis ORDER BY symbol, strategy_id'
+        ).fetchall()
+
+    def test_newest_row_per_symbol_and_strategy_wins(self, db):
+        self._insert(db, 'TCS', '2024-03-01T10:00:00', 6.0, name='Tata Consultancy')
+        newer = self._insert(db, 'TCS', '2024-03-02T10:00:00', 7.5)
+        other_strategy = self._insert(db, 'TCS', '2024-03-01T11:00:00', 4.0, strategy_id=2)
+        infy = self._insert(db, 'INFY', '2024-03-01T09:00:00', 5.0)
+
+        assert self._latest(db) == [
+            ('INFY', 1, infy, 5.0, None),
+            ('TCS', 1, newer, 7.5, 'Tata Consultancy'),
+            ('TCS', 2, other_strategy, 4.0, None),
+        ]
+        assert db.execute('SELECT COUNT(*) FROM analysis_results').fetchone() == (4,)
+
+    def test_older_and_failed_rows_do_not_overwrite(self, db):
+        current = self._insert(db, 'TCS', '2024-03-02T10:00:00', 7.5)
+        self._insert(db, 'TCS', '2024-03-01T10:00:00', 3.0)
+        self._insert(db, 'TCS', '2024-03-03T10:00:00', None, verdict=None, status='failed')
+
+        assert self._latest(db) == [('TCS', 1, current, 7.5, None)]
+
+    def test_same_timestamp_breaks_ties_by_result_id(self, db):
+        self._insert(db, 'TCS', '2024-03-02T10:00:00', 7.5)
+        later = self._insert(db, 'TCS', '2024-03-02T10:00:00', 8.0)
+
+        assert self._latest(db) == [('TCS', 1, later, 8.0, None)]
+
+    def test_missing_result_id_is_a_no_op(self, db):
+        ResultInsertion.upsert_latest(_SQLiteCursor(db), None)
+        assert self._latest(db) == []
+
+    def test_latest_listing_is_newest_first_and_screened(self, db, monkeypatch):
+        from flask import Flask
+        import routes.stocks as stocks_routes
+
+        self._insert(db, 'TCS', '2024-03-01T10:00:00', 6.0)
+        self._insert(db, 'TCS', '2024-03-04T10:00:00', 7.5)
+        self._insert(db, 'INFY', '2024-03-03T10:00:00', 8.0)
+        self._insert(db, 'WIPRO', '2024-03-02T10:00:00', 9.0, verdict='Sell')
+        self._insert(db, 'HDFC', '2024-03-05T10:00:00', 2.0)
+
+        def fake_query_db(query, args=(), one=False):
+            rows = db.execute(query, args).fetchall()
+            return (rows[0] if rows else None) if one else rows
+
+        monkeypatch.setattr(stocks_routes, 'query_db', fake_query_db)
+        monkeypatch.setattr(pagination, 'query_db', fake_query_db)
+        pagination.clear_count_cache()
+
+        app = Flask('latest_listing_test')
+        with app.test_request_context('/?latest=true&verdict=Buy&min_score=5&per_page=1'):
+            first = stocks_routes._get_latest_analysis_results()[0].get_json()
+        with app.test_request_context(f'/?latest=true&verdict=Buy&min_score=5&per_page=1&cursor={first["next_cursor"]}'):
+            second = stocks_routes._get_latest_analysis_results()[0].get_json()
+
+        assert [r['symbol'] for r in first['results']] == ['TCS']
+        assert first['results'][0]['score'] == 7.5
+        assert first['total'] == 2 and first['has_more']
+        assert [r['symbol'] for r in second['results']] == ['INFY']
+        assert second['has_more'] is False
+
+
+class TestAnalysisPartitions:
+    """Partition naming and retention window for analysis_results"""
+
+    def test_add_months_crosses_year_boundaries(self):
+        assert _add_months(date(2025, 11, 1), 3) == date(2026, 2, 1)
+        assert _add_months(date(2025, 1, 1), -1) == date(2024, 12, 1)
+        assert _add_months(date(2025, 6, 1), 0) == date(2025, 6, 1)
+
+    def test_partition_name_round_trip(self):
+        assert analysis_partition_name(date(2025, 3, 1)) == 'analysis_results_p202503'
+        assert parse_analysis_partition_month('analysis_results_p202503') == date(2025, 3, 1)
+        assert parse_analysis_partition_month('analysis_results_default') is None
+        assert parse_analysis_partition_month('analysis_results_p202513') is None
+
+    def test_expired_partitions_keep_retention_window(self):
+        names = [
+            'analysis_results_default',
+            'analysis_results_p202501',
+            'analysis_results_p202502',
+            'analysis_results_p202503',
+            'analysis_results_p202504',
+        ]
+        # Keep April plus the two previous months
+        expired = expired_analysis_partitions(names, 3, today=date(2025, 4, 15))
+        assert expired == ['analysis_results_p202501']
+
+    def test_retention_disabled(self):
+        names = ['analysis_results_p200001']
+        assert expired_analysis_partitions(names, 0, today=date(2025, 4, 15)) == []
+
+
+class _RetentionCursor:
+    """Simulates a temp table of `expired` rows drained in batches"""
+
+    def __init__(self, expired):
+        self.expired = expired
+        self.statements = []
+        self.rowcount = 0
+
+    def execute(self, query, params=None):
+        self.statements.append((' '.join(query.split()), params))
+        if query.startswith('CREATE TEMP TABLE'):
+            self.rowcount = self.expired
+        elif 'WITH batch AS' in query:
+            self.rowcount = min(params[0], self.expired)
+            self.expired -= self.rowcount
+        else:
+            self.rowcount = 3
+
+
+class _FakeConn:
+    def commit(self):
+        pass
+
+
+class TestAnalysisRetention:
+    """cleanup_old_analyses / run_analysis_retention"""
+
+    def _patch(self, monkeypatch, cursor):
+        @contextmanager
+        def fake_session():
+            yield _FakeConn(), cursor
+
+        monkeypatch.setattr(database, 'get_db_session', fake_session)
+
+    def test_full_pass_ranks_once_and_deletes_in_batches(self, monkeypatch):
+        cursor = _RetentionCursor(expired=12)
+        self._patch(monkeypatch, cursor)
+
+        stats = database.run_analysis_retention(keep_last=5, batch_size=5)
+
+        assert stats['deleted'] == 12
+        assert stats['batches'] == 3
+        assert stats['keep_last'] == 5
+        assert stats['elapsed_seconds'] >= 0
+        ranking = [q for q, _ in cursor.statements if q.startswith('CREATE TEMP TABLE')]
+        assert len(ranking) == 1
+        assert 'PARTITION BY COALESCE(symbol, ticker) ORDER BY created_at DESC, id DESC' in ranking[0]
+        assert not any(' OR ' in q for q, _ in cursor.statements)
+
+    def test_no_arguments_uses_set_based_pass(self, monkeypatch):
+        cursor = _RetentionCursor(expired=0)
+        self._patch(monkeypatch, cursor)
+
+        assert database.cleanup_old_analyses(keep_last=10) == 0
+        assert not any('WITH batch AS' in q for q, _ in cursor.statements)
+
+    def test_single_symbol_is_one_statement(self, monkeypatch):
+        cursor = _RetentionCursor(expired=0)
+        self._patch(monkeypatch, cursor)
+
+        assert database.cleanup_old_analyses(symbol='RELIANCE', keep_last=10) == 3
+        assert len(cursor.statements) == 1
+        query, params = cursor.statements[0]
+        assert 'WHERE symbol = %s' in query
+        assert params == ('RELIANCE', 10)
+
+
+class TestJsonbColumns:
+    """raw_data / analysis_config JSONB helpers"""
+
+    def test_jsonb_dumps_replaces_non_finite_floats(self):
+        value = [{'name': 'RSI', 'value': float('nan'), 'vote': 1},
+                 {'name': 'ADX', 'value': np.float32('inf'), 'confidence': np.float64(0.5)}]
+        encoded = jsonb_dumps(value)
+
+        assert 'NaN' not in encoded and 'Infinity' not in encoded
+        assert json.loads(encoded) == [{'name': 'RSI', 'value': None, 'vote': 1},
+                                       {'name': 'ADX', 'value': None, 'confidence': 0.5}]
+        assert jsonb_dumps(None) is None
+
+    def test_indicator_vote_condition_uses_containment(self):
+        assert indicator_vote_condition(None, 1) == ("", ())
+
+        sql, params = indicator_vote_condition('RSI', 1)
+        assert sql == "AND raw_data @> ?::jsonb"
+        assert json.loads(params[0]) == [{'name': 'RSI', 'vote': 1}]
+
+        _, params = indicator_vote_condition('MACD', None)
+        assert json.loads(params[0]) == [{'name': 'MACD'}]
+
+    def test_projection_selects_only_rendered_keys(self):
+        for field in INDICATOR_FIELDS:
+            assert f"'{field}', ind->'{field}'" in INDICATORS_PROJECTION_SQL
+        # Safe to embed in parameterized queries
+        assert '?' not in INDICATORS_PROJECTION_SQL
+        assert '%' not in INDICATORS_PROJECTION_SQL
+
+
+class _JobInsertCursor:
+    """Reports `inserted` rows for the INSERT, as ON CONFLICT DO NOTHING would"""
+
+    def __init__(self, inserted=1):
+        self.inserted = inserted
+        self.statements = []
+        self.rowcount = 0
+
+    def execute(self, query, params=None):
+        self.statements.append((' '.join(query.split()), params))
+        self.rowcount = self.inserted if query.strip().startswith('INSERT') else 0
+
+
+class TestJobDedup:
+    """symbols_digest + idx_jobs_active_digest"""
+
+    def _patch(self, monkeypatch, cursor):
+        @contextmanager
+        def fake_session():
+            yield _FakeConn(), cursor
+
+        monkeypatch.setattr(database, 'get_db_session', fake_session)
+
+    def test_digest_normalizes_symbol_set(self):
+        digest = symbol_set_digest(['tcs', ' INFY ', 'TCS'], strategy_id=2)
+
+        assert digest == symbol_set_digest(['INFY', 'TCS'], strategy_id=2)
+        assert len(digest) == 64
+        assert digest != symbol_set_digest(['INFY', 'TCS'], strategy_id=1)
+        assert digest != symbol_set_digest(['INFY', 'TCS'], strategy_id=2, job_type='backtest')
+        assert symbol_set_digest([]) is None
+        assert symbol_set_digest(['  ']) is None
+
+    def test_dedupe_releases_stale_jobs_and_inserts_digest(self, monkeypatch):
+        cursor = _JobInsertCursor(inserted=1)
+        self._patch(monkeypatch, cursor)
+
+        assert JobStateTransactions.create_job_atomic(
+            'job-1', 'queued', 2, tickers=['TCS', 'INFY'], strategy_id=3, dedupe=True)
+
+        release, insert = cursor.statements
+        digest = symbol_set_digest(['TCS', 'INFY'], 3)
+        assert release[0].startswith('UPDATE analysis_jobs SET symbols_digest = NULL')
+        assert release[1][0] == digest
+        assert "ON CONFLICT (symbols_digest) WHERE status IN ('queued', 'processing') DO NOTHING" in insert[0]
+        assert insert[1][-1] == digest
+
+    def test_conflict_returns_false(self, monkeypatch):
+        cursor = _JobInsertCursor(inserted=0)
+        self._patch(monkeypatch, cursor)
+
+        assert not JobStateTransactions.create_job_atomic(
+            'job-2', 'queued', 1, tickers=['TCS'], dedupe=True)
+
+    def test_reused_items_start_completed(self, monkeypatch):
+        cursor = _JobInsertCursor(inserted=1)
+        self._patch(monkeypatch, cursor)
+
+        assert JobStateTransactions.create_job_atomic('job-4', 'queued', 4, tickers=['A', 'B', 'C', 'D'], reused=3)
+
+        query, params = cursor.statements[0]
+        assert 'reused, symbols_digest' in query
+        assert params[3:5] == (3, 75)  # completed, progress
+        assert params[10] == 3 and params[-2] == 3  # successful, reused
+
+    def test_without_dedupe_digest_is_null(self, monkeypatch):
+        cursor = _JobInsertCursor(inserted=1)
+        self._patch(monkeypatch, cursor)
+
+        assert JobStateTransactions.create_job_atomic(
+            'job-3', 'queued', 1, tickers=['TCS'], job_type='backtest')
+        assert len(cursor.statements) == 1
+        assert cursor.statements[0][1][-1] is None
+
+
+class TestAPIKeyCache:
+    """APIKeyManager validation cache and write-behind buffer"""
+
+    @pytest.fixture(autouse=True)
+    def _isolate(self, monkeypatch):
+        self.queries = []
+        self.revoked = False
+
+        def fake_execute_query(query, args=(), fetch_one=False):
+            self.queries.append(' '.join(query.split()))
+            if query.lstrip().startswith('SELECT'):
+                return None if self.revoked else (1, 'Test Key', 'read,write', None, None)
+            if 'SET revoked_at' in query:
+                self.revoked = True
+            return None
+
+        monkeypatch.setattr(api_key_manager, 'execute_query', fake_execute_query)
+        monkeypatch.setattr(api_key_manager, '_revocation_redis', False)
+        monkeypatch.setattr(APIKeyManager, '_ensure_flusher', staticmethod(lambda: None))
+        APIKeyManager.invalidate_cache()
+        api_key_manager._pending_last_used.clear()
+        api_key_manager._pending_audit.clear()
+        yield
+        APIKeyManager.invalidate_cache()
+        api_key_manager._pending_last_used.clear()
+        api_key_manager._pending_audit.clear()
+
+    def test_repeat_validation_is_served_from_cache(self):
+        first = APIKeyManager.validate_api_key('secret')
+        second = APIKeyManager.validate_api_key('secret')
+
+        assert first == second
+        assert first['permissions'] == ['read', 'write']
+        assert len(self.queries) == 1
+        assert not any(q.startswith('UPDATE') for q in self.queries)
+        assert list(api_key_manager._pending_last_used) == [APIKeyManager.hash_api_key('secret')]
+
+    def test_returned_metadata_does_not_alias_cache(self):
+        APIKeyManager.validate_api_key('secret')['permissions'].append('all')
+        assert APIKeyManager.validate_api_key('secret')['permissions'] == ['read', 'write']
+
+    def test_revocation_evicts_cached_key(self):
+        APIKeyManager.validate_api_key('secret')
+        assert APIKeyManager.revoke_api_key('secret')
+
+        key_hash = APIKeyManager.hash_api_key('secret')
+        assert key_hash not in api_key_manager._key_cache
+        assert api_key_manager._pending_audit[-1][:2] == (key_hash, 'revoked')
+
+    def test_revocation_in_another_worker_is_seen_on_cache_hit(self, monkeypatch):
+        shared = _JobRedis()
+        monkeypatch.setattr(api_key_manager, '_revocation_redis', shared)
+        APIKeyManager.validate_api_key('secret')
+        key_hash = APIKeyManager.hash_api_key('secret')
+
+        # Another worker revokes: its own cache is evicted, this one's is not
+        this_worker = dict(api_key_manager._key_cache)
+        assert APIKeyManager.revoke_api_key('secret')
+        api_key_manager._key_cache.update(this_worker)
+
+        assert shared.ttls[f'apikey:revoked:{key_hash}'] == api_key_manager.config.API_KEY_CACHE_TTL + 5
+        assert APIKeyManager.validate_api_key('secret') is None
+        assert key_hash not in api_key_manager._key_cache
+
+    def test_without_redis_cache_entries_expire_by_ttl(self):
+        APIKeyManager.validate_api_key('secret')
+        this_worker = dict(api_key_manager._key_cache)
+        APIKeyManager.revoke_api_key('secret')
+        api_key_manager._key_cache.update(this_worker)
+
+        assert APIKeyManager.validate_api_key('secret') is not None
+
+    def test_expired_entry_is_reloaded(self, monkeypatch):
+        APIKeyManager.validate_api_key('secret')
+        key_hash = APIKeyManager.hash_api_key('secret')
+        metadata, _ = api_key_manager._key_cache[key_hash]
+        api_key_manager._key_cache[key_hash] = (metadata, 0)
+
+        APIKeyManager.validate_api_key('secret')
+        assert len(self.queries) == 2
+
+    def test_flush_writes_one_batch_and_requeues_on_failure(self, monkeypatch):
+        APIKeyManager.validate_api_key('secret')
+        APIKeyManager._audit_log('abc', 'created', 'details')
+        batches = []
+
+        def fake_execute_values(cursor, sql, rows):
+            batches.append((' '.join(sql.split()), rows))
+
+        monkeypatch.setattr(api_key_manager, 'execute_values', fake_execute_values)
+
+        @contextmanager
+        def failing_session():
+            raise RuntimeError('database down')
+            yield
+
+        monkeypatch.setattr(api_key_manager, 'get_db_session', failing_session)
+        assert APIKeyManager.flush_usage() == {'last_used': 0, 'audit': 0}
+        assert len(api_key_manager._pending_last_used) == 1
+        assert len(api_key_manager._pending_audit) == 1
+
+        @contextmanager
+        def fake_session():
+            yield _FakeConn(), None
+
+        monkeypatch.setattr(api_key_manager, 'get_db_session', fake_session)
+        assert APIKeyManager.flush_usage() == {'last_used': 1, 'audit': 1}
+        assert batches[0][0].startswith('UPDATE api_keys AS k')
+        assert batches[1][1] == [('abc', 'created', 'details')]
+        assert APIKeyManager.flush_usage() == {'last_used': 0, 'audit': 0}
+
+
+class _FakeRedis:
+    """register_script() stand-in that can be told to fail"""
+
+    def __init__(self, allowed=1, fail=False):
+        self.allowed = allowed
+        self.fail = fail
+        self.calls = []
+
+    def register_script(self, lua):
+        def script(keys, args):
+            if self.fail:
+                raise ConnectionError('redis down')
+            self.calls.append((keys, args))
+            return self.allowed
+        return script
+
+
+class TestRateLimiter:
+    """Per-key token buckets behind auth.check_rate_limit"""
+
+    def test_bucket_allows_burst_then_refills(self, monkeypatch):
+        clock = [1000.0]
+        monkeypatch.setattr(rate_limiter.time, 'monotonic', lambda: clock[0])
+        limiter = InMemoryRateLimiter(shards=4)
+
+        assert all(limiter.allow('k', 3, 60) for _ in range(3))
+        assert not limiter.allow('k', 3, 60)
+        assert limiter.allow('other', 3, 60)
+
+        clock[0] += 20  # one token refilled (3 per 60s)
+        assert limiter.allow('k', 3, 60)
+        assert not limiter.allow('k', 3, 60)
+
+    def test_full_buckets_are_evicted_when_shard_is_full(self, monkeypatch):
+        clock = [0.0]
+        monkeypatch.setattr(rate_limiter.time, 'monotonic', lambda: clock[0])
+        limiter = InMemoryRateLimiter(shards=1, max_keys_per_shard=2)
+
+        limiter.allow('a', 5, 60)
+        limiter.allow('b', 5, 60)
+        clock[0] += 60
+        limiter.allow('c', 5, 60)
+
+        assert set(limiter._shards[0][1]) == {'c'}
+
+    def test_redis_limiter_runs_script_per_key(self):
+        client = _FakeRedis(allowed=0)
+        limiter = RedisRateLimiter(redis_client=client)
+
+        assert not limiter.allow('hash', 60, 60)
+        keys, args = client.calls[0]
+        assert keys == ['ratelimit:hash']
+        assert args[:2] == [60, 1.0]
+
+    def test_redis_errors_fall_back_to_memory(self):
+        limiter = RedisRateLimiter(redis_client=_FakeRedis(fail=True),
+                                   fallback=InMemoryRateLimiter(shards=1))
+
+        assert limiter.allow('hash', 1, 60)
+        assert not limiter.allow('hash', 1, 60)
+
+    def test_check_rate_limit_uses_key_hash(self, monkeypatch):
+        import auth
+
+        seen = []
+
+        class _Recorder:
+            def allow(self, key, limit, period=60.0):
+                seen.append((key, limit, period))
+                return True
+
+        monkeypatch.setattr(auth, 'get_rate_limiter', lambda: _Recorder())
+        assert auth.check_rate_limit('secret', 10)
+        assert seen == [(APIKeyManager.hash_api_key('secret'), 10, 60)]
+
+
+class _StatementConn:
+    def __init__(self):
+        self.prepared_statements = set()
+
+
+class _StatementCursor(_RecordingCursor):
+    def __init__(self, connection=None):
+        super().__init__()
+        self.connection = connection
+
+
+class TestPreparedStatements:
+    """register_statement / PreparedStatement.execute"""
+
+    def test_placeholders_are_converted_once_at_registration(self):
+        statement = register_statement('test_job_touch', 'UPDATE analysis_jobs SET progress = ? WHERE job_id = ?')
+
+        assert statement.prepare_sql == 'PREPARE test_job_touch AS UPDATE analysis_jobs SET progress = $1 WHERE job_id = $2'
+        assert statement.execute_sql == 'EXECUTE test_job_touch (%s, %s)'
+        assert statement.fallback_sql == 'UPDATE analysis_jobs SET progress = %s WHERE job_id = %s'
+        assert get_statement('test_job_touch') is statement
+
+    def test_prepares_once_per_connection(self):
+        statement = register_statement('test_job_read', 'SELECT status FROM analysis_jobs WHERE job_id = ?')
+        first, second = _StatementConn(), _StatementConn()
+
+        cursor = _StatementCursor(first)
+        statement.execute(cursor, ('a',))
+        statement.execute(cursor, ('b',))
+        assert cursor.executed == [
+            (statement.prepare_sql, None),
+            ('EXECUTE test_job_read (%s)', ('a',)),
+            ('EXECUTE test_job_read (%s)', ('b',)),
+        ]
+
+        other = _StatementCursor(second)
+        statement.execute(other, ('c',))
+        assert other.executed[0] == (statement.prepare_sql, None)
+
+    def test_untracked_connections_use_plain_query(self, monkeypatch):
+        statement = register_statement('test_job_plain', 'SELECT total FROM analysis_jobs WHERE job_id = ?')
+
+        cursor = _StatementCursor()
+        statement.execute(cursor, ('a',))
+        assert cursor.executed == [(statement.fallback_sql, ('a',))]
+
+        monkeypatch.setattr(database.config, 'DB_PREPARED_STATEMENTS', False)
+        pooled = _StatementCursor(_StatementConn())
+        statement.execute(pooled, ('b',))
+        assert pooled.executed == [(statement.fallback_sql, ('b',))]
+
+    def test_registration_rejects_conflicts_and_wrong_arity(self):
+        statement = register_statement('test_job_dup', 'SELECT 1 FROM analysis_jobs WHERE job_id = ?')
+        assert register_statement('test_job_dup', statement.query) is statement
+
+        with pytest.raises(ValueError):
+            register_statement('test_job_dup', 'SELECT 2')
+        with pytest.raises(ValueError):
+            register_statement('bad name', 'SELECT 1')
+        with pytest.raises(ValueError):
+            statement.execute(_StatementCursor(), ())
+
+    def test_hot_statements_are_registered(self):
+        for name in ('analysis_result_insert', 'latest_analysis_upsert', 'job_status_select'):
+            assert '?' not in get_statement(name).fallback_sql
+
+
+_UNIVERSE_CSV = """symbol,name,yahoo_symbol,sector,industry
+TCS,Tata Consultancy Services Limited,TCS.NS,IT,Software
+INFY,Infosys Limited,INFY.NS,IT,Software
+TATAMOTORS,Tata Motors Limited,TATAMOTORS.NS,Auto,Vehicles
+RELIANCE,"Reliance Industries, Limited",,Energy,Refining
+,Missing Symbol Limited,X.NS,,
+"""
+
+
+class TestNSEUniverse:
+    """Loaded-once NSE universe index"""
+
+    @pytest.fixture
+    def csv_path(self, tmp_path):
+        path = tmp_path / 'nse_stocks_complete.csv'
+        path.write_text(_UNIVERSE_CSV, encoding='utf-8')
+        return path
+
+    def test_columns_and_defaults(self, csv_path):
+        universe = NSEUniverse.from_csv(csv_path)
+
+        assert len(universe) == 4
+        assert universe.symbols == ('TCS', 'INFY', 'TATAMOTORS', 'RELIANCE')
+        assert universe.names[3] == 'Reliance Industries, Limited'
+        assert universe.yahoo_symbols[3] == 'RELIANCE.NS'
+
+    def test_pages_share_prebuilt_rows(self, csv_path):
+        universe = NSEUniverse.from_csv(csv_path)
+
+        page = universe.page(2, 2)
+        assert [row['symbol'] for row in page] == ['TATAMOTORS', 'RELIANCE']
+        assert page[0] is universe.records[2]
+        assert universe.page(3, 2) == []
+
+    def test_sector_and_industry_groups(self, csv_path):
+        universe = NSEUniverse.from_csv(csv_path)
+
+        assert universe.by_sector['IT'] == (0, 1)
+        assert universe.filter_indices(industry='Vehicles') == (2,)
+        assert universe.filter_indices(sector='IT', industry='Vehicles') == ()
+        assert universe.filter_indices() is None
+        assert [r['symbol'] for r in universe.page(1, 10, universe.by_sector['IT'])] == ['TCS', 'INFY']
+
+    def test_prefix_search_symbols_before_names(self, csv_path):
+        universe = NSEUniverse.from_csv(csv_path)
+
+        assert [universe.symbols[i] for i in universe.search_prefix('tata')] == ['TATAMOTORS', 'TCS']
+        assert universe.search_prefix('ta', limit=1) == [2]
+        assert universe.search_prefix('  ') == []
+
+    def test_ranked_search_tiers(self, csv_path):
+        universe = NSEUniverse.from_csv(csv_path)
+
+        def search(query, limit=10):
+            return [(universe.symbols[i], match) for i, _, match in universe.search(query, limit)]
+
+        assert search('tcs')[0] == ('TCS', 'symbol')
+        assert search('tata') == [('TATAMOTORS', 'symbol_prefix'), ('TCS', 'name_prefix')]
+        assert search('cons serv') == [('TCS', 'word_prefix')]
+        assert search('tata', limit=1) == [('TATAMOTORS', 'symbol_prefix')]
+        assert search('   ') == []
+
+    def test_fuzzy_search_tolerates_typos(self, csv_path):
+        universe = NSEUniverse.from_csv(csv_path)
+
+        results = universe.search('relaince')
+        assert universe.symbols[results[0][0]] == 'RELIANCE'
+        assert results[0][2] == 'fuzzy'
+        assert results[0][1] < 60
+        # Single-letter words don't prefix-match every company
+        assert universe.search('t x') == []
+
+    def test_reloads_when_file_changes(self, csv_path):
+        first = get_nse_universe(csv_path)
+        assert get_nse_universe(csv_path) is first
+
+        csv_path.write_text(_UNIVERSE_CSV + 'HDFCBANK,HDFC Bank Limited,HDFCBANK.NS,Banks,Private\n', encoding='utf-8')
+        stat = os.stat(csv_path)
+        os.utime(csv_path, ns=(stat.st_atime_ns, first.mtime_ns + 1_000_000_000))
+
+        reloaded = get_nse_universe(csv_path)
+        assert reloaded is not first
+        assert reloaded.symbols[-1] == 'HDFCBANK'
+
+    def test_missing_file_raises(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            get_nse_universe(tmp_path / 'missing.csv')
+
+
+class TestJSONSerialization:
+    """Numpy-aware serializer behind jsonify() and the JSONB columns"""
+
+    @pytest.fixture(params=['stdlib', 'orjson'])
+    def backend(self, request, monkeypatch):
+        if request.param == 'orjson' and not serialization.ORJSON_AVAILABLE:
+            pytest.skip('orjson not installed')
+        monkeypatch.setattr(serialization, '_backend', None)
+        return serialization.set_json_backend(request.param)
+
+    def test_numpy_datetime_and_non_finite_values(self, backend):
+        value = {
+            'score': np.float64(7.5), 'votes': np.int64(3), 'ok': np.bool_(True),
+            'series': np.array([1.0, np.nan]), 'strided': np.arange(6).reshape(2, 3)[:, 0],
+            'missing': float('inf'), 'at': datetime(2025, 1, 2, 9, 15), 'day': date(2025, 1, 2),
+            1: 'int key',
+        }
+        encoded = serialization.dumps(value)
+
+        assert ', ' not in encoded and ': ' not in encoded and 'NaN' not in encoded
+        assert json.loads(encoded) == {
+            'score': 7.5, 'votes': 3, 'ok': True, 'series': [1.0, None], 'strided': [0, 3],
+            'missing': None, 'at': '2025-01-02T09:15:00', 'day': '2025-01-02', '1': 'int key',
+        }
+
+    def test_pretty_printing_is_opt_in(self, backend):
+        assert serialization.dumps({'a': [1]}, pretty=True) == '{\n  "a": [\n    1\n  ]\n}'
+        assert serialization.loads(b'{"a":[1]}') == {'a': [1]}
+
+    def test_unknown_backend_rejected(self):
+        with pytest.raises(ValueError):
+            serialization._create_backend('msgpack')
+
+    def test_incomplete_backend_fails_on_creation(self):
+        class DumpsOnly(serialization.JSONBackend):
+            def dumps(self, value, pretty=False):
+                return b'null'
+
+        with pytest.raises(TypeError):
+            DumpsOnly()
+
+    def test_flask_provider_compact_unless_requested(self):
+        from flask import Flask, jsonify
+
+        app = Flask('serialization_test')
+        app.json = serialization.FastJSONProvider(app)
+
+        @app.route('/r')
+        def r():
+            return jsonify({'score': np.float32(1.5), 'values': np.array([1, 2])})
+
+        client = app.test_client()
+        assert client.get('/r').data == b'{"score":1.5,"values":[1,2]}'
+        assert b'\n  "score"' in client.get('/r?pretty=1').data
+
+
+class _DownRedis:
+    """Redis client whose every call fails"""
+
+    def __getattr__(self, name):
+        def fail(*args, **kwargs):
+            raise ConnectionError('redis down')
+        return fail
+
+
+class TestResponseCache:
+    """@cached_response, conditional GETs and tag invalidation"""
+
+    @pytest.fixture
+    def app(self, monkeypatch):
+        from flask import Flask, jsonify, request
+
+        cache = InMemoryResponseCache(max_entries=8)
+        monkeypatch.setattr(response_cache, 'get_response_cache', lambda: cache)
+        monkeypatch.setattr(response_cache.config, 'RESPONSE_CACHE_ENABLED', True)
+
+        app = Flask('response_cache_test')
+        app.calls = []
+
+        @app.route('/results')
+        @cached_response(tags=('results',), ttl=60)
+        def results():
+            app.calls.append(request.args.to_dict())
+            return jsonify({'calls': len(app.calls)})
+
+        @app.route('/broken')
+        @cached_response(tags=('results',), ttl=60)
+        def broken():
+            app.calls.append('broken')
+            return jsonify({'error': 'nope'}), 500
+
+        return app
+
+    def test_hits_skip_the_view_and_vary_by_query(self, app):
+        client = app.test_client()
+
+        first = client.get('/results?page=1')
+        assert client.get('/results?page=1').data == first.data
+        assert len(app.calls) == 1
+        client.get('/results?page=2')
+        assert len(app.calls) == 2
+        assert first.headers['Cache-Control'] == 'no-cache'
+        assert first.headers['Last-Modified']
+
+    def test_matching_etag_gets_304(self, app):
+        client = app.test_client()
+        etag = client.get('/results').headers['ETag']
+
+        response = client.get('/results', headers={'If-None-Match': etag})
+        assert response.status_code == 304
+        assert response.data == b''
+        assert client.get('/results', headers={'If-None-Match': '"stale"'}).status_code == 200
+
+    def test_invalidation_recomputes(self, app):
+        client = app.test_client()
+        etag = client.get('/results').headers['ETag']
+
+        invalidate_responses('jobs')
+        assert client.get('/results', headers={'If-None-Match': etag}).status_code == 304
+        invalidate_responses('results')
+        response = client.get('/results', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        assert response.get_json() == {'calls': 2}
+
+    def test_errors_are_not_cached(self, app):
+        client = app.test_client()
+
+        assert client.get('/broken').status_code == 500
+        assert client.get('/broken').status_code == 500
+        assert app.calls == ['broken', 'broken']
+
+    def test_entries_expire_and_lru_is_bounded(self, monkeypatch):
+        clock = [100.0]
+        monkeypatch.setattr(response_cache.time, 'monotonic', lambda: clock[0])
+        cache = InMemoryResponseCache(max_entries=2)
+        entry = response_cache.CachedResponse(b'{}', 'application/json', 'e', 0.0)
+
+        cache.set('a', entry, ttl=5)
+        cache.set('b', entry, ttl=5)
+        cache.get('a')
+        cache.set('c', entry, ttl=5)
+        assert cache.get('b') is None and cache.get('a') is entry
+
+        clock[0] += 5
+        assert cache.get('a') is None
+
+    def test_redis_errors_fall_back_to_memory(self):
+        cache = RedisResponseCache(redis_client=_DownRedis(), fallback=InMemoryResponseCache())
+        entry = response_cache.CachedResponse(b'{}', 'application/json', 'e', 0.0)
+
+        assert cache.generations(['results']) == [0]
+        cache.invalidate(['results'])
+        assert cache.generations(['results']) == [1]
+        cache.set('k', entry, ttl=5)
+        assert cache.get('k') is entry
+
+
+class TestResultExport:
+    """Filter SQL and batch-by-batch encoding of results exports"""
+
+    ROWS = [
+        (1, 'job-1', 'TCS.NS', 'TCS', 'Tata, Consultancy', 'TCS.NS', 1, 'bulk', 'completed',
+         'Buy', 7.5, 100.0, 95.0, 110.0, 10, 2.0, 'real', False, datetime(2025, 6, 1, 9, 15),
+         [{'name': 'RSI', 'vote': 1}]),
+        (2, 'job-1', 'INFY.NS', 'INFY', 'Infosys', 'INFY.NS', 1, 'bulk', 'completed',
+         'Sell', 3.0, None, None, None, None, None, 'real', False, datetime(2025, 6, 1, 9, 16),
+         []),
+    ]
+
+    @pytest.fixture
+    def batches(self, monkeypatch):
+        calls = []
+
+        def fake_batches(query, params, batch_size):
+            calls.append((query, params, batch_size))
+            yield [row[:-1] if 'raw_data' not in query else row for row in self.ROWS[:1]]
+            yield [row[:-1] if 'raw_data' not in query else row for row in self.ROWS[1:]]
+
+        monkeypatch.setattr(result_export, 'iter_result_batches', fake_batches)
+        return calls
+
+    def test_query_combines_filters_in_order(self):
+        query, params = build_export_query(ExportFilter(
+            job_id='job-1', start=datetime(2025, 6, 1), end=datetime(2025, 7, 1), strategy_id=2
+        ))
+        assert 'job_id = ?' in query
+        assert 'created_at >= ?' in query and 'created_at < ?' in query
+        assert 'raw_data' not in query
+        assert query.strip().endswith('ORDER BY created_at, id')
+        assert params == ('job-1', datetime(2025, 6, 1), datetime(2025, 7, 1), 2)
+        assert ExportFilter().is_empty() and not ExportFilter(source='bulk').is_empty()
+
+        query, _ = build_export_query(ExportFilter(source='bulk'), include_indicators=True)
+        assert 'raw_data' in query and 'analysis_source = ?' in query
+
+    def test_csv_streams_one_chunk_per_batch(self, batches):
+        chunks = list(stream_results_export(ExportFilter(job_id='job-1'), 'csv', batch_size=1))
+
+        assert batches[0][1:] == (('job-1',), 1)
+        assert len([c for c in chunks if c]) == 3  # header + two batches
+        lines = b''.join(chunks).decode().splitlines()
+        assert lines[0].split(',')[:3] == ['id', 'job_id', 'ticker']
+        assert '"Tata, Consultancy"' in lines[1] and '2025-06-01T09:15:00' in lines[1]
+        assert lines[2].startswith('2,job-1,INFY.NS') and ',,,' in lines[2]
+
+    def test_ndjson_with_indicators_and_gzip(self, batches):
+        data = b''.join(stream_results_export(
+            ExportFilter(job_id='job-1'), 'ndjson', compress=True, include_indicators=True
+        ))
+
+        records = [json.loads(line) for line in gzip.decompress(data).decode().splitlines()]
+        assert [r['ticker'] for r in records] == ['TCS.NS', 'INFY.NS']
+        assert records[0]['raw_data'] == [{'name': 'RSI', 'vote': 1}]
+        assert records[1]['entry'] is None
+
+    def test_unknown_format_is_rejected(self):
+        with pytest.raises(ValueError):
+            stream_results_export(ExportFilter(job_id='job-1'), 'xlsx')
+
+    def test_parquet_round_trip(self, batches):
+        pq = pytest.importorskip('pyarrow.parquet')
+
+        data = b''.join(stream_results_export(ExportFilter(job_id='job-1'), 'parquet', include_indicators=True))
+
+        table = pq.read_table(io.BytesIO(data))
+        assert table.num_rows == 2
+        assert table.column('ticker').to_pylist() == ['TCS.NS', 'INFY.NS']
+        assert json.loads(table.column('raw_data')[0].as_py()) == [{'name': 'RSI', 'vote': 1}]
+
+
+class TestExcelReports:
+    """Write-only workbooks saved to memory instead of DATA_PATH/reports"""
+
+    INDICATORS = [
+        {'name': 'RSI', 'vote': 1, 'confidence': 0.8, 'category': 'momentum'},
+        {'name': 'MACD', 'vote': -1, 'confidence': 0.6, 'category': 'trend'},
+    ]
+
+    def _result(self, ticker, **extra):
+        return {'ticker': ticker, 'verdict': 'Buy', 'score': 7.5, 'entry': 100.0,
+                'stop': 95.0, 'target': 110.0, 'indicators': self.INDICATORS, **extra}
+
+    def test_single_report_is_built_in_memory(self, tmp_path, monkeypatch):
+        openpyxl = pytest.importorskip('openpyxl')
+        monkeypatch.setenv('DATA_PATH', str(tmp_path))
+
+        buffer = export_to_excel(self._result('TCS.NS'))
+
+        assert not any(tmp_path.iterdir())
+        rows = list(openpyxl.load_workbook(buffer).active.values)
+        assert rows[0][0] == 'Trading Signal Analysis Report'
+        assert rows[2][:2] == ('Ticker:', 'TCS.NS')
+        assert rows[7][:2] == ('Stop Loss:', 95.0)
+        assert rows[10] == ('Indicator', 'Vote', 'Confidence', 'Category')
+        assert rows[11] == ('RSI', 1, 0.8, 'momentum')
+
+    def test_invalid_result_is_rejected(self):
+        pytest.importorskip('openpyxl')
+        with pytest.raises(ValueError):
+            export_to_excel({'ticker': 'TCS.NS'})
+
+    def test_job_workbook_consumes_results_lazily(self):
+        openpyxl = pytest.importorskip('openpyxl')
+        created = datetime(2025, 6, 1, 9, 15)
+
+        def results():
+            for i in range(3):
+                yield self._result(f'SYM{i}.NS', created_at=created)
+
+        wb = openpyxl.load_workbook(export_results_to_excel(results()))
+
+        summary = list(wb['Summary'].values)
+        assert summary[0][0] == 'Ticker' and len(summary) == 4
+        assert summary[3] == ('SYM2.NS', 'Buy', 7.5, 100.0, 95.0, 110.0, created)
+        indicators = list(wb['Indicators'].values)
+        assert len(indicators) == 1 + 3 * len(self.INDICATORS)
+        assert indicators[2] == ('SYM0.NS', 'MACD', -1, 0.6, 'trend')
+
+    def test_job_report_route_reads_result_batches(self, monkeypatch):
+        openpyxl = pytest.importorskip('openpyxl')
+        from flask import Flask
+        import routes.analysis as analysis_routes
+
+        app = Flask('excel_report_test')
+        app.register_blueprint(analysis_routes.bp)
+
+        row = dict.fromkeys(result_export.EXPORT_COLUMNS)
+        row.update(ticker='TCS.NS', verdict='Sell', score=2.0, stop_loss=90.0,
+                   raw_data=json.dumps(self.INDICATORS))
+        batches = []
+
+        def fake_batches(query, params, batch_size):
+            batches.append(params)
+            yield [tuple(row[c] for c in result_export.EXPORT_COLUMNS + ('raw_data',))]
+
+        monkeypatch.setattr(analysis_routes, 'query_db', lambda *a, **k: ('job-1',))
+        monkeypatch.setattr(analysis_routes, 'iter_result_batches', fake_batches)
+
+        response = app.test_client().get('/api/analysis/report/job/job-1/download')
+
+        assert response.status_code == 200
+        assert 'job_job-1_analysis.xlsx' in response.headers['Content-Disposition']
+        assert batches == [('job-1',)]
+        wb = openpyxl.load_workbook(io.BytesIO(response.data))
+        assert list(wb['Summary'].values)[1][:5] == ('TCS.NS', 'Sell', 2.0, None, 90.0)
+        assert len(list(wb['Indicators'].values)) == 3
+
+
+class _RequestConnection:
+    """Request connection double: records statements, answers RETURNING from a callback"""
+
+    encoding = 'UTF8'
+
+    def __init__(self, returning):
+        self.returning = returning
+        self.statements = []
+        self.commits = 0
+
+    def cursor(self):
+        return _RequestCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+
+class _RequestCursor:
+    def __init__(self, conn):
+        self.connection = conn
+        self._rows = []
+
+    def mogrify(self, template, args):
+        return repr(tuple(args)).encode()
+
+    def execute(self, query, args=None):
+        query = query.decode() if isinstance(query, bytes) else query
+        self.connection.statements.append((query, args))
+        self._rows = self.connection.returning(query, args)
+
+    def fetchall(self):
+        return self._rows
+
+    def close(self):
+        pass
+
+
+class TestWatchlistCollectionBatching:
+    """add-stocks / move-stocks / listing issue a constant number of statements"""
+
+    @pytest.fixture
+    def client(self, monkeypatch):
+        from flask import Flask
+        import routes.watchlist_collections as collections_routes
+
+        app = Flask('watchlist_collections_test')
+        app.register_blueprint(collections_routes.bp)
+        app.queries = []
+
+        def fake_query_db(query, args=(), one=False):
+            app.queries.append(query)
+            if 'GROUP BY collection_id' in query:
+                return [(None, 4), (7, 2)]
+            if 'FROM watchlist_collections' in query and 'WHERE id' in query:
+                return (7,)
+            return [(7, 'Banks', '', None), (8, 'Empty', '', None)]
+
+        monkeypatch.setattr(collections_routes, 'query_db', fake_query_db)
+        app.conn = None
+
+        def use_connection(returning):
+            app.conn = _RequestConnection(returning)
+            monkeypatch.setattr(collections_routes, 'get_db', lambda: app.conn)
+
+        app.use_connection = use_connection
+        return app.test_client()
+
+    def test_collection_counts_come_from_one_group_by(self, client):
+        data = client.get('/api/watchlist-collections').get_json()
+
+        assert len(client.application.queries) == 2
+        counts = {c['name']: c['stock_count'] for c in data['collections']}
+        assert counts == {'Default': 4, 'Banks': 2, 'Empty': 0}
+
+    def test_add_stocks_is_one_multi_row_insert(self, client):
+        # TCS already in the collection: ON CONFLICT skips it
+        client.application.use_connection(
+            lambda query, args: [('INFY.NS',), ('HDFCBANK.NS',)] if 'INSERT' in query else []
+        )
+        stocks = ['tcs', {'symbol': 'INFY', 'name': 'Infosys'}, 'HDFCBANK.NS', 'Tcs.ns', '  ']
+
+        data = client.post('/api/watchlist-collections/add-stocks',
+                           json={'collection_id': 7, 'stocks': stocks}).get_json()
+
+        conn = client.application.conn
+        assert len(conn.statements) == 1 and conn.commits == 1
+        statement = conn.statements[0][0]
+        assert 'ON CONFLICT DO NOTHING RETURNING ticker' in statement
+        assert statement.count("'TCS.NS'") == 1 and "'Infosys'" in statement
+        assert data['added'] == ['INFY.NS', 'HDFCBANK.NS']
+        assert data['skipped'] == ['TCS.NS']
+
+    def test_move_stocks_is_one_update(self, client):
+        client.application.use_connection(lambda query, args: [(3,), (5,)])
+
+        data = client.post('/api/watchlist-collections/move-stocks',
+                           json={'target_collection_id': 7, 'stock_ids': [3, '5', 9]}).get_json()
+
+        conn = client.application.conn
+        assert len(conn.statements) == 1 and conn.commits == 1
+        query, args = conn.statements[0]
+        assert query.lstrip().startswith('UPDATE watchlist') and 'ANY(%s)' in query
+        assert args == (7, [3, 5, 9], 7)
+        assert data['moved_count'] == 2 and data['skipped_ids'] == [9]
+
+    def test_move_stocks_rejects_non_integer_ids(self, client):
+        response = client.post('/api/watchlist-collections/move-stocks',
+                               json={'target_collection_id': None, 'stock_ids': ['abc']})
+        assert response.status_code == 400
+
+
+class _FreshnessCursor:
+    def __init__(self, rows):
+        self.rows = rows
+        self.statements = []
+
+    def execute(self, query, params=None):
+        self.statements.append((' '.join(query.split()), params))
+
+    def fetchall(self):
+        return self.rows
+
+
+class TestAnalysisFreshness:
+    """freshness_policy='reuse_fresh' lookups and last-bar cutoffs"""
+
+    CONFIG = {'capital': 100000, 'risk_percent': None, 'use_demo_data': False}
+
+    def _patch(self, monkeypatch, rows):
+        cursor = _FreshnessCursor(rows)
+
+        @contextmanager
+        def fake_session():
+            yield _FakeConn(), cursor
+
+        monkeypatch.setattr(freshness, 'get_db_session', fake_session)
+        return cursor
+
+    def test_last_market_bar(self):
+        # Friday 2026-10-16, 15-minute bars from 09:15
+        assert last_market_bar(datetime(2026, 10, 16, 10, 7), 15) == datetime(2026, 10, 16, 10, 0)
+        assert last_market_bar(datetime(2026, 10, 16, 9, 15), 15) == datetime(2026, 10, 16, 9, 15)
+        assert last_market_bar(datetime(2026, 10, 16, 18, 0), 15) == datetime(2026, 10, 16, 15, 30)
+        # Weekend and Monday pre-open fall back to Friday's close
+        assert last_market_bar(datetime(2026, 10, 18, 12, 0), 15) == datetime(2026, 10, 16, 15, 30)
+        assert last_market_bar(datetime(2026, 10, 19, 8, 0), 15) == datetime(2026, 10, 16, 15, 30)
+
+    def test_aware_times_are_converted_to_ist(self):
+        from datetime import timezone
+        now = datetime(2026, 10, 16, 5, 0, tzinfo=timezone.utc)  # 10:30 IST
+        assert last_market_bar(now, 15) == datetime(2026, 10, 16, 10, 30)
+
+    def test_newest_matching_result_per_ticker(self, monkeypatch):
+        since = datetime(2026, 10, 16, 15, 30)
+        cursor = self._patch(monkeypatch, [
+            # Newest TCS row used different settings; the older one still matches
+            (9, 'TCS.NS', {'capital': 50000, 'use_demo_data': False}, datetime(2026, 10, 16, 17, 0), 'job-b'),
+            (8, 'INFY.NS', {'capital': 100000, 'use_demo_data': False, 'strategy_id': 2}, datetime(2026, 10, 16, 16, 5), 'job-a'),
+            (7, 'TCS.NS', '{"capital": 100000.0, "use_demo_data": false}', datetime(2026, 10, 16, 16, 0), 'job-a'),
+            (6, 'INFY.NS', {'capital': 100000, 'use_demo_data': False}, datetime(2026, 10, 16, 15, 45), 'job-0'),
+        ])
+
+        fresh = freshness.find_fresh_results(['tcs.ns', 'INFY.NS', 'HDFC.NS'], 2, self.CONFIG, since=since)
+
+        assert fresh == {
+            'tcs.ns': {'result_id': 7, 'created_at': datetime(2026, 10, 16, 16, 0), 'job_id': 'job-a'},
+            'INFY.NS': {'result_id': 8, 'created_at': datetime(2026, 10, 16, 16, 5), 'job_id': 'job-a'},
+        }
+        query, params = cursor.statements[0]
+        assert 'LOWER(ticker) = ANY(%s)' in query
+        assert params == (since, ['tcs.ns', 'infy.ns', 'hdfc.ns'], 2)
+
+    def test_aware_cutoff_is_compared_as_naive_ist(self, monkeypatch):
+        from datetime import timezone
+        cursor = self._patch(monkeypatch, [])
+
+        freshness.find_fresh_results(['TCS.NS'], 1, self.CONFIG, since=datetime(2026, 10, 16, 10, 0, tzinfo=timezone.utc))
+
+        assert cursor.statements[0][1][0] == datetime(2026, 10, 16, 15, 30)
+
+    def test_split_keeps_request_order(self, monkeypatch):
+        monkeypatch.setattr(freshness, 'find_fresh_results', lambda *a: {'B.NS': {'result_id': 1}})
+
+        fresh, pending = split_by_freshness(['A.NS', 'B.NS', 'C.NS'], 1, {}, 'reuse_fresh')
+        assert list(fresh) == ['B.NS'] and pending == ['A.NS', 'C.NS']
+
+        assert split_by_freshness(['A.NS', 'B.NS'], 1, {}, 'recompute') == ({}, ['A.NS', 'B.NS'])
+
+    def test_lookup_failure_recomputes_everything(self, monkeypatch):
+        def broken(*args):
+            raise RuntimeError('db down')
+
+        monkeypatch.setattr(freshness, 'find_fresh_results', broken)
+        assert split_by_freshness(['A.NS'], 1, {}, 'reuse_fresh') == ({}, ['A.NS'])
+
+    def test_policy_parsing(self, monkeypatch):
+        monkeypatch.setattr(freshness.config, 'ANALYSIS_FRESHNESS_POLICY', 'recompute')
+        assert parse_freshness_policy(None) == 'recompute'
+        assert parse_freshness_policy(' Reuse_Fresh ') == 'reuse_fresh'
+        with pytest.raises(ValueError):
+            parse_freshness_policy('sometimes')
+
+
+class _JobRedis:
+    """Dict-backed stand-in for a decode_responses=True client; counts round-trips"""
+
+    def __init__(self):
+        self.hashes = {}
+        self.values = {}
+        self.sets = {}
+        self.ttls = {}
+        self.round_trips = 0
+
+    def _call(self, name, *args, **kwargs):
+        return getattr(self, '_' + name)(*args, **kwargs)
+
+    def __getattr__(self, name):
+        if not hasattr(type(self), '_' + name):
+            raise AttributeError(name)
+
+        def command(*args, **kwargs):
+            self.round_trips += 1
+            return self._call(name, *args, **kwargs)
+        return command
+
+    def pipeline(self, transaction=True):
+        return _JobRedisPipeline(self)
+
+    def register_script(self, lua):
+        assert lua == RedisJobStateManager.UPDATE_JOB_LUA
+
+        def update_job(keys, args):
+            # Same steps as the script, applied in one call
+            self.round_trips += 1
+            key, cancel_key, active = keys
+            job_id, cancelled, finished, ttl, *fields = args
+            if cancelled:
+                self._set(cancel_key, 1, ex=ttl)
+            if key not in self.hashes:
+                return 0
+            self._hset(key, mapping=dict(zip(fields[::2], fields[1::2])))
+            if finished:
+                self._expire(key, ttl)
+                self._srem(active, job_id)
+            return 1
+        return update_job
+
+    def _ping(self):
+        return True
+
+    def _hset(self, key, mapping):
+        self.hashes.setdefault(key, {}).update(mapping)
+
+    def _hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def _exists(self, *keys):
+        return sum(key in self.hashes or key in self.values for key in keys)
+
+    def _set(self, key, value, ex=None):
+        self.values[key] = str(value)
+        self.ttls[key] = ex
+
+    def _expire(self, key, seconds):
+        self.ttls[key] = seconds
+
+    def _delete(self, *keys):
+        for key in keys:
+            self.hashes.pop(key, None)
+            self.values.pop(key, None)
+
+    def _sadd(self, key, member):
+        self.sets.setdefault(key, set()).add(member)
+
+    def _srem(self, key, member):
+        self.sets.get(key, set()).discard(member)
+
+    def _smembers(self, key):
+        return set(self.sets.get(key, set()))
+
+    def _scan(self, cursor, match=None, count=None):
+        return 0, list(self.hashes) + list(self.values)
+
+
+class _JobRedisPipeline:
+    def __init__(self, client):
+        self.client = client
+        self.queued = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.queued.append((name, args, kwargs))
+            return self
+        return queue
+
+    def execute(self):
+        self.client.round_trips += 1
+        return [self.client._call(name, *args, **kwargs) for name, args, kwargs in self.queued]
+
+
+class TestJobStateRoundTrips:
+    """Cheap cancellation checks, pipelined writes and bulk reads in the job state managers"""
+
+    @pytest.fixture
+    def manager(self):
+        return RedisJobStateManager(redis_client=_JobRedis())
+
+    def test_update_is_one_round_trip(self, manager):
+        manager.create_job('j1', {'status': 'processing', 'total': 3, 'completed': 0})
+        client = manager.redis
+        client.round_trips = 0
+
+        assert manager.update_job('j1', {'completed': 1, 'errors': []})
+        assert manager.update_job('j1', {'status': 'completed'})
+
+        assert client.round_trips == 2
+        assert manager.get_job('j1')['completed'] == 1
+        assert client.ttls['job:j1'] == RedisJobStateManager.FINISHED_TTL
+        assert 'j1' not in client.sets['active_jobs']
+
+    def test_update_of_unknown_job_leaves_no_hash_behind(self, manager):
+        manager.redis.round_trips = 0
+        assert not manager.update_job('ghost', {'completed': 1})
+        assert manager.redis.hashes == {} and manager.redis.values == {}
+        assert manager.redis.round_trips == 1  # no compensating delete
+
+    def test_cancel_before_start_is_kept(self, manager):
+        assert not manager.cancel_job('queued')
+
+        assert manager.redis.hashes == {}
+        assert manager.redis.ttls['job:queued:cancelled'] == RedisJobStateManager.FINISHED_TTL
+        assert RedisJobStateManager(redis_client=manager.redis).is_cancelled('queued')
+
+    def test_cancellation_flag_is_checked_without_reading_the_job(self, manager):
+        manager.create_job('j1', {'status': 'processing', 'cancelled': False})
+        assert not manager.is_cancelled('j1')
+
+        # Cancelled through another manager (i.e. another worker)
+        RedisJobStateManager(redis_client=manager.redis).cancel_job('j1')
+        client = manager.redis
+        client.round_trips = 0
+
+        assert manager.is_cancelled('j1')
+        assert manager.is_cancelled('j1')
+        assert client.round_trips == 1  # one EXISTS, then remembered
+        assert manager.get_job('j1')['cancelled'] is True
+
+    def test_get_jobs_is_one_round_trip(self, manager):
+        for job_id in ('a', 'b', 'c'):
+            manager.create_job(job_id, {'status': 'processing', 'completed': 2})
+        manager.redis.round_trips = 0
+
+        jobs = manager.get_jobs(['a', 'missing', 'c', 'a'])
+
+        assert list(jobs) == ['a', 'c'] and jobs['c']['completed'] == 2
+        assert manager.redis.round_trips == 1
+        assert manager.get_jobs([]) == {}
+
+    def test_cleanup_skips_flag_keys(self, manager):
+        manager.create_job('old', {'status': 'processing'})
+        manager.cancel_job('old')
+        manager.update_job('old', {'completed_at': '2000-01-01T00:00:00'})
+
+        assert manager.cleanup_old_jobs(max_age_hours=1) == 1
+        assert manager.redis.hashes == {} and manager.redis.values == {}
+
+    def test_in_memory_manager(self):
+        manager = InMemoryJobStateManager()
+        manager.create_job('j1', {'status': 'processing'})
+        manager.create_job('j2', {'status': 'processing'})
+        manager.cancel_job('j2')
+
+        assert not manager.is_cancelled('j1') and manager.is_cancelled('j2')
+        assert not manager.is_cancelled('missing')
+        assert list(manager.get_jobs(['j2', 'missing', 'j1'])) == ['j2', 'j1']
+
+        # Reads are copies, like the Redis manager's
+        manager.get_jobs(['j1'])['j1']['status'] = 'mutated'
+        manager.get_job('j1')['status'] = 'mutated'
+        manager.get_all_jobs()['j1']['status'] = 'mutated'
+        assert manager.get_job('j1')['status'] == 'processing'
+
+        # Cancelled while still queued
+        assert not manager.cancel_job('queued')
+        assert manager.is_cancelled('queued')
@@ -15,7 +15,7 @@ Part 3C: MODULE_REWRITE_002 - Utils Module Decomposition
 # ============================================================================
 
 # Analysis Domain
-from utils.analysis.orchestrator import analyze_ticker, aggregate_votes, get_verdict, export_to_excel
+from utils.analysis.orchestrator import analyze_ticker, aggregate_votes, get_verdict, export_to_excel, export_results_to_excel
 from utils.analysis.signal_validator import validate_buy_signal, validate_sell_signal
 from utils.analysis.vote_aggregator import aggregate_strategies, select_best_strategy
 
@@ -59,6 +59,7 @@ __all__ = [
     'aggregate_votes',
     'get_verdict',
     'export_to_excel',
+    'export_results_to_excel',
     'validate_buy_signal',
     'validate_sell_signal',
     'aggregate_strategies',
@@ -5,19 +5,25 @@ Core ticker analysis functionality:
 - Orchestration: Coordinate analysis pipeline
 - Aggregation: Combine indicator votes
 - Validation: Verify signal quality
+- Freshness: Reuse recent results instead of recomputing
 """
 
-from utils.analysis.orchestrator import analyze_ticker, aggregate_votes, get_verdict, export_to_excel
+from utils.analysis.orchestrator import analyze_ticker, aggregate_votes, get_verdict, export_to_excel, export_results_to_excel
 from utils.analysis.signal_validator import validate_buy_signal, validate_sell_signal
 from utils.analysis.vote_aggregator import aggregate_strategies, select_best_strategy
+from utils.analysis.freshness import find_fresh_results, last_market_bar, split_by_freshness
 
 __all__ = [
     'analyze_ticker',
     'aggregate_votes',
     'get_verdict',
     'export_to_excel',
+    'export_results_to_excel',
     'validate_buy_signal',
     'validate_sell_signal',
     'aggregate_strategies',
     'select_best_strategy',
+    'find_fresh_results',
+    'last_market_bar',
+    'split_by_freshness',
 ]
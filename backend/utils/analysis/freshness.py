@@ -0,0 +1,157 @@
+"""
+Freshness policy for analysis requests
+
+Watchlist (/api/analysis/analyze) and bulk (/api/stocks/analyze-all-stocks)
+runs both write to analysis_results, so a ticker analyzed minutes ago by
+either path does not need recomputing. With the 'reuse_fresh' policy, a
+ticker is served from the table when its newest completed result for the
+same strategy and config was created after the last market bar; only the
+remaining tickers are queued.
+
+Market bars follow the NSE cash session (09:15-15:30 IST, Monday-Friday,
+exchange holidays not modelled):
+- during the session, the start of the current MARKET_BAR_MINUTES bar
+- outside it, the close of the latest session
+"""
+
+import json
+import logging
+from datetime import datetime, time, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from config import config
+from database import get_db_session, _convert_query_params
+from utils.timezone_util import IST, get_ist_now
+
+logger = logging.getLogger(__name__)
+
+FRESHNESS_POLICIES = ('recompute', 'reuse_fresh')
+
+SESSION_OPEN = time(9, 15)
+SESSION_CLOSE = time(15, 30)
+
+
+def last_market_bar(now: Optional[datetime] = None, bar_minutes: Optional[int] = None) -> datetime:
+    """
+    Timestamp of the last market bar, as naive IST (how created_at is stored).
+
+    Args:
+        now: Current time (default: now in IST); aware values are converted to IST
+        bar_minutes: Intraday bar length (default MARKET_BAR_MINUTES)
+    """
+    if now is None:
+        now = get_ist_now()
+    if now.tzinfo is not None:
+        now = now.astimezone(IST)
+    now = now.replace(tzinfo=None)
+    bar = timedelta(minutes=bar_minutes or config.MARKET_BAR_MINUTES)
+
+    opened = datetime.combine(now.date(), SESSION_OPEN)
+    closed = datetime.combine(now.date(), SESSION_CLOSE)
+    if now.weekday() < 5 and opened <= now < closed:
+        return opened + ((now - opened) // bar) * bar
+    if now.weekday() < 5 and now >= closed:
+        return closed
+
+    # Before today's open or on a weekend: close of the previous weekday
+    day = now.date() - timedelta(days=1)
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return datetime.combine(day, SESSION_CLOSE)
+
+
+def normalize_config(analysis_config: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Config as compared between runs.
+
+    Unset (None) options are dropped, as is strategy_id (matched on its own
+    column), so watchlist and bulk requests with the same settings compare equal.
+    """
+    if isinstance(analysis_config, str):
+        analysis_config = json.loads(analysis_config)
+    return {
+        key: value for key, value in (analysis_config or {}).items()
+        if value is not None and key != 'strategy_id'
+    }
+
+
+def find_fresh_results(
+    tickers: Iterable[str],
+    strategy_id: int,
+    analysis_config: Optional[Dict[str, Any]],
+    since: Optional[datetime] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Newest reusable result per ticker, in one query.
+
+    Args:
+        tickers: Requested tickers (matched case-insensitively)
+        strategy_id: Strategy the results must have been produced with
+        analysis_config: Requested config; stored analysis_config must match
+                         after normalize_config
+        since: Freshness cutoff (default last_market_bar()); aware values are
+               converted to naive IST to match the stored created_at
+
+    Returns:
+        {requested ticker: {result_id, created_at, job_id}} for fresh tickers only
+    """
+    requested = {ticker.lower(): ticker for ticker in tickers}
+    if not requested:
+        return {}
+    since = since or last_market_bar()
+    if since.tzinfo is not None:
+        since = since.astimezone(IST).replace(tzinfo=None)
+    wanted = normalize_config(analysis_config)
+
+    query, params = _convert_query_params('''
+        SELECT id, ticker, analysis_config, created_at, job_id
+        FROM analysis_results
+        WHERE created_at >= ? AND LOWER(ticker) = ANY(?)
+          AND COALESCE(strategy_id, 1) = ? AND status = 'completed'
+        ORDER BY created_at DESC, id DESC
+    ''', (since, list(requested), strategy_id))
+    with get_db_session() as (conn, cursor):
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+
+    fresh = {}
+    for result_id, ticker, stored_config, created_at, job_id in rows:
+        key = ticker.lower()
+        if key in fresh or normalize_config(stored_config) != wanted:
+            continue
+        fresh[key] = {'result_id': result_id, 'created_at': created_at, 'job_id': job_id}
+    return {requested[key]: match for key, match in fresh.items()}
+
+
+def split_by_freshness(
+    tickers: List[str],
+    strategy_id: int,
+    analysis_config: Optional[Dict[str, Any]],
+    policy: str
+) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+    """
+    (reused results by ticker, tickers to recompute in request order).
+
+    With the 'recompute' policy, or if the lookup fails, nothing is reused.
+    """
+    if policy != 'reuse_fresh' or not tickers:
+        return {}, list(tickers)
+    try:
+        fresh = find_fresh_results(tickers, strategy_id, analysis_config)
+    except Exception as e:
+        logger.warning(f"Freshness lookup failed, recomputing all {len(tickers)} tickers: {e}")
+        return {}, list(tickers)
+    return fresh, [ticker for ticker in tickers if ticker not in fresh]
+
+
+def parse_freshness_policy(value: Optional[str]) -> str:
+    """Request value -> policy (default ANALYSIS_FRESHNESS_POLICY); ValueError if unknown"""
+    policy = (value or config.ANALYSIS_FRESHNESS_POLICY).strip().lower()
+    if policy not in FRESHNESS_POLICIES:
+        raise ValueError(f"freshness_policy must be one of {', '.join(FRESHNESS_POLICIES)}")
+    return policy
+
+
+def reused_summary(fresh: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """API representation of reused results"""
+    return [{'ticker': ticker, **match} for ticker, match in fresh.items()]
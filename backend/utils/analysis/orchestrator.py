@@ -87,23 +87,17 @@ def get_verdict(score):
     return SignalAggregator.get_verdict(score)
 
 
-def export_to_excel(result):
+REPORT_INDICATOR_HEADERS = ("Indicator", "Vote", "Confidence", "Category")
+REPORT_SUMMARY_HEADERS = ("Ticker", "Verdict", "Score", "Entry", "Stop Loss", "Target", "Analyzed At")
+
+
+def _validate_report_result(result):
     """
-    Export analysis result to Excel file
-    
-    Args:
-        result: Analysis result dictionary
-    
-    Returns:
-        Path to generated Excel file
+    Check a result dict has what the Excel report needs
     
     Raises:
         ValueError: If result dict is missing required keys or has invalid structure
     """
-    import openpyxl
-    from openpyxl.styles import Font, PatternFill, Alignment
-    import os
-    
     # Validate top-level required keys
     required_keys = {'ticker', 'verdict', 'score', 'entry', 'stop', 'target', 'indicators'}
     missing_keys = required_keys - set(result.keys())
@@ -133,56 +127,130 @@ def export_to_excel(result):
                 f"Indicator at index {i} missing required keys: {sorted(missing_indicator_keys)}. "
                 f"Required keys: {sorted(indicator_required_keys)}"
             )
+
+
+def _styled_header(ws, values):
+    """Bold, grey-filled header row for a write-only sheet"""
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, PatternFill
     
-    wb = openpyxl.Workbook()
-    ws = wb.active
+    font = Font(bold=True)
+    fill = PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid")
+    cells = []
+    for value in values:
+        cell = WriteOnlyCell(ws, value=value)
+        cell.font = font
+        cell.fill = fill
+        cells.append(cell)
+    return cells
+
+
+def _save_workbook(wb, output):
+    """Save into `output` (a new BytesIO if None), rewound for reading"""
+    import io
+    
+    if output is None:
+        output = io.BytesIO()
+    wb.save(output)
+    output.seek(0)
+    return output
+
+
+def export_to_excel(result, output=None):
+    """
+    Export analysis result to an Excel workbook
     
-    ws.title = "Analysis Report"
+    The workbook is built in openpyxl write-only mode and saved to a
+    file-like object, so nothing is written under DATA_PATH.
+    
+    Args:
+        result: Analysis result dictionary
+        output: Writable binary file object (default: a new BytesIO)
+    
+    Returns:
+        The file object holding the .xlsx, positioned at 0
+    
+    Raises:
+        ValueError: If result dict is missing required keys or has invalid structure
+    """
+    import openpyxl
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+    
+    _validate_report_result(result)
+    
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("Analysis Report")
     
     # Header
-    ws['A1'] = "Trading Signal Analysis Report"
-    ws['A1'].font = Font(size=16, bold=True)
-    ws.merge_cells('A1:D1')
+    title = WriteOnlyCell(ws, value="Trading Signal Analysis Report")
+    title.font = Font(size=16, bold=True)
+    ws.append([title])
+    ws.append([])
     
     # Ticker info
-    ws['A3'] = "Ticker:"
-    ws['B3'] = result['ticker']
-    ws['A4'] = "Verdict:"
-    ws['B4'] = result['verdict']
-    ws['A5'] = "Score:"
-    ws['B5'] = result['score']
+    ws.append(["Ticker:", result['ticker']])
+    ws.append(["Verdict:", result['verdict']])
+    ws.append(["Score:", result['score']])
+    ws.append([])
     
     # Entry/Stop/Target
-    ws['A7'] = "Entry:"
-    ws['B7'] = result['entry']
-    ws['A8'] = "Stop Loss:"
-    ws['B8'] = result['stop']
-    ws['A9'] = "Target:"
-    ws['B9'] = result['target']
+    ws.append(["Entry:", result['entry']])
+    ws.append(["Stop Loss:", result['stop']])
+    ws.append(["Target:", result['target']])
+    ws.append([])
     
     # Indicators table
-    ws['A11'] = "Indicator"
-    ws['B11'] = "Vote"
-    ws['C11'] = "Confidence"
-    ws['D11'] = "Category"
+    ws.append(_styled_header(ws, REPORT_INDICATOR_HEADERS))
+    for indicator in result['indicators']:
+        ws.append([indicator['name'], indicator['vote'], indicator['confidence'], indicator['category']])
     
-    for col in ['A11', 'B11', 'C11', 'D11']:
-        ws[col].font = Font(bold=True)
-        ws[col].fill = PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid")
+    return _save_workbook(wb, output)
+
+
+def export_results_to_excel(results, output=None):
+    """
+    Export many analysis results (e.g. a whole job) to one Excel workbook
     
-    row = 12
-    for indicator in result['indicators']:
-        ws[f'A{row}'] = indicator['name']
-        ws[f'B{row}'] = indicator['vote']
-        ws[f'C{row}'] = indicator['confidence']
-        ws[f'D{row}'] = indicator['category']
-        row += 1
+    Rows are appended as `results` is iterated and write-only sheets keep
+    no cell objects, so memory does not grow with the number of tickers.
+    
+    Sheets:
+    - Summary: one row per result
+    - Indicators: one row per (ticker, indicator)
+    
+    Args:
+        results: Iterable of result dicts (same keys as export_to_excel,
+                 plus an optional 'created_at')
+        output: Writable binary file object (default: a new BytesIO)
+    
+    Returns:
+        The file object holding the .xlsx, positioned at 0
+    
+    Raises:
+        ValueError: If a result dict is missing required keys or has invalid structure
+    """
+    import openpyxl
     
-    # Save file
-    output_dir = os.path.join(os.getenv('DATA_PATH', './data'), 'reports')
-    os.makedirs(output_dir, exist_ok=True)
+    wb = openpyxl.Workbook(write_only=True)
+    summary = wb.create_sheet("Summary")
+    indicators = wb.create_sheet("Indicators")
+    summary.append(_styled_header(summary, REPORT_SUMMARY_HEADERS))
+    indicators.append(_styled_header(indicators, ("Ticker",) + REPORT_INDICATOR_HEADERS))
     
-    filepath = os.path.join(output_dir, f"{result['ticker']}_report.xlsx")
-    wb.save(filepath)
+    for result in results:
+        _validate_report_result(result)
+        created_at = result.get('created_at')
+        if getattr(created_at, 'tzinfo', None) is not None:
+            created_at = created_at.replace(tzinfo=None)  # Excel has no time zones
+        summary.append([
+            result['ticker'], result['verdict'], result['score'],
+            result['entry'], result['stop'], result['target'], created_at
+        ])
+        for indicator in result['indicators']:
+            indicators.append([
+                result['ticker'], indicator['name'], indicator['vote'],
+                indicator['confidence'], indicator['category']
+            ])
     
-    return filepath
+    return _save_workbook(wb, output)
@@ -26,6 +26,7 @@ from typing import Dict, List, Any, Tuple, Optional
 import logging
 
 from utils.analysis_orchestrator import DataFetcher
+from cache import get_backtest_cache, ohlcv_fingerprint, config_fingerprint
 from strategies.strategy_1 import Strategy1
 from strategies.strategy_2 import Strategy2
 from strategies.strategy_3 import Strategy3
@@ -214,7 +215,8 @@ class BacktestEngine:
         
         logger.info(f"[Backtest] Initialized with Strategy {strategy_id}: {self.config['name']}")
     
-    def backtest_ticker(self, ticker: str, days: int = 90) -> Dict[str, Any]:
+    def backtest_ticker(self, ticker: str, days: int = 90, use_cache: bool = True,
+                        include_closes: bool = False) -> Dict[str, Any]:
         """
         Run backtest for a single ticker.
         
@@ -223,9 +225,17 @@ class BacktestEngine:
         - IndicatorEngine for calculations (respects modular indicators)
         - Strategy-specific parameters and validation
         
+        Results are cached by OHLCV fingerprint + strategy config hash, so a
+        repeat request over unchanged bars skips indicators and simulation.
+        
         Args:
             ticker: Stock ticker (e.g., 'RELIANCE.NS')
             days: Historical days to analyze (30-365, default 90)
+            use_cache: Serve/store results via the backtest result cache
+            include_closes: Add the backtested bars' closes as
+                            'closes': {'dates': [...], 'close': [...]}
+                            (used to mark open portfolio positions to market;
+                            never stored in the cache)
         
         Returns:
             {
@@ -282,6 +292,25 @@ class BacktestEngine:
             # Normalize column names (DataFetcher returns capitalized names)
             df.columns = df.columns.str.lower()
             
+            def with_closes(result: Dict[str, Any]) -> Dict[str, Any]:
+                if not include_closes:
+                    return result
+                return {**result, 'closes': {
+                    'dates': [d.strftime('%Y-%m-%d') for d in df.index],
+                    'close': [float(c) for c in df['close']]
+                }}
+            
+            # Cache lookup: a new bar changes the fingerprint, so stale results miss
+            cache = get_backtest_cache() if use_cache else None
+            if cache is not None:
+                fingerprint = ohlcv_fingerprint(df)
+                config_hash = config_fingerprint(self.config)
+                cached = cache.get(ticker, self.strategy_id, days, fingerprint, config_hash)
+                if cached is not None:
+                    logger.info(f"[Backtest] Cache hit for {ticker} (strategy_id={self.strategy_id}, {days} days)")
+                    cached['data_source'] = source
+                    return with_closes(cached)
+            
             # Calculate indicators for entire dataframe
             df = self._calculate_indicators(df, ticker)
             
@@ -290,7 +319,7 @@ class BacktestEngine:
             
             if not signals:
                 logger.info(f"[Backtest] No signals generated for {ticker}")
-                return {
+                result = {
                     'ticker': ticker,
                     'strategy_id': self.strategy_id,
                     'strategy_name': self.config['name'],
@@ -301,6 +330,9 @@ class BacktestEngine:
                     'losing_trades': 0,
                     'message': 'No buy signals generated in this period'
                 }
+                if cache is not None:
+                    cache.set(ticker, self.strategy_id, days, fingerprint, config_hash, result)
+                return with_closes(result)
             
             logger.info(f"[Backtest] Generated {len(signals)} entry signals for {ticker}")
             
@@ -335,7 +367,10 @@ class BacktestEngine:
             
             logger.info(f"[Backtest] Completed for {ticker}: {metrics['win_rate']}% win rate, {metrics['profit_factor']}x profit factor")
             
-            return metrics
+            if cache is not None:
+                cache.set(ticker, self.strategy_id, days, fingerprint, config_hash, metrics)
+            
+            return with_closes(metrics)
             
         except Exception as e:
             logger.error(f"[Backtest] Failed for {ticker}: {str(e)}", exc_info=True)
@@ -937,3 +972,71 @@ class BacktestEngine:
             'consecutive_wins': max_consecutive,
             'trades_per_day': trades_per_day
         }
+
+
+def summarize_portfolio_results(results: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Aggregate per-ticker backtest results into portfolio-level totals.
+    
+    Used as the final record of a portfolio backtest. Tickers whose result
+    carries an 'error' key are counted as failed and excluded from the totals.
+    
+    Args:
+        results: Dict mapping ticker -> backtest_ticker() result
+    
+    Returns:
+        {
+            'tickers_analyzed': 3,
+            'tickers_succeeded': 2,
+            'tickers_failed': 1,
+            'failed_tickers': ['XYZ.NS'],
+            'total_signals': 31,
+            'winning_trades': 20,
+            'losing_trades': 11,
+            'win_rate': 64.52,
+            'profit_factor': 1.85,
+            'avg_profit_pct': 6.4,
+            'best_ticker': 'TCS.NS',
+            'worst_ticker': 'INFY.NS'
+        }
+    """
+    failed = [t for t, r in results.items() if not r or 'error' in r]
+    succeeded = {t: r for t, r in results.items() if r and 'error' not in r}
+    
+    total_signals = sum(r.get('total_signals', 0) for r in succeeded.values())
+    wins = sum(r.get('winning_trades', 0) for r in succeeded.values())
+    losses = sum(r.get('losing_trades', 0) for r in succeeded.values())
+    
+    gross_win = 0.0
+    gross_loss = 0.0
+    for r in succeeded.values():
+        for trade in r.get('trades', []):
+            pnl = trade.get('pnl_pct', 0) or 0
+            if pnl > 0:
+                gross_win += pnl
+            else:
+                gross_loss += abs(pnl)
+    
+    if gross_loss > 0:
+        profit_factor = gross_win / gross_loss
+    elif gross_win > 0:
+        profit_factor = 999.99
+    else:
+        profit_factor = 0
+    
+    profits = {t: r.get('total_profit_pct', 0) for t, r in succeeded.items()}
+    
+    return {
+        'tickers_analyzed': len(results),
+        'tickers_succeeded': len(succeeded),
+        'tickers_failed': len(failed),
+        'failed_tickers': sorted(failed),
+        'total_signals': total_signals,
+        'winning_trades': wins,
+        'losing_trades': losses,
+        'win_rate': round(wins / total_signals * 100, 2) if total_signals else 0,
+        'profit_factor': round(profit_factor, 2),
+        'avg_profit_pct': round(sum(profits.values()) / len(profits), 2) if profits else 0,
+        'best_ticker': max(profits, key=profits.get) if profits else None,
+        'worst_ticker': min(profits, key=profits.get) if profits else None,
+    }
@@ -5,12 +5,20 @@ Handles all external data operations:
 - Fetching: Retrieve market data from sources
 - Validation: Ensure data quality
 - Fallback: Handle source failures
+- Universe: In-memory NSE stock list index
+- Export: Streaming analysis_results export (csv / ndjson / parquet)
 """
 
 from utils.data.fetcher import fetch_ticker_data
 from utils.data.validator import DataValidator
+from utils.data.nse_universe import NSEUniverse, get_nse_universe
+from utils.data.result_export import ExportFilter, stream_results_export
 
 __all__ = [
     'fetch_ticker_data',
     'DataValidator',
+    'NSEUniverse',
+    'get_nse_universe',
+    'ExportFilter',
+    'stream_results_export',
 ]
@@ -0,0 +1,309 @@
+"""
+NSE stock universe index
+
+data/nse_stocks_complete.csv is parsed once per worker and kept as a
+read-only NSEUniverse snapshot:
+- one tuple per column (symbol, name, yahoo_symbol, sector, industry)
+- the row dicts served by the API, built once so pages are plain slices
+- row indices grouped by sector and by industry
+- sorted symbol/name/word keys for prefix search
+- a trigram index over symbols and name words for fuzzy typeahead matches
+
+get_nse_universe() stats the file on every call and rebuilds the snapshot
+when its mtime or size changes, so a refreshed CSV is picked up without a
+restart.
+"""
+
+import csv
+import heapq
+import logging
+import os
+import re
+import threading
+from bisect import bisect_left
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_UNIVERSE_PATH = Path(__file__).resolve().parents[2] / "data" / "nse_stocks_complete.csv"
+
+# Header variants seen in NSE exports, first match wins
+_COLUMN_ALIASES = {
+    'symbol': ('symbol', 'SYMBOL'),
+    'name': ('name', 'NAME OF COMPANY', 'company_name'),
+    'yahoo_symbol': ('yahoo_symbol',),
+    'sector': ('sector',),
+    'industry': ('industry',),
+}
+
+
+# Words too common in company names to help ranking ("... Limited")
+_NAME_STOPWORDS = frozenset({'LIMITED', 'LTD', 'THE', 'AND', 'OF', 'CO', 'COMPANY'})
+
+_NON_ALNUM = re.compile(r'[^A-Z0-9]+')
+
+# Ranked search tiers (higher first); fuzzy matches score up to FUZZY_SCORE
+EXACT_SYMBOL_SCORE = 100.0
+SYMBOL_PREFIX_SCORE = 90.0
+NAME_PREFIX_SCORE = 80.0
+WORD_PREFIX_SCORE = 70.0
+FUZZY_SCORE = 60.0
+# Share of the query's trigrams a fuzzy match must contain
+FUZZY_MIN_COVERAGE = 0.5
+# Shorter query words would prefix-match most of the universe
+MIN_WORD_PREFIX = 2
+
+
+def _words(text: str) -> List[str]:
+    """Upper-cased alphanumeric words of `text`, minus name stopwords"""
+    return [w for w in _NON_ALNUM.split(text.upper()) if w and w not in _NAME_STOPWORDS]
+
+
+def _trigrams(words: Sequence[str]) -> frozenset:
+    """Padded per-word trigrams (pg_trgm style, without the two-space prefix)"""
+    grams = set()
+    for word in words:
+        padded = f" {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+def _column(row: Dict[str, str], field: str) -> str:
+    for key in _COLUMN_ALIASES[field]:
+        value = row.get(key)
+        if value:
+            return value.strip()
+    return ''
+
+
+def _prefix_keys(values: Sequence[str]) -> Tuple[Tuple[str, ...], Tuple[int, ...]]:
+    """Upper-cased values sorted for bisect, with the row index of each"""
+    pairs = sorted((value.upper(), idx) for idx, value in enumerate(values) if value)
+    return tuple(key for key, _ in pairs), tuple(idx for _, idx in pairs)
+
+
+def _group(values: Sequence[str]) -> Dict[str, Tuple[int, ...]]:
+    groups: Dict[str, List[int]] = {}
+    for idx, value in enumerate(values):
+        if value:
+            groups.setdefault(value, []).append(idx)
+    return {key: tuple(rows) for key, rows in groups.items()}
+
+
+class NSEUniverse:
+    """
+    Immutable snapshot of the NSE stock list.
+
+    Row dicts returned by page()/rows() are shared between requests and must
+    not be modified.
+    """
+
+    def __init__(self, rows: Sequence[Dict[str, str]], mtime_ns: int = 0, size: int = 0):
+        self.symbols = tuple(row['symbol'] for row in rows)
+        self.names = tuple(row['name'] for row in rows)
+        self.yahoo_symbols = tuple(row['yahoo_symbol'] for row in rows)
+        self.sectors = tuple(row['sector'] for row in rows)
+        self.industries = tuple(row['industry'] for row in rows)
+        self.records = tuple(dict(row) for row in rows)
+
+        self.by_sector = _group(self.sectors)
+        self.by_industry = _group(self.industries)
+        self._symbol_keys, self._symbol_rows = _prefix_keys(self.symbols)
+        self._name_keys, self._name_rows = _prefix_keys(self.names)
+        self._build_search_index()
+
+        self.mtime_ns = mtime_ns
+        self.size = size
+
+    def _build_search_index(self) -> None:
+        """Word-prefix keys and trigram postings for search()"""
+        word_pairs = []
+        postings: Dict[str, List[int]] = {}
+        gram_counts = []
+        symbol_grams = []
+        for idx, (symbol, name) in enumerate(zip(self.symbols, self.names)):
+            words = set(_words(symbol)) | set(_words(name))
+            word_pairs.extend((word, idx) for word in words)
+            grams = _trigrams(sorted(words))
+            gram_counts.append(len(grams))
+            symbol_grams.append(_trigrams(_words(symbol)))
+            for gram in grams:
+                postings.setdefault(gram, []).append(idx)
+        word_pairs.sort()
+        self._word_keys = tuple(word for word, _ in word_pairs)
+        self._word_rows = tuple(idx for _, idx in word_pairs)
+        self._trigram_rows = {gram: tuple(rows) for gram, rows in postings.items()}
+        self._trigram_counts = tuple(gram_counts)
+        self._symbol_trigrams = tuple(symbol_grams)
+
+    @classmethod
+    def from_csv(cls, path: Path) -> 'NSEUniverse':
+        """Parse the CSV; rows without a symbol are skipped"""
+        stat = os.stat(path)
+        rows = []
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            for raw in csv.DictReader(f):
+                row = {field: _column(raw, field) for field in _COLUMN_ALIASES}
+                if not row['symbol']:
+                    continue
+                if not row['yahoo_symbol']:
+                    row['yahoo_symbol'] = f"{row['symbol']}.NS"
+                rows.append(row)
+        return cls(rows, mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def rows(self, indices: Optional[Sequence[int]] = None) -> List[Dict[str, str]]:
+        """Row dicts for `indices` (all rows when None)"""
+        if indices is None:
+            return list(self.records)
+        return [self.records[i] for i in indices]
+
+    def page(self, page: int, per_page: int, indices: Optional[Sequence[int]] = None) -> List[Dict[str, str]]:
+        """One 1-based page of rows, optionally within a filtered index list"""
+        start = (page - 1) * per_page
+        if indices is None:
+            return list(self.records[start:start + per_page])
+        return [self.records[i] for i in indices[start:start + per_page]]
+
+    def filter_indices(self, sector: Optional[str] = None, industry: Optional[str] = None) -> Optional[Tuple[int, ...]]:
+        """
+        Row indices in `sector` and/or `industry` (exact match), in file order.
+
+        Returns None when no filter is given, meaning every row.
+        """
+        if not sector and not industry:
+            return None
+        if sector and industry:
+            in_industry = set(self.by_industry.get(industry, ()))
+            return tuple(i for i in self.by_sector.get(sector, ()) if i in in_industry)
+        return self.by_sector.get(sector, ()) if sector else self.by_industry.get(industry, ())
+
+    def _prefix_rows(self, keys: Tuple[str, ...], rows: Tuple[int, ...], prefix: str):
+        pos = bisect_left(keys, prefix)
+        while pos < len(keys) and keys[pos].startswith(prefix):
+            yield rows[pos]
+            pos += 1
+
+    def search_prefix(self, prefix: str, limit: Optional[int] = None) -> List[int]:
+        """
+        Row indices whose symbol or company name starts with `prefix`
+        (case-insensitive). Symbol matches come first, each group sorted
+        alphabetically.
+        """
+        prefix = (prefix or '').strip().upper()
+        if not prefix:
+            return []
+
+        matches: List[int] = []
+        seen = set()
+        for idx in self._prefix_rows(self._symbol_keys, self._symbol_rows, prefix):
+            matches.append(idx)
+            seen.add(idx)
+            if limit is not None and len(matches) >= limit:
+                return matches
+        for idx in self._prefix_rows(self._name_keys, self._name_rows, prefix):
+            if idx not in seen:
+                matches.append(idx)
+                seen.add(idx)
+                if limit is not None and len(matches) >= limit:
+                    break
+        return matches
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[int, float, str]]:
+        """
+        Ranked typeahead matches over symbol and company name.
+
+        Tiers: exact symbol, symbol prefix (shorter symbols first), name
+        prefix, every query word (of 2+ characters) prefixing a symbol/name
+        word, then trigram fuzzy matches (only when the earlier tiers leave
+        fewer than `limit`).
+        Ties are broken alphabetically by symbol.
+
+        Returns:
+            Up to `limit` (row index, score, match type) tuples, best first
+        """
+        raw = (query or '').strip().upper()
+        words = _words(raw)
+        if not raw or limit <= 0:
+            return []
+
+        best: Dict[int, Tuple[float, str]] = {}
+
+        def offer(idx: int, score: float, match: str) -> None:
+            if idx not in best or best[idx][0] < score:
+                best[idx] = (score, match)
+
+        for idx in self._prefix_rows(self._symbol_keys, self._symbol_rows, raw):
+            extra = len(self.symbols[idx]) - len(raw)
+            if extra == 0:
+                offer(idx, EXACT_SYMBOL_SCORE, 'symbol')
+            else:
+                offer(idx, SYMBOL_PREFIX_SCORE - min(extra, 20) * 0.25, 'symbol_prefix')
+        for idx in self._prefix_rows(self._name_keys, self._name_rows, raw):
+            offer(idx, NAME_PREFIX_SCORE, 'name_prefix')
+        prefix_words = [w for w in words if len(w) >= MIN_WORD_PREFIX]
+        if prefix_words:
+            matched = None
+            for word in prefix_words:
+                rows = set(self._prefix_rows(self._word_keys, self._word_rows, word))
+                matched = rows if matched is None else matched & rows
+                if not matched:
+                    break
+            for idx in matched or ():
+                offer(idx, WORD_PREFIX_SCORE, 'word_prefix')
+
+        query_grams = _trigrams(words)
+        if len(best) < limit and len(query_grams) >= 3:
+            shared: Dict[int, int] = {}
+            for gram in query_grams:
+                for idx in self._trigram_rows.get(gram, ()):
+                    shared[idx] = shared.get(idx, 0) + 1
+            needed = FUZZY_MIN_COVERAGE * len(query_grams)
+            for idx, count in shared.items():
+                if count < needed or idx in best:
+                    continue
+                coverage = count / len(query_grams)
+                jaccard = count / (len(query_grams) + self._trigram_counts[idx] - count)
+                # Misspelt symbols should beat names that merely share a word
+                symbol_overlap = len(query_grams & self._symbol_trigrams[idx]) / len(query_grams)
+                offer(idx, FUZZY_SCORE * (0.5 * coverage + 0.2 * jaccard + 0.3 * symbol_overlap), 'fuzzy')
+
+        return heapq.nsmallest(
+            limit,
+            ((idx, score, match) for idx, (score, match) in best.items()),
+            key=lambda item: (-item[1], self.symbols[item[0]])
+        )
+
+
+_universe: Optional[NSEUniverse] = None
+_universe_path: Optional[Path] = None
+_universe_lock = threading.Lock()
+
+
+def get_nse_universe(path: Optional[Path] = None) -> NSEUniverse:
+    """
+    Current universe snapshot, reloaded when the CSV's mtime or size changes.
+
+    Raises:
+        FileNotFoundError: If the CSV does not exist
+    """
+    global _universe, _universe_path
+
+    path = Path(path) if path else DEFAULT_UNIVERSE_PATH
+    stat = os.stat(path)
+    current = _universe
+    if (current is not None and _universe_path == path
+            and current.mtime_ns == stat.st_mtime_ns and current.size == stat.st_size):
+        return current
+
+    with _universe_lock:
+        current = _universe
+        if (current is None or _universe_path != path
+                or current.mtime_ns != stat.st_mtime_ns or current.size != stat.st_size):
+            current = NSEUniverse.from_csv(path)
+            _universe, _universe_path = current, path
+            logger.info(f"Loaded NSE universe: {len(current)} stocks from {path.name}")
+    return current
@@ -0,0 +1,278 @@
+"""
+Streaming export of analysis_results
+
+Rows are read through a server-side (named) cursor, EXPORT_BATCH_SIZE at a
+time, and each batch is encoded and handed to the response before the next
+one is fetched, so memory stays flat however many rows a job or date range
+covers. Formats:
+- csv: header line, then one line per row (raw_data as a JSON string)
+- ndjson: one JSON object per row
+- parquet: one row group per batch (needs the optional pyarrow package)
+
+csv/ndjson can be gzip-compressed on the fly; parquet is already
+compressed per column by the writer.
+"""
+
+import csv
+import io
+import uuid
+import zlib
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from config import config
+from database import get_db_session, _convert_query_params
+from utils.serialization import dumps as json_dumps
+
+EXPORT_COLUMNS = (
+    'id', 'job_id', 'ticker', 'symbol', 'name', 'yahoo_symbol', 'strategy_id',
+    'analysis_source', 'status', 'verdict', 'score', 'entry', 'stop_loss', 'target',
+    'position_size', 'risk_reward_ratio', 'data_source', 'is_demo_data', 'created_at',
+)
+INDICATORS_COLUMN = 'raw_data'
+
+# format -> (mimetype, file extension)
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+
+@dataclass(frozen=True)
+class ExportFilter:
+    """Which analysis_results rows to export (all given conditions apply)"""
+    job_id: Optional[str] = None
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None  # exclusive
+    strategy_id: Optional[int] = None
+    source: Optional[str] = None
+
+    def is_empty(self) -> bool:
+        return all(value is None for value in (self.job_id, self.start, self.end, self.strategy_id, self.source))
+
+
+def build_export_query(filters: ExportFilter, include_indicators: bool = False) -> Tuple[str, Tuple]:
+    """
+    SELECT for an export, oldest first.
+
+    The created_at bounds let PostgreSQL prune monthly partitions; job_id
+    is served by idx_results_job.
+    """
+    columns = EXPORT_COLUMNS + ((INDICATORS_COLUMN,) if include_indicators else ())
+    conditions = []
+    params: List[Any] = []
+    if filters.job_id is not None:
+        conditions.append('job_id = ?')
+        params.append(filters.job_id)
+    if filters.start is not None:
+        conditions.append('created_at >= ?')
+        params.append(filters.start)
+    if filters.end is not None:
+        conditions.append('created_at < ?')
+        params.append(filters.end)
+    if filters.strategy_id is not None:
+        conditions.append('COALESCE(strategy_id, 1) = ?')
+        params.append(filters.strategy_id)
+    if filters.source is not None:
+        conditions.append('analysis_source = ?')
+        params.append(filters.source)
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    query = f'''
+        SELECT {', '.join(columns)}
+        FROM analysis_results
+        {where}
+        ORDER BY created_at, id
+    '''
+    return query, tuple(params)
+
+
+def iter_result_batches(query: str, params: Tuple, batch_size: int) -> Iterator[List[tuple]]:
+    """
+    Yield row batches from a named (server-side) cursor.
+
+    The pooled connection is held until the generator is exhausted or
+    closed (e.g. the client disconnects).
+    """
+    with get_db_session() as (conn, _):
+        cursor = conn.cursor(name=f"results_export_{uuid.uuid4().hex[:12]}")
+        cursor.itersize = batch_size
+        try:
+            cursor.execute(*_convert_query_params(query, params))
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            cursor.close()
+
+
+def _cell(value: Any) -> Any:
+    """Flat value for csv/parquet cells"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return json_dumps(value)
+    return value
+
+
+class _CsvEncoder:
+    def __init__(self, columns: Sequence[str]):
+        self.columns = columns
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer, lineterminator='\n')
+
+    def _take(self) -> bytes:
+        data = self._buffer.getvalue().encode('utf-8')
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data
+
+    def header(self) -> bytes:
+        self._writer.writerow(self.columns)
+        return self._take()
+
+    def encode(self, rows: Iterable[tuple]) -> bytes:
+        self._writer.writerows([[_cell(v) for v in row] for row in rows])
+        return self._take()
+
+    def finish(self) -> bytes:
+        return b''
+
+
+class _NdjsonEncoder:
+    def __init__(self, columns: Sequence[str]):
+        self.columns = columns
+
+    def header(self) -> bytes:
+        return b''
+
+    def encode(self, rows: Iterable[tuple]) -> bytes:
+        return ''.join(json_dumps(dict(zip(self.columns, row))) + '\n' for row in rows).encode('utf-8')
+
+    def finish(self) -> bytes:
+        return b''
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands back whatever was written since the last drain()"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class _ParquetEncoder:
+    def __init__(self, columns: Sequence[str]):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        types = {
+            'id': pa.int64(), 'strategy_id': pa.int64(), 'position_size': pa.int64(),
+            'score': pa.float64(), 'entry': pa.float64(), 'stop_loss': pa.float64(),
+            'target': pa.float64(), 'risk_reward_ratio': pa.float64(),
+            'is_demo_data': pa.bool_(), 'created_at': pa.timestamp('us'),
+        }
+        self.columns = columns
+        self._pa = pa
+        self._schema = pa.schema([(name, types.get(name, pa.string())) for name in columns])
+        self._sink = _ChunkSink()
+        self._writer = pq.ParquetWriter(self._sink, self._schema, compression='zstd')
+
+    def header(self) -> bytes:
+        return self._sink.drain()
+
+    def encode(self, rows: Sequence[tuple]) -> bytes:
+        data = {
+            name: [row[i] if name == 'created_at' else _cell(row[i]) for row in rows]
+            for i, name in enumerate(self.columns)
+        }
+        self._writer.write_table(self._pa.Table.from_pydict(data, schema=self._schema))
+        return self._sink.drain()
+
+    def finish(self) -> bytes:
+        self._writer.close()
+        return self._sink.drain()
+
+
+_ENCODERS = {'csv': _CsvEncoder, 'ndjson': _NdjsonEncoder, 'parquet': _ParquetEncoder}
+
+
+def parquet_available() -> bool:
+    try:
+        import pyarrow.parquet  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _gzip(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """gzip member built incrementally (wbits=31 writes the gzip header/trailer)"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream_results_export(
+    filters: ExportFilter,
+    fmt: str = 'csv',
+    compress: bool = False,
+    include_indicators: bool = False,
+    batch_size: Optional[int] = None
+) -> Iterator[bytes]:
+    """
+    Encoded export as a stream of byte chunks.
+
+    The query runs when the first chunk is requested, so callers can pull
+    one chunk before starting the response to surface database errors.
+
+    Args:
+        filters: Row selection
+        fmt: 'csv', 'ndjson' or 'parquet'
+        compress: gzip the csv/ndjson stream (ignored for parquet)
+        include_indicators: Add the raw_data column
+        batch_size: Rows per cursor fetch (default EXPORT_BATCH_SIZE)
+    """
+    if fmt not in _ENCODERS:
+        raise ValueError(f"Unsupported export format '{fmt}'")
+    columns = EXPORT_COLUMNS + ((INDICATORS_COLUMN,) if include_indicators else ())
+    query, params = build_export_query(filters, include_indicators)
+    batches = iter_result_batches(query, params, batch_size or config.EXPORT_BATCH_SIZE)
+
+    def encoded() -> Iterator[bytes]:
+        encoder = _ENCODERS[fmt](columns)
+        first = next(batches, None)
+        yield encoder.header()
+        if first is not None:
+            yield encoder.encode(first)
+            for rows in batches:
+                yield encoder.encode(rows)
+        yield encoder.finish()
+
+    if compress and fmt != 'parquet':
+        return _gzip(encoded())
+    return encoded()
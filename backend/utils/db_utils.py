@@ -4,21 +4,48 @@ Enhanced database utilities with concurrency control and transaction support
 Provides:
 - execute_transaction(): Atomic multi-statement transactions
 - get_job_with_lock(): Optimistic locking for job updates
-- create_job_atomic(): Atomic job creation
+- create_job_atomic(): Atomic job creation (with database-enforced dedup)
+- symbol_set_digest(): Normalized job identity for duplicate detection
 - query_builder: SQL query helpers
 """
 
+import hashlib
 import json
 import logging
 from typing import Dict, Any, Optional, List, Tuple
-from datetime import datetime
-from database import get_db_connection, query_db, execute_db
+from datetime import datetime, timedelta
+from database import get_db_connection, get_db_session, query_db, execute_db, register_statement
+from utils.serialization import dumps as json_dumps
+from utils.timezone_util import get_ist_timestamp
+from utils.infrastructure.response_cache import invalidate_responses
+from utils.infrastructure.job_scheduler import get_job_scheduler
 
 # Import PostgreSQL driver
 import psycopg2
 
 logger = logging.getLogger(__name__)
 
+# Must match the predicate of idx_jobs_active_digest so ON CONFLICT can infer it
+ACTIVE_JOB_PREDICATE = "status IN ('queued', 'processing')"
+
+
+def symbol_set_digest(symbols: List[str], strategy_id: int = 1, job_type: str = 'analysis') -> Optional[str]:
+    """
+    Identity of a job request for duplicate detection.
+
+    Symbols are trimmed, uppercased, de-duplicated and sorted, so the same set in
+    any order (or with repeats) yields the same digest. Strategy and job type are
+    part of the identity because different strategies may run concurrently.
+
+    Returns:
+        SHA-256 hex digest, or None when there are no symbols
+    """
+    normalized = sorted({str(s).strip().upper() for s in symbols or [] if str(s).strip()})
+    if not normalized:
+        return None
+    payload = f"{job_type}|{strategy_id}|" + "\n".join(normalized)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
 
 class JobStateTransactions:
     """
@@ -34,7 +61,10 @@ class JobStateTransactions:
         total: int,
         description: str = "",
         tickers: Optional[List[str]] = None,
-        strategy_id: int = 1
+        strategy_id: int = 1,
+        job_type: str = 'analysis',
+        dedupe: bool = False,
+        reused: int = 0
     ) -> bool:
         """
         Create a job record atomically.
@@ -42,6 +72,14 @@ class JobStateTransactions:
         Uses a fresh database connection with proper transaction handling.
         Each call gets a new connection to avoid aborted transaction issues.
         
+        With dedupe=True the job stores symbol_set_digest(tickers, ...) and the
+        partial unique index idx_jobs_active_digest guarantees at most one
+        queued/processing job per digest: a concurrent identical request loses
+        the insert (ON CONFLICT DO NOTHING) and gets False back, after which the
+        caller can look the winner up with find_active_job(). Active jobs older
+        than JOB_DEDUP_WINDOW_SECONDS release their digest first so a stuck job
+        cannot block new requests forever.
+        
         Args:
             job_id: Unique job identifier
             status: Initial status (usually 'queued')
@@ -49,11 +87,16 @@ class JobStateTransactions:
             description: Optional job description
             tickers: List of tickers being analyzed (for duplicate detection)
             strategy_id: Strategy ID (default 1)
+            job_type: 'analysis' or 'backtest'
+            dedupe: Enforce one active job per symbol set/strategy/job type
+            reused: Items served from existing results (counted as completed
+                    and successful from the start)
             
         Returns:
             True if created, False if failed or duplicate
         """
         from database import get_db_session, _convert_query_params
+        from config import config
         
         # Normalize tickers: sort and JSON dump for consistent duplicate detection
         # For very large batches (> 100 stocks), skip storing tickers to avoid
@@ -66,36 +109,57 @@ class JobStateTransactions:
             tickers_json = json.dumps({"type": "bulk", "count": len(tickers), "strategy_id": strategy_id})
             logger.info(f"Large batch ({len(tickers)} stocks) - using bulk marker with strategy_id={strategy_id}")
         
+        digest = symbol_set_digest(tickers, strategy_id, job_type) if dedupe else None
+        
         # Use get_db_session() for proper transaction handling with rollback
         try:
             with get_db_session() as (conn, cursor):
-                now = datetime.now().isoformat()
+                now = datetime.now()
+                
+                if digest:
+                    stale_before = now - timedelta(seconds=config.JOB_DEDUP_WINDOW_SECONDS)
+                    query, params = _convert_query_params(f'''
+                        UPDATE analysis_jobs SET symbols_digest = NULL
+                        WHERE symbols_digest = ? AND {ACTIVE_JOB_PREDICATE} AND created_at < ?
+                    ''', (digest, stale_before.isoformat()))
+                    cursor.execute(query, params)
+                    if cursor.rowcount:
+                        logger.info(f"Released {cursor.rowcount} stale active job(s) for digest {digest[:12]}")
                 
                 # Convert query params for PostgreSQL
-                query = '''
+                query = f'''
                     INSERT INTO analysis_jobs 
                     (job_id, status, total, completed, progress, errors,
-                     tickers_json, strategy_id, created_at, updated_at, successful)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                     tickers_json, strategy_id, created_at, updated_at, successful, job_type,
+                     reused, symbols_digest)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (symbols_digest) WHERE {ACTIVE_JOB_PREDICATE} DO NOTHING
                 '''
                 query, params = _convert_query_params(query, (
                     job_id,
                     status,
                     total,
-                    0,  # completed
-                    0,  # progress
+                    reused,  # completed
+                    int(reused * 100 / total) if total else 0,  # progress
                     '[]',  # errors
                     tickers_json,  # normalized tickers
                     strategy_id,  # strategy ID
-                    now,
-                    now,
-                    0  # successful
+                    now.isoformat(),
+                    now.isoformat(),
+                    reused,  # successful
+                    job_type,
+                    reused,
+                    digest
                 ))
                 
                 cursor.execute(query, params)
+                if cursor.rowcount == 0:
+                    logger.info(f"Job {job_id} not created: identical {job_type} job already active")
+                    return False
                 # commit() is called automatically by context manager
-                logger.info(f"Job {job_id} created atomically with strategy_id={strategy_id}")
-                return True
+                logger.info(f"Job {job_id} ({job_type}) created atomically with strategy_id={strategy_id}")
+            invalidate_responses('jobs')
+            return True
                 
         except Exception as e:
             # Transaction is automatically rolled back by context manager
@@ -112,6 +176,49 @@ class JobStateTransactions:
                 logger.error(f"Failed to create job {job_id}: {e}")
                 return False
     
+    @staticmethod
+    def find_active_job(
+        tickers: List[str],
+        strategy_id: int = 1,
+        job_type: str = 'analysis'
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Find the queued/processing job for an identical request.
+        
+        One lookup on idx_jobs_active_digest; jobs past JOB_DEDUP_WINDOW_SECONDS
+        are treated as stale and ignored.
+        
+        Returns:
+            Dict with job_id, status, total, completed, created_at - or None
+        """
+        from config import config
+        
+        digest = symbol_set_digest(tickers, strategy_id, job_type)
+        if not digest:
+            return None
+        
+        stale_before = datetime.now() - timedelta(seconds=config.JOB_DEDUP_WINDOW_SECONDS)
+        try:
+            row = query_db(f'''
+                SELECT job_id, status, total, completed, created_at
+                FROM analysis_jobs
+                WHERE symbols_digest = ? AND {ACTIVE_JOB_PREDICATE} AND created_at > ?
+            ''', (digest, stale_before.isoformat()), one=True)
+        except Exception as e:
+            logger.warning(f"Active job lookup failed for digest {digest[:12]}: {e}")
+            return None
+        
+        if not row:
+            return None
+        job_id, status, total, completed, created_at = row
+        return {
+            "job_id": job_id,
+            "status": status,
+            "total": total,
+            "completed": completed,
+            "created_at": created_at
+        }
+    
     @staticmethod
     def update_job_progress(
         job_id: str,
@@ -160,8 +267,9 @@ class JobStateTransactions:
                 '''
                 query, params = _convert_query_params(query, (completed, successful, progress, errors_json, now, job_id))
                 cursor.execute(query, params)
-                
-                return True
+            
+            invalidate_responses('jobs')
+            return True
         except Exception as e:
             logger.error(f"Failed to update job {job_id} progress: {e}")
             return False
@@ -195,9 +303,10 @@ class JobStateTransactions:
                 '''
                 query, params = _convert_query_params(query, (status, now, now, job_id))
                 cursor.execute(query, params)
-                
-                logger.info(f"Job {job_id} marked as {status}")
-                return True
+            
+            invalidate_responses('jobs')
+            logger.info(f"Job {job_id} marked as {status}")
+            return True
         except Exception as e:
             logger.error(f"Failed to mark job {job_id} as {status}: {e}")
             return False
@@ -206,8 +315,64 @@ class JobStateTransactions:
 class ResultInsertion:
     """
     Atomic result insertion with consistency checks
+    
+    Every analysis_results insert should be followed by upsert_latest() on the
+    same cursor so latest_analysis stays in step with history.
     """
     
+    # Copies one analysis_results row into latest_analysis unless a newer row
+    # for the same (symbol, strategy_id) is already there. Failed rows are skipped
+    # so a transient error never hides the last good result.
+    LATEST_UPSERT_SQL = '''
+        INSERT INTO latest_analysis
+        (symbol, strategy_id, result_id, ticker, name, yahoo_symbol, score, verdict,
+         entry, stop_loss, target, status, analysis_source, created_at, updated_at)
+        SELECT symbol, COALESCE(strategy_id, 1), id, ticker, name, yahoo_symbol, score, verdict,
+               entry, stop_loss, target, status, analysis_source, created_at, updated_at
+        FROM analysis_results
+        WHERE id = ? AND symbol IS NOT NULL AND status IS DISTINCT FROM 'failed'
+        ON CONFLICT (symbol, strategy_id) DO UPDATE SET
+            result_id = EXCLUDED.result_id,
+            ticker = EXCLUDED.ticker,
+            name = COALESCE(EXCLUDED.name, latest_analysis.name),
+            yahoo_symbol = EXCLUDED.yahoo_symbol,
+            score = EXCLUDED.score,
+            verdict = EXCLUDED.verdict,
+            entry = EXCLUDED.entry,
+            stop_loss = EXCLUDED.stop_loss,
+            target = EXCLUDED.target,
+            status = EXCLUDED.status,
+            analysis_source = EXCLUDED.analysis_source,
+            created_at = EXCLUDED.created_at,
+            updated_at = EXCLUDED.updated_at
+        WHERE (EXCLUDED.created_at, EXCLUDED.result_id) >= (latest_analysis.created_at, latest_analysis.result_id)
+    '''
+    LATEST_UPSERT = register_statement('latest_analysis_upsert', LATEST_UPSERT_SQL)
+    
+    # Full analysis row written by watchlist and bulk analysis workers
+    # (job_id is NULL for rows not produced by an analysis_jobs run)
+    INSERT_RESULT = register_statement('analysis_result_insert', '''
+        INSERT INTO analysis_results
+        (ticker, symbol, name, yahoo_symbol, score, verdict, entry, stop_loss, target,
+         position_size, risk_reward_ratio, analysis_config, strategy_id,
+         entry_method, data_source, is_demo_data, raw_data, status,
+         created_at, updated_at, analysis_source, job_id)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        RETURNING id
+    ''')
+    
+    @staticmethod
+    def upsert_latest(cursor, result_id: Optional[int]) -> None:
+        """
+        Refresh latest_analysis from a just-inserted analysis_results row.
+        
+        Must run on the cursor that performed the insert so both writes
+        commit (or roll back) together.
+        """
+        if result_id is None:
+            return
+        ResultInsertion.LATEST_UPSERT.execute(cursor, (result_id,))
+    
     @staticmethod
     def insert_analysis_result(
         job_id: Optional[str] = None,
@@ -240,7 +405,7 @@ class ResultInsertion:
         
         try:
             with get_db_session() as (conn, cursor):
-                now = datetime.now().isoformat()
+                now = get_ist_timestamp()
                 query = '''
                     INSERT INTO analysis_results
                     (job_id, ticker, symbol, name, yahoo_symbol, score, verdict,
@@ -248,6 +413,7 @@ class ResultInsertion:
                      is_demo_data, raw_data, status, error_message,
                      created_at, updated_at, analysis_source)
                     VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    RETURNING id
                 '''
                 query, params = _convert_query_params(query, (
                     job_id, ticker, symbol, name, yahoo_symbol, score, verdict,
@@ -256,7 +422,10 @@ class ResultInsertion:
                     now, now, analysis_source
                 ))
                 cursor.execute(query, params)
-                return True  # PostgreSQL doesn't return lastrowid
+                result_id = cursor.fetchone()[0]
+                ResultInsertion.upsert_latest(cursor, result_id)
+            invalidate_responses('results')
+            return result_id
         except Exception as e:
             logger.error(f"Failed to insert result for {symbol}: {e}")
             return None
@@ -289,6 +458,21 @@ def execute_transaction(conn, operations: List[Tuple[str, tuple]]) -> bool:
         cursor.close()
 
 
+# Polled by the frontend every few seconds per running job
+JOB_STATUS_SELECT = register_statement('job_status_select', '''
+    SELECT job_id, status, progress, completed, total,
+           successful, errors, created_at, updated_at,
+           started_at, completed_at, reused
+    FROM analysis_jobs WHERE job_id = ?
+''')
+
+JOB_LATEST_TICKER_SELECT = register_statement('job_latest_ticker_select', '''
+    SELECT ticker FROM analysis_results
+    WHERE job_id = ?
+    ORDER BY created_at DESC LIMIT 1
+''')
+
+
 def get_job_status(job_id: str) -> Optional[Dict[str, Any]]:
     """
     Get current job status.
@@ -297,25 +481,41 @@ def get_job_status(job_id: str) -> Optional[Dict[str, Any]]:
     Includes current_ticker and message for frontend progress display.
     """
     try:
-        result = query_db(
-            '''SELECT job_id, status, progress, completed, total, 
-                      successful, errors, created_at, updated_at, 
-                      started_at, completed_at
-               FROM analysis_jobs WHERE job_id = ?''',
-            (job_id,),
-            one=True
-        )
+        with get_db_session() as (conn, cursor):
+            JOB_STATUS_SELECT.execute(cursor, (job_id,))
+            result = cursor.fetchone()
+            
+            # Get the ticker currently being analyzed or the last analyzed one
+            current_ticker = None
+            if result:
+                cursor.execute('SAVEPOINT latest_ticker')
+                try:
+                    JOB_LATEST_TICKER_SELECT.execute(cursor, (job_id,))
+                    latest_result = cursor.fetchone()
+                    if latest_result:
+                        current_ticker = latest_result[0]
+                except psycopg2.Error:
+                    # If query fails, current_ticker remains None
+                    cursor.execute('ROLLBACK TO SAVEPOINT latest_ticker')
+        
         if result:
             completed = result[3]
             total = result[4]
             status = result[1]
             successful = result[5]
+            reused = result[11] or 0
             
             # Calculate current index (1-based for display)
             current_index = completed + 1 if completed < total else total
             
+            # Scheduling info is only known to the process that queued the job
+            schedule = get_job_scheduler().job_status(job_id) or {}
+            queue_position = schedule.get('queue_position')
+            
             # Build message based on status
-            if status == "queued":
+            if status == "queued" and queue_position:
+                message = f"Queued for analysis (position {queue_position})..."
+            elif status == "queued":
                 message = "Queued for analysis..."
             elif status == "processing":
                 message = f"Processing ticker {current_index}/{total}..."
@@ -328,22 +528,6 @@ def get_job_status(job_id: str) -> Optional[Dict[str, Any]]:
             else:
                 message = f"Status: {status}"
             
-            # Get the ticker currently being analyzed or the last analyzed one
-            current_ticker = None
-            try:
-                # Get most recent analysis result for this job
-                latest_result = query_db(
-                    '''SELECT ticker FROM analysis_results 
-                       WHERE job_id = ? 
-                       ORDER BY created_at DESC LIMIT 1''',
-                    (job_id,),
-                    one=True
-                )
-                if latest_result:
-                    current_ticker = latest_result[0]
-            except:
-                pass  # If query fails, current_ticker remains None
-            
             return {
                 "job_id": result[0],
                 "status": status,
@@ -358,9 +542,64 @@ def get_job_status(job_id: str) -> Optional[Dict[str, Any]]:
                 "completed_at": result[10],
                 "current_index": current_index,
                 "current_ticker": current_ticker,
+                "reused": reused,
+                "recomputed": total - reused,
+                "priority": schedule.get('priority'),
+                "queue_position": queue_position,
+                "wait_seconds": schedule.get('wait_seconds'),
                 "message": message
             }
         return None
     except Exception as e:
         logger.error(f"Failed to get job status for {job_id}: {e}")
         return None
+
+
+# =============================================================================
+# JSONB COLUMNS (analysis_results.raw_data / analysis_config)
+# =============================================================================
+
+# Indicator keys the UI renders. History and report endpoints project these in
+# SQL so only the needed part of each raw_data document leaves the database.
+INDICATOR_FIELDS = ('name', 'category', 'value', 'vote', 'confidence')
+
+INDICATORS_PROJECTION_SQL = '''
+    CASE WHEN jsonb_typeof(raw_data) = 'array' THEN (
+        SELECT COALESCE(jsonb_agg(jsonb_build_object(
+            {fields}
+        ) ORDER BY ord), '[]'::jsonb)
+        FROM jsonb_array_elements(raw_data) WITH ORDINALITY AS elem(ind, ord)
+    ) ELSE '[]'::jsonb END
+'''.format(fields=', '.join(f"'{f}', ind->'{f}'" for f in INDICATOR_FIELDS))
+
+
+def jsonb_dumps(value) -> Optional[str]:
+    """
+    Serialize a value for a JSONB column.
+    
+    Uses utils.serialization, so numpy values are stored as plain numbers
+    and NaN/Infinity (which PostgreSQL rejects) as null.
+    
+    Args:
+        value: Object to serialize (None stays None -> SQL NULL)
+    """
+    if value is None:
+        return None
+    return json_dumps(value)
+
+
+def indicator_vote_condition(indicator: Optional[str], vote: Optional[int]) -> Tuple[str, Tuple]:
+    """
+    WHERE fragment matching results where `indicator` cast `vote`.
+    
+    Uses JSONB containment so it is served by the raw_data GIN index.
+    
+    Returns:
+        ("AND raw_data @> ?::jsonb", (json,)) or ("", ()) when no filter is given
+    """
+    if not indicator:
+        return "", ()
+    element = {'name': indicator}
+    if vote is not None:
+        element['vote'] = int(vote)
+    return "AND raw_data @> ?::jsonb", (json.dumps([element]),)
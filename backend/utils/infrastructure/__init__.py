@@ -4,13 +4,27 @@ Infrastructure Module
 Cross-cutting concerns:
 - Logging: Application logging setup
 - Scheduling: Cron task management
+- Rate limiting: Per-key token buckets (Redis or in-memory)
+- Response caching: Tag-invalidated GET responses with ETag/304 support
+- Job scheduling: Priority classes and a shared worker budget for background jobs
 - Configuration: System configuration
 """
 
 from utils.infrastructure.logging import setup_logger
 from utils.infrastructure.scheduler import start_scheduler
+from utils.infrastructure.rate_limiter import RateLimiter, get_rate_limiter
+from utils.infrastructure.response_cache import cached_response, invalidate_responses, get_response_cache
+from utils.infrastructure.job_scheduler import JobScheduler, ScheduledJob, get_job_scheduler
 
 __all__ = [
     'setup_logger',
     'start_scheduler',
+    'RateLimiter',
+    'get_rate_limiter',
+    'cached_response',
+    'invalidate_responses',
+    'get_response_cache',
+    'JobScheduler',
+    'ScheduledJob',
+    'get_job_scheduler',
 ]
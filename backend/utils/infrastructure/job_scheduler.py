@@ -0,0 +1,334 @@
+"""
+Priority-aware scheduler for background jobs
+
+All analysis and backtest jobs share one budget of JOB_SCHEDULER_WORKERS
+worker threads instead of each starting its own thread. Workers hand out
+one item (ticker) at a time, so a job never holds a worker between items
+and a newly queued higher-priority job gets the next free worker: small
+interactive jobs preempt bulk runs at ticker granularity.
+
+Dispatch order for every free worker:
+1. Priority class, strictly: interactive > watchlist > bulk > backtest
+2. Within a class, fair share: the job with the fewest items in flight,
+   then the one served least recently (new jobs first, in arrival order)
+
+Workers are started on demand up to the budget and exit as soon as there
+is nothing to dispatch, so an idle process keeps no scheduler threads.
+
+The scheduler is per process: queue position and wait time are only known
+to the process that accepted the job.
+"""
+
+import itertools
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, Dict, Iterable, Optional
+
+from config import config
+from database import close_thread_connection
+
+logger = logging.getLogger(__name__)
+
+# Highest priority first
+PRIORITY_CLASSES = ('interactive', 'watchlist', 'bulk', 'backtest')
+_RANK = {name: rank for rank, name in enumerate(PRIORITY_CLASSES)}
+
+# Item placeholder for a job that has nothing left to run but still needs start()/finish()
+_NO_ITEM = object()
+
+
+def classify_priority(requested: str, size: int) -> str:
+    """
+    Priority class for a job of `size` items.
+
+    Analysis jobs ('watchlist' / 'bulk') with at most INTERACTIVE_JOB_MAX_TICKERS
+    tickers are promoted to 'interactive'; backtests keep their class.
+    """
+    if requested not in _RANK:
+        raise ValueError(f"priority must be one of {', '.join(PRIORITY_CLASSES)}")
+    if requested in ('watchlist', 'bulk') and size <= config.INTERACTIVE_JOB_MAX_TICKERS:
+        return 'interactive'
+    return requested
+
+
+class ScheduledJob(ABC):
+    """
+    A job the scheduler can interleave with others, one item at a time.
+
+    run_item() may be called from several workers at once; start() runs
+    before the first item and finish() (or fail()) exactly once after the last.
+    """
+
+    def __init__(self, job_id: str, items: Iterable[Any], priority: str):
+        if priority not in _RANK:
+            raise ValueError(f"priority must be one of {', '.join(PRIORITY_CLASSES)}")
+        self.job_id = job_id
+        self.items = list(items)
+        self.priority = priority
+
+    def start(self) -> None:
+        """Called once, before the first item"""
+        pass
+
+    @abstractmethod
+    def run_item(self, item: Any) -> None:
+        """Process one item; per-item errors should be recorded, not raised"""
+        pass
+
+    def should_stop(self) -> bool:
+        """Checked before each item; True drops the remaining items"""
+        return False
+
+    def cancel(self) -> None:
+        """Cancellation requested through the scheduler (called under its lock; keep it cheap)"""
+        pass
+
+    def finish(self) -> None:
+        """Called once after the last item ran or the job stopped"""
+        pass
+
+    def fail(self, error: Exception) -> None:
+        """Called instead of finish() when start/run_item/finish raised"""
+        logger.error(f"Job {self.job_id} failed: {error}", exc_info=error)
+
+    def run_inline(self) -> None:
+        """Run every item in order in the calling thread, without the scheduler"""
+        try:
+            self.start()
+            for item in self.items:
+                if self.should_stop():
+                    break
+                self.run_item(item)
+            self.finish()
+        except Exception as e:
+            self.fail(e)
+
+
+class _Entry:
+    """Scheduler bookkeeping for one submitted job"""
+
+    __slots__ = ('job', 'pending', 'seq', 'submitted_at', 'first_dispatch_at',
+                 'last_turn', 'in_flight', 'started', 'starting', 'stopping', 'finished', 'error')
+
+    def __init__(self, job: ScheduledJob, seq: int):
+        self.job = job
+        self.pending = deque(job.items)
+        self.seq = seq
+        self.submitted_at = time.monotonic()
+        self.first_dispatch_at: Optional[float] = None
+        self.last_turn = -1
+        self.in_flight = 0
+        self.started = False
+        self.starting = False
+        self.stopping = False
+        self.finished = False
+        self.error: Optional[Exception] = None
+
+    @property
+    def rank(self) -> int:
+        return _RANK[self.job.priority]
+
+    def dispatchable(self) -> bool:
+        if self.finished or self.stopping or self.starting:
+            return False
+        return not self.started or bool(self.pending)
+
+    def done(self) -> bool:
+        if self.finished or self.in_flight or self.starting:
+            return False
+        return self.error is not None or (self.started and (self.stopping or not self.pending))
+
+
+class JobScheduler:
+    """Shared worker budget with priority classes and fair share within a class"""
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max(1, max_workers or config.JOB_SCHEDULER_WORKERS)
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, _Entry] = {}
+        self._seq = itertools.count()
+        self._turns = itertools.count()
+        self._worker_ids = itertools.count(1)
+        self._workers = 0
+        self._idle = 0  # started workers that have not picked an item yet
+
+    def submit(self, job: ScheduledJob) -> bool:
+        """Queue a job; False if a job with the same ID is already scheduled"""
+        with self._lock:
+            if job.job_id in self._jobs:
+                return False
+            self._jobs[job.job_id] = _Entry(job, next(self._seq))
+            self._spawn_locked()
+        logger.info(f"Scheduled job {job.job_id} ({job.priority}, {len(job.items)} items)")
+        return True
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Drop a job's remaining items.
+
+        Items already running finish first; a job that never started is
+        finalized right away. Returns False if the job is not scheduled here.
+        """
+        with self._lock:
+            entry = self._jobs.get(job_id)
+            if entry is None or entry.finished:
+                return False
+            entry.stopping = True
+            entry.pending.clear()
+            entry.job.cancel()
+            finalize = not entry.started and not entry.starting
+            if finalize:
+                entry.finished = True
+                del self._jobs[job_id]
+        if finalize:
+            self._finalize(entry)
+        return True
+
+    def job_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Scheduling state of a job accepted by this process.
+
+        queue_position is 1-based among jobs still waiting for their first
+        worker (0 once running); wait_seconds is the time until the first
+        item was dispatched, or so far while still queued.
+        """
+        with self._lock:
+            entry = self._jobs.get(job_id)
+            if entry is None:
+                return None
+            now = time.monotonic()
+            if entry.first_dispatch_at is None:
+                waiting = sorted(
+                    (e for e in self._jobs.values() if e.first_dispatch_at is None),
+                    key=lambda e: (e.rank, e.seq)
+                )
+                position = waiting.index(entry) + 1
+                waited = now - entry.submitted_at
+            else:
+                position = 0
+                waited = entry.first_dispatch_at - entry.submitted_at
+            return {
+                'priority': entry.job.priority,
+                'queue_position': position,
+                'wait_seconds': round(waited, 3),
+                'running_items': entry.in_flight,
+                'pending_items': len(entry.pending),
+            }
+
+    def stats(self) -> Dict[str, Any]:
+        """Worker and queue counts"""
+        with self._lock:
+            queued = {name: 0 for name in PRIORITY_CLASSES}
+            for entry in self._jobs.values():
+                queued[entry.job.priority] += 1
+            return {'workers': self._workers, 'max_workers': self.max_workers, 'jobs': queued}
+
+    def _spawn_locked(self) -> None:
+        needed = sum(
+            len(entry.pending) if entry.started else 1
+            for entry in self._jobs.values() if entry.dispatchable()
+        )
+        for _ in range(min(needed - self._idle, self.max_workers - self._workers)):
+            self._workers += 1
+            self._idle += 1
+            worker = threading.Thread(
+                target=self._work,
+                daemon=False,  # CRITICAL: Must be False on Railway for threads to execute
+                name=f"JobWorker-{next(self._worker_ids)}"
+            )
+            worker.start()
+
+    def _pick_locked(self):
+        candidates = [entry for entry in self._jobs.values() if entry.dispatchable()]
+        if not candidates:
+            return None
+        entry = min(candidates, key=lambda e: (e.rank, e.in_flight, e.last_turn, e.seq))
+        first = not entry.started
+        if first:
+            entry.starting = True
+        item = entry.pending.popleft() if entry.pending else _NO_ITEM
+        entry.in_flight += 1
+        entry.last_turn = next(self._turns)
+        if entry.first_dispatch_at is None:
+            entry.first_dispatch_at = time.monotonic()
+        return entry, item, first
+
+    def _work(self) -> None:
+        try:
+            while True:
+                with self._lock:
+                    self._idle -= 1
+                    picked = self._pick_locked()
+                    if picked is None:
+                        self._workers -= 1
+                        return
+                self._run(*picked)
+                with self._lock:
+                    self._idle += 1
+        finally:
+            close_thread_connection()
+
+    def _run(self, entry: _Entry, item: Any, first: bool) -> None:
+        job = entry.job
+        error = None
+        try:
+            if first:
+                job.start()
+                with self._lock:
+                    entry.starting = False
+                    entry.started = True
+                    self._spawn_locked()
+            if item is not _NO_ITEM:
+                if job.should_stop():
+                    with self._lock:
+                        entry.stopping = True
+                        entry.pending.clear()
+                else:
+                    job.run_item(item)
+        except Exception as e:
+            error = e
+
+        with self._lock:
+            entry.in_flight -= 1
+            entry.starting = False
+            if error is not None and entry.error is None:
+                entry.error = error
+                entry.stopping = True
+                entry.pending.clear()
+            finalize = entry.done()
+            if finalize:
+                entry.finished = True
+                del self._jobs[job.job_id]
+        if finalize:
+            self._finalize(entry)
+
+    @staticmethod
+    def _finalize(entry: _Entry) -> None:
+        job = entry.job
+        if entry.error is not None:
+            job.fail(entry.error)
+            return
+        try:
+            job.finish()
+        except Exception as e:
+            job.fail(e)
+
+
+# Global scheduler instance
+_job_scheduler: Optional[JobScheduler] = None
+_job_scheduler_lock = threading.Lock()
+
+
+def get_job_scheduler() -> JobScheduler:
+    """Get singleton job scheduler instance"""
+    global _job_scheduler
+
+    if _job_scheduler is None:
+        with _job_scheduler_lock:
+            if _job_scheduler is None:
+                _job_scheduler = JobScheduler()
+
+    return _job_scheduler
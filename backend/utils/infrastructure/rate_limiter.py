@@ -0,0 +1,197 @@
+"""
+Token-bucket rate limiting for API keys
+
+Each key owns a bucket holding up to `limit` tokens that refills continuously
+at `limit / period` tokens per second; a request spends one token. A check is
+O(1) regardless of request rate (two floats per key instead of a timestamp
+list), and a burst of up to `limit` requests is allowed after idle time.
+
+Architecture:
+    RateLimiter (Abstract Base Class)
+    ├── RedisRateLimiter (shared across gunicorn workers, atomic Lua script)
+    └── InMemoryRateLimiter (per-process fallback, sharded locks)
+
+The Redis limiter falls back to the in-memory limiter whenever Redis errors,
+so an outage degrades to per-process limits instead of failing requests.
+"""
+
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import config
+
+# Optional Redis import
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter(ABC):
+    """Abstract base class for rate limiters"""
+
+    @abstractmethod
+    def allow(self, key: str, limit: int, period: float = 60.0) -> bool:
+        """
+        Spend one token for `key`.
+
+        Args:
+            key: Identity being limited (e.g. API key hash)
+            limit: Requests allowed per `period` (bucket capacity)
+            period: Window in seconds over which `limit` tokens refill
+
+        Returns:
+            True if the request is within the limit, False if it should be rejected
+        """
+        pass
+
+
+class InMemoryRateLimiter(RateLimiter):
+    """
+    Per-process token buckets.
+
+    Buckets are spread over `shards` independent dict/lock pairs so concurrent
+    requests for different keys rarely contend on the same lock.
+    """
+
+    def __init__(self, shards: int = 64, max_keys_per_shard: int = 1024):
+        self._shards: List[Tuple[threading.Lock, Dict[str, List[float]]]] = [
+            (threading.Lock(), {}) for _ in range(shards)
+        ]
+        self._max_keys_per_shard = max_keys_per_shard
+
+    def allow(self, key: str, limit: int, period: float = 60.0) -> bool:
+        if limit <= 0:
+            return False
+
+        lock, buckets = self._shards[hash(key) % len(self._shards)]
+        rate = limit / period
+        now = time.monotonic()
+
+        with lock:
+            bucket = buckets.get(key)
+            if bucket is None:
+                if len(buckets) >= self._max_keys_per_shard:
+                    self._evict_full(buckets, now, rate, limit)
+                bucket = buckets[key] = [float(limit), now]
+
+            tokens = min(limit, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+            if tokens < 1:
+                bucket[0] = tokens
+                return False
+            bucket[0] = tokens - 1
+            return True
+
+    @staticmethod
+    def _evict_full(buckets: Dict[str, List[float]], now: float, rate: float, limit: int) -> None:
+        """Drop buckets that have refilled completely (indistinguishable from new ones)"""
+        for k in [k for k, (tokens, last) in buckets.items() if tokens + (now - last) * rate >= limit]:
+            del buckets[k]
+
+
+class RedisRateLimiter(RateLimiter):
+    """
+    Token buckets stored in Redis, enforced across all workers.
+
+    Key Structure:
+    - ratelimit:{key} -> Hash {tokens, ts}, expiring once the bucket would be full again
+    """
+
+    # KEYS[1] = bucket key; ARGV = limit, rate (tokens/sec), now (sec)
+    TOKEN_BUCKET_LUA = """
+    local limit = tonumber(ARGV[1])
+    local rate = tonumber(ARGV[2])
+    local now = tonumber(ARGV[3])
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or limit
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(limit, tokens + math.max(0, now - ts) * rate)
+    local allowed = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+        allowed = 1
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+    redis.call('PEXPIRE', KEYS[1], math.ceil((limit - tokens) / rate * 1000) + 1000)
+    return allowed
+    """
+
+    def __init__(self, redis_client: Optional[Any] = None, fallback: Optional[RateLimiter] = None):
+        """
+        Args:
+            redis_client: Optional Redis client (will create from config if None)
+            fallback: Limiter used while Redis is unreachable
+        """
+        if redis_client is None:
+            redis_client = redis.Redis(
+                host=config.REDIS_HOST,
+                port=config.REDIS_PORT,
+                db=config.REDIS_DB,
+                password=config.REDIS_PASSWORD if config.REDIS_PASSWORD else None,
+                socket_connect_timeout=2,
+                socket_timeout=2
+            )
+            redis_client.ping()
+        self.redis = redis_client
+        self._script = redis_client.register_script(self.TOKEN_BUCKET_LUA)
+        self.fallback = fallback or InMemoryRateLimiter()
+
+    def allow(self, key: str, limit: int, period: float = 60.0) -> bool:
+        if limit <= 0:
+            return False
+        try:
+            return bool(self._script(keys=[f"ratelimit:{key}"], args=[limit, limit / period, time.time()]))
+        except Exception as e:
+            logger.warning(f"Redis rate limit check failed, using in-process limiter: {e}")
+            return self.fallback.allow(key, limit, period)
+
+
+def create_rate_limiter() -> RateLimiter:
+    """
+    Factory function to create the configured rate limiter.
+
+    RATE_LIMIT_BACKEND:
+    - 'memory': always per-process
+    - 'redis' / 'auto': Redis when installed, enabled and reachable; otherwise in-memory
+    """
+    backend = config.RATE_LIMIT_BACKEND
+    if backend == 'memory':
+        return InMemoryRateLimiter()
+
+    if not REDIS_AVAILABLE or not config.REDIS_ENABLED:
+        if backend == 'redis':
+            logger.warning("RATE_LIMIT_BACKEND=redis but Redis is not available, using in-memory rate limits")
+        return InMemoryRateLimiter()
+
+    try:
+        limiter = RedisRateLimiter()
+        logger.info("Using Redis-backed rate limits (shared across workers)")
+        return limiter
+    except Exception as e:
+        logger.warning(f"Redis unavailable for rate limiting, falling back to in-memory: {e}")
+        return InMemoryRateLimiter()
+
+
+# Global rate limiter instance
+_rate_limiter: Optional[RateLimiter] = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Get singleton rate limiter instance"""
+    global _rate_limiter
+
+    if _rate_limiter is None:
+        with _rate_limiter_lock:
+            if _rate_limiter is None:
+                _rate_limiter = create_rate_limiter()
+
+    return _rate_limiter
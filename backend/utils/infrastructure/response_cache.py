@@ -0,0 +1,336 @@
+"""
+Response caching for read-heavy GET endpoints
+
+@cached_response(tags=..., ttl=...) stores a view's 200 response keyed by
+path, query args and the current generation of each tag it depends on.
+Writers call invalidate_responses(*tags) after committing, which bumps the
+tag generations so every dependent entry misses from then on (no key scans).
+
+Every cached response carries a strong ETag (hash of the body),
+Last-Modified and Cache-Control: no-cache, so polling clients revalidate
+and get 304 Not Modified while the data is unchanged, including after the
+entry itself has expired.
+
+Tags used by the API:
+- 'results': analysis_results / latest_analysis inserts
+- 'jobs': analysis_jobs created, progressed or finished
+
+Architecture:
+    ResponseCache (Abstract Base Class)
+    ├── RedisResponseCache (entries and generations shared across workers)
+    └── InMemoryResponseCache (per-process LRU fallback)
+
+The in-memory cache only sees invalidations made in its own process, so
+with several workers it relies on the (short) per-route TTLs.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, Optional, Sequence
+
+from flask import Response, current_app, request
+
+from config import config
+
+# Optional Redis import
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    """Body and validators of a cached 200 response"""
+    body: bytes
+    content_type: str
+    etag: str
+    last_modified: float
+
+    @classmethod
+    def from_response(cls, response: Response) -> 'CachedResponse':
+        body = response.get_data()
+        return cls(
+            body=body,
+            content_type=response.content_type or 'application/json',
+            etag=hashlib.sha1(body).hexdigest(),
+            last_modified=time.time()
+        )
+
+    def to_response(self) -> Response:
+        """A fresh Response, turned into a 304 when the request's validators match"""
+        response = Response(self.body, status=200, content_type=self.content_type)
+        response.set_etag(self.etag)
+        response.last_modified = self.last_modified
+        response.headers['Cache-Control'] = 'no-cache'
+        return response.make_conditional(request)
+
+
+class ResponseCache(ABC):
+    """Abstract base class for response caches"""
+
+    @abstractmethod
+    def generations(self, tags: Sequence[str]) -> Sequence[int]:
+        """Current generation of each tag (0 if never invalidated)"""
+        pass
+
+    @abstractmethod
+    def invalidate(self, tags: Iterable[str]) -> None:
+        """Bump the generation of each tag"""
+        pass
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[CachedResponse]:
+        pass
+
+    @abstractmethod
+    def set(self, key: str, entry: CachedResponse, ttl: float) -> None:
+        pass
+
+    @abstractmethod
+    def clear(self) -> None:
+        pass
+
+
+class InMemoryResponseCache(ResponseCache):
+    """Per-process LRU of cached responses plus tag generation counters"""
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def generations(self, tags: Sequence[str]) -> Sequence[int]:
+        return [self._generations.get(tag, 0) for tag in tags]
+
+    def invalidate(self, tags: Iterable[str]) -> None:
+        with self._lock:
+            for tag in tags:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            entry, expires_at = item
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: CachedResponse, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (entry, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+
+
+class RedisResponseCache(ResponseCache):
+    """
+    Cached responses shared by all workers.
+
+    Key Structure:
+    - respcache:gen:{tag} -> generation counter (INCR on invalidation)
+    - respcache:entry:{key} -> Hash {body, content_type, etag, last_modified}, PEXPIRE ttl
+    """
+
+    def __init__(self, redis_client: Optional[Any] = None, fallback: Optional[ResponseCache] = None):
+        """
+        Args:
+            redis_client: Optional Redis client (will create from config if None)
+            fallback: Cache used while Redis is unreachable
+        """
+        if redis_client is None:
+            redis_client = redis.Redis(
+                host=config.REDIS_HOST,
+                port=config.REDIS_PORT,
+                db=config.REDIS_DB,
+                password=config.REDIS_PASSWORD if config.REDIS_PASSWORD else None,
+                socket_connect_timeout=2,
+                socket_timeout=2
+            )
+            redis_client.ping()
+        self.redis = redis_client
+        self.fallback = fallback or InMemoryResponseCache(config.RESPONSE_CACHE_MAX_ENTRIES)
+
+    def generations(self, tags: Sequence[str]) -> Sequence[int]:
+        try:
+            return [int(value or 0) for value in self.redis.mget([f"respcache:gen:{tag}" for tag in tags])]
+        except Exception as e:
+            logger.warning(f"Redis response cache unavailable, using in-process cache: {e}")
+            return self.fallback.generations(tags)
+
+    def invalidate(self, tags: Iterable[str]) -> None:
+        tags = list(tags)
+        # The fallback must never serve entries Redis has already invalidated
+        self.fallback.invalidate(tags)
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for tag in tags:
+                pipe.incr(f"respcache:gen:{tag}")
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Failed to invalidate response cache tags {tags} in Redis: {e}")
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        try:
+            data = self.redis.hgetall(f"respcache:entry:{key}")
+        except Exception as e:
+            logger.warning(f"Redis response cache read failed: {e}")
+            return self.fallback.get(key)
+        if not data:
+            return None
+        return CachedResponse(
+            body=data[b'body'],
+            content_type=data[b'content_type'].decode(),
+            etag=data[b'etag'].decode(),
+            last_modified=float(data[b'last_modified'])
+        )
+
+    def set(self, key: str, entry: CachedResponse, ttl: float) -> None:
+        try:
+            pipe = self.redis.pipeline(transaction=True)
+            pipe.hset(f"respcache:entry:{key}", mapping={
+                'body': entry.body,
+                'content_type': entry.content_type,
+                'etag': entry.etag,
+                'last_modified': entry.last_modified,
+            })
+            pipe.pexpire(f"respcache:entry:{key}", max(1, int(ttl * 1000)))
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Redis response cache write failed: {e}")
+            self.fallback.set(key, entry, ttl)
+
+    def clear(self) -> None:
+        self.fallback.clear()
+        try:
+            for key in self.redis.scan_iter(match='respcache:*', count=500):
+                self.redis.delete(key)
+        except Exception as e:
+            logger.warning(f"Failed to clear Redis response cache: {e}")
+
+
+def create_response_cache() -> ResponseCache:
+    """
+    Factory function to create the configured response cache.
+
+    RESPONSE_CACHE_BACKEND:
+    - 'memory': always per-process
+    - 'redis' / 'auto': Redis when installed, enabled and reachable; otherwise in-memory
+    """
+    backend = config.RESPONSE_CACHE_BACKEND
+    if backend == 'memory':
+        return InMemoryResponseCache(config.RESPONSE_CACHE_MAX_ENTRIES)
+
+    if not REDIS_AVAILABLE or not config.REDIS_ENABLED:
+        if backend == 'redis':
+            logger.warning("RESPONSE_CACHE_BACKEND=redis but Redis is not available, using in-memory response cache")
+        return InMemoryResponseCache(config.RESPONSE_CACHE_MAX_ENTRIES)
+
+    try:
+        cache = RedisResponseCache()
+        logger.info("Using Redis-backed response cache (shared across workers)")
+        return cache
+    except Exception as e:
+        logger.warning(f"Redis unavailable for response cache, falling back to in-memory: {e}")
+        return InMemoryResponseCache(config.RESPONSE_CACHE_MAX_ENTRIES)
+
+
+# Global response cache instance
+_response_cache: Optional[ResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """Get singleton response cache instance"""
+    global _response_cache
+
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                _response_cache = create_response_cache()
+
+    return _response_cache
+
+
+def invalidate_responses(*tags: str) -> None:
+    """
+    Drop every cached response that depends on any of `tags`.
+
+    Call after the write has committed; never raises.
+    """
+    if not config.RESPONSE_CACHE_ENABLED or not tags:
+        return
+    try:
+        get_response_cache().invalidate(tags)
+    except Exception as e:
+        logger.warning(f"Response cache invalidation failed for {tags}: {e}")
+
+
+def _cache_key(tags: Sequence[str], generations: Sequence[int]) -> str:
+    args = '&'.join(f"{k}={v}" for k, v in sorted(request.args.items(multi=True)))
+    versions = ','.join(f"{tag}:{gen}" for tag, gen in zip(tags, generations))
+    raw = f"{request.path}?{args}|{versions}"
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def cached_response(tags: Sequence[str] = (), ttl: Optional[float] = None) -> Callable:
+    """
+    Cache a GET view's 200 responses and answer conditional requests.
+
+    Place below @bp.route. Error responses are returned as-is and never
+    cached.
+
+    Args:
+        tags: Data the response depends on; invalidate_responses(tag) evicts it
+        ttl: Seconds an entry may be served without recomputing
+             (default RESPONSE_CACHE_TTL)
+    """
+    tags = tuple(tags)
+
+    def decorator(view: Callable) -> Callable:
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not config.RESPONSE_CACHE_ENABLED or request.method != 'GET':
+                return view(*args, **kwargs)
+
+            cache = get_response_cache()
+            try:
+                key = _cache_key(tags, cache.generations(tags))
+                entry = cache.get(key)
+            except Exception as e:
+                logger.warning(f"Response cache lookup failed for {request.path}: {e}")
+                return view(*args, **kwargs)
+
+            if entry is None:
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200 or response.direct_passthrough:
+                    return response
+                entry = CachedResponse.from_response(response)
+                try:
+                    cache.set(key, entry, ttl if ttl is not None else config.RESPONSE_CACHE_TTL)
+                except Exception as e:
+                    logger.warning(f"Response cache store failed for {request.path}: {e}")
+            return entry.to_response()
+        return wrapper
+    return decorator
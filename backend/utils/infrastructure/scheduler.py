@@ -243,6 +243,22 @@ def clean_old_data():
     except Exception as e:
         logger.exception(f"Data cleanup failed: {str(e)}")
 
+def manage_partitions():
+    """
+    Maintain analysis_results monthly partitions
+    Runs daily at 2:30 AM IST: creates upcoming months ahead of time and
+    detaches/drops partitions past ANALYSIS_RETENTION_MONTHS
+    """
+    try:
+        from database import manage_analysis_partitions
+        
+        result = manage_analysis_partitions()
+        logger.info(f"Partition maintenance completed: {len(result['created'])} created, "
+                    f"{len(result['expired'])} expired")
+        
+    except Exception as e:
+        logger.exception(f"Partition maintenance failed: {str(e)}")
+
 def start_scheduler():
     """Start background scheduler for cron jobs"""
     if not SCHEDULER_AVAILABLE:
@@ -257,6 +273,9 @@ def start_scheduler():
     # Data cleanup - daily at 3:00 AM IST
     scheduler.add_job(clean_old_data, 'cron', hour=3, minute=0)
     
+    # analysis_results partition maintenance - daily at 2:30 AM IST
+    scheduler.add_job(manage_partitions, 'cron', hour=2, minute=30)
+    
     # Log compression - weekly on Sunday at midnight
     scheduler.add_job(compress_logs, 'cron', day_of_week='sun', hour=0, minute=0)
     
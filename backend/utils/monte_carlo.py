@@ -0,0 +1,147 @@
+"""
+Monte Carlo Robustness Analysis for Backtest Trades
+
+BacktestEngine._calculate_metrics reports point estimates for one specific
+ordering of trades. This module resamples the trade sequence thousands of
+times to show how much of the result is luck:
+
+- bootstrap: draw trades with replacement (return AND drawdown vary)
+- permute:   shuffle trade order (return fixed, drawdown/path varies)
+
+All simulations run as a single NumPy operation on an (iterations x trades)
+matrix, chunked to bound memory, so a few thousand runs take milliseconds
+and can be attached inline to /api/backtest/ticker responses.
+
+P&L is accumulated additively in percent, the same convention used by
+_calculate_metrics for total_profit_pct and max_drawdown.
+"""
+
+import logging
+from typing import Any, Dict, Iterable, Optional, Union
+
+import numpy as np
+
+logger = logging.getLogger('trading_analyzer')
+
+METHODS = ('bootstrap', 'permute')
+DEFAULT_ITERATIONS = 2000
+MAX_ITERATIONS = 20000
+PERCENTILES = (5, 25, 50, 75, 95)
+
+# Upper bound on simulated cells held in memory at once (~16 MB of float64)
+_MAX_CHUNK_CELLS = 2_000_000
+
+
+def extract_pnl(trades: Union[Iterable[Dict[str, Any]], Dict[str, Iterable[Dict[str, Any]]]]) -> np.ndarray:
+    """
+    Flatten one or many trade lists into a P&L (%) array.
+
+    Accepts a list of trade dicts, a list of such lists, or a dict mapping
+    ticker -> trades / backtest result (as returned by backtest_multiple).
+    """
+    if isinstance(trades, dict):
+        groups = [v.get('trades', []) if isinstance(v, dict) else v for v in trades.values()]
+    else:
+        trades = list(trades or [])
+        groups = trades if trades and isinstance(trades[0], (list, tuple)) else [trades]
+
+    pnl = [t['pnl_pct'] for group in groups for t in group or [] if t.get('pnl_pct') is not None]
+    return np.asarray(pnl, dtype=np.float64)
+
+
+def _summarize(values: np.ndarray, confidence: float) -> Dict[str, Any]:
+    tail = (1 - confidence) / 2 * 100
+    lo, hi = np.percentile(values, [tail, 100 - tail])
+    pct = np.percentile(values, PERCENTILES)
+    return {
+        'mean': round(float(values.mean()), 2),
+        'std': round(float(values.std()), 2),
+        'ci_low': round(float(lo), 2),
+        'ci_high': round(float(hi), 2),
+        'percentiles': {f'p{p}': round(float(v), 2) for p, v in zip(PERCENTILES, pct)},
+    }
+
+
+def run_monte_carlo(trades, iterations: int = DEFAULT_ITERATIONS, method: str = 'bootstrap',
+                    seed: Optional[int] = None, confidence: float = 0.95) -> Dict[str, Any]:
+    """
+    Resample trade sequences and return return/drawdown distributions.
+
+    Args:
+        trades: Trade list(s) (see extract_pnl) or a 1-D array of pnl_pct values
+        iterations: Number of simulated sequences (capped at MAX_ITERATIONS)
+        method: 'bootstrap' or 'permute'
+        seed: RNG seed for reproducible results
+        confidence: Two-sided confidence level for ci_low / ci_high
+
+    Returns:
+        {
+            'method': 'bootstrap',
+            'iterations': 2000,
+            'trades': 45,
+            'seed': 42,
+            'confidence': 0.95,
+            'total_return': {'mean': 18.1, 'std': 9.4, 'ci_low': 0.2, 'ci_high': 36.0,
+                             'percentiles': {'p5': 3.1, ..., 'p95': 33.4}},
+            'max_drawdown': {... same shape, negative values ...},
+            'prob_loss': 3.2,                 # % of runs ending below 0
+            'prob_worse_drawdown': 41.5,      # % of runs with deeper DD than observed
+            'observed': {'total_return': 18.5, 'max_drawdown': -8.5}
+        }
+    """
+    if method not in METHODS:
+        raise ValueError(f"method must be one of {METHODS}")
+    if not 0 < confidence < 1:
+        raise ValueError("confidence must be between 0 and 1")
+
+    pnl = trades if isinstance(trades, np.ndarray) else extract_pnl(trades)
+    pnl = np.asarray(pnl, dtype=np.float64).ravel()
+    n = pnl.size
+    iterations = int(max(1, min(iterations, MAX_ITERATIONS)))
+
+    if n == 0:
+        return {
+            'method': method,
+            'iterations': 0,
+            'trades': 0,
+            'seed': seed,
+            'confidence': confidence,
+            'message': 'No trades to simulate'
+        }
+
+    rng = np.random.default_rng(seed)
+    totals = np.empty(iterations, dtype=np.float64)
+    drawdowns = np.empty(iterations, dtype=np.float64)
+
+    chunk = max(1, _MAX_CHUNK_CELLS // n)
+    for start in range(0, iterations, chunk):
+        size = min(chunk, iterations - start)
+        if method == 'bootstrap':
+            paths = pnl[rng.integers(0, n, size=(size, n))]
+        else:
+            paths = rng.permuted(np.broadcast_to(pnl, (size, n)), axis=1)
+
+        equity = np.cumsum(paths, axis=1)
+        # Peak starts at 0 (flat equity before the first trade)
+        peaks = np.maximum.accumulate(np.maximum(equity, 0), axis=1)
+        totals[start:start + size] = equity[:, -1]
+        drawdowns[start:start + size] = -(peaks - equity).max(axis=1)
+
+    observed_equity = np.cumsum(pnl)
+    observed_dd = -float((np.maximum.accumulate(np.maximum(observed_equity, 0)) - observed_equity).max())
+
+    return {
+        'method': method,
+        'iterations': iterations,
+        'trades': int(n),
+        'seed': seed,
+        'confidence': confidence,
+        'total_return': _summarize(totals, confidence),
+        'max_drawdown': _summarize(drawdowns, confidence),
+        'prob_loss': round(float((totals < 0).mean() * 100), 2),
+        'prob_worse_drawdown': round(float((drawdowns < observed_dd).mean() * 100), 2),
+        'observed': {
+            'total_return': round(float(observed_equity[-1]), 2),
+            'max_drawdown': round(observed_dd, 2),
+        },
+    }
@@ -0,0 +1,160 @@
+"""
+Keyset (cursor) pagination for analysis_results listings
+
+OFFSET pagination makes PostgreSQL read and discard every skipped row, and the
+matching COUNT(*) scans the whole filtered table on every page. Because full
+analysis history is kept, both get slower with every run.
+
+Keyset pagination instead remembers the last row of the previous page and
+asks for rows strictly "before" it:
+
+    WHERE (created_at, id) < (:created_at, :id)
+    ORDER BY created_at DESC, id DESC
+    LIMIT :limit + 1
+
+(created_at, id) is unique and monotonic, so pages never skip or repeat rows
+even while new analyses are being inserted. The extra row tells us whether
+another page exists without counting.
+
+Totals are optional (see count_rows):
+- 'exact':    COUNT(*), cached for RESULT_COUNT_CACHE_TTL seconds
+- 'estimate': planner row estimate from EXPLAIN (no table scan)
+- 'none':     skip counting entirely
+"""
+
+import base64
+import json
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from config import config
+from database import query_db
+
+logger = logging.getLogger(__name__)
+
+COUNT_MODES = ('exact', 'estimate', 'none')
+
+# (query, params) -> (count, expires_at)
+_count_cache: Dict[Tuple[str, Tuple], Tuple[int, float]] = {}
+_count_lock = threading.Lock()
+
+
+def encode_cursor(created_at: Any, row_id: int) -> str:
+    """Encode the (created_at, id) of the last row on a page as an opaque token"""
+    if isinstance(created_at, datetime):
+        created_at = created_at.isoformat()
+    payload = json.dumps([str(created_at), int(row_id)], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token: str) -> Tuple[datetime, int]:
+    """
+    Decode a token produced by encode_cursor.
+
+    Raises:
+        ValueError: If the token is malformed
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except Exception:
+        raise ValueError("Invalid pagination cursor")
+
+
+def keyset_condition(cursor: Optional[str], columns: str = "created_at, id") -> Tuple[str, Tuple]:
+    """
+    Build the WHERE fragment for rows after `cursor` (newest-first ordering).
+
+    Args:
+        cursor: Token from encode_cursor, or None for the first page
+        columns: Timestamp and tie-breaker columns the listing is ordered by
+
+    Returns:
+        ("AND (created_at, id) < (?, ?)", (created_at, id)) or ("", ())
+    """
+    if not cursor:
+        return "", ()
+    created_at, row_id = decode_cursor(cursor)
+    return f"AND ({columns}) < (?, ?)", (created_at, row_id)
+
+
+def split_page(rows: Sequence, limit: int, created_at_index: int, id_index: int = 0) -> Tuple[List, Optional[str]]:
+    """
+    Trim a `LIMIT limit + 1` result to one page and build the next cursor.
+
+    Returns:
+        (page_rows, next_cursor) - next_cursor is None on the last page
+    """
+    rows = list(rows or [])
+    if len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    last = page[-1]
+    return page, encode_cursor(last[created_at_index], last[id_index])
+
+
+def parse_limit(value: Optional[int], default: int, maximum: int) -> int:
+    """Clamp a page size request parameter"""
+    if value is None or value < 1 or value > maximum:
+        return default
+    return value
+
+
+def parse_count_mode(value: Optional[str], default: str) -> str:
+    """Normalize the ?count= request parameter"""
+    value = (value or default).lower()
+    return value if value in COUNT_MODES else default
+
+
+def count_rows(from_where: str, params: Tuple = (), mode: str = 'exact') -> Optional[int]:
+    """
+    Count rows matching `FROM ... WHERE ...` according to `mode`.
+
+    Args:
+        from_where: SQL starting at FROM, e.g. "FROM analysis_results WHERE verdict IS NOT NULL"
+        params: Query parameters for from_where
+        mode: 'exact' (cached COUNT), 'estimate' (planner estimate) or 'none'
+
+    Returns:
+        Row count, or None when mode is 'none'
+    """
+    if mode == 'none':
+        return None
+
+    if mode == 'estimate':
+        try:
+            row = query_db(f"EXPLAIN (FORMAT JSON) SELECT 1 {from_where}", params, one=True)
+            plan = row[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return int(plan[0]['Plan']['Plan Rows'])
+        except Exception as e:
+            logger.warning(f"Row estimate failed, falling back to exact count: {e}")
+
+    key = (from_where, tuple(params))
+    now = time.time()
+    with _count_lock:
+        cached = _count_cache.get(key)
+        if cached and cached[1] > now:
+            return cached[0]
+
+    row = query_db(f"SELECT COUNT(*) {from_where}", params, one=True)
+    total = int(row[0]) if row else 0
+
+    with _count_lock:
+        _count_cache[key] = (total, now + config.RESULT_COUNT_CACHE_TTL)
+        # Bounded by the number of distinct filters; drop expired entries opportunistically
+        if len(_count_cache) > 1024:
+            for k in [k for k, v in _count_cache.items() if v[1] <= now]:
+                del _count_cache[k]
+    return total
+
+
+def clear_count_cache():
+    """Drop all cached totals (e.g. after bulk deletes)"""
+    with _count_lock:
+        _count_cache.clear()
@@ -0,0 +1,244 @@
+"""
+JSON serialization for API responses and stored blobs
+
+One serializer backs Flask responses (FastJSONProvider), the raw_data /
+errors / backtest result columns and anything that used to go through
+json.dumps(cls=NumpyEncoder):
+- numpy scalars and arrays, datetime/date (ISO 8601), Decimal and UUID
+  are handled natively
+- NaN/Infinity are written as null (valid JSON, accepted by JSONB)
+- output is compact; pretty printing is opt-in
+
+Backends are pluggable (register_json_backend); config.JSON_BACKEND picks
+one: "orjson" (optional dependency), "stdlib", or "auto" for orjson when
+it is installed.
+"""
+
+import dataclasses
+import json
+import logging
+import math
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, Callable, Dict, Optional, Union
+
+import numpy as np
+from flask import has_request_context, request
+from flask.json.provider import JSONProvider
+
+from config import config
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+def _default(o: Any) -> Any:
+    """Values neither backend serializes on its own"""
+    if isinstance(o, np.ndarray):
+        return to_native(o.tolist())
+    if isinstance(o, np.generic):
+        return to_native(o.item())
+    if isinstance(o, (datetime, date, time)):
+        return o.isoformat()
+    if isinstance(o, (Decimal, uuid.UUID)):
+        return str(o)
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return to_native(dataclasses.asdict(o))
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+def to_native(value: Any) -> Any:
+    """
+    Convert `value` into plain JSON types in one pass: numpy values become
+    Python numbers/lists, non-finite floats become None and dict keys become
+    strings.
+    """
+    kind = type(value)
+    if kind is str or kind is int or kind is bool or value is None:
+        return value
+    if kind is float:
+        return value if math.isfinite(value) else None
+    if kind is dict:
+        return {_key(k): to_native(v) for k, v in value.items()}
+    if kind is list or kind is tuple:
+        return [to_native(v) for v in value]
+    if isinstance(value, np.floating):
+        value = float(value)
+        return value if math.isfinite(value) else None
+    if isinstance(value, np.ndarray) and value.dtype.kind == 'f':
+        # Mask non-finite values in C instead of checking each element
+        native = value.astype(object)
+        native[~np.isfinite(value)] = None
+        return native.tolist()
+    if isinstance(value, dict):
+        return {_key(k): to_native(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_native(v) for v in value]
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, (str, int)):
+        return value
+    return to_native(_default(value))
+
+
+def _key(key: Any) -> Any:
+    if isinstance(key, np.generic):
+        key = key.item()
+    if isinstance(key, (str, int, float, bool)) or key is None:
+        return key
+    return str(_default(key))
+
+
+class JSONBackend(ABC):
+    """Serializer backend; dumps() returns UTF-8 bytes"""
+
+    name = 'base'
+
+    @abstractmethod
+    def dumps(self, value: Any, pretty: bool = False) -> bytes:
+        """Serialize `value` (compact unless `pretty`)"""
+        pass
+
+    @abstractmethod
+    def loads(self, data: Union[str, bytes]) -> Any:
+        """Parse a JSON document"""
+        pass
+
+
+class StdlibBackend(JSONBackend):
+    """json module, after a to_native() pass"""
+
+    name = 'stdlib'
+
+    def dumps(self, value: Any, pretty: bool = False) -> bytes:
+        native = to_native(value)
+        if pretty:
+            text = json.dumps(native, indent=2, ensure_ascii=False, allow_nan=False)
+        else:
+            text = json.dumps(native, separators=(',', ':'), ensure_ascii=False, allow_nan=False)
+        return text.encode('utf-8')
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return json.loads(data)
+
+
+class OrjsonBackend(JSONBackend):
+    """orjson with numpy support; falls back to stdlib for what it rejects"""
+
+    name = 'orjson'
+
+    def __init__(self):
+        if not ORJSON_AVAILABLE:
+            raise RuntimeError("orjson is not installed")
+        self._options = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        self._fallback = StdlibBackend()
+
+    def dumps(self, value: Any, pretty: bool = False) -> bytes:
+        options = (self._options | orjson.OPT_INDENT_2) if pretty else self._options
+        try:
+            return orjson.dumps(value, default=_default, option=options)
+        except orjson.JSONEncodeError:
+            # e.g. numpy dict keys or integers beyond 64 bits
+            return self._fallback.dumps(value, pretty=pretty)
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return orjson.loads(data)
+
+
+_BACKENDS: Dict[str, Callable[[], JSONBackend]] = {
+    'stdlib': StdlibBackend,
+    'orjson': OrjsonBackend,
+}
+
+_backend: Optional[JSONBackend] = None
+_backend_lock = threading.Lock()
+
+
+def register_json_backend(name: str, factory: Callable[[], JSONBackend]) -> None:
+    """Make a backend selectable through JSON_BACKEND / set_json_backend()"""
+    _BACKENDS[name.lower()] = factory
+
+
+def _create_backend(name: str) -> JSONBackend:
+    name = (name or 'auto').lower()
+    if name == 'auto':
+        name = 'orjson' if ORJSON_AVAILABLE else 'stdlib'
+    if name not in _BACKENDS:
+        raise ValueError(f"Unknown JSON backend '{name}' (available: {', '.join(sorted(_BACKENDS))})")
+    try:
+        return _BACKENDS[name]()
+    except RuntimeError as e:
+        logger.warning(f"JSON backend '{name}' unavailable ({e}), using stdlib")
+        return StdlibBackend()
+
+
+def set_json_backend(name: str) -> JSONBackend:
+    """Switch the process-wide backend (tests, benchmarks)"""
+    global _backend
+    with _backend_lock:
+        _backend = _create_backend(name)
+    return _backend
+
+
+def get_json_backend() -> JSONBackend:
+    """Process-wide backend, chosen from config.JSON_BACKEND on first use"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = _create_backend(config.JSON_BACKEND)
+                logger.info(f"JSON backend: {_backend.name}")
+    return _backend
+
+
+def dumps_bytes(value: Any, pretty: bool = False) -> bytes:
+    """Serialize to UTF-8 JSON bytes"""
+    return get_json_backend().dumps(value, pretty=pretty)
+
+
+def dumps(value: Any, pretty: bool = False) -> str:
+    """Serialize to a JSON string"""
+    return dumps_bytes(value, pretty=pretty).decode('utf-8')
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """Parse JSON text or bytes"""
+    return get_json_backend().loads(data)
+
+
+class FastJSONProvider(JSONProvider):
+    """
+    Flask JSON provider (app.json) built on the configured backend.
+
+    Responses are compact unless JSON_PRETTY_PRINT is set or the request
+    asks for ?pretty=1.
+    """
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return dumps(obj, pretty=bool(kwargs.get('indent')))
+
+    def loads(self, s: Union[str, bytes], **kwargs: Any) -> Any:
+        return loads(s)
+
+    def _pretty(self) -> bool:
+        if self._app.config.get('JSON_PRETTY_PRINT'):
+            return True
+        return has_request_context() and request.args.get('pretty', '').lower() in ('1', 'true', 'yes')
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            dumps_bytes(obj, pretty=self._pretty()),
+            mimetype='application/json'
+        )
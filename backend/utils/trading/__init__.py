@@ -7,14 +7,17 @@ Trading-specific calculations and validations:
 - Target Price: Profit targets
 - Position Sizing: Share quantity calculation
 - Trade Validation: Feasibility checks
+- Portfolio Simulation: Capital-constrained replay of backtest trades
 """
 
 from utils.trading.entry_calculator import EntryCalculator
 from utils.trading.trade_validator import TradeValidator
 from utils.trading.risk_manager import RiskManager
+from utils.trading.portfolio_simulator import PortfolioSimulator
 
 __all__ = [
     'EntryCalculator',
     'TradeValidator',
     'RiskManager',
+    'PortfolioSimulator',
 ]
@@ -0,0 +1,380 @@
+"""
+Portfolio Simulator Module
+Cross-sectional, capital-constrained replay of backtest trades
+
+BacktestEngine evaluates every ticker in isolation. This module answers the
+portfolio question: starting from fixed capital and holding at most K
+positions at once, which signals would actually have been taken, and what
+does the equity curve look like?
+
+- Trades from all tickers are placed on one common date axis
+- On each date exits are settled first, then entries are taken in
+  descending confidence order while slots and cash remain
+- Position size follows RiskManager.calculate_position_size (2% risk,
+  20% max position) against current equity, capped by free cash
+- One open position per ticker (overlapping signals are skipped)
+
+Open positions are marked to market: with closes supplied through
+add_prices(), every bar on the common date axis values each holding at
+that ticker's latest close, so equity, exposure and drawdown include
+unrealized P&L. A ticker without closes is carried at its entry price
+until exit.
+
+Trades and closes are packed into compact typed arrays as they are added,
+so per-ticker backtest results can be discarded as soon as they have been
+fed in.
+"""
+
+import heapq
+import logging
+from array import array
+from bisect import bisect_right
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from utils.trading.risk_manager import RiskManager
+
+logger = logging.getLogger('trading_analyzer')
+
+
+class PortfolioSimulator:
+    """Replays per-ticker trades under a shared capital and position budget"""
+
+    DEFAULT_MAX_POSITIONS = 10
+
+    def __init__(self, initial_capital: Optional[float] = None,
+                 max_positions: int = DEFAULT_MAX_POSITIONS,
+                 position_sizer: Optional[Callable[..., int]] = None):
+        """
+        Args:
+            initial_capital: Starting capital (default: RiskManager.DEFAULT_CAPITAL)
+            max_positions: Maximum concurrent open positions (K)
+            position_sizer: callable(entry, stop, capital) -> shares
+                            (default: RiskManager.calculate_position_size)
+        """
+        if initial_capital is None:
+            initial_capital = RiskManager.DEFAULT_CAPITAL
+        if initial_capital <= 0:
+            raise ValueError("initial_capital must be positive")
+        if max_positions < 1:
+            raise ValueError("max_positions must be at least 1")
+
+        self.initial_capital = float(initial_capital)
+        self.max_positions = int(max_positions)
+        self.position_sizer = position_sizer or RiskManager.calculate_position_size
+
+        # Compact columnar trade storage (one slot per accepted trade)
+        self._tickers: List[str] = []
+        self._ticker_ids: Dict[str, int] = {}
+        self._ticker_idx = array('i')
+        self._entry_day = array('i')
+        self._exit_day = array('i')
+        self._entry_price = array('d')
+        self._exit_price = array('d')
+        self._stop = array('d')
+        self._confidence = array('d')
+        self._rejected = 0
+
+        # Per-ticker closes: ticker_id -> (sorted days, closes)
+        self._prices: Dict[int, tuple] = {}
+
+    @property
+    def trade_count(self) -> int:
+        return len(self._ticker_idx)
+
+    @staticmethod
+    def _to_day(value) -> int:
+        """Convert a date / 'YYYY-MM-DD' string to days since epoch"""
+        return int(np.datetime64(str(value)[:10], 'D').astype(np.int64))
+
+    def _ticker_id(self, ticker: str) -> int:
+        ticker_id = self._ticker_ids.get(ticker)
+        if ticker_id is None:
+            ticker_id = len(self._tickers)
+            self._ticker_ids[ticker] = ticker_id
+            self._tickers.append(ticker)
+        return ticker_id
+
+    def add_prices(self, ticker: str, dates: Iterable[Any], closes: Iterable[float]) -> int:
+        """
+        Add one ticker's daily closes, used to mark its open positions to market.
+
+        Bars with a missing or non-positive close are ignored; a later bar on
+        the same date replaces an earlier one.
+
+        Returns:
+            Number of bars stored
+        """
+        bars = {}
+        for date, close in zip(dates, closes):
+            try:
+                close = float(close)
+                day = self._to_day(date)
+            except (TypeError, ValueError):
+                continue
+            if close > 0:
+                bars[day] = close
+        days = sorted(bars)
+        self._prices[self._ticker_id(ticker)] = (array('i', days), array('d', (bars[d] for d in days)))
+        return len(days)
+
+    def add_trades(self, ticker: str, trades: Iterable[Dict[str, Any]]) -> int:
+        """
+        Add one ticker's trades (as produced by BacktestEngine.backtest_ticker).
+
+        Each trade needs entry_date, exit_date, entry_price, exit_price and
+        stop_loss; confidence is used to rank same-day entries.
+
+        Returns:
+            Number of trades accepted
+        """
+        ticker_id = self._ticker_id(ticker)
+
+        accepted = 0
+        for trade in trades or []:
+            try:
+                entry_day = self._to_day(trade['entry_date'])
+                exit_day = self._to_day(trade['exit_date'])
+                entry_price = float(trade['entry_price'])
+                exit_price = float(trade['exit_price'])
+                stop = float(trade['stop_loss'])
+                confidence = float(trade.get('confidence') or 0)
+            except (KeyError, TypeError, ValueError):
+                self._rejected += 1
+                continue
+
+            if exit_day < entry_day or entry_price <= 0 or not 0 < stop < entry_price:
+                self._rejected += 1
+                continue
+
+            self._ticker_idx.append(ticker_id)
+            self._entry_day.append(entry_day)
+            self._exit_day.append(exit_day)
+            self._entry_price.append(entry_price)
+            self._exit_price.append(exit_price)
+            self._stop.append(stop)
+            self._confidence.append(confidence)
+            accepted += 1
+
+        return accepted
+
+    def add_backtest_result(self, result: Dict[str, Any]) -> int:
+        """Add trades from a backtest_ticker() result dict (errors are ignored)"""
+        if not result or 'error' in result:
+            return 0
+        return self.add_trades(result.get('ticker', 'UNKNOWN'), result.get('trades', []))
+
+    def run(self, include_curve: bool = True) -> Dict[str, Any]:
+        """
+        Simulate the portfolio over the common date axis.
+
+        Returns:
+            {
+                'initial_capital': 100000.0,
+                'final_equity': 112450.0,
+                'total_return_pct': 12.45,
+                'max_drawdown_pct': -4.3,
+                'max_positions': 10,
+                'trades_available': 320,
+                'trades_taken': 118,
+                'skipped': {'capacity': 150, 'cash': 12, 'duplicate': 40, 'size': 0, 'invalid': 0},
+                'win_rate': 61.02,
+                'avg_exposure_pct': 54.2,
+                'max_concurrent_positions': 10,
+                'turnover': 8.7,
+                'period': '2024-01-02 to 2025-01-28',
+                'equity_curve': [
+                    {'date': '2024-01-02', 'equity': 100000.0,
+                     'exposure_pct': 18.5, 'open_positions': 2},
+                    ...
+                ],
+                'trades': [{'ticker': ..., 'entry_date': ..., 'shares': ..., 'pnl': ...}, ...]
+            }
+        """
+        skipped = {'capacity': 0, 'cash': 0, 'duplicate': 0, 'size': 0, 'invalid': self._rejected}
+        n = self.trade_count
+
+        if n == 0:
+            return self._empty_result(skipped)
+
+        ticker_idx = np.frombuffer(self._ticker_idx, dtype=np.int32)
+        entry_day = np.frombuffer(self._entry_day, dtype=np.int32)
+        exit_day = np.frombuffer(self._exit_day, dtype=np.int32)
+        entry_price = np.frombuffer(self._entry_price, dtype=np.float64)
+        exit_price = np.frombuffer(self._exit_price, dtype=np.float64)
+        stop = np.frombuffer(self._stop, dtype=np.float64)
+        confidence = np.frombuffer(self._confidence, dtype=np.float64)
+
+        # Common date axis: every trade date plus every bar in between
+        first_day, last_day = int(entry_day.min()), int(exit_day.max())
+        bar_days = [
+            np.frombuffer(days, dtype=np.int32) for days, _ in self._prices.values() if len(days)
+        ]
+        axis = np.unique(np.concatenate([entry_day, exit_day] + bar_days))
+        axis = axis[(axis >= first_day) & (axis <= last_day)]
+        entry_pos = np.searchsorted(axis, entry_day)
+        exit_pos = np.searchsorted(axis, exit_day)
+
+        # Entries by date, then highest confidence first
+        order = np.lexsort((-confidence, entry_pos))
+
+        num_days = len(axis)
+        equity_arr = np.empty(num_days, dtype=np.float64)
+        invested_arr = np.empty(num_days, dtype=np.float64)
+        open_arr = np.empty(num_days, dtype=np.int32)
+
+        def mark(trade_id: int, day_value: int) -> float:
+            """Latest close of the trade's ticker on or before the day (entry price before any bar)"""
+            prices = self._prices.get(int(ticker_idx[trade_id]))
+            if prices is not None:
+                i = bisect_right(prices[0], day_value) - 1
+                if i >= 0 and prices[0][i] >= entry_day[trade_id]:
+                    return prices[1][i]
+            return float(entry_price[trade_id])
+
+        def market_value(day_value: int) -> float:
+            return sum(shares * mark(trade_id, day_value) for _, trade_id, shares in open_heap)
+
+        cash = self.initial_capital
+        traded_notional = 0.0
+        open_heap = []           # (exit_pos, trade_id, shares)
+        open_tickers = set()
+        taken = []               # (trade_id, shares)
+
+        cursor = 0
+        for day in range(num_days):
+            day_value = int(axis[day])
+
+            # 1. Settle exits first so freed capital/slots are reusable today
+            while open_heap and open_heap[0][0] <= day:
+                _, trade_id, shares = heapq.heappop(open_heap)
+                proceeds = shares * exit_price[trade_id]
+                cash += proceeds
+                traded_notional += proceeds
+                open_tickers.discard(int(ticker_idx[trade_id]))
+
+            # Positions are sized against current (marked) equity
+            invested = market_value(day_value)
+
+            # 2. Take entries in confidence order while slots remain
+            while cursor < n and entry_pos[order[cursor]] == day:
+                trade_id = int(order[cursor])
+                cursor += 1
+
+                if len(open_heap) >= self.max_positions:
+                    skipped['capacity'] += 1
+                    continue
+                if int(ticker_idx[trade_id]) in open_tickers:
+                    skipped['duplicate'] += 1
+                    continue
+
+                price = float(entry_price[trade_id])
+                shares = self.position_sizer(price, float(stop[trade_id]), cash + invested)
+                if shares <= 0:
+                    skipped['size'] += 1
+                    continue
+
+                shares = min(shares, int(cash // price))
+                if shares <= 0:
+                    skipped['cash'] += 1
+                    continue
+
+                cost = shares * price
+                cash -= cost
+                invested += cost
+                traded_notional += cost
+                open_tickers.add(int(ticker_idx[trade_id]))
+                heapq.heappush(open_heap, (int(exit_pos[trade_id]), trade_id, shares))
+                taken.append((trade_id, shares))
+
+            # 3. Mark everything still open to today's close
+            invested = market_value(day_value)
+            equity_arr[day] = cash + invested
+            invested_arr[day] = invested
+            open_arr[day] = len(open_heap)
+
+        return self._build_result(
+            axis, equity_arr, invested_arr, open_arr, traded_notional, taken, skipped,
+            include_curve,
+            ticker_idx=ticker_idx, entry_day=entry_day, exit_day=exit_day,
+            entry_price=entry_price, exit_price=exit_price
+        )
+
+    def _empty_result(self, skipped: Dict[str, int]) -> Dict[str, Any]:
+        return {
+            'initial_capital': self.initial_capital,
+            'final_equity': self.initial_capital,
+            'total_return_pct': 0,
+            'max_drawdown_pct': 0,
+            'max_positions': self.max_positions,
+            'trades_available': 0,
+            'trades_taken': 0,
+            'skipped': skipped,
+            'win_rate': 0,
+            'avg_exposure_pct': 0,
+            'max_concurrent_positions': 0,
+            'turnover': 0,
+            'period': None,
+            'equity_curve': [],
+            'trades': []
+        }
+
+    def _build_result(self, axis, equity_arr, invested_arr, open_arr, traded_notional,
+                      taken, skipped, include_curve, **cols) -> Dict[str, Any]:
+        dates = axis.astype('datetime64[D]').astype(str)
+
+        running_peak = np.maximum.accumulate(equity_arr)
+        drawdown = (equity_arr - running_peak) / running_peak * 100
+        exposure = np.divide(invested_arr, equity_arr,
+                             out=np.zeros_like(invested_arr), where=equity_arr > 0) * 100
+        final_equity = float(equity_arr[-1])
+
+        trade_rows = []
+        wins = 0
+        for trade_id, shares in taken:
+            pnl = shares * (cols['exit_price'][trade_id] - cols['entry_price'][trade_id])
+            if pnl > 0:
+                wins += 1
+            trade_rows.append({
+                'ticker': self._tickers[cols['ticker_idx'][trade_id]],
+                'entry_date': str(np.datetime64(int(cols['entry_day'][trade_id]), 'D')),
+                'exit_date': str(np.datetime64(int(cols['exit_day'][trade_id]), 'D')),
+                'entry_price': round(float(cols['entry_price'][trade_id]), 2),
+                'exit_price': round(float(cols['exit_price'][trade_id]), 2),
+                'shares': int(shares),
+                'pnl': round(float(pnl), 2)
+            })
+
+        result = {
+            'initial_capital': self.initial_capital,
+            'final_equity': round(final_equity, 2),
+            'total_return_pct': round((final_equity / self.initial_capital - 1) * 100, 2),
+            'max_drawdown_pct': round(float(drawdown.min()), 2),
+            'max_positions': self.max_positions,
+            'trades_available': self.trade_count,
+            'trades_taken': len(taken),
+            'skipped': skipped,
+            'win_rate': round(wins / len(taken) * 100, 2) if taken else 0,
+            'avg_exposure_pct': round(float(exposure.mean()), 2),
+            'max_concurrent_positions': int(open_arr.max()),
+            # Traded notional (buys + sells) relative to average equity
+            'turnover': round(traded_notional / float(equity_arr.mean()), 2),
+            'period': f"{dates[0]} to {dates[-1]}",
+            'trades': trade_rows
+        }
+
+        if include_curve:
+            result['equity_curve'] = [
+                {
+                    'date': dates[i],
+                    'equity': round(float(equity_arr[i]), 2),
+                    'exposure_pct': round(float(exposure[i]), 2),
+                    'open_positions': int(open_arr[i])
+                }
+                for i in range(len(axis))
+            ]
+
+        logger.info(f"[PortfolioSim] {len(taken)}/{self.trade_count} trades taken, "
+                    f"return {result['total_return_pct']}%, max DD {result['max_drawdown_pct']}%")
+        return result
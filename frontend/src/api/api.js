@@ -128,6 +128,15 @@ export const getAllNSEStocks = async (page = 1, per_page = 50) => {
   return response.data;
 };
 
+export const searchNSEStocks = async (q, limit = 10, exclude = []) => {
+  const params = new URLSearchParams({ q, limit: String(limit) });
+  if (exclude.length > 0) {
+    params.set('exclude', exclude.join(','));
+  }
+  const response = await api.get(`/api/stocks/search?${params.toString()}`);
+  return response.data;
+};
+
 export const getNSEStocks = async () => {
   const response = await api.get('/api/stocks/nse-stocks');
   return response.data;
@@ -175,8 +184,8 @@ export const getAllStocks = async () => {
   return response.data;
 };
 
-export const getStockHistory = async (symbol) => {
-  const response = await api.get(`/api/analysis/history/${symbol}`);
+export const getStockHistory = async (symbol, params = {}) => {
+  const response = await api.get(`/api/analysis/history/${symbol}`, { params });
   return response.data;
 };
 
@@ -204,7 +213,7 @@ export const getAllStocksProgress = async () => {
 };
 
 export const getAllAnalysisResults = async (page = 1, per_page = 100) => {
-  const response = await api.get(`/api/stocks/all-stocks/results?page=${page}&per_page=${per_page}`);
+  const response = await api.get(`/api/stocks/all-stocks/results?latest=true&page=${page}&per_page=${per_page}`);
   return response.data;
 };
 
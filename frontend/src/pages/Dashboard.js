@@ -265,7 +265,7 @@ function Dashboard() {
         const enrichedStocks = await Promise.all(
           stocks.filter(s => s.ticker && s.ticker.trim()).map(async (stock) => {
             try {
-              const historyData = await getStockHistory(stock.ticker);
+              const historyData = await getStockHistory(stock.ticker, { limit: 10, indicators: false });
               if (historyData?.history?.length > 0) {
                 const latest = historyData.history[0];
                 return {